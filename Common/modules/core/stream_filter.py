@@ -0,0 +1,144 @@
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.security import SensitiveDataFilter
+
+# 시크릿 패턴 (응답에 섞여 나오는 키/토큰)
+SECRET_PATTERNS = {
+    "openai_key": r"sk-[A-Za-z0-9_-]{20,}",
+    "aws_access_key": r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+    "github_token": r"\bgh[pousr]_[A-Za-z0-9]{36}\b",
+    "slack_token": r"\bxox[abprs]-[A-Za-z0-9-]{10,}",
+    "private_key": r"-----BEGIN [A-Z ]*PRIVATE KEY-----",
+    "jwt": r"\beyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}",
+}
+
+# 스트리밍 시 마지막 window 글자는 다음 청크와 합쳐 검사하기 위해 보류 (첫 토큰 지연과 교환)
+DEFAULT_WINDOW = int(os.getenv("STREAM_FILTER_WINDOW", "64"))
+
+# 규칙별 조치: redact = 마스킹 후 계속 전송, block = 스트림 중단
+REDACT = "redact"
+BLOCK = "block"
+
+@dataclass
+class StreamFinding:
+    label: str
+    action: str
+    offset: int  # 응답 전체 기준 시작 위치
+
+@dataclass
+class StreamFilterResult:
+    text: str                    # 클라이언트로 보낼 (마스킹된) 텍스트
+    blocked: bool = False
+    findings: List[StreamFinding] = field(default_factory=list)
+
+class IncrementalResponseFilter:
+    """
+    스트리밍 응답용 슬라이딩 윈도우 스캐너
+
+    청크가 올 때마다 미전송 버퍼를 검사해 안전한 앞부분만 내보내고, 마지막 window-1 글자는
+    다음 청크와 이어 붙여 다시 검사한다. 길이가 window 이하인 민감 정보는 청크 경계에 걸쳐도
+    일부가 먼저 새어 나가지 않는다. (무제한 길이 패턴은 window 글자까지만 보장)
+    """
+
+    def __init__(self, canary_words: Iterable[str] = (), window: int = DEFAULT_WINDOW,
+                 actions: Optional[Dict[str, str]] = None):
+        self.window = max(window, 1)
+        self.rules: List[Tuple[str, "re.Pattern", str]] = []
+        for label, pattern in SensitiveDataFilter().patterns.items():
+            self.rules.append((label, re.compile(pattern), REDACT))
+        for label, pattern in SECRET_PATTERNS.items():
+            self.rules.append((label, re.compile(pattern), REDACT))
+        canaries = [word for word in canary_words if word]
+        if canaries:
+            self.rules.append(("canary_word", re.compile("|".join(re.escape(w) for w in canaries)), BLOCK))
+        if actions:
+            self.rules = [(label, pattern, actions.get(label, action)) for label, pattern, action in self.rules]
+
+        self._pending = ""
+        self._context = ""  # 직전에 내보낸 원문 마지막 글자 (\b 등 경계 판정용)
+        self._emitted = 0  # 지금까지 확정된 원문 길이
+        self.blocked = False
+        self.findings: List[StreamFinding] = []
+
+    def _matches(self, text: str) -> List[Tuple[int, int, str, str]]:
+        """겹치지 않는 매치 (앞선 시작, 같은 시작이면 긴 매치 우선)"""
+        spans = []
+        shift = len(self._context)
+        for label, pattern, action in self.rules:
+            for match in pattern.finditer(self._context + text):
+                # 이미 내보낸 글자에서 시작하는 매치는 제외
+                if match.end() > match.start() and match.start() >= shift:
+                    spans.append((match.start() - shift, match.end() - shift, label, action))
+        spans.sort(key=lambda span: (span[0], -span[1]))
+        result = []
+        last_end = -1
+        for span in spans:
+            if span[0] >= last_end:
+                result.append(span)
+                last_end = span[1]
+        return result
+
+    def _release(self, final: bool) -> StreamFilterResult:
+        text = self._pending
+        matches = self._matches(text)
+        # 버퍼 끝 window-1 글자는 이후 청크와 합쳐져 매치가 될 수 있으므로 보류
+        cut = len(text) if final else max(len(text) - (self.window - 1), 0)
+        if not final:
+            for start, end, _, _ in matches:
+                # 보류 구간까지 이어지는 매치는 더 길어질 수 있으므로 시작점부터 보류
+                if end > cut:
+                    cut = min(cut, start)
+                    break
+
+        output = []
+        position = 0
+        findings = []
+        for start, end, label, action in matches:
+            if end > cut:
+                break
+            finding = StreamFinding(label=label, action=action, offset=self._emitted + start)
+            findings.append(finding)
+            if action == BLOCK:
+                # 차단 매치 앞까지만 전송하고 스트림 종료
+                output.append(text[position:start])
+                self.blocked = True
+                self.findings.extend(findings)
+                self._pending = ""
+                return StreamFilterResult(text="".join(output), blocked=True, findings=findings)
+            output.append(text[position:start])
+            output.append(f"[MASKED_{label.upper()}]")
+            position = end
+        output.append(text[position:cut])
+
+        self.findings.extend(findings)
+        self._emitted += cut
+        if cut:
+            self._context = text[cut - 1]
+        self._pending = text[cut:]
+        return StreamFilterResult(text="".join(output), findings=findings)
+
+    def feed(self, chunk: str) -> StreamFilterResult:
+        """청크 추가 후 내보내도 안전한 텍스트 반환"""
+        if self.blocked:
+            return StreamFilterResult(text="", blocked=True)
+        self._pending += chunk
+        if len(self._pending) < self.window:
+            return StreamFilterResult(text="")
+        return self._release(final=False)
+
+    def flush(self) -> StreamFilterResult:
+        """스트림 종료 시 남은 버퍼 전체 검사"""
+        if self.blocked:
+            return StreamFilterResult(text="", blocked=True)
+        return self._release(final=True)
+
+def filter_response_text(text: str, canary_words: Iterable[str] = ()) -> StreamFilterResult:
+    """비스트리밍 응답 전체 검사 (스트리밍과 같은 규칙)"""
+    response_filter = IncrementalResponseFilter(canary_words)
+    head = response_filter.feed(text)
+    tail = response_filter.flush()
+    return StreamFilterResult(text=head.text + tail.text, blocked=response_filter.blocked,
+                              findings=response_filter.findings)
@@ -1,6 +1,10 @@
 import re
 from difflib import SequenceMatcher
-from typing import List
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from .heuristic_similarity import SimilarityBackend, get_similarity_backend
 
 
 def generate_injection_keywords() -> List[str]:
@@ -144,35 +148,180 @@ def get_matched_words_score(
     return base_score
 
 
-def detect_prompt_injection_using_heuristic_on_input(input: str) -> float:
+class _KeywordGroup:
+    """
+    Normalized injection keywords that share the same number of words, encoded as a (keywords, length) array of
+    word token ids so that windows can be matched against every keyword of the group at once.
+    """
+
+    def __init__(self, length: int, keywords: List[str], tokens: np.ndarray):
+        self.length = length
+        self.keywords = keywords
+        self.tokens = tokens
+
+    def matched_words(self, windows: np.ndarray) -> np.ndarray:
+        """
+        Number of positional word matches between each window and each keyword.
+
+        Args:
+            windows (np.ndarray): (windows, length) word token ids
+
+        Returns:
+            (windows, keywords) match counts
+        """
+        counts = np.zeros((len(windows), len(self.keywords)), dtype=np.int16)
+        for position in range(self.length):
+            counts += windows[:, position : position + 1] == self.tokens[:, position]
+        return counts
+
+
+def _build_keyword_groups() -> Tuple[Dict[str, int], Dict[int, _KeywordGroup]]:
+    vocabulary: Dict[str, int] = {}
+    grouped: Dict[int, List[Tuple[str, List[int]]]] = {}
+    for keyword_string in generate_injection_keywords():
+        normalized_keyword_string = normalize_string(keyword_string)
+        parts = normalized_keyword_string.split(" ")
+        tokens = [vocabulary.setdefault(part, len(vocabulary) + 1) for part in parts]
+        grouped.setdefault(len(parts), []).append((normalized_keyword_string, tokens))
+
+    groups = {
+        length: _KeywordGroup(
+            length,
+            [keyword for keyword, _ in entries],
+            np.array([tokens for _, tokens in entries], dtype=np.int32),
+        )
+        for length, entries in grouped.items()
+    }
+    return vocabulary, groups
+
+
+# Keyword strings, their normalized forms and per-length groupings never change, so build them once at import
+_VOCABULARY, _KEYWORD_GROUPS = _build_keyword_groups()
+_MAX_MATCHED_WORDS = 5
+_SIMILARITY_BATCH_SIZE = 256
+_WINDOW_BLOCK_SIZE = 1024
+
+
+def _encode_words(words: List[str]) -> np.ndarray:
+    """Keyword words keep their vocabulary id, every other distinct word gets its own id above the vocabulary."""
+    unknown: Dict[str, int] = {}
+    ids = []
+    for word in words:
+        token = _VOCABULARY.get(word)
+        if token is None:
+            token = unknown.setdefault(word, len(_VOCABULARY) + 1 + len(unknown))
+        ids.append(token)
+    return np.array(ids, dtype=np.int32)
+
+
+def detect_prompt_injection_using_heuristic_on_input(
+    input: str, similarity_backend: Union[str, SimilarityBackend, None] = None
+) -> float:
+    """
+    Score how closely any window of the input matches a known injection phrase.
+
+    A (window, keyword) pair scores get_matched_words_score(...) minus a tenth of their SequenceMatcher ratio.
+    Pairs without an exact positional word match never score above zero, and a pair with more matched words
+    (capped at max_matched_words) always outscores one with fewer, so the ratio is only computed for pairs at
+    the highest matched-word level. With the default sequence_matcher backend the result is identical to scoring
+    every pair.
+
+    Backends whose similarity is bounded below by the characters of the matched words (see SimilarityBackend)
+    score candidates in batches ordered by that bound and stop once no remaining pair can beat the best score.
+
+    Args:
+        input (str): User input
+        similarity_backend: Backend instance or name (see get_similarity_backend)
+
+    Returns:
+        Highest adjusted score (0 if no window matches any keyword word)
+    """
     highest_score = 0
-    max_matched_words = 5
+    max_matched_words = _MAX_MATCHED_WORDS
+    backend = get_similarity_backend(similarity_backend)
 
-    all_injection_keywords_strings = generate_injection_keywords()
     normalized_input_string = normalize_string(input)
+    words = normalized_input_string.split(" ")
+
+    tokens = _encode_words(words)
+    word_lengths = np.array([len(word) for word in words], dtype=np.int32)
+
+    best_level = 0
+    candidates: List[Tuple[float, str, str]] = []
+    for length, group in _KEYWORD_GROUPS.items():
+        if len(words) < length:
+            continue
+        # Windows are generated once per distinct keyword length and scored against the whole group
+        windows, starts = np.unique(
+            np.lib.stride_tricks.sliding_window_view(tokens, length), axis=0, return_index=True
+        )
+        has_keyword_word = (windows <= len(_VOCABULARY)).any(axis=1)
+        windows, starts = windows[has_keyword_word], starts[has_keyword_word]
+
+        for block in range(0, len(windows), _WINDOW_BLOCK_SIZE):
+            block_windows = windows[block : block + _WINDOW_BLOCK_SIZE]
+            levels = np.minimum(group.matched_words(block_windows), max_matched_words)
+            level = int(levels.max()) if levels.size else 0
+            if level == 0 or level < best_level:
+                continue
+            if level > best_level:
+                best_level = level
+                candidates = []
+
+            window_index, keyword_index = np.nonzero(levels == level)
+            block_starts = starts[block : block + _WINDOW_BLOCK_SIZE][window_index]
+            positions = block_starts[:, None] + np.arange(length)
+            # Characters of the matched words, shared by both strings in the same order
+            characters = (
+                (block_windows[window_index] == group.tokens[keyword_index]) * word_lengths[positions]
+            ).sum(axis=1)
+
+            substrings: Dict[int, str] = {}
+            for start, keyword, shared in zip(
+                block_starts.tolist(), keyword_index.tolist(), characters.tolist()
+            ):
+                substring = substrings.get(start)
+                if substring is None:
+                    substring = substrings[start] = " ".join(words[start : start + length])
+                normalized_keyword_string = group.keywords[keyword]
+                candidates.append(
+                    (
+                        # Lower bound of an LCS-based similarity
+                        2 * shared / (len(substring) + len(normalized_keyword_string)),
+                        normalized_keyword_string,
+                        substring,
+                    )
+                )
 
-    for keyword_string in all_injection_keywords_strings:
-        normalized_keyword_string = normalize_string(keyword_string)
-        keywords = normalized_keyword_string.split(" ")
-        # Generate substrings of similar length (to keyword length) in the input string
-        input_substrings = get_input_substrings(normalized_input_string, len(keywords))
-
-        # Calculate the similarity score between the keywords and each substring
-        for substring in input_substrings:
-            similarity_score = SequenceMatcher(
-                None, substring, normalized_keyword_string
-            ).ratio()
-
-            matched_word_score = get_matched_words_score(
-                substring, keywords, max_matched_words
-            )
-
-            # Adjust the score using the similarity score
-            adjusted_score = matched_word_score - similarity_score * (
-                1 / (max_matched_words * 2)
-            )
-
-            if adjusted_score > highest_score:
-                highest_score = adjusted_score
+    if not candidates:
+        return highest_score
+
+    matched_word_score = 0.5 + 0.5 * min(best_level / max_matched_words, 1)
+    if backend.lcs_lower_bound:
+        candidates.sort(key=lambda candidate: candidate[0])
+        batch_size = _SIMILARITY_BATCH_SIZE
+    else:
+        batch_size = len(candidates)
+
+    lowest_similarity = None
+    for start in range(0, len(candidates), batch_size):
+        batch = candidates[start : start + batch_size]
+        if backend.lcs_lower_bound and lowest_similarity is not None and batch[0][0] >= lowest_similarity:
+            # No remaining pair can have a lower similarity, i.e. a higher adjusted score
+            break
+        similarities = backend.ratios(
+            [keyword for _, keyword, _ in batch], [substring for _, _, substring in batch]
+        )
+        batch_lowest = min(similarities)
+        if lowest_similarity is None or batch_lowest < lowest_similarity:
+            lowest_similarity = batch_lowest
+
+    # Adjust the score using the similarity score
+    adjusted_score = matched_word_score - lowest_similarity * (
+        1 / (max_matched_words * 2)
+    )
+
+    if adjusted_score > highest_score:
+        highest_score = adjusted_score
 
     return highest_score
@@ -0,0 +1,177 @@
+import os
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    from rapidfuzz.distance import Indel as _RapidfuzzIndel
+except ImportError:  # optional, the NumPy implementation is used instead
+    _RapidfuzzIndel = None
+
+
+class SimilarityBackend:
+    """
+    Fuzzy similarity between a normalized injection keyword and an input window, in [0, 1].
+
+    Attributes:
+        name (str): Backend name used by get_similarity_backend
+        lcs_lower_bound (bool): True if 2 * shared_chars / (len(a) + len(b)) is a lower bound of the similarity
+            whenever the two strings share words of shared_chars characters at the same positions. The heuristic
+            uses it to skip pairs that cannot beat the current best score.
+    """
+
+    name = "base"
+    lcs_lower_bound = False
+
+    def ratios(self, keywords: Sequence[str], substrings: Sequence[str]) -> List[float]:
+        """
+        Similarity of each (keywords[i], substrings[i]) pair.
+
+        Args:
+            keywords (Sequence[str]): Normalized keyword strings
+            substrings (Sequence[str]): Input windows, same length as keywords
+
+        Returns:
+            List of similarities
+        """
+        raise NotImplementedError
+
+
+class SequenceMatcherSimilarity(SimilarityBackend):
+    """Reference implementation: difflib Ratcliff/Obershelp ratio (exact, pure Python)."""
+
+    name = "sequence_matcher"
+
+    def ratios(self, keywords: Sequence[str], substrings: Sequence[str]) -> List[float]:
+        # Reuse one matcher per keyword so the keyword side (seq2) is analysed only once
+        matchers: Dict[str, SequenceMatcher] = {}
+        result = []
+        for keyword, substring in zip(keywords, substrings):
+            matcher = matchers.get(keyword)
+            if matcher is None:
+                matcher = matchers[keyword] = SequenceMatcher(None, "", keyword)
+            matcher.set_seq1(substring)
+            result.append(matcher.ratio())
+        return result
+
+
+def _encode(strings: Sequence[str]) -> List[np.ndarray]:
+    return [np.frombuffer(s.encode("utf-32-le", "surrogatepass"), dtype=np.uint32) for s in strings]
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Number of set bits per row of a (rows, words) uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1).astype(np.int64)
+    return np.unpackbits(words.view(np.uint8), axis=-1).sum(axis=-1).astype(np.int64)
+
+
+class IndelSimilarity(SimilarityBackend):
+    """
+    Normalized Indel similarity 2 * LCS / (len(a) + len(b)), the same score as rapidfuzz fuzz.ratio / 100.
+
+    It approximates the Ratcliff/Obershelp ratio from above: the matching blocks SequenceMatcher finds form a
+    common subsequence, so the score is never lower than the reference one. Pairs are scored in one batch with
+    the bit-parallel LCS algorithm (Hyyro 2004) over NumPy uint64 words, or with rapidfuzz when installed.
+    """
+
+    name = "indel"
+    lcs_lower_bound = True
+
+    def __init__(self, use_rapidfuzz: Optional[bool] = None):
+        self.use_rapidfuzz = _RapidfuzzIndel is not None if use_rapidfuzz is None else use_rapidfuzz
+        if self.use_rapidfuzz and _RapidfuzzIndel is None:
+            raise ImportError("rapidfuzz is not installed")
+
+    def ratios(self, keywords: Sequence[str], substrings: Sequence[str]) -> List[float]:
+        if not keywords:
+            return []
+        if self.use_rapidfuzz:
+            return [
+                _RapidfuzzIndel.normalized_similarity(substring, keyword)
+                for keyword, substring in zip(keywords, substrings)
+            ]
+        return self._numpy_ratios(keywords, substrings).tolist()
+
+    @staticmethod
+    def _numpy_ratios(keywords: Sequence[str], substrings: Sequence[str]) -> np.ndarray:
+        # Token-id encoding: characters that occur in some keyword get an id, everything else maps to 0
+        unique_keywords = list(dict.fromkeys(keywords))
+        keyword_index = {keyword: i for i, keyword in enumerate(unique_keywords)}
+        encoded_keywords = _encode(unique_keywords)
+        alphabet = np.unique(np.concatenate(encoded_keywords)) if encoded_keywords else np.zeros(0, np.uint32)
+
+        keyword_lengths = np.array([len(k) for k in encoded_keywords], dtype=np.int64)
+        words = max(1, int((keyword_lengths.max() + 63) // 64))
+
+        # Match masks: bit j of peq[k, c] is set when keyword k has character id c at position j
+        peq = np.zeros((len(unique_keywords), len(alphabet) + 1, words), dtype=np.uint64)
+        length_mask = np.zeros((len(unique_keywords), words), dtype=np.uint64)
+        for k, codes in enumerate(encoded_keywords):
+            ids = np.searchsorted(alphabet, codes) + 1
+            for j, c in enumerate(ids.tolist()):
+                peq[k, c, j // 64] |= np.uint64(1) << np.uint64(j % 64)
+            for w in range(words):
+                bits = min(max(len(codes) - 64 * w, 0), 64)
+                length_mask[k, w] = np.uint64((1 << bits) - 1)
+
+        encoded_substrings = _encode(substrings)
+        substring_lengths = np.array([len(s) for s in encoded_substrings], dtype=np.int64)
+        max_length = int(substring_lengths.max()) if len(substring_lengths) else 0
+        # Padding uses id 0, whose mask is empty and leaves the state unchanged
+        ids = np.zeros((len(substrings), max_length), dtype=np.int64)
+        for row, codes in enumerate(encoded_substrings):
+            if len(codes):
+                position = np.minimum(np.searchsorted(alphabet, codes), max(len(alphabet) - 1, 0))
+                known = alphabet[position] == codes if len(alphabet) else np.zeros(len(codes), dtype=bool)
+                ids[row, : len(codes)] = np.where(known, position + 1, 0)
+
+        pair_keywords = np.array([keyword_index[k] for k in keywords], dtype=np.int64)
+        state = np.full((len(substrings), words), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for t in range(max_length):
+            matches = state & peq[pair_keywords, ids[:, t]]
+            # state + matches with carry across words, then | (state - matches); matches is a subset of state
+            total = np.empty_like(state)
+            carry = np.zeros(len(substrings), dtype=np.uint64)
+            for w in range(words):
+                partial = state[:, w] + matches[:, w]
+                overflow = partial < state[:, w]
+                partial_carry = partial + carry
+                carry = (overflow | (partial_carry < partial)).astype(np.uint64)
+                total[:, w] = partial_carry
+            state = total | (state ^ matches)
+
+        lcs = keyword_lengths[pair_keywords] - _popcount(state & length_mask[pair_keywords])
+        denominator = substring_lengths + keyword_lengths[pair_keywords]
+        return np.where(denominator > 0, 2.0 * lcs / np.maximum(denominator, 1), 1.0)
+
+
+_BACKENDS = {
+    SequenceMatcherSimilarity.name: SequenceMatcherSimilarity,
+    IndelSimilarity.name: IndelSimilarity,
+}
+_default_backends: Dict[str, SimilarityBackend] = {}
+
+
+def get_similarity_backend(
+    backend: Union[str, SimilarityBackend, None] = None
+) -> SimilarityBackend:
+    """
+    Resolve a similarity backend.
+
+    Args:
+        backend: Backend instance, backend name ("sequence_matcher" or "indel"), or None for the
+            REBUFF_HEURISTIC_SIMILARITY environment variable (defaults to "sequence_matcher")
+
+    Returns:
+        SimilarityBackend
+    """
+    if isinstance(backend, SimilarityBackend):
+        return backend
+    name = backend or os.getenv("REBUFF_HEURISTIC_SIMILARITY", SequenceMatcherSimilarity.name)
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown similarity backend: {name}")
+    if name not in _default_backends:
+        _default_backends[name] = _BACKENDS[name]()
+    return _default_backends[name]
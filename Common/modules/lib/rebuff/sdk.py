@@ -32,8 +32,10 @@ class RebuffSdk:
         pinecone_apikey: str,
         pinecone_index: str,
         openai_model: str = "gpt-3.5-turbo",
+        heuristic_similarity: Optional[str] = None,
     ) -> None:
         self.openai_model = openai_model
+        self.heuristic_similarity = heuristic_similarity
         self.openai_apikey = openai_apikey
         self.pinecone_apikey = pinecone_apikey
         self.pinecone_index = pinecone_index
@@ -76,7 +78,7 @@ class RebuffSdk:
 
         if check_heuristic:
             rebuff_heuristic_score = detect_prompt_injection_using_heuristic_on_input(
-                user_input
+                user_input, self.heuristic_similarity
             )
 
         else:
@@ -1,15 +1,25 @@
 # main.py
 
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import StreamingResponse
 from api import proxy
+from core.security import SensitiveDataFilter
+from core.stream_filter import IncrementalResponseFilter, filter_response_text, SECRET_PATTERNS
+from services.provider_gateway import get_gateway, get_gateway_stats, close_gateways
+from services.semantic_cache import get_semantic_cache, policy_bundle_id
+from services.usage_log import get_usage_log_sink, close_usage_log_sink
 from pydantic import BaseModel
+from typing import Optional, Tuple
 import httpx # 비동기 HTTP 요청을 위한 라이브러리
 import os
+import json
+import secrets
+import time
 import logging
 import asyncio
 
 # 로깅 설정
-logging.basicConfig(level=logging.INFO, format="%(asctime )s - %(levelname)s - %(message)s")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 # --- 설정 및 환경 변수 --- #
@@ -17,9 +27,22 @@ logger = logging.getLogger(__name__)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "your_openai_api_key")
 CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY", "your_claude_api_key")
 
-# 외부 AI 서비스 엔드포인트 (예시)
-OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
-CLAUDE_CHAT_URL = "https://api.anthropic.com/v1/messages"
+# 외부 AI 서비스 엔드포인트/요청률/재시도/헤지 설정은 services.provider_gateway (GATEWAY_<PROVIDER>_*)
+
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+CLAUDE_MODEL = os.getenv("CLAUDE_MODEL", "claude-3-opus-20240229")
+CLAUDE_MAX_TOKENS = int(os.getenv("CLAUDE_MAX_TOKENS", "1024"))
+
+# 응답 필터링 설정 (스트리밍 보류 윈도우는 core.stream_filter 의 STREAM_FILTER_WINDOW)
+# 카나리 워드를 시스템 프롬프트에 넣고 응답에 나타나면 스트림 차단
+CANARY_ENABLED = os.getenv("CANARY_ENABLED", "false").lower() == "true"
+
+# 금지 키워드 / 기밀 용어
+FORBIDDEN_KEYWORDS = ["기밀", "내부 문서 유출", "개인 정보 추출"]
+CONFIDENTIAL_TERMS = ["Project X", "Confidential Data"]
+
+# 시맨틱 캐시 항목은 이 정책 번들(필터/마스킹 규칙)로 만들어진 응답만 재사용
+POLICY_BUNDLE = policy_bundle_id(FORBIDDEN_KEYWORDS, CONFIDENTIAL_TERMS, SensitiveDataFilter().patterns, SECRET_PATTERNS)
 
 # Rebuff SDK 초기화 (설치 필요: pip install rebuff-sdk )
 # from rebuff import Rebuff
@@ -33,6 +56,8 @@ class PromptRequest(BaseModel):
     # 추가적인 메타데이터 필드
     session_id: str = None
     device_info: str = None
+    stream: bool = False # True 이면 SSE 로 토큰을 받는 대로 전달
+    tenant_id: str = None # 시맨틱 캐시 옵트인 단위 (SEMANTIC_CACHE_TENANTS)
 
 # --- PromptGate 핵심 기능 구현 (Placeholder) --- #
 
@@ -49,8 +74,7 @@ async def filter_prompt(prompt: str, user_id: str) -> (bool, str, str):
     #     return False, prompt, "Prompt Injection Detected"
 
     # TODO: 금지 키워드/문구 차단 로직 추가
-    forbidden_keywords = ["기밀", "내부 문서 유출", "개인 정보 추출"]
-    for keyword in forbidden_keywords:
+    for keyword in FORBIDDEN_KEYWORDS:
         if keyword in prompt:
             return False, prompt, f"Forbidden keyword '{keyword}' detected"
 
@@ -75,8 +99,7 @@ async def mask_sensitive_info(prompt: str) -> (str, dict):
         masked_details["email"] = email # 실제로는 원본 값 저장 시 주의 필요
 
     # TODO: 기업 기밀 용어 탐지 및 마스킹 로직 추가
-    confidential_terms = ["Project X", "Confidential Data"]
-    for term in confidential_terms:
+    for term in CONFIDENTIAL_TERMS:
         if term in masked_prompt:
             masked_prompt = masked_prompt.replace(term, "[MASKED_CONFIDENTIAL]")
             masked_details["confidential_term"] = term
@@ -86,17 +109,180 @@ async def mask_sensitive_info(prompt: str) -> (str, dict):
 async def log_ai_usage(log_data: dict):
     """
     AI 사용 로그를 기록하고 DashIQ로 전송합니다.
+    큐에 넣기만 하며, 파일 기록(JSON Lines, 교체/압축)과 DashIQ 전달은 services.usage_log 백그라운드 태스크가 처리합니다.
     """
-    logger.info(f"[Log] Logging AI usage: {log_data}")
-    # TODO: DashIQ 모듈로 로그 전송 로직 구현 (HTTP 요청, 메시지 큐 등)
-    # 예시: 간단히 파일에 저장하거나 콘솔에 출력
-    with open("ai_usage.log", "a") as f:
-        f.write(f"{log_data}\n")
-    logger.info("Log saved to ai_usage.log")
+    get_usage_log_sink().emit(log_data)
+    logger.info(f"[Log] {log_data.get('user_id')} {log_data.get('ai_service')} {log_data.get('status', 'STREAMING')}")
+
+# --- 외부 AI 서비스 연결 --- #
+def build_upstream_request(ai_service: str, prompt: str, stream: bool,
+                           canary_word: Optional[str] = None) -> Tuple[dict, dict]:
+    """외부 AI 서비스 요청 (헤더, 페이로드)"""
+    canary_instruction = f"<!-- {canary_word} -->" if canary_word else None
+    if ai_service == "openai":
+        headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
+        messages = [{"role": "user", "content": prompt}]
+        if canary_instruction:
+            messages.insert(0, {"role": "system", "content": canary_instruction})
+        payload = {"model": OPENAI_MODEL, "messages": messages, "stream": stream}
+        return headers, payload
+    if ai_service == "claude":
+        headers = {"x-api-key": CLAUDE_API_KEY, "Content-Type": "application/json", "anthropic-version": "2023-06-01"}
+        payload = {"model": CLAUDE_MODEL, "max_tokens": CLAUDE_MAX_TOKENS,
+                   "messages": [{"role": "user", "content": prompt}], "stream": stream}
+        if canary_instruction:
+            payload["system"] = canary_instruction
+        return headers, payload
+    raise HTTPException(status_code=400, detail="Unsupported AI service")
+
+def extract_response_text(ai_service: str, body: dict) -> str:
+    if ai_service == "openai":
+        return body["choices"][0]["message"]["content"]
+    return body["content"][0]["text"]
+
+def extract_usage_tokens(ai_service: str, body: dict, text: str) -> int:
+    """공급자 응답의 사용 토큰 수 (usage 가 없으면 글자 수로 추정)"""
+    usage = body.get("usage") or {}
+    if ai_service == "openai" and usage.get("total_tokens"):
+        return int(usage["total_tokens"])
+    if ai_service == "claude" and usage:
+        return int(usage.get("input_tokens", 0)) + int(usage.get("output_tokens", 0))
+    return max(len(text) // 4, 1)
+
+def extract_stream_delta(ai_service: str, event: dict) -> str:
+    """SSE 이벤트에서 텍스트 조각 추출 (텍스트가 없는 이벤트는 빈 문자열)"""
+    if ai_service == "openai":
+        choices = event.get("choices") or []
+        if not choices:
+            return ""
+        return (choices[0].get("delta") or {}).get("content") or ""
+    if event.get("type") == "content_block_delta":
+        return (event.get("delta") or {}).get("text") or ""
+    return ""
+
+def _sse(event: dict) -> str:
+    return f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+# 응답 후처리(캐시 저장 등) 백그라운드 태스크 참조 유지
+_background_tasks = set()
+
+def _run_in_background(coroutine):
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def cache_response(cache_context: Optional[dict], response: str, tokens: int, latency_ms: float):
+    """필터링을 통과한 응답을 시맨틱 캐시에 저장 (응답 지연에 영향 없도록 백그라운드)"""
+    if cache_context is None or not response:
+        return
+    _run_in_background(get_semantic_cache().store(response=response, tokens=tokens, latency_ms=latency_ms,
+                                                  **cache_context))
+
+async def stream_cached_response(hit, log_data: dict):
+    """캐시 적중 응답을 스트리밍 형식으로 전달"""
+    yield _sse({"type": "delta", "text": hit.response})
+    yield _sse({"type": "end", "status": "SUCCESS", "cached": True, "findings": []})
+    yield "data: [DONE]\n\n"
+    await log_ai_usage(log_data)
+
+async def stream_ai_response(ai_service: str, masked_prompt: str, log_data: dict,
+                             canary_word: Optional[str] = None, cache_context: Optional[dict] = None):
+    """
+    외부 AI 서비스 응답을 SSE 로 중계하면서 증분 응답 필터링을 적용합니다.
+    민감 정보는 전송 전에 마스킹하고, 카나리 워드가 나타나면 업스트림 연결을 끊고 스트림을 종료합니다.
+    """
+    response_filter = IncrementalResponseFilter([canary_word] if canary_word else [])
+    headers, payload = build_upstream_request(ai_service, masked_prompt, stream=True, canary_word=canary_word)
+    sent_parts = []
+    status = "SUCCESS"
+    completed = False
+    started = time.perf_counter()
+    try:
+        try:
+            # 공급자 게이트웨이: 커넥션 풀 + 요청률 제한 + 첫 바이트 전 429/5xx 재시도
+            async with get_gateway(ai_service).stream(headers, payload) as response:
+                if response.status_code >= 400:
+                    body = await response.aread()
+                    logger.error(f"HTTP error during AI service stream: {response.status_code} - {body[:200]!r}")
+                    status = "AI_SERVICE_ERROR"
+                else:
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            event = json.loads(data)
+                        except json.JSONDecodeError as e:
+                            logger.error(f"Malformed SSE data from AI service: {e} - {data[:200]!r}")
+                            status = "AI_SERVICE_ERROR"
+                            break
+                        delta = extract_stream_delta(ai_service, event)
+                        if not delta:
+                            continue
+                        result = response_filter.feed(delta)
+                        if result.text:
+                            sent_parts.append(result.text)
+                            yield _sse({"type": "delta", "text": result.text})
+                        if result.blocked:
+                            # 블록을 빠져나가면서 업스트림 응답을 닫아 생성 중단
+                            status = "RESPONSE_BLOCKED"
+                            break
+        except httpx.RequestError as e:
+            logger.error(f"Request error during AI service stream: {e}")
+            status = "NETWORK_ERROR"
+
+        if status == "SUCCESS":
+            tail = response_filter.flush()
+            if tail.text:
+                sent_parts.append(tail.text)
+                yield _sse({"type": "delta", "text": tail.text})
+            if tail.blocked:
+                status = "RESPONSE_BLOCKED"
+
+        yield _sse({"type": "end", "status": status,
+                    "findings": [finding.label for finding in response_filter.findings]})
+        yield "data: [DONE]\n\n"
+        completed = True
+        if status == "SUCCESS":
+            response_text = "".join(sent_parts)
+            cache_response(cache_context, response_text, extract_usage_tokens(ai_service, {}, masked_prompt + response_text),
+                           (time.perf_counter() - started) * 1000)
+    finally:
+        if not completed and status == "SUCCESS":
+            status = "CLIENT_DISCONNECTED"
+        log_data.update({
+            "ai_response": "".join(sent_parts),
+            "status": status,
+            "response_findings": [finding.label for finding in response_filter.findings],
+        })
+        await log_ai_usage(log_data)
 
 # --- FastAPI 애플리케이션 인스턴스 생성 --- #
 app = FastAPI(title="KRA-AiGov PromptGate", version="0.1.0")
 
+@app.on_event("startup")
+async def start_usage_log():
+    get_usage_log_sink().start()
+
+@app.on_event("shutdown")
+async def close_provider_clients():
+    await close_gateways()
+    await close_usage_log_sink()
+
+@app.get("/gateway/stats")
+async def gateway_stats():
+    return get_gateway_stats()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return get_semantic_cache().get_stats()
+
+@app.get("/usage-log/stats")
+async def usage_log_stats():
+    return get_usage_log_sink().get_stats()
+
 # --- API 엔드포인트 정의 --- #
 @app.post("/process_prompt")
 async def process_prompt(request: PromptRequest):
@@ -116,8 +302,7 @@ async def process_prompt(request: PromptRequest):
             "masked_prompt": "N/A",
             "ai_response": "N/A",
             "status": "BLOCKED",
-            "reason": filter_message,
-            "timestamp": asyncio.current_task()._loop.time() # 임시 타임스탬프
+            "reason": filter_message
         }
         await log_ai_usage(log_data)
         raise HTTPException(status_code=403, detail=f"Prompt blocked: {filter_message}")
@@ -125,25 +310,64 @@ async def process_prompt(request: PromptRequest):
     # 2. 민감 정보 마스킹
     masked_prompt, masked_details = await mask_sensitive_info(filtered_prompt)
 
-    # 3. 외부 AI 서비스로 요청 전송 (Placeholder)
+    canary_word = secrets.token_hex(4) if CANARY_ENABLED else None
+    # 지원하지 않는 서비스는 캐시 조회/스트림 시작 전에 400
+    headers, payload = build_upstream_request(ai_service, masked_prompt, stream=request.stream, canary_word=canary_word)
+
+    # 3. 시맨틱 캐시 (옵트인 테넌트, 같은 공급자/모델/정책 번들에서 필터링을 통과한 응답만)
+    cache_context = None
+    cache = get_semantic_cache()
+    if cache.enabled_for(request.tenant_id):
+        hit, vector = await cache.lookup(request.tenant_id, ai_service, payload["model"], POLICY_BUNDLE, masked_prompt)
+        if hit is not None:
+            logger.info(f"[Cache] hit for {user_id} (similarity {hit.similarity:.3f}, saved {hit.tokens_saved} tokens)")
+            log_data = {
+                "user_id": user_id,
+                "ai_service": ai_service,
+                "original_prompt": original_prompt,
+                "masked_prompt": masked_prompt,
+                "masked_details": masked_details,
+                "ai_response": hit.response,
+                "status": "CACHE_HIT",
+                "cache_similarity": hit.similarity,
+                "filter_message": "N/A"
+            }
+            if request.stream:
+                return StreamingResponse(stream_cached_response(hit, log_data), media_type="text/event-stream",
+                                         headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+            await log_ai_usage(log_data)
+            return {"status": "success", "response": hit.response, "cached": True}
+        cache_context = {"tenant_id": request.tenant_id, "ai_service": ai_service, "model": payload["model"],
+                         "policy_bundle": POLICY_BUNDLE, "prompt": masked_prompt, "vector": vector}
+
+    # 4. 외부 AI 서비스로 요청 전송
+    if request.stream:
+        log_data = {
+            "user_id": user_id,
+            "ai_service": ai_service,
+            "original_prompt": original_prompt,
+            "masked_prompt": masked_prompt,
+            "masked_details": masked_details,
+            "filter_message": "N/A",
+            "stream": True
+        }
+        return StreamingResponse(
+            stream_ai_response(ai_service, masked_prompt, log_data, canary_word, cache_context),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     ai_response = ""
     status = "SUCCESS"
+    usage_tokens = 0
+    started = time.perf_counter()
     try:
-        async with httpx.AsyncClient( ) as client:
-            if ai_service == "openai":
-                headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
-                payload = {"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": masked_prompt}]}
-                response = await client.post(OPENAI_CHAT_URL, headers=headers, json=payload, timeout=60)
-                response.raise_for_status()
-                ai_response = response.json()["choices"][0]["message"]["content"]
-            elif ai_service == "claude":
-                headers = {"x-api-key": CLAUDE_API_KEY, "Content-Type": "application/json", "anthropic-version": "2023-06-01"}
-                payload = {"model": "claude-3-opus-20240229", "messages": [{"role": "user", "content": masked_prompt}]}
-                response = await client.post(CLAUDE_CHAT_URL, headers=headers, json=payload, timeout=60)
-                response.raise_for_status()
-                ai_response = response.json()["content"][0]["text"]
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported AI service")
+        # 공급자 게이트웨이: 커넥션 풀 + 요청률 제한 + 429/5xx 재시도 (+ GATEWAY_<PROVIDER>_HEDGE_MS 헤지)
+        response = await get_gateway(ai_service).post(headers, payload)
+        response.raise_for_status()
+        body = response.json()
+        ai_response = extract_response_text(ai_service, body)
+        usage_tokens = extract_usage_tokens(ai_service, body, masked_prompt + ai_response)
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error during AI service call: {e.response.status_code} - {e.response.text}" )
         ai_response = f"Error: AI service returned status {e.response.status_code}"
@@ -160,13 +384,16 @@ async def process_prompt(request: PromptRequest):
         status = "UNEXPECTED_ERROR"
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
-    # 4. 응답 필터링 (선택 사항: MVP 이후 고려)
-    # is_response_allowed, final_response, response_filter_message = await filter_response(ai_response)
-    # if not is_response_allowed:
-    #     ai_response = "Response blocked due to policy violation."
-    #     status = "RESPONSE_BLOCKED"
+    # 5. 응답 필터링 (스트리밍과 같은 규칙으로 민감 정보 마스킹 / 카나리 워드 유출 차단)
+    response_result = filter_response_text(ai_response, [canary_word] if canary_word else [])
+    ai_response = response_result.text
+    if response_result.blocked:
+        ai_response = "Response blocked due to policy violation."
+        status = "RESPONSE_BLOCKED"
+    else:
+        cache_response(cache_context, ai_response, usage_tokens, (time.perf_counter() - started) * 1000)
 
-    # 5. AI 사용 로그 기록
+    # 6. AI 사용 로그 기록
     log_data = {
         "user_id": user_id,
         "ai_service": ai_service,
@@ -175,8 +402,8 @@ async def process_prompt(request: PromptRequest):
         "masked_details": masked_details,
         "ai_response": ai_response,
         "status": status,
-        "filter_message": filter_message if not is_allowed else "N/A",
-        "timestamp": asyncio.current_task()._loop.time() # 임시 타임스탬프
+        "response_findings": [finding.label for finding in response_result.findings],
+        "filter_message": filter_message if not is_allowed else "N/A"
     }
     await log_ai_usage(log_data)
 
@@ -0,0 +1,171 @@
+"""
+로컬 모의 LLM 공급자 (부하 테스트용, 네트워크 불필요)
+OpenAI /v1/chat/completions 와 Claude /v1/messages 형식을 흉내내며 스트리밍/비스트리밍을 모두 지원한다.
+지연, 토큰 간격, 429/5xx 비율을 조정해 게이트웨이의 재시도/헤지/요청률 제한을 확인한다.
+
+실행:
+    python -m services.mock_provider serve --port 8900 --latency-ms 200 --error-rate 0.05
+    GATEWAY_OPENAI_URL=http://localhost:8900/v1/chat/completions uvicorn main:app
+부하 테스트 (게이트웨이 → 모의 공급자):
+    python -m services.mock_provider load --url http://localhost:8900/v1/chat/completions -n 500 -c 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+MOCK_LATENCY_MS = float(os.getenv("MOCK_LATENCY_MS", "200"))         # 첫 토큰까지 지연
+MOCK_JITTER_MS = float(os.getenv("MOCK_JITTER_MS", "100"))           # 지연 편차 (꼬리 지연 재현)
+MOCK_TOKEN_INTERVAL_MS = float(os.getenv("MOCK_TOKEN_INTERVAL_MS", "20"))
+MOCK_ERROR_RATE = float(os.getenv("MOCK_ERROR_RATE", "0"))           # 503 비율
+MOCK_RATE_LIMIT_RATE = float(os.getenv("MOCK_RATE_LIMIT_RATE", "0"))  # 429 비율
+MOCK_RESPONSE = os.getenv("MOCK_RESPONSE", "This is a mock response from the local provider used for load testing.")
+
+app = FastAPI(title="PromptGate Mock LLM Provider")
+
+def _failure():
+    roll = random.random()
+    if roll < MOCK_RATE_LIMIT_RATE:
+        return JSONResponse({"error": {"message": "rate limited"}}, status_code=429, headers={"retry-after": "0.1"})
+    if roll < MOCK_RATE_LIMIT_RATE + MOCK_ERROR_RATE:
+        return JSONResponse({"error": {"message": "overloaded"}}, status_code=503)
+    return None
+
+async def _first_token_delay():
+    jitter = random.expovariate(1 / MOCK_JITTER_MS) if MOCK_JITTER_MS > 0 else 0.0
+    await asyncio.sleep((MOCK_LATENCY_MS + jitter) / 1000)
+
+def _tokens():
+    return [word + " " for word in MOCK_RESPONSE.split()]
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    failure = _failure()
+    if failure is not None:
+        return failure
+    await _first_token_delay()
+
+    if not body.get("stream"):
+        return {
+            "id": "mock-completion",
+            "object": "chat.completion",
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": MOCK_RESPONSE}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": len(_tokens()), "total_tokens": 10 + len(_tokens())},
+        }
+
+    async def events():
+        for token in _tokens():
+            yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': {'content': token}}]})}\n\n"
+            await asyncio.sleep(MOCK_TOKEN_INTERVAL_MS / 1000)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.post("/v1/messages")
+async def messages(request: Request):
+    body = await request.json()
+    failure = _failure()
+    if failure is not None:
+        return failure
+    await _first_token_delay()
+
+    if not body.get("stream"):
+        return {
+            "id": "mock-message",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "mock"),
+            "content": [{"type": "text", "text": MOCK_RESPONSE}],
+            "usage": {"input_tokens": 10, "output_tokens": len(_tokens())},
+        }
+
+    async def events():
+        yield f"event: message_start\ndata: {json.dumps({'type': 'message_start'})}\n\n"
+        for token in _tokens():
+            event = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": token}}
+            yield f"event: content_block_delta\ndata: {json.dumps(event)}\n\n"
+            await asyncio.sleep(MOCK_TOKEN_INTERVAL_MS / 1000)
+        yield f"event: message_stop\ndata: {json.dumps({'type': 'message_stop'})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+async def run_load(url: str, provider: str, requests: int, concurrency: int):
+    """게이트웨이로 모의 공급자에 부하를 주고 지연 분포와 게이트웨이 통계 출력"""
+    from services.provider_gateway import ProviderConfig, ProviderGateway
+
+    config = ProviderConfig.from_env(provider, url=url)
+    gateway = ProviderGateway(config)
+    payload = {"model": "mock", "messages": [{"role": "user", "content": "hello"}]}
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await gateway.post({"Content-Type": "application/json"}, payload)
+                if response.status_code >= 400:
+                    failures += 1
+            except Exception:
+                failures += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    await gateway.close()
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)]
+
+    print(f"📊 {requests}건 / 동시 {concurrency} / {elapsed:.2f}s ({requests / elapsed:.1f} req/s), 실패 {failures}")
+    print(f"⏱️  p50 {percentile(0.5):.1f}ms  p95 {percentile(0.95):.1f}ms  p99 {percentile(0.99):.1f}ms")
+    stats = gateway.get_stats()
+    stats.pop("config")
+    print(f"🔁 게이트웨이 통계: {stats}")
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 모의 LLM 공급자 / 게이트웨이 부하 테스트")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="모의 공급자 서버 실행")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8900)
+    serve.add_argument("--latency-ms", type=float, default=None)
+    serve.add_argument("--error-rate", type=float, default=None)
+    serve.add_argument("--rate-limit-rate", type=float, default=None)
+
+    load = sub.add_parser("load", help="게이트웨이를 통해 부하 테스트")
+    load.add_argument("--url", default="http://127.0.0.1:8900/v1/chat/completions")
+    load.add_argument("--provider", default="openai", help="GATEWAY_<PROVIDER>_* 설정을 읽을 공급자 이름")
+    load.add_argument("-n", "--requests", type=int, default=200)
+    load.add_argument("-c", "--concurrency", type=int, default=20)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        global MOCK_LATENCY_MS, MOCK_ERROR_RATE, MOCK_RATE_LIMIT_RATE
+        if args.latency_ms is not None:
+            MOCK_LATENCY_MS = args.latency_ms
+        if args.error_rate is not None:
+            MOCK_ERROR_RATE = args.error_rate
+        if args.rate_limit_rate is not None:
+            MOCK_RATE_LIMIT_RATE = args.rate_limit_rate
+        import uvicorn
+        uvicorn.run(app, host=args.host, port=args.port)
+    else:
+        asyncio.run(run_load(args.url, args.provider, args.requests, args.concurrency))
+
+if __name__ == "__main__":
+    main()
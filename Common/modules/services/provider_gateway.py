@@ -0,0 +1,292 @@
+"""
+LLM 공급자 게이트웨이
+공급자별 커넥션 풀(HTTP/2) 클라이언트, 토큰 버킷 요청률 제한, 동시 요청 수 제한,
+429/5xx 지터 백오프 재시도, (선택) 헤지 요청으로 꼬리 지연을 줄인다.
+
+공급자 설정은 환경변수 GATEWAY_<PROVIDER>_* 로 조정한다. (예: GATEWAY_OPENAI_RPS=50)
+요청률 제한은 RPS 를 지정한 공급자에만 적용한다. (기본 0 = 제한 없음)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+DEFAULT_PROVIDER_URLS = {
+    "openai": "https://api.openai.com/v1/chat/completions",
+    "claude": "https://api.anthropic.com/v1/messages",
+}
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+@dataclass
+class ProviderConfig:
+    name: str
+    url: str
+    requests_per_second: float = 0.0    # 공급자 쿼터에 맞춘 평균 요청률 (0 = 제한 없음)
+    burst: int = 0                      # 순간 허용 요청 수 (최소 1)
+    max_concurrency: int = 64
+    max_retries: int = 3
+    backoff_base: float = 0.5           # 초
+    backoff_max: float = 8.0            # 초
+    hedge_after_ms: Optional[float] = None  # 지정 시 이 시간 안에 응답이 없으면 두 번째 요청 (비스트리밍만)
+    timeout: float = 60.0
+    connect_timeout: float = 5.0
+    http2: bool = True
+
+    @classmethod
+    def from_env(cls, name: str, url: Optional[str] = None) -> "ProviderConfig":
+        prefix = f"GATEWAY_{name.upper()}_"
+
+        def env(key: str, default: Any) -> Any:
+            return os.getenv(prefix + key, default)
+
+        hedge = env("HEDGE_MS", "")
+        return cls(
+            name=name,
+            url=url or env("URL", DEFAULT_PROVIDER_URLS.get(name, "")),
+            requests_per_second=float(env("RPS", 0)),
+            burst=int(env("BURST", 0)),
+            max_concurrency=int(env("MAX_CONCURRENCY", 64)),
+            max_retries=int(env("MAX_RETRIES", 3)),
+            backoff_base=float(env("BACKOFF_BASE", 0.5)),
+            backoff_max=float(env("BACKOFF_MAX", 8.0)),
+            hedge_after_ms=float(hedge) if hedge else None,
+            timeout=float(env("TIMEOUT", 60)),
+            connect_timeout=float(env("CONNECT_TIMEOUT", 5)),
+            http2=env("HTTP2", "true").lower() == "true",
+        )
+
+class TokenBucket:
+    """비동기 토큰 버킷 (rate 개/초, 최대 capacity 개 누적)"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def has_capacity(self) -> bool:
+        """대기 없이 요청할 수 있는지 (토큰은 소비하지 않음)"""
+        self._refill()
+        return self.tokens >= 1
+
+    def try_acquire(self) -> bool:
+        """대기 없이 토큰을 얻을 수 있으면 소비"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> float:
+        """토큰 1개 소비 (부족하면 채워질 때까지 대기), 대기 시간(초) 반환"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        async with self._lock:
+            while not self.try_acquire():
+                delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+        return waited
+
+class ProviderGateway:
+    """공급자 한 곳에 대한 공유 HTTP 클라이언트와 흐름 제어"""
+
+    def __init__(self, config: ProviderConfig, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.config = config
+        self.bucket = TokenBucket(config.requests_per_second, config.burst)
+        self.semaphore = asyncio.Semaphore(config.max_concurrency)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "errors": 0,
+            "throttled_seconds": 0.0,
+        }
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            http2 = self.config.http2 and self._transport is None and _http2_available()
+            if self.config.http2 and not http2 and self._transport is None:
+                logger.warning("h2 라이브러리가 설치되지 않음 - HTTP/1.1 커넥션 풀 사용")
+            self._client = httpx.AsyncClient(
+                http2=http2,
+                transport=self._transport,
+                timeout=httpx.Timeout(self.config.timeout, connect=self.config.connect_timeout),
+                limits=httpx.Limits(max_connections=self.config.max_concurrency,
+                                    max_keepalive_connections=self.config.max_concurrency),
+            )
+        return self._client
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Retry-After 헤더 우선, 없으면 full jitter 지수 백오프"""
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.config.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt)))
+
+    async def _admit(self):
+        waited = await self.bucket.acquire()
+        self.stats["throttled_seconds"] += waited
+
+    async def _send_with_retries(self, headers: Dict[str, str], payload: Dict[str, Any]) -> httpx.Response:
+        attempt = 0
+        while True:
+            await self._admit()
+            response = None
+            error: Optional[Exception] = None
+            async with self.semaphore:
+                self.stats["requests"] += 1
+                try:
+                    response = await self.client.post(self.config.url, headers=headers, json=payload)
+                except (httpx.TimeoutException, httpx.NetworkError) as e:
+                    error = e
+            if error is None and response.status_code not in RETRYABLE_STATUS:
+                return response
+            if attempt >= self.config.max_retries:
+                self.stats["errors"] += 1
+                if error is not None:
+                    raise error
+                return response
+            delay = self._backoff(attempt, response)
+            logger.warning(f"[Gateway] {self.config.name} 재시도 {attempt + 1}/{self.config.max_retries} "
+                           f"({error or response.status_code}), {delay:.2f}s 후")
+            self.stats["retries"] += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def post(self, headers: Dict[str, str], payload: Dict[str, Any]) -> httpx.Response:
+        """비스트리밍 요청 (재시도 + 선택적 헤지)"""
+        if self.config.hedge_after_ms is None:
+            return await self._send_with_retries(headers, payload)
+
+        primary = asyncio.ensure_future(self._send_with_retries(headers, payload))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.config.hedge_after_ms / 1000.0)
+            # 요청률 여유가 있을 때만 헤지 (부하 중에는 공급자 쿼터를 두 배로 쓰지 않음)
+            if done or not self.bucket.has_capacity():
+                return await primary
+
+            self.stats["hedged"] += 1
+            hedge = asyncio.ensure_future(self._send_with_retries(headers, payload))
+            tasks.append(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    response = task.result()
+                    # 성공, 또는 다시 보내도 결과가 같은 오류(4xx 등)는 다른 요청을 기다리지 않고 반환
+                    if response.status_code not in RETRYABLE_STATUS:
+                        if task is hedge and response.status_code < 400:
+                            self.stats["hedge_wins"] += 1
+                        return response
+            # 둘 다 실패하면 원 요청 결과를 그대로 전달
+            return primary.result()
+        finally:
+            # 먼저 끝난 쪽을 채택하고 나머지는 취소 (호출자가 취소된 경우 포함)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    @asynccontextmanager
+    async def stream(self, headers: Dict[str, str], payload: Dict[str, Any]) -> AsyncIterator[httpx.Response]:
+        """
+        스트리밍 요청. 재시도는 응답 본문을 받기 전(429/5xx/연결 실패)에만 하고,
+        재시도를 다 쓰면 마지막 오류 응답을 그대로 넘긴다.
+        """
+        attempt = 0
+        while True:
+            await self._admit()
+            async with self.semaphore:
+                self.stats["requests"] += 1
+                request = self.client.build_request("POST", self.config.url, headers=headers, json=payload)
+                response = None
+                try:
+                    response = await self.client.send(request, stream=True)
+                except (httpx.TimeoutException, httpx.NetworkError) as e:
+                    if attempt >= self.config.max_retries:
+                        self.stats["errors"] += 1
+                        raise
+                    logger.warning(f"[Gateway] {self.config.name} 스트림 연결 실패: {e}")
+
+                if response is not None:
+                    if response.status_code not in RETRYABLE_STATUS or attempt >= self.config.max_retries:
+                        if response.status_code >= 400:
+                            self.stats["errors"] += 1
+                        # 본문을 넘긴 뒤에는 재시도하지 않음 (호출자가 읽는 동안 동시 요청 슬롯 유지)
+                        try:
+                            yield response
+                        finally:
+                            await response.aclose()
+                        return
+                    await response.aread()
+                    await response.aclose()
+            delay = self._backoff(attempt, response)
+            self.stats["retries"] += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "config": asdict(self.config),
+            "available_tokens": round(self.bucket.tokens, 2),
+            **self.stats,
+        }
+
+_gateways: Dict[str, ProviderGateway] = {}
+
+def get_gateway(name: str) -> ProviderGateway:
+    """공급자별 게이트웨이 (프로세스에서 공유)"""
+    gateway = _gateways.get(name)
+    if gateway is None:
+        if name not in DEFAULT_PROVIDER_URLS and not os.getenv(f"GATEWAY_{name.upper()}_URL"):
+            raise KeyError(name)
+        gateway = _gateways[name] = ProviderGateway(ProviderConfig.from_env(name))
+    return gateway
+
+def get_gateway_stats() -> Dict[str, Any]:
+    return {name: gateway.get_stats() for name, gateway in _gateways.items()}
+
+async def close_gateways():
+    for gateway in _gateways.values():
+        await gateway.close()
+    _gateways.clear()
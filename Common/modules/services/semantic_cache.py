@@ -0,0 +1,275 @@
+"""
+LLM 게이트웨이 시맨틱 응답 캐시
+테넌트가 옵트인하면, 마스킹된 프롬프트의 ko-sroberta 임베딩으로 로컬 벡터 인덱스를 검색해
+유사도가 임계값을 넘는 이전 응답(응답 필터링을 통과한 것)을 공급자 호출 없이 반환한다.
+
+캐시는 (테넌트, 공급자, 모델, 정책 번들) 단위로 분리되어 정책이 바뀌면 이전 응답을 쓰지 않으며,
+항목마다 TTL 이 있고 파티션이 가득 차면 가장 오래 쓰이지 않은 항목부터 제거한다.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "jhgan/ko-sroberta-multitask"
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+@dataclass
+class CacheEntry:
+    prompt: str
+    response: str
+    tokens: int          # 이 응답을 만드는 데 쓴 공급자 토큰 수 (적중 시 절감량)
+    created_at: float
+    last_used: float
+    hits: int = 0
+
+@dataclass
+class CacheHit:
+    response: str
+    similarity: float
+    matched_prompt: str
+    tokens_saved: int
+
+class _Partition:
+    """(테넌트, 공급자, 모델, 정책 번들) 하나의 캐시 (정규화 벡터 행렬 + 슬롯별 항목)"""
+
+    def __init__(self, dimension: int, capacity: int):
+        self.capacity = capacity
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.occupied = np.zeros(capacity, dtype=bool)
+        self.entries: List[Optional[CacheEntry]] = [None] * capacity
+        self.exact: Dict[str, int] = {}  # 정규화 프롬프트 → 슬롯 (임베딩 없이 즉시 적중)
+
+    def _valid(self, slot: int, now: float, ttl: float) -> bool:
+        entry = self.entries[slot]
+        return entry is not None and now - entry.created_at < ttl
+
+    def _evict(self, slot: int):
+        entry = self.entries[slot]
+        if entry is not None:
+            self.exact.pop(_normalize_text(entry.prompt), None)
+        self.entries[slot] = None
+        self.occupied[slot] = False
+
+    def lookup_exact(self, prompt: str, now: float, ttl: float) -> Optional[int]:
+        slot = self.exact.get(_normalize_text(prompt))
+        if slot is None:
+            return None
+        if not self._valid(slot, now, ttl):
+            self._evict(slot)
+            return None
+        return slot
+
+    def search(self, vector: np.ndarray, now: float, ttl: float) -> Tuple[Optional[int], float]:
+        """가장 유사한 유효 항목 (만료 항목은 이 때 제거)"""
+        scores = np.where(self.occupied, self.vectors @ vector, -np.inf)
+        while True:
+            slot = int(np.argmax(scores))
+            if not np.isfinite(scores[slot]):
+                return None, 0.0
+            if self._valid(slot, now, ttl):
+                return slot, float(scores[slot])
+            self._evict(slot)
+            scores[slot] = -np.inf
+
+    def insert(self, vector: np.ndarray, entry: CacheEntry, now: float, ttl: float) -> int:
+        existing = self.exact.get(_normalize_text(entry.prompt))
+        if existing is not None:
+            slot = existing
+        else:
+            free = np.flatnonzero(~self.occupied)
+            if free.size:
+                slot = int(free[0])
+            else:
+                expired = [i for i in range(self.capacity) if not self._valid(i, now, ttl)]
+                # 만료 항목이 없으면 가장 오래 쓰이지 않은 항목 제거 (LRU)
+                slot = expired[0] if expired else min(range(self.capacity), key=lambda i: self.entries[i].last_used)
+            self._evict(slot)
+        self.vectors[slot] = vector
+        self.occupied[slot] = True
+        self.entries[slot] = entry
+        self.exact[_normalize_text(entry.prompt)] = slot
+        return slot
+
+    def __len__(self) -> int:
+        return int(self.occupied.sum())
+
+class SemanticResponseCache:
+    """테넌트 옵트인 시맨틱 응답 캐시"""
+
+    def __init__(self, tenants: Optional[Set[str]] = None, threshold: float = 0.95, ttl_seconds: float = 3600.0,
+                 max_entries: int = 1000, model_name: str = DEFAULT_EMBEDDING_MODEL):
+        self.tenants = tenants if tenants is not None else set()
+        self.threshold = threshold
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.model_name = model_name
+
+        self._model = None
+        self._model_error: Optional[str] = None
+        self._model_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._partitions: Dict[Tuple[str, str, str, str], _Partition] = {}
+
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "exact_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "tokens_saved": 0,
+            "latency_saved_ms": 0.0,
+        }
+        self._upstream_latency_ms: Dict[Tuple[str, str, str, str], float] = {}
+
+    @classmethod
+    def from_env(cls) -> "SemanticResponseCache":
+        tenants = {t.strip() for t in os.getenv("SEMANTIC_CACHE_TENANTS", "").split(",") if t.strip()}
+        return cls(
+            tenants=tenants,
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000")),
+            model_name=os.getenv("EMBEDDING_MODEL_NAME", DEFAULT_EMBEDDING_MODEL),
+        )
+
+    def enabled_for(self, tenant_id: Optional[str]) -> bool:
+        """테넌트 옵트인 여부 (SEMANTIC_CACHE_TENANTS=* 이면 전체)"""
+        if self._model_error is not None or not tenant_id:
+            return False
+        return "*" in self.tenants or tenant_id in self.tenants
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                        self._model = SentenceTransformer(self.model_name)
+                    except ImportError:
+                        self._model_error = "sentence-transformers 미설치"
+                        logger.warning("SentenceTransformers 라이브러리가 설치되지 않음 - 시맨틱 캐시 비활성화")
+                        raise
+        return self._model
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = self._get_model().encode([text], normalize_embeddings=True)[0]
+        return np.asarray(vector, dtype=np.float32)
+
+    def _partition(self, key: Tuple[str, str, str, str], dimension: int) -> _Partition:
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = _Partition(dimension, self.max_entries)
+        return partition
+
+    def _lookup_sync(self, key: Tuple[str, str, str, str], prompt: str) -> Tuple[Optional[CacheHit], Optional[np.ndarray]]:
+        now = time.time()
+        with self._lock:
+            partition = self._partitions.get(key)
+            slot = partition.lookup_exact(prompt, now, self.ttl) if partition else None
+            if slot is not None:
+                self.stats["exact_hits"] += 1
+                return self._hit(key, partition, slot, 1.0, now), None
+
+        # 임베딩은 잠금 밖에서 계산 (동시 조회가 서로를 막지 않도록)
+        vector = self._embed(prompt)
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is None:
+                return None, vector
+            slot, similarity = partition.search(vector, now, self.ttl)
+            if slot is None or similarity < self.threshold:
+                return None, vector
+            return self._hit(key, partition, slot, similarity, now), vector
+
+    def _hit(self, key, partition: _Partition, slot: int, similarity: float, now: float) -> CacheHit:
+        entry = partition.entries[slot]
+        entry.hits += 1
+        entry.last_used = now
+        self.stats["hits"] += 1
+        self.stats["tokens_saved"] += entry.tokens
+        self.stats["latency_saved_ms"] += self._upstream_latency_ms.get(key, 0.0)
+        return CacheHit(response=entry.response, similarity=similarity, matched_prompt=entry.prompt,
+                        tokens_saved=entry.tokens)
+
+    async def lookup(self, tenant_id: str, ai_service: str, model: str, policy_bundle: str,
+                     prompt: str) -> Tuple[Optional[CacheHit], Optional[np.ndarray]]:
+        """
+        캐시 조회. 미적중 시 저장에 재사용할 수 있도록 계산한 임베딩을 함께 반환한다.
+        """
+        key = (tenant_id, ai_service, model, policy_bundle)
+        self.stats["lookups"] += 1
+        try:
+            hit, vector = await asyncio.to_thread(self._lookup_sync, key, prompt)
+        except Exception as e:
+            logger.error(f"[Cache] 조회 실패: {e}")
+            hit, vector = None, None
+        if hit is None:
+            self.stats["misses"] += 1
+        return hit, vector
+
+    def _store_sync(self, key, prompt: str, response: str, tokens: int, vector: Optional[np.ndarray],
+                    latency_ms: float):
+        if vector is None:
+            vector = self._embed(prompt)
+        now = time.time()
+        with self._lock:
+            partition = self._partition(key, vector.shape[0])
+            partition.insert(vector, CacheEntry(prompt=prompt, response=response, tokens=tokens,
+                                                created_at=now, last_used=now), now, self.ttl)
+            self.stats["stores"] += 1
+            # 공급자 응답 지연 이동 평균 (적중 시 절감 지연 추정)
+            previous = self._upstream_latency_ms.get(key)
+            self._upstream_latency_ms[key] = latency_ms if previous is None else previous * 0.9 + latency_ms * 0.1
+
+    async def store(self, tenant_id: str, ai_service: str, model: str, policy_bundle: str, prompt: str,
+                    response: str, tokens: int, vector: Optional[np.ndarray] = None, latency_ms: float = 0.0):
+        """응답 필터링을 통과한 응답 저장"""
+        key = (tenant_id, ai_service, model, policy_bundle)
+        try:
+            await asyncio.to_thread(self._store_sync, key, prompt, response, tokens, vector, latency_ms)
+        except Exception as e:
+            logger.error(f"[Cache] 저장 실패: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["lookups"]
+        with self._lock:
+            entries = {"/".join(key): len(partition) for key, partition in self._partitions.items()}
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "tenants": sorted(self.tenants),
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+            "model": self.model_name,
+            "model_error": self._model_error,
+            "entries": entries,
+        }
+
+def policy_bundle_id(*parts: Any) -> str:
+    """필터/마스킹 규칙 묶음의 식별자 (규칙이 바뀌면 캐시 파티션도 바뀜)"""
+    override = os.getenv("POLICY_BUNDLE_VERSION")
+    if override:
+        return override
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+    return digest[:12]
+
+_semantic_cache: Optional[SemanticResponseCache] = None
+
+def get_semantic_cache() -> SemanticResponseCache:
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticResponseCache.from_env()
+    return _semantic_cache
@@ -0,0 +1,318 @@
+"""
+비동기 AI 사용 로그 싱크
+요청 경로에서는 레코드를 큐에 넣기만 하고(가득 차면 버림), 백그라운드 태스크가 배치로 모아
+JSON Lines 파일에 기록한다. 파일은 크기/시간 기준으로 교체하고 교체된 파일은 gzip 으로 압축하며,
+선택한 포워더(Elasticsearch _bulk 또는 HTTP)로 DashIQ 수집 경로에 전달한다.
+
+설정 (환경변수):
+    USAGE_LOG_PATH             기록 파일 (기본 ai_usage.jsonl)
+    USAGE_LOG_MAX_BYTES        교체 크기 (기본 100MB)
+    USAGE_LOG_ROTATE_SECONDS   교체 주기 (기본 86400)
+    USAGE_LOG_BACKUP_COUNT     보관할 압축 파일 수 (기본 14)
+    USAGE_LOG_BATCH_SIZE / USAGE_LOG_FLUSH_SECONDS / USAGE_LOG_QUEUE_SIZE
+    USAGE_LOG_FORWARDER        none (기본) | elasticsearch | http
+    ELASTICSEARCH_URL / USAGE_LOG_ES_INDEX / USAGE_LOG_FORWARD_URL
+"""
+
+import asyncio
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # 백그라운드 태스크 종료 신호
+
+class UsageLogForwarder:
+    """배치를 외부 수집 경로로 전달하는 포워더 인터페이스"""
+
+    name = "base"
+
+    async def send(self, records: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class ElasticsearchForwarder(UsageLogForwarder):
+    """Elasticsearch _bulk API 로 전달 (DashIQ 대시보드 인덱스)"""
+
+    name = "elasticsearch"
+
+    def __init__(self, url: str, index: str, timeout: float = 5.0):
+        self.url = url.rstrip("/")
+        self.index = index
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, records: List[Dict[str, Any]]):
+        action = json.dumps({"index": {"_index": self.index}})
+        body = "".join(f"{action}\n{json.dumps(record, ensure_ascii=False, default=str)}\n" for record in records)
+        response = await self.client.post(f"{self.url}/_bulk", content=body.encode("utf-8"),
+                                          headers={"Content-Type": "application/x-ndjson"})
+        response.raise_for_status()
+        if response.json().get("errors"):
+            raise RuntimeError("Elasticsearch bulk 일부 실패")
+
+    async def close(self):
+        await self.client.aclose()
+
+class HttpForwarder(UsageLogForwarder):
+    """JSON Lines 본문으로 임의 HTTP 수집 엔드포인트에 전달"""
+
+    name = "http"
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, records: List[Dict[str, Any]]):
+        body = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records)
+        response = await self.client.post(self.url, content=body.encode("utf-8"),
+                                          headers={"Content-Type": "application/x-ndjson"})
+        response.raise_for_status()
+
+    async def close(self):
+        await self.client.aclose()
+
+def create_forwarder(kind: Optional[str] = None) -> Optional[UsageLogForwarder]:
+    kind = (kind or os.getenv("USAGE_LOG_FORWARDER", "none")).lower()
+    if kind == "none":
+        return None
+    if kind == "elasticsearch":
+        return ElasticsearchForwarder(os.getenv("ELASTICSEARCH_URL", "http://localhost:9200"),
+                                      os.getenv("USAGE_LOG_ES_INDEX", "ai-usage-logs"))
+    if kind == "http":
+        return HttpForwarder(os.getenv("USAGE_LOG_FORWARD_URL", "http://localhost:8080/ingest/usage"))
+    raise ValueError(f"알 수 없는 사용 로그 포워더: {kind}")
+
+class UsageLogSink:
+    """버퍼링되는 JSON Lines 사용 로그 싱크 (요청 경로를 막지 않음)"""
+
+    def __init__(self, path: str = "ai_usage.jsonl", max_bytes: int = 100 * 1024 * 1024,
+                 rotate_seconds: float = 86400.0, backup_count: int = 14, batch_size: int = 500,
+                 flush_seconds: float = 1.0, queue_size: int = 10000,
+                 forwarder: Optional[UsageLogForwarder] = None, forward_queue_size: int = 100):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue_size = queue_size
+        self.forwarder = forwarder
+        self.forward_queue_size = forward_queue_size
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._forward_queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._compress_tasks: set = set()
+        self._file = None
+        self._opened_at = 0.0
+
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "batches": 0,
+            "rotations": 0,
+            "forwarded": 0,
+            "forward_dropped": 0,
+            "forward_errors": 0,
+            "write_errors": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "UsageLogSink":
+        return cls(
+            path=os.getenv("USAGE_LOG_PATH", "ai_usage.jsonl"),
+            max_bytes=int(os.getenv("USAGE_LOG_MAX_BYTES", str(100 * 1024 * 1024))),
+            rotate_seconds=float(os.getenv("USAGE_LOG_ROTATE_SECONDS", "86400")),
+            backup_count=int(os.getenv("USAGE_LOG_BACKUP_COUNT", "14")),
+            batch_size=int(os.getenv("USAGE_LOG_BATCH_SIZE", "500")),
+            flush_seconds=float(os.getenv("USAGE_LOG_FLUSH_SECONDS", "1.0")),
+            queue_size=int(os.getenv("USAGE_LOG_QUEUE_SIZE", "10000")),
+            forwarder=create_forwarder(),
+        )
+
+    # ------------------------------------------------------------------
+    # 요청 경로
+    # ------------------------------------------------------------------
+    def emit(self, record: Dict[str, Any]):
+        """레코드를 큐에 추가 (대기 없음, 큐가 가득 차면 버리고 카운트)"""
+        if self._queue is None:
+            self.start()
+        now = time.time()
+        record = {
+            "timestamp": datetime.fromtimestamp(now, tz=timezone.utc).isoformat(),
+            **record,
+        }
+        try:
+            self._queue.put_nowait(record)
+            self.stats["enqueued"] += 1
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+
+    # ------------------------------------------------------------------
+    # 백그라운드 기록
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks.append(asyncio.create_task(self._writer()))
+        if self.forwarder is not None:
+            self._forward_queue = asyncio.Queue(maxsize=self.forward_queue_size)
+            self._tasks.append(asyncio.create_task(self._forward_loop()))
+
+    async def _next_batch(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """첫 레코드를 기다린 뒤 batch_size 또는 flush_seconds 까지 모음 (종료 신호를 받으면 stop=True)"""
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                record = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if record is _STOP:
+                return batch, True
+            batch.append(record)
+        return batch, False
+
+    async def _writer(self):
+        stop = False
+        while not stop:
+            batch, stop = await self._next_batch()
+            if batch:
+                await self._write(batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        lines = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch)
+        try:
+            # 파일 I/O 와 교체는 스레드에서 (이벤트 루프를 막지 않음)
+            rotated = await asyncio.to_thread(self._write_lines, lines)
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+            if rotated:
+                task = asyncio.create_task(asyncio.to_thread(self._compress, rotated))
+                self._compress_tasks.add(task)
+                task.add_done_callback(self._compress_tasks.discard)
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logger.error(f"[UsageLog] 기록 실패: {e}")
+
+        if self._forward_queue is not None:
+            try:
+                self._forward_queue.put_nowait(batch)
+            except asyncio.QueueFull:
+                self.stats["forward_dropped"] += len(batch)
+
+    def _write_lines(self, lines: str) -> Optional[str]:
+        """배치 기록, 교체 조건을 넘으면 파일을 교체하고 교체된 경로 반환"""
+        if self._file is None:
+            self._open()
+        self._file.write(lines)
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes or time.time() - self._opened_at >= self.rotate_seconds:
+            return self._rotate()
+        return None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.time()
+
+    def _rotate(self) -> str:
+        self._file.close()
+        self._file = None
+        base, ext = os.path.splitext(self.path)
+        rotated = f"{base}.{datetime.now().strftime('%Y%m%dT%H%M%S%f')}{ext}"
+        os.replace(self.path, rotated)
+        self.stats["rotations"] += 1
+        return rotated
+
+    def _compress(self, path: str):
+        with open(path, "rb") as source, gzip.open(path + ".gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(path)
+        base, ext = os.path.splitext(self.path)
+        backups = sorted(glob.glob(f"{base}.*{ext}.gz"))
+        for old in backups[:-self.backup_count] if self.backup_count > 0 else []:
+            os.remove(old)
+
+    async def _forward_loop(self):
+        while True:
+            batch = await self._forward_queue.get()
+            if batch is _STOP:
+                return
+            try:
+                await self.forwarder.send(batch)
+                self.stats["forwarded"] += len(batch)
+            except Exception as e:
+                # 전달 실패 레코드는 로컬 파일에 남아 있으므로 재시도하지 않고 카운트만
+                self.stats["forward_errors"] += 1
+                logger.error(f"[UsageLog] {self.forwarder.name} 전달 실패: {e}")
+
+    async def close(self, timeout: float = 5.0):
+        """큐에 남은 레코드를 기록/전달한 뒤 종료 (timeout 을 넘기면 남은 작업 취소)"""
+        if self._queue is None:
+            return
+        # 작성기가 큐를 비우고 있으므로 가득 차 있어도 곧 들어감
+        await self._queue.put(_STOP)
+        if self._forward_queue is not None:
+            writer = self._tasks[0]
+            await asyncio.wait({writer}, timeout=timeout)
+            await self._forward_queue.put(_STOP)
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+            logger.warning("[UsageLog] 종료 시간 초과 - 남은 기록/전달 취소")
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self.forwarder is not None:
+            await self.forwarder.close()
+        if self._compress_tasks:
+            await asyncio.gather(*self._compress_tasks, return_exceptions=True)
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+        self._queue = None
+        self._forward_queue = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "path": self.path,
+            "forwarder": self.forwarder.name if self.forwarder else None,
+        }
+
+_usage_log_sink: Optional[UsageLogSink] = None
+
+def get_usage_log_sink() -> UsageLogSink:
+    global _usage_log_sink
+    if _usage_log_sink is None:
+        _usage_log_sink = UsageLogSink.from_env()
+    return _usage_log_sink
+
+async def close_usage_log_sink():
+    global _usage_log_sink
+    if _usage_log_sink is not None:
+        await _usage_log_sink.close()
+        _usage_log_sink = None
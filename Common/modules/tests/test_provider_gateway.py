@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.provider_gateway import ProviderConfig, ProviderGateway
+
+
+def scripted_transport(script):
+    """호출 순서대로 (지연 초, 상태 코드) 응답"""
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        delay, status = script[min(len(calls), len(script) - 1)]
+        calls.append(request)
+        await asyncio.sleep(delay)
+        return httpx.Response(status, json={"call": len(calls)})
+
+    return httpx.MockTransport(handler), calls
+
+
+def make_gateway(script, **overrides) -> tuple:
+    transport, calls = scripted_transport(script)
+    config = ProviderConfig(name="test", url="http://provider.test/v1", backoff_base=0.001, backoff_max=0.01,
+                            **overrides)
+    return ProviderGateway(config, transport=transport), calls
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_rate_limit_is_opt_in(monkeypatch):
+    monkeypatch.delenv("GATEWAY_TEST_RPS", raising=False)
+    monkeypatch.delenv("GATEWAY_TEST_BURST", raising=False)
+    config = ProviderConfig.from_env("test", url="http://provider.test/v1")
+    assert config.requests_per_second == 0 and config.burst == 0
+
+    gateway, calls = make_gateway([(0, 200)])
+
+    async def burst():
+        await asyncio.gather(*(gateway.post({}, {}) for _ in range(50)))
+        await gateway.close()
+
+    run(burst())
+    assert len(calls) == 50
+    assert gateway.stats["throttled_seconds"] == 0
+
+
+def test_configured_rate_limit_throttles():
+    gateway, calls = make_gateway([(0, 200)], requests_per_second=100, burst=1)
+
+    async def burst():
+        await asyncio.gather(*(gateway.post({}, {}) for _ in range(5)))
+        await gateway.close()
+
+    run(burst())
+    assert gateway.stats["throttled_seconds"] > 0.02
+
+
+def test_retries_retryable_status_then_succeeds():
+    gateway, calls = make_gateway([(0, 503), (0, 429), (0, 200)])
+
+    async def send():
+        response = await gateway.post({}, {})
+        await gateway.close()
+        return response
+
+    assert run(send()).status_code == 200
+    assert len(calls) == 3 and gateway.stats["retries"] == 2
+
+
+def test_client_error_is_not_retried():
+    gateway, calls = make_gateway([(0, 400)])
+
+    async def send():
+        response = await gateway.post({}, {})
+        await gateway.close()
+        return response
+
+    assert run(send()).status_code == 400
+    assert len(calls) == 1
+
+
+def test_hedge_returns_primary_client_error_without_waiting_for_hedge():
+    # 원 요청: 헤지 시작 후 4xx, 헤지: 한참 뒤 200
+    gateway, calls = make_gateway([(0.05, 400), (2.0, 200)], hedge_after_ms=10)
+
+    async def send():
+        started = time.perf_counter()
+        response = await gateway.post({}, {})
+        elapsed = time.perf_counter() - started
+        await gateway.close()
+        return response, elapsed
+
+    response, elapsed = run(send())
+    assert response.status_code == 400
+    assert elapsed < 1.0
+    assert gateway.stats["hedged"] == 1 and gateway.stats["hedge_wins"] == 0
+
+
+def test_hedge_wins_when_primary_is_slow():
+    gateway, calls = make_gateway([(2.0, 200), (0, 200)], hedge_after_ms=10)
+
+    async def send():
+        response = await gateway.post({}, {})
+        await gateway.close()
+        return response
+
+    assert run(send()).json() == {"call": 2}
+    assert gateway.stats["hedge_wins"] == 1
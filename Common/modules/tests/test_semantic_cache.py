@@ -0,0 +1,122 @@
+import asyncio
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.semantic_cache as semantic_cache
+from services.semantic_cache import SemanticResponseCache, policy_bundle_id
+
+VOCABULARY = ["weather", "seoul", "today", "sales", "report", "summary", "busan", "tomorrow"]
+
+
+class FakeEncoder:
+    """단어 출현 벡터 (정규화), 호출 수 기록"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, normalize_embeddings=True):
+        self.calls += 1
+        vectors = []
+        for text in texts:
+            words = text.lower().split()
+            vector = np.array([float(word in words) for word in VOCABULARY], dtype=np.float32)
+            vectors.append(vector / (np.linalg.norm(vector) or 1.0))
+        return np.stack(vectors)
+
+
+def make_cache(**overrides) -> SemanticResponseCache:
+    options = {"tenants": {"tenant-a"}, "threshold": 0.9, "ttl_seconds": 60.0, "max_entries": 8}
+    options.update(overrides)
+    cache = SemanticResponseCache(**options)
+    cache._model = FakeEncoder()
+    return cache
+
+
+def lookup(cache, prompt, bundle="v1"):
+    hit, _ = asyncio.run(cache.lookup("tenant-a", "openai", "gpt", bundle, prompt))
+    return hit
+
+
+def store(cache, prompt, response, bundle="v1", tokens=10):
+    asyncio.run(cache.store("tenant-a", "openai", "gpt", bundle, prompt, response, tokens))
+
+
+def test_cache_is_opt_in_per_tenant():
+    cache = make_cache()
+    assert cache.enabled_for("tenant-a")
+    assert not cache.enabled_for("tenant-b")
+    assert not cache.enabled_for(None)
+    assert make_cache(tenants={"*"}).enabled_for("tenant-b")
+    assert not make_cache(tenants=set()).enabled_for("tenant-a")
+
+
+def test_exact_hit_skips_embedding():
+    cache = make_cache()
+    store(cache, "Weather in Seoul today", "sunny")
+    encodes = cache._model.calls
+
+    hit = lookup(cache, "  weather IN seoul   today ")
+
+    assert hit.response == "sunny" and hit.similarity == 1.0 and hit.tokens_saved == 10
+    assert cache._model.calls == encodes
+    assert cache.stats["exact_hits"] == 1
+
+
+def test_similar_prompt_hits_and_dissimilar_misses():
+    cache = make_cache(threshold=0.8)
+    store(cache, "weather seoul today", "sunny")
+
+    assert lookup(cache, "seoul weather today please").response == "sunny"
+    assert lookup(cache, "sales report summary") is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_policy_bundle_partitions_are_isolated():
+    cache = make_cache()
+    store(cache, "weather seoul today", "sunny", bundle="v1")
+
+    assert lookup(cache, "weather seoul today", bundle="v2") is None
+    assert lookup(cache, "weather seoul today", bundle="v1").response == "sunny"
+
+
+def test_expired_entries_are_not_served(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: clock[0])
+    cache = make_cache(ttl_seconds=60.0)
+    store(cache, "weather seoul today", "sunny")
+
+    clock[0] += 61
+    assert lookup(cache, "weather seoul today") is None
+    assert lookup(cache, "seoul weather today") is None
+    assert cache.get_stats()["entries"] == {"tenant-a/openai/gpt/v1": 0}
+
+
+def test_full_partition_evicts_least_recently_used(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: clock[0])
+    cache = make_cache(max_entries=2)
+
+    store(cache, "weather seoul", "a")
+    clock[0] += 1
+    store(cache, "sales report", "b")
+    clock[0] += 1
+    assert lookup(cache, "weather seoul").response == "a"  # a 를 최근 사용으로
+    clock[0] += 1
+    store(cache, "busan tomorrow", "c")
+
+    assert lookup(cache, "sales report") is None
+    assert lookup(cache, "weather seoul").response == "a"
+    assert lookup(cache, "busan tomorrow").response == "c"
+
+
+def test_policy_bundle_id_changes_with_rules(monkeypatch):
+    monkeypatch.delenv("POLICY_BUNDLE_VERSION", raising=False)
+    assert policy_bundle_id(["rule-1"], "mask") == policy_bundle_id(["rule-1"], "mask")
+    assert policy_bundle_id(["rule-1"], "mask") != policy_bundle_id(["rule-2"], "mask")
+
+    monkeypatch.setenv("POLICY_BUNDLE_VERSION", "2026-10")
+    assert policy_bundle_id(["rule-1"]) == "2026-10"
@@ -0,0 +1,126 @@
+import asyncio
+import glob
+import gzip
+import json
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.usage_log import ElasticsearchForwarder, UsageLogForwarder, UsageLogSink
+
+
+class RecordingForwarder(UsageLogForwarder):
+    name = "recording"
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.closed = False
+
+    async def send(self, records):
+        if self.fail:
+            raise RuntimeError("collector down")
+        self.batches.append(records)
+
+    async def close(self):
+        self.closed = True
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_close_flushes_buffered_records(tmp_path):
+    path = str(tmp_path / "usage.jsonl")
+
+    async def scenario():
+        sink = UsageLogSink(path=path, batch_size=100, flush_seconds=10.0)
+        for i in range(25):
+            sink.emit({"request_id": i, "tenant_id": "t1"})
+        await sink.close()
+        return sink
+
+    sink = asyncio.run(scenario())
+    records = read_lines(path)
+    assert [record["request_id"] for record in records] == list(range(25))
+    assert all("timestamp" in record for record in records)
+    assert sink.stats["written"] == 25 and sink.stats["dropped"] == 0
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    path = str(tmp_path / "usage.jsonl")
+
+    async def scenario():
+        sink = UsageLogSink(path=path, queue_size=3)
+        for i in range(10):
+            sink.emit({"request_id": i})  # 작성기가 돌기 전에 큐가 가득 참
+        dropped = sink.stats["dropped"]
+        await sink.close()
+        return dropped
+
+    assert asyncio.run(scenario()) == 7
+    assert len(read_lines(path)) == 3
+
+
+def test_rotated_files_are_compressed_and_pruned(tmp_path):
+    path = str(tmp_path / "usage.jsonl")
+
+    async def scenario():
+        sink = UsageLogSink(path=path, max_bytes=1, backup_count=2, batch_size=1, flush_seconds=0.0)
+        for i in range(4):
+            sink.emit({"request_id": i})
+            await asyncio.sleep(0.05)  # 배치마다 교체
+        await sink.close()
+        return sink
+
+    sink = asyncio.run(scenario())
+    backups = sorted(glob.glob(str(tmp_path / "usage.*.jsonl.gz")))
+    assert sink.stats["rotations"] == 4
+    assert len(backups) == 2
+    with gzip.open(backups[-1], "rt", encoding="utf-8") as f:
+        assert json.loads(f.read())["request_id"] == 3
+    assert not glob.glob(str(tmp_path / "usage.*.jsonl"))
+
+
+def test_forwarder_receives_batches_and_failures_are_counted(tmp_path):
+    async def scenario(forwarder):
+        sink = UsageLogSink(path=str(tmp_path / f"{forwarder.fail}.jsonl"), forwarder=forwarder)
+        for i in range(5):
+            sink.emit({"request_id": i})
+        await sink.close()
+        return sink
+
+    forwarder = RecordingForwarder()
+    sink = asyncio.run(scenario(forwarder))
+    assert [record["request_id"] for batch in forwarder.batches for record in batch] == list(range(5))
+    assert sink.stats["forwarded"] == 5 and forwarder.closed
+
+    failing = RecordingForwarder(fail=True)
+    sink = asyncio.run(scenario(failing))
+    assert sink.stats["forward_errors"] == 1 and sink.stats["written"] == 5
+
+
+def test_elasticsearch_forwarder_sends_bulk_ndjson():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"errors": False})
+
+    async def scenario():
+        forwarder = ElasticsearchForwarder("http://es.test:9200/", "ai-usage-logs")
+        await forwarder.client.aclose()
+        forwarder.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await forwarder.send([{"request_id": 1}, {"request_id": 2}])
+        await forwarder.close()
+
+    asyncio.run(scenario())
+    [request] = requests
+    assert str(request.url) == "http://es.test:9200/_bulk"
+    lines = request.content.decode("utf-8").splitlines()
+    assert json.loads(lines[0]) == {"index": {"_index": "ai-usage-logs"}}
+    assert [json.loads(line)["request_id"] for line in lines[1::2]] == [1, 2]
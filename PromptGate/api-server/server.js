@@ -75,49 +75,30 @@ app.get('/api/dashboard/kpi', async (req, res) => {
     // 날짜 필터 생성
     const { startDate, endDate } = getDateFilter(year, month, week);
 
-    // 전체 AI 요청 수 (필터링된 기간)
-    const totalRequestsQuery = `
-      SELECT COALESCE(SUM(total_prompts), 0) as total_requests,
-             COALESCE(SUM(total_tokens), 0) as total_tokens,
-             COALESCE(SUM(total_cost), 0) as total_cost
-      FROM prompt_sessions 
-      WHERE tenant_id = $1 
-      AND created_at >= $2::timestamp
-      AND created_at <= $3::timestamp
-    `;
-    const totalRequestsResult = await pool.query(totalRequestsQuery, [tenantId, startDate, endDate]);
-    const totalRequests = totalRequestsResult.rows[0].total_requests || 0;
-
-    // 정책 위반 수 (필터링된 기간)
-    const violationsQuery = `
-      SELECT COUNT(*) as violation_count
-      FROM decision_logs 
-      WHERE tenant_id = $1 
-      AND decision = 'deny'
-      AND ts >= $2::timestamp
-      AND ts <= $3::timestamp
-    `;
-    const violationsResult = await pool.query(violationsQuery, [tenantId, startDate, endDate]);
-    const violations = violationsResult.rows[0].violation_count || 0;
-
-    // Shadow AI 탐지 수 (필터링된 기간)
-    const shadowAIQuery = `
-      SELECT COUNT(*) as shadow_count
-      FROM shadow_events 
+    // 요청 수 / 정책 위반 수 / Shadow AI 탐지 수 (일별 롤업, 필터링된 기간)
+    const totalsQuery = `
+      SELECT COALESCE(SUM(prompt_requests), 0) as total_requests,
+             COALESCE(SUM(prompt_tokens), 0) as total_tokens,
+             COALESCE(SUM(prompt_cost), 0) as total_cost,
+             COALESCE(SUM(decision_count) FILTER (WHERE decision = 'deny'), 0) as violation_count,
+             COALESCE(SUM(shadow_event_count), 0) as shadow_count
+      FROM dashboard_rollup_daily 
       WHERE tenant_id = $1 
-      AND ts >= $2::timestamp
-      AND ts <= $3::timestamp
+      AND bucket_date >= $2::date
+      AND bucket_date <= $3::date
     `;
-    const shadowAIResult = await pool.query(shadowAIQuery, [tenantId, startDate, endDate]);
-    const shadowAI = shadowAIResult.rows[0].shadow_count || 0;
+    const totalsResult = await pool.query(totalsQuery, [tenantId, startDate, endDate]);
+    const totalRequests = parseInt(totalsResult.rows[0].total_requests) || 0;
+    const violations = parseInt(totalsResult.rows[0].violation_count) || 0;
+    const shadowAI = parseInt(totalsResult.rows[0].shadow_count) || 0;
 
-    // AI 서비스 활성 사용자 수 (필터링된 기간)
+    // AI 서비스 활성 사용자 수 (일별 사용자 롤업, 필터링된 기간)
     const activeUsersQuery = `
       SELECT COUNT(DISTINCT user_id) as active_users
-      FROM prompt_sessions 
+      FROM dashboard_rollup_daily_users 
       WHERE tenant_id = $1 
-      AND created_at >= $2::timestamp
-      AND created_at <= $3::timestamp
+      AND bucket_date >= $2::date
+      AND bucket_date <= $3::date
     `;
     const activeUsersResult = await pool.query(activeUsersQuery, [tenantId, startDate, endDate]);
     const activeUsers = activeUsersResult.rows[0].active_users || 0;
@@ -174,21 +155,34 @@ app.get('/api/dashboard/department-usage', async (req, res) => {
     const tenantId = 1;
 
     const query = `
+      WITH departments AS (
+        SELECT department, COUNT(*) as user_count
+        FROM users
+        WHERE tenant_id = $1
+        AND department IS NOT NULL
+        GROUP BY department
+      ),
+      usage AS (
+        SELECT 
+          department,
+          SUM(prompt_requests) as total_requests,
+          SUM(prompt_tokens) as total_tokens,
+          SUM(prompt_cost) as total_cost,
+          SUM(decision_count) FILTER (WHERE decision = 'deny') as violations
+        FROM dashboard_rollup_hourly
+        WHERE tenant_id = $1
+        AND bucket_start >= NOW() - INTERVAL '7 days'
+        GROUP BY department
+      )
       SELECT 
-        u.department,
-        COUNT(DISTINCT u.id) as user_count,
-        COALESCE(SUM(ps.total_prompts), 0) as total_requests,
-        COALESCE(SUM(ps.total_tokens), 0) as total_tokens,
-        COALESCE(SUM(ps.total_cost), 0) as total_cost,
-        COUNT(DISTINCT CASE WHEN dl.decision = 'deny' THEN dl.id END) as violations
-      FROM users u
-      LEFT JOIN prompt_sessions ps ON u.id = ps.user_id 
-        AND ps.created_at >= NOW() - INTERVAL '7 days'
-      LEFT JOIN decision_logs dl ON u.id = dl.user_id 
-        AND dl.ts >= NOW() - INTERVAL '7 days'
-      WHERE u.tenant_id = $1 
-      AND u.department IS NOT NULL
-      GROUP BY u.department
+        d.department,
+        d.user_count,
+        COALESCE(us.total_requests, 0) as total_requests,
+        COALESCE(us.total_tokens, 0) as total_tokens,
+        COALESCE(us.total_cost, 0) as total_cost,
+        COALESCE(us.violations, 0) as violations
+      FROM departments d
+      LEFT JOIN usage us ON us.department = d.department
       ORDER BY total_requests DESC
     `;
 
@@ -282,13 +276,14 @@ app.get('/api/dashboard/shadow-ai-heatmap', async (req, res) => {
 
     const query = `
       SELECT 
-        EXTRACT(HOUR FROM ts) as hour,
-        EXTRACT(DOW FROM ts) as dow,
-        COUNT(*) as count
-      FROM shadow_events 
+        EXTRACT(HOUR FROM bucket_start) as hour,
+        EXTRACT(DOW FROM bucket_start) as dow,
+        SUM(shadow_event_count) as count
+      FROM dashboard_rollup_hourly 
       WHERE tenant_id = $1 
-      AND ts >= NOW() - INTERVAL '7 days'
-      GROUP BY EXTRACT(HOUR FROM ts), EXTRACT(DOW FROM ts)
+      AND bucket_start >= NOW() - INTERVAL '7 days'
+      AND shadow_event_count > 0
+      GROUP BY EXTRACT(HOUR FROM bucket_start), EXTRACT(DOW FROM bucket_start)
       ORDER BY hour, dow
     `;
 
@@ -489,32 +484,15 @@ app.get('/api/dashboard/usage-trend', async (req, res) => {
     const tenantId = 1;
 
     const query = `
-      WITH daily_stats AS (
-        SELECT 
-          DATE(created_at) as date,
-          SUM(total_prompts) as requests
-        FROM prompt_sessions 
-        WHERE tenant_id = $1 
-        AND created_at >= NOW() - INTERVAL '7 days'
-        GROUP BY DATE(created_at)
-      ),
-      daily_violations AS (
-        SELECT 
-          DATE(ts) as date,
-          COUNT(*) as violations
-        FROM decision_logs 
-        WHERE tenant_id = $1 
-        AND decision = 'deny'
-        AND ts >= NOW() - INTERVAL '7 days'
-        GROUP BY DATE(ts)
-      )
       SELECT 
-        ds.date,
-        COALESCE(ds.requests, 0) as requests,
-        COALESCE(dv.violations, 0) as violations
-      FROM daily_stats ds
-      FULL OUTER JOIN daily_violations dv ON ds.date = dv.date
-      ORDER BY COALESCE(ds.date, dv.date)
+        DATE(bucket_start) as date,
+        COALESCE(SUM(prompt_requests), 0) as requests,
+        COALESCE(SUM(decision_count) FILTER (WHERE decision = 'deny'), 0) as violations
+      FROM dashboard_rollup_hourly 
+      WHERE tenant_id = $1 
+      AND bucket_start >= NOW() - INTERVAL '7 days'
+      GROUP BY DATE(bucket_start)
+      ORDER BY DATE(bucket_start)
     `;
 
     const result = await pool.query(query, [tenantId]);
@@ -4,6 +4,10 @@ from typing import Optional, Dict, Any, List
 import httpx
 import json
 import uuid
+import os
+import asyncio
+import re
+import logging
 from datetime import datetime
 from app.filter import evaluate_prompt_with_policy
 from app.policy_engine import get_policy_engine
@@ -11,6 +15,11 @@ from app.secret_scanner import get_secret_scanner
 from app.rebuff_sdk_client import get_rebuff_client
 from app.ml_classifier import get_ml_classifier
 from app.embedding_filter import get_embedding_filter
+from app.tenant_vector_policy import get_tenant_vector_policy
+from app.local_vector_index import get_local_vector_mirrors
+from app.bulk_ingest import BulkIngester, BulkIngestConfig, aiter_stream_records, register_ingest_job, get_ingest_job
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -38,6 +47,7 @@ class PromptResponse(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
     blocked_keywords: Optional[list] = None
     tactics: Optional[list] = None
+    detectors: Optional[Dict[str, Dict[str, Any]]] = None
     error: Optional[str] = None
 
 class PolicyRequest(BaseModel):
@@ -87,6 +97,7 @@ class EmbeddingSimilarityRequest(BaseModel):
     prompt: str
     threshold: Optional[float] = None
     max_results: Optional[int] = None
+    tenant_id: Optional[str] = None
 
 class EmbeddingSimilarityResponse(BaseModel):
     is_similar: bool
@@ -96,6 +107,7 @@ class EmbeddingSimilarityResponse(BaseModel):
     processing_time: float
     embedding_model: str
     threshold_used: float
+    action: str = "block"
     error: Optional[str] = None
 
 @router.post("/evaluate", response_model=PromptResponse)
@@ -141,6 +153,7 @@ async def evaluate_prompt_endpoint(
             metadata=result.get("metadata"),
             blocked_keywords=result.get("blocked_keywords"),
             tactics=result.get("tactics"),
+            detectors=result.get("detectors"),
             error=result.get("error")
         )
         
@@ -417,7 +430,8 @@ async def check_embedding_similarity(request: EmbeddingSimilarityRequest):
         result = await embedding_filter.check_similarity(
             prompt=request.prompt,
             threshold=request.threshold,
-            max_results=request.max_results
+            max_results=request.max_results,
+            tenant_id=request.tenant_id
         )
         
         return EmbeddingSimilarityResponse(
@@ -428,6 +442,7 @@ async def check_embedding_similarity(request: EmbeddingSimilarityRequest):
             processing_time=result.processing_time,
             embedding_model=result.embedding_model,
             threshold_used=result.threshold_used,
+            action=result.action,
             error="; ".join(result.error_messages) if result.error_messages else None
         )
         
@@ -449,9 +464,10 @@ async def add_blocked_prompt(
     prompt: str,
     category: str = "malicious",
     severity: str = "high",
-    source: str = "manual"
+    source: str = "manual",
+    tenant_id: Optional[str] = None
 ):
-    """차단 프롬프트 추가"""
+    """차단 프롬프트 추가 (tenant_id 지정 시 해당 테넌트 전용)"""
     try:
         embedding_filter = await get_embedding_filter()
         
@@ -465,7 +481,8 @@ async def add_blocked_prompt(
             prompt=prompt,
             category=category,
             severity=severity,
-            source=source
+            source=source,
+            tenant_id=tenant_id
         )
         
         if success:
@@ -484,6 +501,94 @@ async def add_blocked_prompt(
         logger.error(f"차단 프롬프트 추가 실패: {e}")
         raise HTTPException(status_code=500, detail=f"차단 프롬프트 추가 실패: {str(e)}")
 
+@router.post("/embedding/bulk-ingest")
+async def bulk_ingest_blocked_prompts(
+    request: Request,
+    format: str = "jsonl",
+    ingest_id: Optional[str] = None,
+    text_field: Optional[str] = None,
+    category: str = "malicious",
+    severity: str = "high",
+    source: str = "bulk_ingest",
+    tenant_id: Optional[str] = None,
+    batch_size: int = 256,
+    parallel: int = 4
+):
+    """
+    차단 프롬프트 대량 적재 (요청 본문을 JSONL/CSV 스트림으로 읽음)
+    같은 ingest_id 로 다시 보내면 체크포인트 이후 레코드부터 적재
+    """
+    try:
+        if format not in ("jsonl", "csv"):
+            raise HTTPException(status_code=400, detail="format 은 jsonl 또는 csv 여야 합니다.")
+        ingest_id = ingest_id or str(uuid.uuid4())
+        if not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", ingest_id):
+            raise HTTPException(status_code=400, detail="ingest_id 는 영문/숫자/_/- 64자 이내여야 합니다.")
+        
+        embedding_filter = await get_embedding_filter()
+        if not embedding_filter.is_initialized or not embedding_filter.vector_db_client:
+            raise HTTPException(
+                status_code=503, 
+                detail="Embedding Filter가 초기화되지 않았습니다."
+            )
+        
+        # 전용 컬렉션을 쓰는 테넌트는 해당 컬렉션에 적재
+        policy = await get_tenant_vector_policy(tenant_id, embedding_filter.collection_name,
+                                                embedding_filter.similarity_threshold)
+        await embedding_filter.ensure_tenant_collection(policy)
+        
+        checkpoint_dir = os.getenv("BULK_INGEST_CHECKPOINT_DIR", os.path.join("cache", "ingest"))
+        ingester = BulkIngester(
+            embedding_filter.embedding_service,
+            embedding_filter.vector_db_client,
+            BulkIngestConfig(
+                collection_name=policy.collection_name,
+                tenant_id=tenant_id,
+                batch_size=max(1, min(batch_size, 1024)),
+                parallel=max(1, min(parallel, 16)),
+                text_field=text_field,
+                category=category,
+                severity=severity,
+                source=source,
+                checkpoint_path=os.path.join(checkpoint_dir, f"{ingest_id}.json")
+            )
+        )
+        register_ingest_job(ingest_id, ingester.progress)
+        
+        progress = await ingester.ingest(aiter_stream_records(request.stream(), format))
+        
+        # 로컬 벡터 인덱스는 다음 검색 시 재동기화
+        for mirror in get_local_vector_mirrors().values():
+            if mirror.collection_name == policy.collection_name:
+                mirror.mark_stale()
+        
+        return {
+            "success": progress.batches_failed == 0,
+            "ingest_id": ingest_id,
+            "progress": progress.to_dict(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"차단 프롬프트 대량 적재 실패: {e}")
+        raise HTTPException(status_code=500, detail=f"차단 프롬프트 대량 적재 실패: {str(e)}")
+
+@router.get("/embedding/bulk-ingest/{ingest_id}")
+async def get_bulk_ingest_progress(ingest_id: str):
+    """대량 적재 진행 상황 조회"""
+    progress = get_ingest_job(ingest_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="적재 작업을 찾을 수 없습니다.")
+    
+    return {
+        "success": True,
+        "ingest_id": ingest_id,
+        "progress": progress.to_dict(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @router.get("/embedding/stats")
 async def get_embedding_stats():
     """Embedding Filter 통계 조회"""
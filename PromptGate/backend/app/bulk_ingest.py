@@ -0,0 +1,368 @@
+"""
+차단 프롬프트 대량 적재 파이프라인
+JSONL/CSV 코퍼스를 스트리밍으로 읽어 내용 해시로 중복 제거 → 임베딩 마이크로배처로 encode →
+Qdrant 에 병렬 배치 upsert (wait=False) 하고, 중단 시 체크포인트부터 재개한다.
+
+포인트 ID 는 정규화 프롬프트 해시에서 만든 UUID 이므로 같은 프롬프트를 다시 적재해도 덮어쓰기만 된다.
+체크포인트는 "이 레코드 번호까지의 배치가 모두 upsert 완료" 를 의미하며 배치 완료 순서와 무관하게
+연속 구간만 기록한다.
+"""
+
+import asyncio
+import codecs
+import csv
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .embedding_cache import normalize_text, text_key
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("jsonl", "csv")
+TEXT_FIELD_CANDIDATES = ("prompt", "text", "content")
+
+@dataclass
+class BulkIngestConfig:
+    """대량 적재 설정"""
+    collection_name: str = "blocked-prompts"
+    batch_size: int = 256
+    parallel: int = 4
+    wait: bool = False
+    text_field: Optional[str] = None  # None 이면 prompt / text / content 순으로 탐색
+    category: str = "malicious"
+    severity: str = "high"
+    source: str = "bulk_ingest"
+    tenant_id: Optional[str] = None  # 레코드에 tenant_id 가 없을 때 기본값 (None 이면 공용)
+    checkpoint_path: Optional[str] = None
+    progress_every: int = 10  # 배치 N 개마다 진행 로그
+
+@dataclass
+class IngestProgress:
+    """적재 진행 상황"""
+    records_read: int = 0
+    resumed_from: int = 0
+    skipped_empty: int = 0
+    duplicates: int = 0
+    upserted: int = 0
+    failed: int = 0
+    batches_done: int = 0
+    batches_failed: int = 0
+    checkpoint: int = 0
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    errors: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        data = asdict(self)
+        data["elapsed_seconds"] = round(elapsed, 2)
+        data["upserts_per_second"] = round(self.upserted / elapsed, 1) if elapsed > 0 else 0.0
+        data["errors"] = self.errors[-10:]
+        return data
+
+def detect_format(name: str, fmt: Optional[str] = None) -> str:
+    """파일 이름 확장자로 형식 추정 (.jsonl/.ndjson/.json → jsonl, .csv/.tsv → csv)"""
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"지원하지 않는 형식: {fmt}")
+        return fmt
+    lowered = name.lower()
+    if lowered.endswith((".csv", ".tsv")):
+        return "csv"
+    return "jsonl"
+
+def content_key(text: str, tenant_id: Optional[str] = None) -> bytes:
+    """중복 판정 키 (공용 컬렉션에서 테넌트가 다르면 다른 포인트)"""
+    return text_key(f"{tenant_id}\x00{text}" if tenant_id else text)
+
+def point_id_for(text: str, tenant_id: Optional[str] = None) -> str:
+    """정규화 프롬프트 (+ 테넌트) sha256 기반 결정적 UUID"""
+    return str(uuid.UUID(bytes=content_key(text, tenant_id)[:16]))
+
+class _RecordParser:
+    """줄 단위 입력을 (레코드 번호, dict) 로 변환 (CSV 의 따옴표 안 줄바꿈 지원)"""
+
+    def __init__(self, fmt: str, delimiter: str = ","):
+        self.fmt = fmt
+        self.delimiter = delimiter
+        self.header: Optional[List[str]] = None
+        self.record_no = 0
+        self._pending = ""
+
+    def feed(self, line: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        if self.fmt == "jsonl":
+            line = line.strip()
+            if not line:
+                return None
+            self.record_no += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = {}
+            if isinstance(record, str):
+                record = {"prompt": record}
+            return self.record_no, record if isinstance(record, dict) else {}
+
+        # CSV: 따옴표 수가 홀수면 다음 줄과 이어 붙임
+        self._pending += line
+        if self._pending.count('"') % 2 == 1:
+            return None
+        text, self._pending = self._pending, ""
+        if not text.strip():
+            return None
+        row = next(csv.reader([text], delimiter=self.delimiter), [])
+        if self.header is None:
+            self.header = [column.strip() for column in row]
+            return None
+        self.record_no += 1
+        return self.record_no, dict(zip(self.header, row))
+
+def iter_file_records(path: str, fmt: Optional[str] = None) -> Iterable[Tuple[int, Dict[str, Any]]]:
+    """파일에서 레코드 스트리밍 (전체를 메모리에 올리지 않음)"""
+    fmt = detect_format(path, fmt)
+    parser = _RecordParser(fmt, delimiter="\t" if path.lower().endswith(".tsv") else ",")
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for line in f:
+            parsed = parser.feed(line)
+            if parsed is not None:
+                yield parsed
+
+async def aiter_stream_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """HTTP 요청 본문 등 바이트 스트림에서 레코드 스트리밍"""
+    parser = _RecordParser(detect_format("", fmt))
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            parsed = parser.feed(line + "\n")
+            if parsed is not None:
+                yield parsed
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        parsed = parser.feed(buffer + "\n")
+        if parsed is not None:
+            yield parsed
+
+async def _aiter(records: Iterable[Tuple[int, Dict[str, Any]]]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    for record in records:
+        yield record
+
+class BulkIngester:
+    """차단 프롬프트 대량 적재기"""
+
+    def __init__(self, embedding_service: Any, qdrant_client: Any, config: Optional[BulkIngestConfig] = None,
+                 on_progress: Optional[Callable[[IngestProgress], None]] = None):
+        self.embedding_service = embedding_service
+        self.client = qdrant_client
+        self.config = config or BulkIngestConfig()
+        self.on_progress = on_progress
+        self.progress = IngestProgress()
+
+        self._seen: Set[bytes] = set()
+        self._in_flight: Dict[int, int] = {}  # 배치 번호 → 마지막 레코드 번호
+        self._completed: Set[int] = set()
+        self._next_batch = 0
+        self._watermark_batch = -1
+
+    # ------------------------------------------------------------------
+    # 체크포인트
+    # ------------------------------------------------------------------
+    def load_checkpoint(self) -> int:
+        path = self.config.checkpoint_path
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("collection_name") != self.config.collection_name:
+                logger.warning(f"다른 컬렉션의 체크포인트 무시: {path}")
+                return 0
+            return int(state.get("record_no", 0))
+        except Exception as e:
+            logger.warning(f"체크포인트 로드 실패 (처음부터 적재): {e}")
+            return 0
+
+    def _save_checkpoint(self):
+        path = self.config.checkpoint_path
+        if not path:
+            return
+        state = {
+            "collection_name": self.config.collection_name,
+            "record_no": self.progress.checkpoint,
+            "updated_at": datetime.now().isoformat(),
+            "progress": self.progress.to_dict(),
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _advance_watermark(self):
+        """완료된 배치 중 연속 구간까지 체크포인트 이동"""
+        moved = False
+        while self._watermark_batch + 1 in self._completed:
+            self._watermark_batch += 1
+            self._completed.discard(self._watermark_batch)
+            self.progress.checkpoint = self._in_flight.pop(self._watermark_batch)
+            moved = True
+        if moved:
+            self._save_checkpoint()
+
+    # ------------------------------------------------------------------
+    # 적재
+    # ------------------------------------------------------------------
+    def _extract_text(self, record: Dict[str, Any]) -> str:
+        fields = [self.config.text_field] if self.config.text_field else TEXT_FIELD_CANDIDATES
+        for name in fields:
+            value = record.get(name)
+            if isinstance(value, str) and value.strip():
+                return value
+        return ""
+
+    def _build_payload(self, text: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {
+            "prompt": text,
+            "category": record.get("category") or self.config.category,
+            "severity": record.get("severity") or self.config.severity,
+            "source": record.get("source") or self.config.source,
+            "content_hash": text_key(text).hex(),
+            "created_at": datetime.now().isoformat(),
+        }
+        tenant_id = record.get("tenant_id") or self.config.tenant_id
+        if tenant_id:
+            payload["tenant_id"] = tenant_id
+        return payload
+
+    async def _upsert_batch(self, batch_no: int, batch: List[Tuple[str, Dict[str, Any]]],
+                            semaphore: asyncio.Semaphore):
+        from qdrant_client.models import PointStruct
+
+        try:
+            vectors = await self.embedding_service.embed_many([text for text, _ in batch])
+            points = [
+                PointStruct(id=point_id_for(text, payload.get("tenant_id")), vector=vector.tolist(), payload=payload)
+                for (text, payload), vector in zip(batch, vectors)
+            ]
+            await asyncio.to_thread(
+                self.client.upsert,
+                collection_name=self.config.collection_name,
+                points=points,
+                wait=self.config.wait,
+            )
+            self.progress.upserted += len(points)
+            self.progress.batches_done += 1
+        except Exception as e:
+            # 실패한 배치는 체크포인트를 넘기지 않으므로 재실행 시 다시 적재됨
+            self.progress.failed += len(batch)
+            self.progress.batches_failed += 1
+            self.progress.errors.append(f"batch {batch_no}: {e}")
+            logger.error(f"대량 적재 배치 실패 (batch {batch_no}, {len(batch)}건): {e}")
+            return
+        finally:
+            semaphore.release()
+
+        self._completed.add(batch_no)
+        self._advance_watermark()
+        if self.progress.batches_done % self.config.progress_every == 0:
+            logger.info(f"대량 적재 진행: {self.progress.upserted}건 upsert "
+                        f"(읽음 {self.progress.records_read}, 중복 {self.progress.duplicates})")
+        if self.on_progress:
+            self.on_progress(self.progress)
+
+    async def ingest(self, records: Any) -> IngestProgress:
+        """
+        레코드 스트림 적재 (동기/비동기 iterable 모두 지원)
+
+        병렬 upsert 수는 config.parallel 로 제한되며, 제한에 걸리면 입력 읽기도 멈춘다 (배압).
+        """
+        if not hasattr(records, "__aiter__"):
+            records = _aiter(records)
+
+        resume_from = self.load_checkpoint()
+        self.progress.resumed_from = resume_from
+        self.progress.checkpoint = resume_from
+        if resume_from:
+            logger.info(f"체크포인트에서 재개: 레코드 {resume_from} 이후")
+
+        semaphore = asyncio.Semaphore(max(1, self.config.parallel))
+        tasks: Set[asyncio.Task] = set()
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        last_record_no = resume_from
+
+        async def flush():
+            nonlocal batch
+            batch_no = self._next_batch
+            self._next_batch += 1
+            self._in_flight[batch_no] = last_record_no
+            if not batch:
+                # 전부 중복/빈 값이었던 구간도 체크포인트는 진행
+                self._completed.add(batch_no)
+                self._advance_watermark()
+                return
+            await semaphore.acquire()
+            task = asyncio.create_task(self._upsert_batch(batch_no, batch, semaphore))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            batch = []
+
+        pending_records = 0
+        async for record_no, record in records:
+            if record_no <= resume_from:
+                continue
+            self.progress.records_read += 1
+            last_record_no = record_no
+            pending_records += 1
+
+            text = self._extract_text(record)
+            if not text:
+                self.progress.skipped_empty += 1
+            else:
+                key = content_key(text, record.get("tenant_id") or self.config.tenant_id)
+                if key in self._seen:
+                    self.progress.duplicates += 1
+                else:
+                    self._seen.add(key)
+                    batch.append((normalize_text(text), self._build_payload(text, record)))
+
+            if len(batch) >= self.config.batch_size or pending_records >= self.config.batch_size * 4:
+                await flush()
+                pending_records = 0
+
+        if batch or pending_records:
+            await flush()
+        if tasks:
+            await asyncio.gather(*list(tasks))
+
+        self.progress.finished_at = time.time()
+        self._save_checkpoint()
+        logger.info(f"대량 적재 완료: {self.progress.to_dict()}")
+        return self.progress
+
+def ensure_collection(client: Any, collection_name: str, dimension: int):
+    """컬렉션이 없을 때만 튜닝 프로파일로 생성 (기존 데이터는 유지)"""
+    from .qdrant_profile import create_collection_with_profile
+
+    names = [collection.name for collection in client.get_collections().collections]
+    if collection_name not in names:
+        create_collection_with_profile(client, collection_name, dimension)
+
+# 진행 중/완료된 API 적재 작업 (ingest_id → 진행 상황)
+_ingest_jobs: Dict[str, IngestProgress] = {}
+
+def register_ingest_job(ingest_id: str, progress: IngestProgress):
+    _ingest_jobs[ingest_id] = progress
+
+def get_ingest_job(ingest_id: str) -> Optional[IngestProgress]:
+    return _ingest_jobs.get(ingest_id)
@@ -4,6 +4,7 @@ DB 기반 필터링 엔진
 """
 
 import re
+import os
 import json
 import asyncio
 import logging
@@ -204,6 +205,53 @@ class DatabaseFilterEngine:
         finally:
             db.close()
     
+    async def get_embedding_rule(self, tenant_code: str) -> Optional[Dict[str, Any]]:
+        """테넌트의 임베딩 유사도 규칙 (filter_rules.type = 'embedding', 테넌트 코드 기준)"""
+        cache_key = f"embedding_rule_{tenant_code}"
+        
+        if cache_key in self.cache:
+            cached_data, timestamp = self.cache[cache_key]
+            if (datetime.now() - timestamp).seconds < self.cache_ttl:
+                return cached_data
+        
+        db = self.get_db_session()
+        try:
+            query = text("""
+                SELECT fr.id, fr.threshold, fr.action, fr.context
+                FROM filter_rules fr
+                JOIN tenants t ON fr.tenant_id = t.id
+                JOIN policy_bundles pb ON fr.bundle_id = pb.id
+                WHERE t.code = :tenant_code
+                AND fr.type = 'embedding'
+                AND fr.enabled = true
+                AND pb.status = 'active'
+                AND pb.channel = 'prod'
+                ORDER BY fr.id DESC
+                LIMIT 1
+            """)
+            
+            row = db.execute(query, {"tenant_code": tenant_code}).first()
+            rule = None
+            if row:
+                context = row.context
+                if isinstance(context, str):
+                    context = json.loads(context)
+                rule = {
+                    "id": row.id,
+                    "threshold": float(row.threshold) if row.threshold is not None else None,
+                    "action": row.action,
+                    "context": context or {}
+                }
+            
+            self.cache[cache_key] = (rule, datetime.now())
+            return rule
+            
+        except Exception as e:
+            logger.error(f"임베딩 규칙 조회 실패: {e}")
+            return None
+        finally:
+            db.close()
+    
     async def evaluate_prompt(self, prompt: str, context: RequestContext) -> FilterResult:
         """프롬프트 평가 (DB 기반)"""
         start_time = datetime.now()
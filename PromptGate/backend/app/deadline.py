@@ -0,0 +1,243 @@
+"""
+요청 마감 시간(deadline) 전파
+API 진입점에서 요청별 시간 예산을 정하면 탐지기와 외부 클라이언트(OPA, PII, DLP 등)가
+contextvar 로 남은 시간을 읽어 HTTP 타임아웃을 줄이고, 끝낼 수 없는 재시도는 건너뛴다.
+
+탐지기는 run_detector 로 실행하며 completed / skipped / timed_out / failed 상태와
+탐지기별 fail-open / fail-closed 설정에 따른 차단 여부를 보고한다.
+
+설정 (환경변수):
+    REQUEST_DEADLINES                경로별 예산 (기본 "/api/v1/evaluate=300", 단위 ms)
+    DETECTOR_FAIL_MODE_<NAME>        open | closed (기본값은 DEFAULT_FAIL_MODES)
+    DETECTOR_MIN_BUDGET_MS_<NAME>    남은 시간이 이보다 적으면 실행하지 않고 skipped
+    DEADLINE_HEADER_SECRET           내부 호출자 공유 비밀 (미설정 시 X-Request-Deadline-Ms 헤더 무시)
+    CLIENT_BUDGET_FAIL_CLOSED        호출자가 줄인 예산으로 끝나지 못하면 차단할 탐지기 (기본 keyword,rebuff,vector)
+X-Deadline-Secret 헤더로 공유 비밀을 보낸 내부 호출자만 X-Request-Deadline-Ms 헤더로 예산을 더 줄일 수 있다.
+(늘릴 수는 없음) 호출자가 예산을 줄였는데 인젝션 탐지기가 끝나지 못하면 fail-open 이어도 차단한다.
+"""
+
+import asyncio
+import contextvars
+import hmac
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from app.telemetry import get_telemetry
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = "completed"
+SKIPPED = "skipped"
+TIMED_OUT = "timed_out"
+FAILED = "failed"
+
+FAIL_OPEN = "open"
+FAIL_CLOSED = "closed"
+
+# 기존 동작 기준 기본값: 정책(OPA)/DLP/시크릿은 판단할 수 없으면 차단, 나머지는 통과
+DEFAULT_FAIL_MODES = {
+    "keyword": FAIL_OPEN,
+    "rebuff": FAIL_OPEN,
+    "vector": FAIL_OPEN,
+    "secret": FAIL_CLOSED,
+    "pii": FAIL_OPEN,
+    "ml": FAIL_OPEN,
+    "policy": FAIL_CLOSED,
+    "dlp": FAIL_CLOSED,
+}
+
+# 재시도 한 번에 최소한 필요한 시간 (이보다 남은 시간이 적으면 재시도하지 않음)
+MIN_ATTEMPT_SECONDS = 0.01
+
+DEADLINE_HEADER = "x-request-deadline-ms"
+DEADLINE_SECRET_HEADER = "x-deadline-secret"
+
+# 호출자가 예산을 줄여 끝나지 못하게 만들 수 있는 탐지기 (fail-open 이어도 이 경우에는 차단)
+CLIENT_BUDGET_FAIL_CLOSED = {
+    name.strip() for name in os.getenv("CLIENT_BUDGET_FAIL_CLOSED", "keyword,rebuff,vector").split(",") if name.strip()
+}
+
+class DeadlineExceeded(Exception):
+    """요청 마감 시간 초과"""
+
+@dataclass
+class Deadline:
+    budget: float       # 초
+    expires_at: float   # time.monotonic() 기준
+    client_supplied: bool = False  # 호출자 헤더로 줄어든 예산
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+@contextmanager
+def deadline_scope(seconds: float, client_supplied: bool = False) -> Iterator[Deadline]:
+    """현재 컨텍스트(와 여기서 생성되는 태스크)에 마감 시간 설정, 바깥 마감 시간보다 늘리지 않음"""
+    outer = _current_deadline.get()
+    if outer is not None and outer.client_supplied:
+        client_supplied = True
+    deadline = Deadline(budget=seconds, expires_at=time.monotonic() + seconds, client_supplied=client_supplied)
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+@contextmanager
+def reserve_scope(seconds: float) -> Iterator[Optional[Deadline]]:
+    """현재 마감 시간보다 seconds 먼저 끝나는 마감 시간 (뒤 단계가 쓸 시간을 남겨 둠)"""
+    outer = _current_deadline.get()
+    if outer is None:
+        yield None
+        return
+    with deadline_scope(max(outer.remaining() - seconds, 0.0)) as deadline:
+        yield deadline
+
+def deadline_expired() -> bool:
+    deadline = _current_deadline.get()
+    return deadline is not None and deadline.expired()
+
+def derive_timeout(default: float) -> float:
+    """
+    외부 호출 타임아웃 = min(기본 타임아웃, 남은 시간)
+    마감 시간이 없으면 기본값, 이미 지났으면 DeadlineExceeded
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded("요청 마감 시간 초과")
+    return min(default, remaining)
+
+def can_complete(seconds: float) -> bool:
+    """seconds 만큼 기다린 뒤에도 시도할 시간이 남는지 (재시도 전 확인)"""
+    deadline = _current_deadline.get()
+    return deadline is None or deadline.remaining() >= seconds + MIN_ATTEMPT_SECONDS
+
+def detector_fail_mode(name: str) -> str:
+    mode = os.getenv(f"DETECTOR_FAIL_MODE_{name.upper()}", DEFAULT_FAIL_MODES.get(name, FAIL_OPEN)).lower()
+    return FAIL_CLOSED if mode == FAIL_CLOSED else FAIL_OPEN
+
+def detector_min_budget(name: str) -> float:
+    return float(os.getenv(f"DETECTOR_MIN_BUDGET_MS_{name.upper()}", "0")) / 1000.0
+
+@dataclass
+class DetectorOutcome:
+    name: str
+    status: str
+    fail_mode: str
+    elapsed_ms: float
+    result: Any = None
+    error: Optional[str] = None
+
+    @property
+    def should_block(self) -> bool:
+        """완료되지 못했고 fail-closed 인 탐지기"""
+        return self.status != COMPLETED and self.fail_mode == FAIL_CLOSED
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"status": self.status, "fail_mode": self.fail_mode, "elapsed_ms": round(self.elapsed_ms, 2)}
+        if self.error:
+            data["error"] = self.error
+        return data
+
+async def run_detector(name: str, factory: Callable[[], Awaitable[Any]]) -> DetectorOutcome:
+    """
+    남은 시간 안에서 탐지기 실행
+    남은 시간이 최소 예산보다 적으면 시작하지 않고(skipped), 마감 시간을 넘기면 취소한다(timed_out).
+    탐지기마다 스팬과 단계 지연 메트릭을 남긴다.
+    """
+    with get_telemetry().stage(name) as stage:
+        outcome = await _run_detector(name, factory)
+        stage.set_status(outcome.status)
+        return outcome
+
+async def _run_detector(name: str, factory: Callable[[], Awaitable[Any]]) -> DetectorOutcome:
+    fail_mode = detector_fail_mode(name)
+    deadline = _current_deadline.get()
+    if deadline is not None and deadline.client_supplied and name in CLIENT_BUDGET_FAIL_CLOSED:
+        fail_mode = FAIL_CLOSED
+    start = time.perf_counter()
+
+    def outcome(status: str, result: Any = None, error: Optional[str] = None) -> DetectorOutcome:
+        return DetectorOutcome(name=name, status=status, fail_mode=fail_mode,
+                               elapsed_ms=(time.perf_counter() - start) * 1000, result=result, error=error)
+
+    if deadline is not None and deadline.remaining() <= detector_min_budget(name):
+        logger.warning(f"[Deadline] {name} 탐지기 건너뜀 (남은 시간 {deadline.remaining() * 1000:.0f}ms)")
+        return outcome(SKIPPED, error="남은 시간 부족")
+
+    try:
+        if deadline is None:
+            result = await factory()
+        else:
+            result = await asyncio.wait_for(factory(), timeout=deadline.remaining())
+        return outcome(COMPLETED, result=result)
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        logger.warning(f"[Deadline] {name} 탐지기 시간 초과 (fail-{fail_mode})")
+        return outcome(TIMED_OUT, error="요청 마감 시간 초과")
+    except Exception as e:
+        logger.error(f"[Deadline] {name} 탐지기 실패 (fail-{fail_mode}): {e}")
+        return outcome(FAILED, error=str(e))
+
+def load_deadline_budgets() -> Dict[str, float]:
+    """REQUEST_DEADLINES="/api/v1/evaluate=300,/prompt/check=500" → {경로: 초}"""
+    budgets = {}
+    for item in os.getenv("REQUEST_DEADLINES", "/api/v1/evaluate=300").split(","):
+        path, _, ms = item.strip().partition("=")
+        if path and ms:
+            budgets[path] = float(ms) / 1000.0
+    return budgets
+
+class DeadlineMiddleware:
+    """
+    API 진입점에서 요청별 마감 시간 설정 (순수 ASGI, 엔드포인트와 같은 컨텍스트에서 실행)
+    """
+
+    def __init__(self, app, budgets: Optional[Dict[str, float]] = None, secret: Optional[str] = None):
+        self.app = app
+        self.budgets = budgets if budgets is not None else load_deadline_budgets()
+        self.secret = secret if secret is not None else os.getenv("DEADLINE_HEADER_SECRET", "")
+
+    def _budget(self, scope) -> Tuple[Optional[float], bool]:
+        """(예산, 호출자가 줄였는지) - 헤더는 공유 비밀을 보낸 내부 호출자만 반영"""
+        budget = self.budgets.get(scope.get("path", ""))
+        requested = None
+        trusted = False
+        for key, value in scope.get("headers", []):
+            if key == DEADLINE_HEADER.encode():
+                try:
+                    requested = float(value) / 1000.0
+                except ValueError:
+                    requested = None
+            elif key == DEADLINE_SECRET_HEADER.encode() and self.secret:
+                trusted = hmac.compare_digest(value, self.secret.encode())
+        if requested is None or not trusted:
+            return budget, False
+        if budget is not None and requested >= budget:
+            return budget, False
+        return requested, True
+
+    async def __call__(self, scope, receive, send):
+        budget, client_supplied = self._budget(scope) if scope["type"] == "http" else (None, False)
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+        with deadline_scope(budget, client_supplied=client_supplied):
+            await self.app(scope, receive, send)
@@ -10,6 +10,8 @@ from dataclasses import dataclass
 from enum import Enum
 import logging
 
+from .deadline import DeadlineExceeded, can_complete, deadline_expired, derive_timeout
+
 logger = logging.getLogger(__name__)
 
 class DLPAction(Enum):
@@ -109,6 +111,9 @@ class DLPClient:
             
             return self._parse_response(response)
             
+        except DeadlineExceeded:
+            # 호출자(run_detector)가 timed_out 으로 보고하고 fail 모드를 적용
+            raise
         except Exception as e:
             logger.error(f"DLP 검증 실패: {e}")
             # DLP 실패 시 안전하게 차단
@@ -159,6 +164,8 @@ class DLPClient:
             
             return self._parse_response(response_data)
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"AI 응답 DLP 검증 실패: {e}")
             return DLPResult(
@@ -238,6 +245,9 @@ class DLPClient:
         """
         DLP API 요청 실행 (재시도 로직 포함)
         
+        요청마다 타임아웃을 요청 마감 시간까지 남은 시간으로 줄이고,
+        백오프 후 시도할 시간이 남지 않으면 재시도하지 않는다.
+        
         Args:
             method: HTTP 메서드
             endpoint: API 엔드포인트
@@ -249,21 +259,27 @@ class DLPClient:
         url = f"{self.api_url}{endpoint}"
         
         for attempt in range(self.retry_count):
+            backoff = 2 ** attempt  # 지수 백오프
+            can_retry = attempt < self.retry_count - 1 and can_complete(backoff)
             try:
-                response = await self.client.request(method, url, **kwargs)
+                response = await self.client.request(method, url, timeout=derive_timeout(self.timeout), **kwargs)
                 response.raise_for_status()
                 return response.json()
                 
             except httpx.HTTPStatusError as e:
-                if e.response.status_code >= 500 and attempt < self.retry_count - 1:
+                if e.response.status_code >= 500 and can_retry:
                     # 서버 오류 시 재시도
-                    await asyncio.sleep(2 ** attempt)  # 지수 백오프
+                    await asyncio.sleep(backoff)
                     continue
                 else:
                     raise
+            except DeadlineExceeded:
+                raise
             except Exception as e:
-                if attempt < self.retry_count - 1:
-                    await asyncio.sleep(2 ** attempt)
+                if isinstance(e, httpx.TimeoutException) and deadline_expired():
+                    raise DeadlineExceeded(f"DLP 요청 마감 시간 초과: {endpoint}") from e
+                if can_retry:
+                    await asyncio.sleep(backoff)
                     continue
                 else:
                     raise
@@ -0,0 +1,302 @@
+"""
+임베딩 캐시
+정규화한 프롬프트의 sha256 → float16 벡터
+프로세스 내 LRU + 워커 간 공유되는 메모리 맵 디스크 저장소 (모델 이름/백엔드/버전별 네임스페이스)
+버전은 로드된 모델에서 도출한다 (model_fingerprint, 가중치가 바뀌면 네임스페이스도 바뀜)
+
+디스크 저장소는 고정 용량 오픈 어드레싱 해시 테이블:
+    {cache_dir}/{namespace_hash}/meta.json
+    {cache_dir}/{namespace_hash}/keys.bin      capacity x 32 bytes (sha256, 0 이면 빈 슬롯)
+    {cache_dir}/{namespace_hash}/vectors.f16   capacity x dim float16
+쓰기는 flock 으로 직렬화하고 벡터를 먼저 쓴 뒤 키를 기록하므로, 읽기는 잠금 없이 키가 완전히
+일치하는 슬롯만 사용한다. 테이블이 가득 차면 디스크에는 더 저장하지 않는다 (LRU 는 계속 동작).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 32
+MAX_PROBES = 64
+MAX_LOAD_FACTOR = 0.7
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 정규화 (NFC, 앞뒤 공백 제거, 연속 공백 축약). 대소문자는 유지"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).digest()
+
+class MmapEmbeddingStore:
+    """워커 간 공유 메모리 맵 해시 테이블"""
+
+    def __init__(self, directory: str, meta: Dict[str, Any], dim: int, capacity: int):
+        self.directory = directory
+        self.dim = dim
+        self.capacity = capacity
+        self.size = 0
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock_path = os.path.join(directory, ".lock")
+        keys_path = os.path.join(directory, "keys.bin")
+        vectors_path = os.path.join(directory, "vectors.f16")
+
+        meta_path = os.path.join(directory, "meta.json")
+        with self._file_lock():
+            if not os.path.exists(meta_path):
+                # 파일 크기만 잡아두는 sparse 파일 (실제 디스크는 쓴 만큼만 사용)
+                with open(keys_path, "wb") as f:
+                    f.truncate(capacity * KEY_BYTES)
+                with open(vectors_path, "wb") as f:
+                    f.truncate(capacity * dim * 2)
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump({**meta, "dim": dim, "capacity": capacity, "created_at": time.time()}, f)
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.keys = np.memmap(keys_path, dtype=np.uint8, mode="r+", shape=(capacity, KEY_BYTES))
+        self.vectors = np.memmap(vectors_path, dtype=np.float16, mode="r+", shape=(capacity, dim))
+        self.size = int(np.count_nonzero(self.keys.any(axis=1)))
+
+    @contextmanager
+    def _file_lock(self):
+        """프로세스 간 쓰기 잠금"""
+        import fcntl
+
+        with open(self._lock_path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _slots(self, key: bytes):
+        start = int.from_bytes(key[:8], "little") % self.capacity
+        for i in range(min(MAX_PROBES, self.capacity)):
+            yield (start + i) % self.capacity
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        target = np.frombuffer(key, dtype=np.uint8)
+        for slot in self._slots(key):
+            stored = self.keys[slot]
+            if not stored.any():
+                return None
+            if np.array_equal(stored, target):
+                return np.array(self.vectors[slot])
+        return None
+
+    def put(self, key: bytes, vector: np.ndarray) -> bool:
+        if self.size >= self.capacity * MAX_LOAD_FACTOR:
+            return False
+        target = np.frombuffer(key, dtype=np.uint8)
+        with self._file_lock():
+            if (self.size + 1) >= self.capacity * MAX_LOAD_FACTOR:
+                # 다른 워커의 기록까지 반영해 다시 계산
+                self.size = int(np.count_nonzero(self.keys.any(axis=1)))
+                if self.size >= self.capacity * MAX_LOAD_FACTOR:
+                    return False
+            for slot in self._slots(key):
+                stored = self.keys[slot]
+                if np.array_equal(stored, target):
+                    return True
+                if not stored.any():
+                    # 벡터를 먼저 기록한 뒤 키를 공개
+                    self.vectors[slot] = vector.astype(np.float16)
+                    self.keys[slot] = target
+                    self.size += 1
+                    return True
+        return False
+
+    def flush(self):
+        self.keys.flush()
+        self.vectors.flush()
+
+class EmbeddingCache:
+    """LRU + 디스크 2단 임베딩 캐시"""
+
+    def __init__(self, model_name: str, model_version: str, dim: int, cache_dir: Optional[str] = None,
+                 lru_size: int = 10000, disk_capacity: int = 100000, backend: str = "",
+                 prune_grace_seconds: float = 3600.0):
+        self.model_name = model_name
+        self.model_version = model_version
+        self.backend = backend
+        self.dim = dim
+        self.namespace = f"{model_name}@{backend}:{model_version}:{dim}"
+        self.lru_size = lru_size
+        self.prune_grace_seconds = prune_grace_seconds
+        self._lru: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"lru_hits": 0, "disk_hits": 0, "misses": 0, "disk_writes": 0}
+
+        self.store: Optional[MmapEmbeddingStore] = None
+        if cache_dir:
+            namespace_hash = hashlib.sha256(self.namespace.encode("utf-8")).hexdigest()[:16]
+            meta = {"namespace": self.namespace, "model_name": model_name,
+                    "backend": backend, "version": model_version}
+            try:
+                self.store = MmapEmbeddingStore(os.path.join(cache_dir, namespace_hash), meta, dim, disk_capacity)
+                self._prune_stale(cache_dir, namespace_hash)
+            except Exception as e:
+                logger.error(f"임베딩 디스크 캐시 초기화 실패 (LRU 만 사용): {e}")
+
+    def _prune_stale(self, cache_dir: str, current: str):
+        """
+        같은 모델·백엔드의 이전 버전 캐시 디렉터리 삭제 (모델 업그레이드 시 무효화)
+
+        다른 백엔드(torch/ONNX) 파드의 캐시와 현재보다 나중에 만들어진 버전(롤링 배포 중 새 파드)은
+        두고, 이전 버전이라도 prune_grace_seconds 안에 기록이 있으면 아직 쓰는 파드가 있다고 보고 남긴다.
+        """
+        created_at = self.store.meta.get("created_at", time.time())
+        for name in os.listdir(cache_dir):
+            directory = os.path.join(cache_dir, name)
+            meta_path = os.path.join(directory, "meta.json")
+            if name == current or not os.path.exists(meta_path):
+                continue
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                if meta.get("model_name") != self.model_name:
+                    continue
+                # 버전이 없는 meta 는 백엔드 구분 전 형식 → 이전 버전으로 취급
+                if "version" in meta and (meta.get("backend") != self.backend
+                                          or meta.get("version") == self.model_version):
+                    continue
+                if meta.get("created_at", 0.0) >= created_at:
+                    continue
+                last_write = max(os.path.getmtime(os.path.join(directory, file))
+                                 for file in ("meta.json", "keys.bin", "vectors.f16")
+                                 if os.path.exists(os.path.join(directory, file)))
+                if time.time() - last_write < self.prune_grace_seconds:
+                    continue
+                shutil.rmtree(directory, ignore_errors=True)
+                logger.info(f"이전 임베딩 캐시 삭제: {meta.get('namespace')}")
+            except Exception as e:
+                logger.warning(f"임베딩 캐시 정리 실패 ({name}): {e}")
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """캐시된 벡터 (float32) 또는 None"""
+        key = text_key(text)
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                self.stats["lru_hits"] += 1
+                return vector.astype(np.float32)
+
+        vector = self.store.get(key) if self.store else None
+        with self._lock:
+            if vector is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._remember(key, vector)
+        return vector.astype(np.float32)
+
+    def put(self, text: str, vector: np.ndarray):
+        key = text_key(text)
+        half = np.asarray(vector, dtype=np.float16)
+        with self._lock:
+            self._remember(key, half)
+        if self.store and self.store.put(key, half):
+            self.stats["disk_writes"] += 1
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["lru_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        return {
+            "namespace": self.namespace,
+            "lru_entries": len(self._lru),
+            "disk_entries": self.store.size if self.store else None,
+            "disk_capacity": self.store.capacity if self.store else None,
+            "hit_rate": round((lookups - self.stats["misses"]) / lookups, 4) if lookups else 0.0,
+            **self.stats,
+        }
+
+def _hash_file(path: str, digest):
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+def model_backend(model: Any) -> str:
+    """벡터가 달라지는 백엔드 구분 (torch / ONNX int8 / ONNX fp32)"""
+    backend = type(model).__name__
+    model_path = getattr(model, "model_path", None)
+    if model_path:
+        backend = f"{backend}:{os.path.basename(model_path)}"
+    return backend
+
+def model_fingerprint(model: Any) -> Optional[str]:
+    """
+    로드된 모델에서 캐시 버전 도출 (모델이 바뀌면 버전도 바뀜)
+
+    - ONNX (model_path): 모델 파일과 pooling 설정의 sha256
+    - SentenceTransformer: HuggingFace 리비전(commit hash), 로컬 경로에서 로드해 없으면 설정과 가중치의 sha256
+    알 수 없는 모델이면 None
+    """
+    digest = hashlib.sha256()
+    model_path = getattr(model, "model_path", None)
+    if model_path:
+        _hash_file(model_path, digest)
+        pooling_path = os.path.join(os.path.dirname(model_path), "pooling_config.json")
+        if os.path.exists(pooling_path):
+            _hash_file(pooling_path, digest)
+        return digest.hexdigest()[:16]
+
+    first_module = getattr(model, "_first_module", None)
+    config = getattr(getattr(first_module(), "auto_model", None), "config", None) if callable(first_module) else None
+    if config is None:
+        return None
+    commit_hash = getattr(config, "_commit_hash", None)
+    if commit_hash:
+        return commit_hash[:16]
+    digest.update(config.to_json_string().encode("utf-8"))
+    for name, tensor in model.state_dict().items():
+        digest.update(name.encode("utf-8"))
+        digest.update(tensor.detach().cpu().numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def create_embedding_cache(model_name: str, model: Any) -> Optional[EmbeddingCache]:
+    """환경변수 설정으로 임베딩 캐시 생성 (EMBEDDING_CACHE_ENABLED=false 이면 None)"""
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    cache_dir = os.getenv("EMBEDDING_CACHE_DIR", os.path.join("cache", "embeddings")) or None
+    try:
+        version = model_fingerprint(model)
+    except Exception as e:
+        logger.warning(f"임베딩 모델 버전 확인 실패: {e}")
+        version = None
+    if version is None:
+        # 다른 모델의 벡터를 디스크에서 읽지 않도록 프로세스 내 LRU 만 사용
+        logger.warning("임베딩 모델 버전을 알 수 없음 (디스크 캐시 미사용, LRU 만 사용)")
+        version, cache_dir = "unknown", None
+    return EmbeddingCache(
+        model_name=model_name,
+        model_version=version,
+        dim=int(model.get_sentence_embedding_dimension()),
+        cache_dir=cache_dir,
+        lru_size=int(os.getenv("EMBEDDING_CACHE_LRU_SIZE", "10000")),
+        disk_capacity=int(os.getenv("EMBEDDING_CACHE_DISK_CAPACITY", "100000")),
+        # 백엔드(torch/ONNX int8)가 다르면 벡터도 달라지므로 네임스페이스를 나눔
+        backend=model_backend(model),
+        prune_grace_seconds=float(os.getenv("EMBEDDING_CACHE_PRUNE_GRACE_SECONDS", "3600")),
+    )
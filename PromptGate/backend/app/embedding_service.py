@@ -0,0 +1,257 @@
+"""
+임베딩 마이크로배칭 서비스
+동시에 들어온 encode 요청을 최대 배치 크기 / 최대 대기 시간(ms) 단위로 모아
+전용 스레드에서 한 번에 encode 하고 요청별 future 를 완료시킨다.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+LATENCY_MS_BUCKETS = [0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000]
+
+class Histogram:
+    """고정 버킷 누적 히스토그램 (Prometheus le 버킷과 같은 의미)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막은 +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            else:
+                self.counts[-1] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+                running += count
+                cumulative[str(bound)] = running
+            return {
+                "buckets": cumulative,
+                "count": self.count,
+                "sum": round(self.total, 3),
+                "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            }
+
+@dataclass
+class _EmbeddingRequest:
+    text: str
+    future: Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+_STOP = object()
+
+class EmbeddingBatcher:
+    """SentenceTransformer encode 마이크로배처"""
+
+    def __init__(self, model: Any, max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 num_threads: Optional[int] = None, name: str = "embedding", cache: Any = None):
+        self.model = model
+        self.cache = cache  # EmbeddingCache (적중 시 큐를 거치지 않고 바로 반환)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.num_threads = num_threads
+        self.name = name
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_latency_histogram = Histogram(LATENCY_MS_BUCKETS)
+        self.encode_latency_histogram = Histogram(LATENCY_MS_BUCKETS)
+        self.errors = 0
+
+    # ------------------------------------------------------------------
+    # 요청 API
+    # ------------------------------------------------------------------
+    def submit(self, text: str) -> Future:
+        """임베딩 요청 등록 (결과는 numpy 벡터)"""
+        future: Future = Future()
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                future.set_result(cached)
+                return future
+        self._ensure_started()
+        self._queue.put(_EmbeddingRequest(text, future))
+        return future
+
+    async def embed(self, text: str):
+        """이벤트 루프를 막지 않고 임베딩 대기"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    async def embed_many(self, texts: List[str]) -> list:
+        """여러 문장을 개별 요청으로 넣어 다른 요청과 함께 배치되도록 함"""
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    def embed_sync(self, text: str, timeout: Optional[float] = None):
+        """동기 호출자용 (스레드에서 호출)"""
+        return self.submit(text).result(timeout=timeout)
+
+    # ------------------------------------------------------------------
+    # 워커 스레드
+    # ------------------------------------------------------------------
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+            self._thread.start()
+
+    def _configure_torch(self):
+        if not self.num_threads:
+            return
+        try:
+            import torch
+
+            torch.set_num_threads(self.num_threads)
+            logger.info(f"torch intra-op 스레드 수 설정: {self.num_threads}")
+        except ImportError:
+            logger.warning("PyTorch 라이브러리가 설치되지 않음")
+
+    def _collect_batch(self, first: _EmbeddingRequest) -> List[_EmbeddingRequest]:
+        """첫 요청 이후 max_wait 동안 max_batch_size 까지 수집"""
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        self._configure_torch()
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch = [request for request in self._collect_batch(first)
+                     if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for request in batch:
+                self.queue_latency_histogram.observe((started - request.enqueued_at) * 1000)
+            self.batch_size_histogram.observe(len(batch))
+
+            # 같은 배치 안의 중복 문장은 한 번만 encode
+            texts = list(dict.fromkeys(request.text for request in batch))
+            try:
+                vectors = self.model.encode(
+                    texts,
+                    batch_size=len(texts),
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                )
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"임베딩 배치 실패 ({len(batch)}건): {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            self.encode_latency_histogram.observe((time.perf_counter() - started) * 1000)
+            by_text = dict(zip(texts, vectors))
+            for request in batch:
+                request.future.set_result(by_text[request.text])
+            if self.cache is not None:
+                for text, vector in by_text.items():
+                    try:
+                        self.cache.put(text, vector)
+                    except Exception as e:
+                        logger.warning(f"임베딩 캐시 저장 실패: {e}")
+
+    def close(self):
+        """워커 종료 (대기 중인 요청은 처리 후 종료)"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """배치 크기 / 큐 대기 / encode 시간 히스토그램"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "num_threads": self.num_threads,
+            "queue_depth": self._queue.qsize(),
+            "errors": self.errors,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "queue_latency_ms": self.queue_latency_histogram.snapshot(),
+            "encode_latency_ms": self.encode_latency_histogram.snapshot(),
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+        }
+
+# 모델별 배처 (모델 자체는 model_registry 에서 공유)
+_embedding_services: Dict[str, EmbeddingBatcher] = {}
+_embedding_services_lock = threading.Lock()
+
+def get_embedding_service(model_name: Optional[str] = None) -> EmbeddingBatcher:
+    """모델별 임베딩 배처 반환 (모델 로드는 최초 호출 시, 블로킹)"""
+    from .model_registry import get_embedding_model, DEFAULT_EMBEDDING_MODEL
+    from .embedding_cache import create_embedding_cache
+
+    model_name = model_name or os.getenv("EMBEDDING_MODEL_NAME", DEFAULT_EMBEDDING_MODEL)
+    service = _embedding_services.get(model_name)
+    if service is not None:
+        return service
+
+    with _embedding_services_lock:
+        service = _embedding_services.get(model_name)
+        if service is None:
+            num_threads = os.getenv("EMBEDDING_TORCH_THREADS")
+            model = get_embedding_model(model_name)
+            service = EmbeddingBatcher(
+                model,
+                max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32")),
+                max_wait_ms=float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5")),
+                num_threads=int(num_threads) if num_threads else None,
+                name=model_name.split("/")[-1],
+                cache=create_embedding_cache(model_name, model),
+            )
+            _embedding_services[model_name] = service
+            logger.info(f"임베딩 배처 생성: {model_name} (batch={service.max_batch_size}, "
+                        f"wait={service.max_wait * 1000}ms)")
+    return service
+
+def get_embedding_service_stats() -> Dict[str, Any]:
+    """모든 임베딩 배처 통계"""
+    return {name: service.get_stats() for name, service in list(_embedding_services.items())}
+
+def close_embedding_services():
+    """모든 임베딩 배처 종료"""
+    with _embedding_services_lock:
+        for service in _embedding_services.values():
+            service.close()
+        _embedding_services.clear()
@@ -0,0 +1,272 @@
+"""
+MLClassifier 단일 패스 특성 추출기
+텍스트 통계는 코드포인트 분류표 한 번 조회(NumPy)로, 악의적 패턴 수는 키워드 전체를 묶은 정규식 한 번의
+스캔으로 계산해 고정 레이아웃 벡터(FEATURE_NAMES 순서)를 반환한다.
+
+패턴은 모두 "키워드.*키워드" 형태라 키워드 위치만 알면 줄 단위로 re.findall(..., re.IGNORECASE) 과
+같은 개수를 재현할 수 있다. (. 은 개행을 넘지 않고, 탐욕적 .* 는 줄의 마지막 끝 키워드까지 소비)
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+TEXT_FEATURES = (
+    "length",
+    "word_count",
+    "sentence_count",
+    "has_numbers",
+    "has_special_chars",
+    "has_uppercase",
+    "has_lowercase",
+    "has_korean",
+    "has_english",
+    "avg_word_length",
+)
+
+# 패턴 = 대안 목록, 대안 = 순서대로 나타나야 하는 키워드 (사이는 탐욕적 .*)
+PATTERN_FEATURES: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    "ignore_instructions": (("ignore", "instruction"),),         # ignore.*instructions?
+    "forget_everything": (("forget", "everything"),),            # forget.*everything
+    "system_prompt": (("system", "prompt"),),                    # system.*prompt
+    "role_play": (("role", "play"), ("pretend", "to", "be")),    # role.*play|pretend.*to.*be
+    "jailbreak": (("jailbreak",), ("bypass",)),                  # jailbreak|bypass
+    "admin_access": (("admin",), ("root",), ("sudo",)),          # admin|root|sudo
+    "code_execution": (("execute",), ("run", "code"), ("eval",)),  # execute|run.*code|eval
+    "data_extraction": (("show", "all"), ("list", "all"), ("dump", "data")),  # show.*all|list.*all|dump.*data
+}
+
+# 특성 기반 위험도 가중치 (패턴 특성별)
+PATTERN_WEIGHTS = {
+    "ignore_instructions": 0.3,
+    "forget_everything": 0.3,
+    "system_prompt": 0.2,
+    "role_play": 0.2,
+    "jailbreak": 0.4,
+    "admin_access": 0.3,
+    "code_execution": 0.4,
+    "data_extraction": 0.3,
+}
+
+# 휴리스틱 위험도 지표 (패턴, 가중치)
+HEURISTIC_PATTERNS: Tuple[Tuple[Tuple[Tuple[str, ...], ...], float], ...] = (
+    ((("ignore", "instruction"),), 0.3),
+    ((("forget", "everything"),), 0.3),
+    ((("system", "prompt"),), 0.2),
+    ((("role", "play"),), 0.2),
+    ((("jailbreak",),), 0.4),
+    ((("admin",), ("root",), ("sudo",)), 0.3),
+    ((("execute",), ("run", "code")), 0.4),
+    ((("show", "all"), ("list", "all")), 0.3),
+    ((("bypass", "security"),), 0.4),
+    ((("override", "system"),), 0.3),
+)
+
+FEATURE_NAMES = tuple(f"text_{name}" for name in TEXT_FEATURES) + tuple(f"pattern_{name}" for name in PATTERN_FEATURES)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+PATTERN_OFFSET = len(TEXT_FEATURES)
+
+_BOOL_FEATURES = {f"text_{name}" for name in TEXT_FEATURES if name.startswith("has_")}
+_FLOAT_FEATURES = {"text_avg_word_length"}
+
+# 코드포인트 분류 비트
+_SPACE, _DIGIT, _SPECIAL, _UPPER, _LOWER, _KOREAN, _SENTENCE = (1 << i for i in range(7))
+_SPECIAL_CHARS = set('!@#$%^&*(),.?":{}|<>')
+_BMP = 0x10000
+
+# str.lower() 로는 접히지 않지만 re.IGNORECASE 에서 ASCII 와 매치되는 문자 (İ 는 lower() 시 길이도 바뀜)
+_FOLD_SPECIAL = str.maketrans({"İ": "i", "ı": "i", "ſ": "s"})
+
+def _char_class(ch: str) -> int:
+    bits = 0
+    if ch.isspace():
+        bits |= _SPACE
+    if ch.isdecimal():  # 정규식 \d (유니코드 Nd)
+        bits |= _DIGIT
+    if ch in _SPECIAL_CHARS:
+        bits |= _SPECIAL
+    if "A" <= ch <= "Z":
+        bits |= _UPPER
+    if "a" <= ch <= "z":
+        bits |= _LOWER
+    if "가" <= ch <= "힣":
+        bits |= _KOREAN
+    if ch in ".!?":
+        bits |= _SENTENCE
+    return bits
+
+def _runs(mask: np.ndarray) -> int:
+    """True 구간 개수"""
+    if not mask.size:
+        return 0
+    return int(mask[0]) + int(np.count_nonzero(mask[1:] & ~mask[:-1]))
+
+class FeatureExtractor:
+    """컴파일된 특성 추출기 (스레드 안전, 상태 없음)"""
+
+    def __init__(self):
+        self._table = np.array([_char_class(chr(cp)) for cp in range(_BMP)], dtype=np.uint8)
+
+        keywords = sorted({keyword
+                           for alternatives in list(PATTERN_FEATURES.values()) + [p for p, _ in HEURISTIC_PATTERNS]
+                           for alternative in alternatives for keyword in alternative})
+        # 한 위치에서 시작하는 키워드가 하나뿐이어야 매치 문자열로 키워드를 식별할 수 있음
+        for keyword in keywords:
+            if any(other != keyword and other.startswith(keyword) for other in keywords):
+                raise ValueError(f"키워드가 다른 키워드의 접두사입니다: {keyword}")
+        self._scanner = re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+        self._pattern_weights = np.zeros(len(FEATURE_NAMES), dtype=np.float64)
+        for name, weight in PATTERN_WEIGHTS.items():
+            self._pattern_weights[FEATURE_INDEX[f"pattern_{name}"]] = weight
+
+    # ------------------------------------------------------------------
+    # 텍스트 통계
+    # ------------------------------------------------------------------
+    def _classify(self, text: str) -> np.ndarray:
+        """코드포인트별 분류 비트"""
+        codepoints = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        classes = self._table[np.minimum(codepoints, _BMP - 1)]
+        wide = codepoints >= _BMP
+        if wide.any():
+            classes = classes.copy()
+            classes[wide] = [_char_class(chr(cp)) for cp in codepoints[wide]]
+        return classes
+
+    def _text_stats(self, text: str, out: np.ndarray):
+        """TEXT_FEATURES 값"""
+        classes = self._classify(text)
+        present = int(np.bitwise_or.reduce(classes)) if classes.size else 0
+        non_space = (classes & _SPACE) == 0
+        words = _runs(non_space)
+
+        out[0] = len(text)
+        out[1] = words
+        out[2] = _runs((classes & _SENTENCE) != 0) + 1  # re.split(r'[.!?]+') 조각 수
+        out[3] = bool(present & _DIGIT)
+        out[4] = bool(present & _SPECIAL)
+        out[5] = bool(present & _UPPER)
+        out[6] = bool(present & _LOWER)
+        out[7] = bool(present & _KOREAN)
+        out[8] = bool(present & (_UPPER | _LOWER))
+        out[9] = np.count_nonzero(non_space) / words if words else 0
+
+    # ------------------------------------------------------------------
+    # 패턴 개수
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _fold(text: str) -> str:
+        """대소문자 접기 (문자 위치 유지)"""
+        if "İ" in text or "ı" in text or "ſ" in text:
+            text = text.translate(_FOLD_SPECIAL)
+        return text.lower()
+
+    def _scan(self, text: str) -> List[Dict[str, List[int]]]:
+        """키워드 시작 위치 (줄별, 오름차순)"""
+        folded = self._fold(text)
+        lines: Dict[int, Dict[str, List[int]]] = {}
+        breaks = []
+        position = folded.find("\n")
+        while position != -1:
+            breaks.append(position)
+            position = folded.find("\n", position + 1)
+
+        # 겹친 키워드도 찾도록 매치 시작 다음 글자부터 재탐색
+        match = self._scanner.search(folded)
+        while match:
+            start = match.start()
+            lines.setdefault(bisect_left(breaks, start), {}).setdefault(match.group(), []).append(start)
+            match = self._scanner.search(folded, start + 1)
+        return list(lines.values())
+
+    @staticmethod
+    def _count(line: Dict[str, List[int]], alternatives: Sequence[Tuple[str, ...]]) -> int:
+        """한 줄에서 re.findall('A.*B|C|...') 의 매치 수"""
+        count = 0
+        position = 0
+        while True:
+            best: Optional[Tuple[int, int, int]] = None
+            for order, alternative in enumerate(alternatives):
+                starts = line.get(alternative[0])
+                if not starts:
+                    continue
+                i = bisect_left(starts, position)
+                if i == len(starts):
+                    continue
+                start = starts[i]
+                # 가장 이른 시작에서 체인이 안 되면 그 뒤의 시작에서도 안 됨
+                cursor = start + len(alternative[0])
+                for keyword in alternative[1:]:
+                    following = line.get(keyword) or []
+                    j = bisect_left(following, cursor)
+                    if j == len(following):
+                        cursor = None
+                        break
+                    cursor = following[j] + len(keyword)
+                if cursor is None:
+                    continue
+                last = alternative[-1]
+                end = line[last][-1] + len(last) if len(alternative) > 1 else cursor
+                if best is None or (start, order) < best[:2]:
+                    best = (start, order, end)
+            if best is None:
+                return count
+            count += 1
+            position = best[2]
+
+    # ------------------------------------------------------------------
+    # 공개 API
+    # ------------------------------------------------------------------
+    def extract(self, text: str, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """FEATURE_NAMES 순서의 특성 벡터"""
+        vector = out if out is not None else np.zeros(len(FEATURE_NAMES), dtype=np.float64)
+        self._text_stats(text, vector)
+        lines = self._scan(text)
+        for k, alternatives in enumerate(PATTERN_FEATURES.values()):
+            vector[PATTERN_OFFSET + k] = sum(self._count(line, alternatives) for line in lines)
+        return vector
+
+    def extract_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), len(FEATURE_NAMES)) 특성 행렬"""
+        matrix = np.zeros((len(texts), len(FEATURE_NAMES)), dtype=np.float64)
+        for row, text in enumerate(texts):
+            self.extract(text, out=matrix[row])
+        return matrix
+
+    def feature_risk_score(self, features: np.ndarray) -> float:
+        """패턴 특성 가중합 (최대 1.0)"""
+        return min(float(features @ self._pattern_weights), 1.0)
+
+    def heuristic_risk_score(self, text: str) -> float:
+        """휴리스틱 지표 가중합 (최대 1.0)"""
+        lines = self._scan(text)
+        total = sum(weight * sum(self._count(line, alternatives) for line in lines)
+                    for alternatives, weight in HEURISTIC_PATTERNS)
+        return min(total, 1.0)
+
+def features_to_dict(features: np.ndarray) -> Dict[str, Any]:
+    """특성 벡터 → 이름별 dict (API 응답용)"""
+    result: Dict[str, Any] = {}
+    for name, value in zip(FEATURE_NAMES, features.tolist()):
+        if name in _BOOL_FEATURES:
+            result[name] = bool(value)
+        elif name in _FLOAT_FEATURES:
+            result[name] = value
+        else:
+            result[name] = int(value)
+    return result
+
+_feature_extractor_instance: Optional[FeatureExtractor] = None
+_feature_extractor_lock = threading.Lock()
+
+def get_feature_extractor() -> FeatureExtractor:
+    """특성 추출기 싱글톤 (코드포인트 분류표는 최초 1회 생성)"""
+    global _feature_extractor_instance
+    if _feature_extractor_instance is None:
+        with _feature_extractor_lock:
+            if _feature_extractor_instance is None:
+                _feature_extractor_instance = FeatureExtractor()
+    return _feature_extractor_instance
@@ -1,17 +1,23 @@
 import re
+import os
 import time
 import asyncio
 from typing import Dict, Any
 from datetime import datetime
 from app.logger import get_logger, log_to_elasticsearch
-from app.vector_store import check_similarity
+from app.vector_store import match_similarity
 from app.policy_client import get_block_keywords, get_mask_keywords
 from app.rebuff_integration import rebuff_integration
-from app.policy_engine import get_policy_engine, RequestContext, PolicyAction
+from app.policy_engine import get_policy_engine, RequestContext, PolicyAction, PolicyResult
 from app.secret_scanner import get_secret_scanner, SecretScanResult, SecretType, SecretSeverity
+from app.deadline import run_detector, reserve_scope, COMPLETED
+from app.telemetry import get_telemetry
 
 logger = get_logger("filter")
 
+# 1단계 탐지기가 마감 시간을 다 써도 정책 평가(fail-closed)를 할 수 있도록 남겨 두는 시간
+POLICY_RESERVE_SECONDS = float(os.getenv("POLICY_RESERVE_MS", "50")) / 1000.0
+
 
 def mask_prompt(prompt: str) -> str:
     masked = prompt
@@ -40,6 +46,15 @@ def mask_prompt(prompt: str) -> str:
     return masked
 
 
+def fallback_policy_action(filter_results: list) -> PolicyAction:
+    """정책 평가가 끝나지 못했을 때(fail-open) 1단계 필터 결과로 정하는 조치"""
+    actions = {item.get("action") for item in filter_results}
+    if "block" in actions:
+        return PolicyAction.DENY
+    if "warn" in actions:
+        return PolicyAction.ALERT
+    return PolicyAction.ALLOW
+
 async def evaluate_prompt_with_policy(
     prompt: str, 
     tenant_id: str = "kra-internal",
@@ -67,13 +82,32 @@ async def evaluate_prompt_with_policy(
         Dict: 평가 결과
     """
     start_time = time.time()
+    telemetry = get_telemetry()
     
     try:
-        # 1단계: 기본 필터링 (기존 로직)
+        # 1단계: 기본 필터링 (요청 마감 시간 안에서 병렬 실행, 탐지기별 상태 기록)
         filter_results = []
+
+        async def detect_keywords():
+            # DB 조회는 스레드에서 (이벤트 루프를 막지 않도록)
+            keywords = await asyncio.to_thread(get_block_keywords)
+            return [k for k in keywords if k in prompt]
+
+        async def scan_secrets():
+            secret_scanner = await get_secret_scanner()
+            return await secret_scanner.scan_text(prompt, f"user:{user_id}, session:{session_id}")
+
+        with reserve_scope(POLICY_RESERVE_SECONDS):
+            keyword_outcome, rebuff_outcome, vector_outcome, secret_outcome = await asyncio.gather(
+                run_detector("keyword", detect_keywords),
+                run_detector("rebuff", lambda: rebuff_integration.detect_prompt_injection(prompt)),
+                run_detector("vector", lambda: match_similarity(prompt, tenant_id)),
+                run_detector("secret", scan_secrets)
+            )
+        detector_outcomes = [keyword_outcome, rebuff_outcome, vector_outcome, secret_outcome]
         
         # 차단 키워드 검사
-        blocked_keywords = [k for k in get_block_keywords() if k in prompt]
+        blocked_keywords = keyword_outcome.result or []
         if blocked_keywords:
             filter_results.append({
                 "filter_type": "keyword",
@@ -83,8 +117,8 @@ async def evaluate_prompt_with_policy(
             })
         
         # Rebuff SDK 기반 프롬프트 인젝션 탐지
-        rebuff_result = await rebuff_integration.detect_prompt_injection(prompt)
-        if rebuff_result["is_injection"]:
+        rebuff_result = rebuff_outcome.result
+        if rebuff_result and rebuff_result["is_injection"]:
             filter_results.append({
                 "filter_type": "rebuff",
                 "action": "block",
@@ -96,20 +130,20 @@ async def evaluate_prompt_with_policy(
                 }
             })
         
-        # 벡터 기반 유사도 검사
-        if check_similarity(prompt):
+        # 벡터 기반 유사도 검사 (테넌트 임베딩 규칙의 action 적용)
+        vector_policy = vector_outcome.result
+        if vector_policy:
             filter_results.append({
                 "filter_type": "vector",
-                "action": "block",
+                "action": vector_policy.filter_action,
                 "reason": "Similar to known dangerous prompt",
-                "details": {"similarity_score": 0.8}
+                "details": {"similarity_score": 0.8, "rule_id": vector_policy.rule_id}
             })
         
         # 고급 Secret Scanner 검사
-        secret_scanner = await get_secret_scanner()
-        secret_scan_result = await secret_scanner.scan_text(prompt, f"user:{user_id}, session:{session_id}")
+        secret_scan_result = secret_outcome.result
         
-        if secret_scan_result.has_secrets:
+        if secret_scan_result is not None and secret_scan_result.has_secrets:
             # 고위험 시크릿이 발견된 경우
             high_risk_secrets = [s for s in secret_scan_result.secrets 
                                if s.severity in [SecretSeverity.HIGH, SecretSeverity.CRITICAL]]
@@ -143,8 +177,6 @@ async def evaluate_prompt_with_policy(
                 })
         
         # 2단계: OPA 정책 엔진 평가
-        policy_engine = await get_policy_engine()
-        
         # 요청 컨텍스트 생성
         context = RequestContext(
             tenant_id=tenant_id,
@@ -159,7 +191,23 @@ async def evaluate_prompt_with_policy(
         )
         
         # 정책 평가 실행
-        policy_result = await policy_engine.evaluate(context, prompt, filter_results)
+        async def evaluate_policy():
+            policy_engine = await get_policy_engine()
+            return await policy_engine.evaluate(context, prompt, filter_results)
+
+        policy_outcome = await run_detector("policy", evaluate_policy)
+        detector_outcomes.append(policy_outcome)
+        if policy_outcome.status == COMPLETED:
+            policy_result = policy_outcome.result
+        else:
+            # fail-closed 이면 아래에서 차단, fail-open 이면 1단계 탐지 결과로 판정
+            policy_result = PolicyResult(
+                action=fallback_policy_action(filter_results),
+                reason=f"Policy evaluation {policy_outcome.status}",
+                confidence=0.0,
+                violations=[f"policy_{policy_outcome.status}"],
+                processing_time=policy_outcome.elapsed_ms / 1000
+            )
         
         # 3단계: 최종 결과 결정
         if policy_result.action == PolicyAction.DENY:
@@ -200,6 +248,18 @@ async def evaluate_prompt_with_policy(
                 "metadata": policy_result.metadata
             }
         
+        # 끝나지 못한 fail-closed 탐지기가 있으면 정책 결과와 관계없이 차단
+        unverified = [outcome for outcome in detector_outcomes if outcome.should_block]
+        if unverified and not result["is_blocked"]:
+            result.update({
+                "is_blocked": True,
+                "reason": "Detector not completed (fail-closed): " + ", ".join(
+                    f"{outcome.name}={outcome.status}" for outcome in unverified),
+                "detection_method": "deadline",
+                "risk_score": 1.0
+            })
+        result["detectors"] = {outcome.name: outcome.to_dict() for outcome in detector_outcomes}
+        
         # 마스킹된 프롬프트 생성
         masked_prompt = mask_prompt(prompt)
         result["masked_prompt"] = masked_prompt
@@ -227,15 +287,21 @@ async def evaluate_prompt_with_policy(
             "risk_score": result["risk_score"],
             "processing_time": processing_time,
             "policy_violations": policy_result.violations,
+            "detectors": result["detectors"],
             "timestamp": datetime.now().isoformat()
         }
         
-        await log_to_elasticsearch(log_data)
+        # Elasticsearch 클라이언트는 동기식이므로 스레드에서 전송
+        with telemetry.stage("logging"):
+            await asyncio.to_thread(log_to_elasticsearch, "prompt-log", log_data)
         
+        telemetry.record_evaluation("evaluate", tenant_id, "blocked" if result["is_blocked"] else "allowed",
+                                    time.time() - start_time)
         return result
         
     except Exception as e:
         logger.error(f"프롬프트 평가 실패: {e}")
+        telemetry.record_evaluation("evaluate", tenant_id, "error", time.time() - start_time)
         return {
             "is_blocked": True,
             "reason": f"Evaluation failed: {str(e)}",
@@ -261,6 +327,7 @@ async def evaluate_prompt(prompt: str, user_id: int = None, session_id: str = No
         Dict: 평가 결과
     """
     start_time = time.time()
+    telemetry = get_telemetry()
     
     try:
         # 1. 기본 키워드 필터링 (개선된 버전)
@@ -289,16 +356,17 @@ async def evaluate_prompt(prompt: str, user_id: int = None, session_id: str = No
         ]
         
         # 데이터베이스에서 키워드 가져오기 시도
-        try:
-            db_blocked_keywords = get_block_keywords()
-            all_blocked_keywords = hardcoded_blocked_keywords + db_blocked_keywords
-        except Exception as e:
-            logger.warning(f"데이터베이스 키워드 로드 실패, 하드코딩된 키워드만 사용: {e}")
-            all_blocked_keywords = hardcoded_blocked_keywords
+        with telemetry.stage("keyword"):
+            try:
+                db_blocked_keywords = get_block_keywords()
+                all_blocked_keywords = hardcoded_blocked_keywords + db_blocked_keywords
+            except Exception as e:
+                logger.warning(f"데이터베이스 키워드 로드 실패, 하드코딩된 키워드만 사용: {e}")
+                all_blocked_keywords = hardcoded_blocked_keywords
         
-        # 키워드 검사 (대소문자 무시)
-        prompt_lower = prompt.lower()
-        detected_keywords = [keyword for keyword in all_blocked_keywords if keyword.lower() in prompt_lower]
+            # 키워드 검사 (대소문자 무시)
+            prompt_lower = prompt.lower()
+            detected_keywords = [keyword for keyword in all_blocked_keywords if keyword.lower() in prompt_lower]
         
         if detected_keywords:
             return {
@@ -312,72 +380,74 @@ async def evaluate_prompt(prompt: str, user_id: int = None, session_id: str = No
             }
         
         # 2. Rebuff SDK를 통한 프롬프트 인젝션 탐지 (개선된 버전)
-        try:
-            from app.rebuff_sdk_client import get_rebuff_client
-            rebuff_client = await get_rebuff_client()
-            rebuff_result = await rebuff_client.detect_injection(prompt)
-            
-            # Rebuff SDK 결과 확인 (더 엄격한 기준 적용)
-            if rebuff_result.is_injection or rebuff_result.heuristic_score > 0.5:
-                return {
-                    "is_blocked": True,
-                    "reason": f"프롬프트 인젝션 탐지: {rebuff_result.reason}",
-                    "detection_method": "rebuff_sdk",
-                    "risk_score": rebuff_result.heuristic_score,
-                    "masked_prompt": mask_prompt(prompt),
-                    "processing_time": time.time() - start_time,
-                    "rebuff_details": {
-                        "is_injection": rebuff_result.is_injection,
-                        "heuristic_score": rebuff_result.heuristic_score,
-                        "vector_score": getattr(rebuff_result, 'vector_score', 0.0),
-                        "model_score": getattr(rebuff_result, 'model_score', 0.0)
-                    }
-                }
-        except Exception as e:
-            logger.warning(f"Rebuff SDK 탐지 실패: {e}")
-            # Rebuff SDK 실패 시 추가적인 패턴 기반 탐지
-            injection_patterns = [
-                r"ignore\s+all\s+previous\s+instructions",
-                r"forget\s+everything",
-                r"you\s+are\s+now\s+",
-                r"pretend\s+to\s+be",
-                r"act\s+as\s+if",
-                r"roleplay\s+as",
-                r"jailbreak",
-                r"dan\s+mode",
-                r"developer\s+mode",
-                r"admin\s+mode"
-            ]
+        with telemetry.stage("rebuff"):
+            try:
+                from app.rebuff_sdk_client import get_rebuff_client
+                rebuff_client = await get_rebuff_client()
+                rebuff_result = await rebuff_client.detect_injection(prompt)
             
-            import re
-            for pattern in injection_patterns:
-                if re.search(pattern, prompt.lower()):
+                # Rebuff SDK 결과 확인 (더 엄격한 기준 적용)
+                if rebuff_result.is_injection or rebuff_result.heuristic_score > 0.5:
                     return {
                         "is_blocked": True,
-                        "reason": f"패턴 기반 프롬프트 인젝션 탐지: {pattern}",
-                        "detection_method": "pattern_fallback",
-                        "risk_score": 0.8,
+                        "reason": f"프롬프트 인젝션 탐지: {rebuff_result.reason}",
+                        "detection_method": "rebuff_sdk",
+                        "risk_score": rebuff_result.heuristic_score,
                         "masked_prompt": mask_prompt(prompt),
-                        "processing_time": time.time() - start_time
+                        "processing_time": time.time() - start_time,
+                        "rebuff_details": {
+                            "is_injection": rebuff_result.is_injection,
+                            "heuristic_score": rebuff_result.heuristic_score,
+                            "vector_score": getattr(rebuff_result, 'vector_score', 0.0),
+                            "model_score": getattr(rebuff_result, 'model_score', 0.0)
+                        }
                     }
+            except Exception as e:
+                logger.warning(f"Rebuff SDK 탐지 실패: {e}")
+                # Rebuff SDK 실패 시 추가적인 패턴 기반 탐지
+                injection_patterns = [
+                    r"ignore\s+all\s+previous\s+instructions",
+                    r"forget\s+everything",
+                    r"you\s+are\s+now\s+",
+                    r"pretend\s+to\s+be",
+                    r"act\s+as\s+if",
+                    r"roleplay\s+as",
+                    r"jailbreak",
+                    r"dan\s+mode",
+                    r"developer\s+mode",
+                    r"admin\s+mode"
+                ]
+            
+                import re
+                for pattern in injection_patterns:
+                    if re.search(pattern, prompt.lower()):
+                        return {
+                            "is_blocked": True,
+                            "reason": f"패턴 기반 프롬프트 인젝션 탐지: {pattern}",
+                            "detection_method": "pattern_fallback",
+                            "risk_score": 0.8,
+                            "masked_prompt": mask_prompt(prompt),
+                            "processing_time": time.time() - start_time
+                        }
         
         # 3. 벡터 유사도 검사
-        try:
-            from app.embedding_filter import get_embedding_filter
-            embedding_filter = await get_embedding_filter()
-            similarity_result = await embedding_filter.check_similarity(prompt)
+        with telemetry.stage("vector"):
+            try:
+                from app.embedding_filter import get_embedding_filter
+                embedding_filter = await get_embedding_filter()
+                similarity_result = await embedding_filter.check_similarity(prompt)
             
-            if similarity_result["is_similar"]:
-                return {
-                    "is_blocked": True,
-                    "reason": f"유사한 차단된 프롬프트 탐지: {similarity_result['reason']}",
-                    "detection_method": "embedding_filter",
-                    "risk_score": similarity_result["similarity_score"],
-                    "masked_prompt": mask_prompt(prompt),
-                    "processing_time": time.time() - start_time
-                }
-        except Exception as e:
-            logger.warning(f"벡터 유사도 검사 실패: {e}")
+                if similarity_result["is_similar"]:
+                    return {
+                        "is_blocked": True,
+                        "reason": f"유사한 차단된 프롬프트 탐지: {similarity_result['reason']}",
+                        "detection_method": "embedding_filter",
+                        "risk_score": similarity_result["similarity_score"],
+                        "masked_prompt": mask_prompt(prompt),
+                        "processing_time": time.time() - start_time
+                    }
+            except Exception as e:
+                logger.warning(f"벡터 유사도 검사 실패: {e}")
         
         # 4. ML 분류기 검사 (개선된 버전)
         try:
@@ -12,6 +12,7 @@ import time
 
 from .filter import evaluate_prompt
 from .dlp_client import DLPClient, DLPResult, DLPAction, create_dlp_client, load_dlp_config
+from .deadline import run_detector, COMPLETED
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +46,9 @@ class SecurityResult:
     masked_prompt: Optional[str] = None
     audit_log_id: Optional[str] = None
     
+    # 탐지기별 상태 (completed / skipped / timed_out / failed)
+    detectors: Optional[Dict[str, Any]] = None
+    
     def __post_init__(self):
         if self.detection_methods is None:
             self.detection_methods = []
@@ -133,21 +137,23 @@ class HybridSecurityEngine:
         # 2차 검증: DLP
         dlp_result = None
         dlp_processing_time = None
+        dlp_status = None
         if self.dlp_enabled and self.dlp_client:
-            try:
-                dlp_start = time.time()
-                dlp_result = await self._validate_with_dlp(
-                    prompt, user_id, session_id, context
-                )
-                dlp_processing_time = time.time() - dlp_start
+            # 요청 마감 시간 안에서 실행, 끝나지 못하면 탐지기 fail 모드 적용 (기본 fail-closed)
+            outcome = await run_detector(
+                "dlp", lambda: self._validate_with_dlp(prompt, user_id, session_id, context)
+            )
+            dlp_processing_time = outcome.elapsed_ms / 1000
+            dlp_status = outcome.to_dict()
+            if outcome.status == COMPLETED:
+                dlp_result = outcome.result
                 logger.info(f"DLP 검증 완료: {dlp_processing_time:.3f}초")
-            except Exception as e:
-                logger.error(f"DLP 검증 실패: {e}")
+            elif outcome.should_block:
                 dlp_result = DLPResult(
                     action=DLPAction.BLOCK,
                     confidence=1.0,
-                    reason=f"DLP 검증 실패: {str(e)}",
-                    policy_violations=["dlp_system_error"]
+                    reason=f"DLP 검증 실패 ({outcome.status}): {outcome.error}",
+                    policy_violations=[f"dlp_{outcome.status}"]
                 )
         
         # 결과 통합
@@ -157,6 +163,8 @@ class HybridSecurityEngine:
         
         total_time = time.time() - start_time
         final_result.processing_time = total_time
+        if dlp_status is not None:
+            final_result.detectors = {"dlp": dlp_status}
         
         # 감사 로그 기록
         if self.dlp_enabled and self.dlp_client:
@@ -0,0 +1,392 @@
+"""
+로컬 벡터 인덱스
+Qdrant 차단 프롬프트 컬렉션을 프로세스 메모리에 미러링해 저지연 기본 경로 또는 Qdrant 장애 시
+대체 경로로 사용 (소규모: NumPy 전수 코사인 top-k, 대규모: hnswlib HNSW)
+
+동기화: Qdrant scroll 로 전체 벡터를 받아 인덱스를 재구성하고, 로컬 스냅샷(npz)으로 저장해
+재시작 시 Qdrant 가 내려가 있어도 마지막 상태로 바로 서비스한다.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class LocalSearchHit:
+    """Qdrant ScoredPoint 와 같은 속성 (id, score, payload)"""
+    id: Any
+    score: float
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        return vectors / max(float(np.linalg.norm(vectors)), 1e-12)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+class NumpyVectorIndex:
+    """
+    정규화 행렬 곱 기반 전수 코사인 검색 (수천 건 규모에서 HNSW 보다 빠름)
+
+    (ids, matrix, payloads) 를 하나의 튜플 스냅샷으로 두고 add 는 새 스냅샷을 만들어 한 번에 교체하므로,
+    잠금 없이 검색하는 스레드는 항상 서로 길이가 맞는 스냅샷을 읽는다. (쓰기끼리는 미러의 잠금으로 직렬화)
+    """
+
+    kind = "numpy"
+
+    def __init__(self, ids: List[Any], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        ids = list(ids)
+        matrix = _normalize(vectors) if len(ids) else np.zeros((0, 0), dtype=np.float32)
+        self._snapshot = (ids, matrix, list(payloads))
+        self._positions = {point_id: i for i, point_id in enumerate(ids)}
+
+    @property
+    def ids(self) -> List[Any]:
+        return self._snapshot[0]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._snapshot[1]
+
+    @property
+    def payloads(self) -> List[Dict[str, Any]]:
+        return self._snapshot[2]
+
+    def __len__(self) -> int:
+        return len(self._snapshot[0])
+
+    def add(self, point_id: Any, vector: np.ndarray, payload: Dict[str, Any]):
+        ids, matrix, payloads = self._snapshot
+        row = _normalize(vector)[np.newaxis, :]
+        position = self._positions.get(point_id)
+        if position is None:
+            position = len(ids)
+            ids = ids + [point_id]
+            matrix = row if not position else np.vstack([matrix, row])
+            payloads = payloads + [payload]
+        else:
+            matrix = matrix.copy()
+            matrix[position] = row[0]
+            payloads = list(payloads)
+            payloads[position] = payload
+        self._snapshot = (ids, matrix, payloads)
+        self._positions[point_id] = position
+
+    def search(self, query: np.ndarray, limit: int, score_threshold: Optional[float] = None) -> List[LocalSearchHit]:
+        ids, matrix, payloads = self._snapshot
+        if not ids:
+            return []
+        scores = matrix @ _normalize(query)
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            LocalSearchHit(ids[i], float(scores[i]), payloads[i])
+            for i in top
+            if score_threshold is None or scores[i] >= score_threshold
+        ]
+
+class HnswVectorIndex:
+    """
+    hnswlib HNSW 근사 검색 (cosine)
+
+    hnswlib 는 삽입과 검색을 동시에 할 수 있지만 resize_index 는 검색과 함께 실행할 수 없으므로,
+    용량이 차면 더 큰 새 인덱스를 만들어 교체한다. ids/payloads 는 항목을 인덱스에 넣기 전에 추가하므로
+    검색 결과 라벨은 항상 유효하다.
+    """
+
+    kind = "hnsw"
+
+    def __init__(self, ids: List[Any], vectors: np.ndarray, payloads: List[Dict[str, Any]],
+                 m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.dim = vectors.shape[1]
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.ids = list(ids)
+        self.payloads = list(payloads)
+        self._positions = {point_id: i for i, point_id in enumerate(self.ids)}
+        self.index = self._new_index(max(len(self.ids) * 2, 1024))
+        self.index.add_items(vectors, np.arange(len(self.ids)))
+
+    def _new_index(self, max_elements: int):
+        import hnswlib
+
+        index = hnswlib.Index(space="cosine", dim=self.dim)
+        index.init_index(max_elements=max_elements, M=self.m, ef_construction=self.ef_construction)
+        index.set_ef(self.ef_search)
+        return index
+
+    def _grow(self, max_elements: int):
+        """기존 항목을 옮긴 더 큰 인덱스로 교체 (검색 중인 스레드는 이전 인덱스를 계속 사용)"""
+        index = self._new_index(max_elements)
+        count = self.index.get_current_count()
+        if count:
+            labels = np.arange(count)
+            index.add_items(np.asarray(self.index.get_items(labels), dtype=np.float32), labels)
+        self.index = index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, point_id: Any, vector: np.ndarray, payload: Dict[str, Any]):
+        position = self._positions.get(point_id)
+        if position is None:
+            position = len(self.ids)
+            if position >= self.index.get_max_elements():
+                self._grow(position * 2)
+            self.ids.append(point_id)
+            self.payloads.append(payload)
+            self._positions[point_id] = position
+        else:
+            self.payloads[position] = payload
+        self.index.add_items(np.asarray(vector, dtype=np.float32)[np.newaxis, :], [position])
+
+    def search(self, query: np.ndarray, limit: int, score_threshold: Optional[float] = None) -> List[LocalSearchHit]:
+        index = self.index
+        count = index.get_current_count()
+        if not count:
+            return []
+        labels, distances = index.knn_query(np.asarray(query, dtype=np.float32), k=min(limit, count))
+        hits = []
+        for label, distance in zip(labels[0], distances[0]):
+            score = 1.0 - float(distance)  # cosine distance → similarity
+            if score_threshold is None or score >= score_threshold:
+                hits.append(LocalSearchHit(self.ids[label], score, self.payloads[label]))
+        return hits
+
+def build_local_index(ids: List[Any], vectors: np.ndarray, payloads: List[Dict[str, Any]],
+                      hnsw_threshold: int = 20000):
+    """규모에 따라 NumPy 전수 검색 / HNSW 선택 (hnswlib 미설치 시 NumPy)"""
+    if len(ids) >= hnsw_threshold:
+        try:
+            return HnswVectorIndex(ids, vectors, payloads)
+        except ImportError:
+            logger.warning("hnswlib 라이브러리가 설치되지 않음 (NumPy 전수 검색 사용)")
+    return NumpyVectorIndex(ids, vectors, payloads)
+
+class LocalVectorMirror:
+    """Qdrant 컬렉션의 로컬 미러 (동기화, 스냅샷, 리콜 측정)"""
+
+    def __init__(self, collection_name: str, snapshot_dir: Optional[str] = None,
+                 sync_interval: float = 300.0, hnsw_threshold: int = 20000, recall_check: bool = True,
+                 tenant_id: Optional[str] = None):
+        self.collection_name = collection_name
+        self.tenant_id = tenant_id  # 지정 시 해당 테넌트 + 공용 포인트만 미러링
+        self.name = f"{collection_name}@{tenant_id}" if tenant_id else collection_name
+        self.snapshot_path = os.path.join(snapshot_dir, f"{self.name}.npz") if snapshot_dir else None
+        self.sync_interval = sync_interval
+        self.hnsw_threshold = hnsw_threshold
+        self.recall_check = recall_check
+
+        self.index = None
+        self.last_sync: Optional[float] = None
+        self.last_sync_error: Optional[str] = None
+        self.last_recall: Optional[float] = None
+        self._lock = threading.Lock()
+        self._syncing = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.index is not None
+
+    def is_stale(self) -> bool:
+        return self.last_sync is None or time.time() - self.last_sync >= self.sync_interval
+
+    def mark_stale(self):
+        """다음 검색 시 재동기화되도록 표시 (대량 적재 후 등)"""
+        self.last_sync = None
+
+    def _scope_filter(self):
+        """동기화/리콜 측정 범위 (테넌트 슬라이스면 해당 테넌트 + 공용 포인트, 아니면 컬렉션 전체)"""
+        if not self.tenant_id:
+            return None
+        from .qdrant_profile import build_tenant_filter
+
+        return build_tenant_filter(self.tenant_id)
+
+    def search(self, query: np.ndarray, limit: int, score_threshold: Optional[float] = None) -> List[LocalSearchHit]:
+        index = self.index
+        if index is None:
+            raise RuntimeError(f"로컬 인덱스가 준비되지 않음: {self.name}")
+        return index.search(query, limit, score_threshold)
+
+    def add(self, point_id: Any, vector: np.ndarray, payload: Dict[str, Any]):
+        """Qdrant upsert 와 함께 로컬 인덱스에도 즉시 반영"""
+        with self._lock:
+            if self.index is None:
+                self.index = build_local_index([point_id], np.asarray([vector]), [payload], self.hnsw_threshold)
+            else:
+                self.index.add(point_id, vector, payload)
+
+    # ------------------------------------------------------------------
+    # 동기화
+    # ------------------------------------------------------------------
+    def sync_from_qdrant(self, client: Any, batch_size: int = 1000) -> int:
+        """scroll 로 전체 포인트를 받아 인덱스 재구성 (동시 호출 시 하나만 수행)"""
+        if not self._syncing.acquire(blocking=False):
+            return len(self.index) if self.index is not None else 0
+        try:
+            ids, vectors, payloads = [], [], []
+            offset = None
+            while True:
+                points, offset = client.scroll(collection_name=self.collection_name, limit=batch_size,
+                                               offset=offset, with_payload=True, with_vectors=True,
+                                               scroll_filter=self._scope_filter())
+                for point in points:
+                    ids.append(point.id)
+                    vectors.append(point.vector)
+                    payloads.append(point.payload or {})
+                if offset is None:
+                    break
+
+            index = build_local_index(ids, np.asarray(vectors, dtype=np.float32), payloads, self.hnsw_threshold) \
+                if ids else NumpyVectorIndex([], np.zeros((0, 0)), [])
+            with self._lock:
+                self.index = index
+            self.last_sync = time.time()
+            self.last_sync_error = None
+            self._save_snapshot(ids, vectors, payloads)
+            logger.info(f"로컬 벡터 인덱스 동기화 완료: {self.name} ({len(ids)}건, {index.kind})")
+        except Exception as e:
+            self.last_sync_error = str(e)
+            logger.error(f"로컬 벡터 인덱스 동기화 실패: {e}")
+            raise
+        finally:
+            self._syncing.release()
+
+        # 근사 검색(HNSW)일 때만 Qdrant 대비 리콜 측정 (NumPy 는 전수 검색)
+        if self.recall_check and index.kind == "hnsw":
+            try:
+                self.measure_recall(client)
+            except Exception as e:
+                logger.warning(f"로컬 벡터 인덱스 리콜 측정 실패: {e}")
+        return len(ids)
+
+    def _save_snapshot(self, ids: List[Any], vectors: List[Any], payloads: List[Dict[str, Any]]):
+        if not self.snapshot_path:
+            return
+        import json
+
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            tmp_path = self.snapshot_path + ".tmp.npz"
+            np.savez_compressed(
+                tmp_path,
+                ids=np.asarray([json.dumps(point_id) for point_id in ids]),
+                vectors=np.asarray(vectors, dtype=np.float32),
+                payloads=np.asarray([json.dumps(payload, ensure_ascii=False, default=str) for payload in payloads]),
+                synced_at=np.asarray([self.last_sync or time.time()]),
+            )
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"로컬 벡터 스냅샷 저장 실패: {e}")
+
+    def load_snapshot(self) -> bool:
+        """디스크 스냅샷에서 인덱스 복원 (last_sync 는 스냅샷 시각이므로 곧 재동기화 대상)"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        import json
+
+        try:
+            with np.load(self.snapshot_path, allow_pickle=False) as data:
+                ids = [json.loads(point_id) for point_id in data["ids"]]
+                payloads = [json.loads(payload) for payload in data["payloads"]]
+                vectors = data["vectors"]
+                synced_at = float(data["synced_at"][0])
+            with self._lock:
+                self.index = build_local_index(ids, vectors, payloads, self.hnsw_threshold) if ids \
+                    else NumpyVectorIndex([], np.zeros((0, 0)), [])
+            self.last_sync = synced_at
+            logger.info(f"로컬 벡터 스냅샷 로드: {self.name} ({len(ids)}건)")
+            return True
+        except Exception as e:
+            logger.warning(f"로컬 벡터 스냅샷 로드 실패: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # 리콜 측정
+    # ------------------------------------------------------------------
+    def measure_recall(self, client: Any, queries: Optional[np.ndarray] = None, k: int = 10,
+                       sample_size: int = 50, noise: float = 0.05) -> Optional[float]:
+        """
+        Qdrant top-k 대비 로컬 top-k 리콜
+
+        queries 가 없으면 인덱스 벡터 일부에 노이즈를 더해 질의로 사용한다.
+        """
+        if self.index is None or not len(self.index):
+            return None
+        if queries is None:
+            rng = np.random.default_rng(0)
+            if isinstance(self.index, NumpyVectorIndex):
+                base = self.index.matrix
+            else:
+                base = np.asarray(self.index.index.get_items(list(range(len(self.index)))), dtype=np.float32)
+            picks = rng.choice(len(base), size=min(sample_size, len(base)), replace=False)
+            queries = base[picks] + rng.normal(0, noise, size=(len(picks), base.shape[1])).astype(np.float32)
+
+        matched, total = 0, 0
+        for query in queries:
+            remote = client.search(collection_name=self.collection_name, query_vector=query.tolist(), limit=k,
+                                   query_filter=self._scope_filter())
+            remote_ids = {point.id for point in remote}
+            local_ids = {hit.id for hit in self.search(query, k)}
+            matched += len(remote_ids & local_ids)
+            total += len(remote_ids)
+        self.last_recall = matched / total if total else None
+        logger.info(f"로컬 벡터 인덱스 리콜@{k}: {self.last_recall}")
+        return self.last_recall
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "collection_name": self.collection_name,
+            "tenant_id": self.tenant_id,
+            "ready": self.is_ready,
+            "kind": self.index.kind if self.index is not None else None,
+            "size": len(self.index) if self.index is not None else 0,
+            "last_sync": self.last_sync,
+            "last_sync_error": self.last_sync_error,
+            "last_recall": self.last_recall,
+        }
+
+# 컬렉션별 로컬 미러 (EmbeddingFilter 와 vector_store 가 공유)
+_local_mirrors: Dict[str, LocalVectorMirror] = {}
+_local_mirrors_lock = threading.Lock()
+
+def get_local_vector_mirror(collection_name: str, tenant_id: Optional[str] = None) -> LocalVectorMirror:
+    """컬렉션 (또는 컬렉션의 테넌트 슬라이스) 로컬 미러 반환 (최초 생성 시 디스크 스냅샷 로드)"""
+    key = f"{collection_name}@{tenant_id}" if tenant_id else collection_name
+    mirror = _local_mirrors.get(key)
+    if mirror is not None:
+        return mirror
+    with _local_mirrors_lock:
+        mirror = _local_mirrors.get(key)
+        if mirror is None:
+            mirror = LocalVectorMirror(
+                collection_name,
+                snapshot_dir=os.getenv("LOCAL_INDEX_SNAPSHOT_DIR", os.path.join("cache", "vector_index")) or None,
+                sync_interval=float(os.getenv("LOCAL_INDEX_SYNC_SECONDS", "300")),
+                hnsw_threshold=int(os.getenv("LOCAL_INDEX_HNSW_THRESHOLD", "20000")),
+                recall_check=os.getenv("LOCAL_INDEX_RECALL_CHECK", "true").lower() == "true",
+                tenant_id=tenant_id,
+            )
+            mirror.load_snapshot()
+            _local_mirrors[key] = mirror
+    return mirror
+
+def get_local_vector_mirrors() -> Dict[str, LocalVectorMirror]:
+    """생성된 모든 로컬 미러"""
+    return dict(_local_mirrors)
+
+def get_local_index_mode() -> str:
+    """LOCAL_INDEX_MODE: fallback (Qdrant 우선, 장애 시 로컬) | primary (로컬 우선) | off"""
+    mode = os.getenv("LOCAL_INDEX_MODE", "fallback").lower()
+    return mode if mode in ("fallback", "primary", "off") else "fallback"
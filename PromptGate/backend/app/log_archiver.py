@@ -0,0 +1,515 @@
+"""
+프롬프트 로그 아카이브
+보존 기간이 지난 prompt_logs 행 / ES prompt-log 문서를 일 단위 Parquet 파일로 내보내고
+(zstd 압축, tenant/user/method 컬럼 딕셔너리 인코딩) OLTP DB 를 거치지 않는 조회 API 제공
+
+디렉터리 구조 (Hive 파티셔닝):
+    {archive_dir}/source=prompt_logs/dt=2026-01-31/part-00000.parquet
+    {archive_dir}/source=es_prompt_log/dt=2026-01-31/part-00000.parquet
+"""
+
+import glob
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger(__name__)
+
+# 아카이브 공통 컬럼 (DB / ES 소스 모두 이 스키마로 정규화)
+ARCHIVE_COLUMNS = [
+    "log_id",
+    "tenant_id",
+    "user_id",
+    "session_id",
+    "original_prompt",
+    "masked_prompt",
+    "is_blocked",
+    "block_reason",
+    "risk_score",
+    "detection_method",
+    "processing_time",
+    "ip_address",
+    "user_agent",
+    "created_at",
+]
+
+# 소스별 저장 컬럼: prompt_logs 에는 테넌트 컬럼이 없고 PromptGate users 테이블에도 테넌트가 없어
+# 사용자/세션으로 테넌트를 알 수 없으므로 tenant_id 를 저장하지 않는다 (조회 시 NULL)
+SOURCE_COLUMNS = {
+    "prompt_logs": [column for column in ARCHIVE_COLUMNS if column != "tenant_id"],
+    "es_prompt_log": ARCHIVE_COLUMNS,
+}
+
+# 카디널리티가 낮아 딕셔너리 인코딩 효과가 큰 컬럼
+DICTIONARY_COLUMNS = ["tenant_id", "user_id", "detection_method"]
+
+STATE_FILE = "_archive_state.json"
+
+def _archive_schema(columns: Optional[List[str]] = None):
+    """Parquet 스키마 (pyarrow 지연 로딩), columns 를 주면 해당 컬럼만"""
+    import pyarrow as pa
+
+    schema = pa.schema([
+        ("log_id", pa.string()),
+        ("tenant_id", pa.string()),
+        ("user_id", pa.string()),
+        ("session_id", pa.string()),
+        ("original_prompt", pa.string()),
+        ("masked_prompt", pa.string()),
+        ("is_blocked", pa.bool_()),
+        ("block_reason", pa.string()),
+        ("risk_score", pa.float64()),
+        ("detection_method", pa.string()),
+        ("processing_time", pa.float64()),
+        ("ip_address", pa.string()),
+        ("user_agent", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+    ])
+    if columns is None:
+        return schema
+    return pa.schema([schema.field(name) for name in columns])
+
+@dataclass
+class ArchiveConfig:
+    """아카이브 설정"""
+    archive_dir: str = "./archive"
+    archive_after_days: int = 90  # 이 일수보다 오래된 로그만 내보냄
+    purge_source: bool = True  # 내보낸 뒤 원본 행/문서 삭제
+    batch_size: int = 10000  # 원본 조회 및 row group 단위
+    compression: str = "zstd"
+    compression_level: int = 9
+
+@dataclass
+class ArchiveReport:
+    """아카이브 실행 결과"""
+    source: str
+    days: List[str] = field(default_factory=list)
+    rows: int = 0
+    bytes_written: int = 0
+    purged: int = 0
+    errors: List[str] = field(default_factory=list)
+
+def _to_str(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return str(value)
+
+def _to_bool(value: Any) -> Optional[bool]:
+    if value is None:
+        return None
+    return bool(value)
+
+def _to_utc(value: Any) -> Optional[datetime]:
+    """DB(naive UTC) / ES(ISO 문자열) 시각을 UTC aware datetime 으로 변환"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+class _ParquetDayWriter:
+    """하루치 파티션 파일 작성기 (임시 파일에 쓴 뒤 rename 으로 원자적 교체)"""
+
+    def __init__(self, config: ArchiveConfig, source: str, day: date):
+        import pyarrow.parquet as pq
+
+        self.directory = os.path.join(config.archive_dir, f"source={source}", f"dt={day.isoformat()}")
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, "part-00000.parquet")
+        self.tmp_path = os.path.join(self.directory, ".part-00000.parquet.tmp")
+        self.columns = SOURCE_COLUMNS[source]
+        self.schema = _archive_schema(self.columns)
+        self.writer = pq.ParquetWriter(
+            self.tmp_path,
+            self.schema,
+            compression=config.compression,
+            compression_level=config.compression_level,
+            use_dictionary=[column for column in DICTIONARY_COLUMNS if column in self.columns],
+        )
+        self.rows = 0
+
+    def write(self, records: List[Dict[str, Any]]):
+        import pyarrow as pa
+
+        if not records:
+            return
+        columns = {name: [record.get(name) for record in records] for name in self.columns}
+        self.writer.write_table(pa.Table.from_pydict(columns, schema=self.schema))
+        self.rows += len(records)
+
+    def commit(self) -> int:
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+        return os.path.getsize(self.path)
+
+    def abort(self):
+        try:
+            self.writer.close()
+        finally:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+class LogArchiver:
+    """일 단위 Parquet 아카이브 작업"""
+
+    def __init__(self, config: ArchiveConfig, database_url: Optional[str] = None, es_client=None,
+                 es_index: str = "prompt-log"):
+        self.config = config
+        self.engine = create_engine(database_url) if database_url else None
+        self.es = es_client
+        self.es_index = es_index
+
+    # ------------------------------------------------------------------
+    # 진행 상태 (소스별 마지막 아카이브 일자)
+    # ------------------------------------------------------------------
+    def _state_path(self) -> str:
+        return os.path.join(self.config.archive_dir, STATE_FILE)
+
+    def load_state(self) -> Dict[str, str]:
+        try:
+            with open(self._state_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save_state(self, state: Dict[str, str]):
+        os.makedirs(self.config.archive_dir, exist_ok=True)
+        tmp_path = self._state_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self._state_path())
+
+    def _pending_days(self, source: str, oldest: Optional[date], today: date) -> List[date]:
+        """워터마크 다음 날부터 보존 기준일 전날까지"""
+        if oldest is None:
+            return []
+        cutoff = today - timedelta(days=self.config.archive_after_days)
+        archived_through = self.load_state().get(source)
+        start = oldest
+        if archived_through:
+            start = max(start, date.fromisoformat(archived_through) + timedelta(days=1))
+        return [start + timedelta(days=i) for i in range((cutoff - start).days)]
+
+    # ------------------------------------------------------------------
+    # 소스: PostgreSQL/SQLite prompt_logs
+    # ------------------------------------------------------------------
+    def _db_oldest_day(self) -> Optional[date]:
+        with self.engine.connect() as conn:
+            oldest = conn.execute(text("SELECT MIN(created_at) FROM prompt_logs")).scalar()
+        oldest = _to_utc(oldest)
+        return oldest.date() if oldest else None
+
+    def _db_rows(self, day: date) -> Iterator[List[Dict[str, Any]]]:
+        """하루치 prompt_logs 를 batch_size 단위로 (id 키셋 페이지네이션)"""
+        start = datetime.combine(day, time.min)
+        end = start + timedelta(days=1)
+        last_id = 0
+        while True:
+            with self.engine.connect() as conn:
+                rows = conn.execute(text("""
+                    SELECT id, user_id, session_id, original_prompt, masked_prompt, is_blocked,
+                           block_reason, risk_score, detection_method, processing_time,
+                           ip_address, user_agent, created_at
+                    FROM prompt_logs
+                    WHERE created_at >= :start AND created_at < :end AND id > :last_id
+                    ORDER BY id
+                    LIMIT :limit
+                """), {"start": start, "end": end, "last_id": last_id,
+                       "limit": self.config.batch_size}).mappings().all()
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            yield [{
+                "log_id": str(row["id"]),
+                "user_id": _to_str(row["user_id"]),
+                "session_id": row["session_id"],
+                "original_prompt": row["original_prompt"],
+                "masked_prompt": row["masked_prompt"],
+                "is_blocked": _to_bool(row["is_blocked"]),
+                "block_reason": row["block_reason"],
+                "risk_score": row["risk_score"],
+                "detection_method": row["detection_method"],
+                "processing_time": row["processing_time"],
+                "ip_address": row["ip_address"],
+                "user_agent": row["user_agent"],
+                "created_at": _to_utc(row["created_at"]),
+            } for row in rows]
+
+    def _db_purge(self, day: date, max_id: int) -> int:
+        start = datetime.combine(day, time.min)
+        with self.engine.begin() as conn:
+            result = conn.execute(text(
+                "DELETE FROM prompt_logs WHERE created_at >= :start AND created_at < :end AND id <= :max_id"
+            ), {"start": start, "end": start + timedelta(days=1), "max_id": max_id})
+        return result.rowcount
+
+    # ------------------------------------------------------------------
+    # 소스: Elasticsearch prompt-log 인덱스
+    # ------------------------------------------------------------------
+    def _es_oldest_day(self) -> Optional[date]:
+        response = self.es.search(index=self.es_index, size=0,
+                                  aggs={"oldest": {"min": {"field": "timestamp"}}})
+        oldest = response["aggregations"]["oldest"].get("value_as_string")
+        return _to_utc(oldest).date() if oldest else None
+
+    def _es_day_query(self, day: date) -> Dict[str, Any]:
+        start = datetime.combine(day, time.min)
+        return {"range": {"timestamp": {"gte": start.isoformat(),
+                                        "lt": (start + timedelta(days=1)).isoformat()}}}
+
+    def _es_rows(self, day: date, hit_ids: List[str]) -> Iterator[List[Dict[str, Any]]]:
+        from elasticsearch.helpers import scan
+
+        batch = []
+        for hit in scan(self.es, index=self.es_index, query={"query": self._es_day_query(day)},
+                        size=self.config.batch_size, preserve_order=False):
+            doc = hit["_source"]
+            hit_ids.append(hit["_id"])
+            batch.append({
+                "log_id": hit["_id"],
+                "tenant_id": _to_str(doc.get("tenant_id")),
+                "user_id": _to_str(doc.get("user_id")),
+                "session_id": _to_str(doc.get("session_id")),
+                "original_prompt": doc.get("prompt"),
+                "masked_prompt": doc.get("masked_prompt"),
+                "is_blocked": _to_bool(doc.get("is_blocked")),
+                "block_reason": doc.get("reason"),
+                "risk_score": doc.get("risk_score"),
+                "detection_method": doc.get("detection_method"),
+                "processing_time": doc.get("processing_time"),
+                "ip_address": doc.get("ip_address"),
+                "user_agent": doc.get("user_agent"),
+                "created_at": _to_utc(doc.get("timestamp")),
+            })
+            if len(batch) >= self.config.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _es_purge(self, hit_ids: List[str]) -> int:
+        deleted = 0
+        for i in range(0, len(hit_ids), self.config.batch_size):
+            response = self.es.delete_by_query(
+                index=self.es_index,
+                query={"ids": {"values": hit_ids[i:i + self.config.batch_size]}},
+                conflicts="proceed",
+            )
+            deleted += response.get("deleted", 0)
+        return deleted
+
+    # ------------------------------------------------------------------
+    # 실행
+    # ------------------------------------------------------------------
+    def _archive_day(self, source: str, day: date, report: ArchiveReport, dry_run: bool):
+        if source == "prompt_logs":
+            batches = self._db_rows(day)
+        else:
+            hit_ids: List[str] = []
+            batches = self._es_rows(day, hit_ids)
+
+        if dry_run:
+            report.days.append(day.isoformat())
+            report.rows += sum(len(batch) for batch in batches)
+            return
+
+        writer = None
+        max_id = 0
+        try:
+            for batch in batches:
+                if writer is None:
+                    writer = _ParquetDayWriter(self.config, source, day)
+                writer.write(batch)
+                if source == "prompt_logs":
+                    max_id = int(batch[-1]["log_id"])
+            if writer is None:
+                return
+            report.bytes_written += writer.commit()
+        except Exception:
+            if writer is not None:
+                writer.abort()
+            raise
+
+        report.days.append(day.isoformat())
+        report.rows += writer.rows
+        logger.info(f"아카이브 완료: {source} {day} ({writer.rows}행)")
+
+        # 파일이 확정된 뒤에만 원본 삭제
+        if self.config.purge_source:
+            if source == "prompt_logs":
+                report.purged += self._db_purge(day, max_id)
+            else:
+                report.purged += self._es_purge(hit_ids)
+
+    def archive_source(self, source: str, today: Optional[date] = None, dry_run: bool = False) -> ArchiveReport:
+        """소스 하나의 미처리 일자를 순서대로 아카이브"""
+        today = today or datetime.now(timezone.utc).date()
+        report = ArchiveReport(source=source)
+        oldest = self._db_oldest_day() if source == "prompt_logs" else self._es_oldest_day()
+
+        for day in self._pending_days(source, oldest, today):
+            try:
+                self._archive_day(source, day, report, dry_run)
+            except Exception as e:
+                logger.error(f"아카이브 실패 ({source} {day}): {e}")
+                report.errors.append(f"{day}: {e}")
+                break
+            if not dry_run:
+                state = self.load_state()
+                state[source] = day.isoformat()
+                self.save_state(state)
+        return report
+
+    def run(self, today: Optional[date] = None, dry_run: bool = False) -> List[ArchiveReport]:
+        """설정된 모든 소스 아카이브"""
+        reports = []
+        sources = []
+        if self.engine is not None:
+            sources.append("prompt_logs")
+        if self.es is not None:
+            sources.append("es_prompt_log")
+        for source in sources:
+            try:
+                reports.append(self.archive_source(source, today, dry_run))
+            except Exception as e:
+                logger.error(f"아카이브 소스 조회 실패 ({source}): {e}")
+                reports.append(ArchiveReport(source=source, errors=[str(e)]))
+        return reports
+
+class ArchiveQuery:
+    """
+    Parquet 아카이브 조회 API
+    DuckDB 가 있으면 SQL 로, 없으면 pyarrow.dataset 필터로 조회 (둘 다 dt 파티션 프루닝)
+    소스마다 컬럼이 다르면 (prompt_logs 의 tenant_id) 없는 컬럼은 NULL 로 조회된다
+    """
+
+    VIEW_NAME = "prompt_log_archive"
+
+    def __init__(self, archive_dir: str):
+        self.archive_dir = archive_dir
+        self._duckdb = None
+        pattern = os.path.join(archive_dir, "source=*", "dt=*", "*.parquet")
+        self.is_empty = not glob.glob(pattern)
+        if self.is_empty:
+            logger.warning(f"아카이브 파일이 없음: {archive_dir}")
+            return
+        try:
+            import duckdb
+
+            self._duckdb = duckdb.connect(database=":memory:")
+            self._duckdb.execute(
+                f"CREATE VIEW {self.VIEW_NAME} AS "
+                f"SELECT * FROM read_parquet('{pattern}', hive_partitioning = true, union_by_name = true)"
+            )
+        except ImportError:
+            logger.warning("DuckDB 라이브러리가 설치되지 않음 (pyarrow 조회로 대체)")
+            self._duckdb = None
+
+    def sql(self, query: str, params: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """임의 SQL 조회 (테이블 이름: prompt_log_archive, DuckDB 필요)"""
+        if self.is_empty:
+            return []
+        if self._duckdb is None:
+            raise RuntimeError("SQL 조회에는 DuckDB 가 필요합니다")
+        cursor = self._duckdb.execute(query, params or [])
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def search(self, start: date, end: date, tenant_id: Optional[str] = None,
+               user_id: Optional[str] = None, detection_method: Optional[str] = None,
+               blocked_only: bool = False, text_contains: Optional[str] = None,
+               columns: Optional[List[str]] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """기간(start~end, 양끝 포함) 및 조건으로 아카이브 로그 검색 (created_at 순)"""
+        columns = columns or ARCHIVE_COLUMNS
+        if self.is_empty:
+            return []
+        filters = {
+            "tenant_id": tenant_id,
+            "user_id": user_id,
+            "detection_method": detection_method,
+        }
+
+        if self._duckdb is not None:
+            where = ["CAST(dt AS DATE) BETWEEN ? AND ?"]
+            params: List[Any] = [start, end]
+            for column, value in filters.items():
+                if value is not None:
+                    where.append(f"{column} = ?")
+                    params.append(value)
+            if blocked_only:
+                where.append("is_blocked")
+            if text_contains:
+                where.append("(original_prompt ILIKE ? OR masked_prompt ILIKE ?)")
+                params.extend([f"%{text_contains}%"] * 2)
+            params.append(limit)
+            return self.sql(
+                f"SELECT source, {', '.join(columns)} FROM {self.VIEW_NAME} "
+                f"WHERE {' AND '.join(where)} ORDER BY created_at LIMIT ?",
+                params,
+            )
+
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        partitioning = ds.partitioning(pa.schema([("source", pa.string()), ("dt", pa.string())]), flavor="hive")
+        schema = _archive_schema()
+        for partition_field in partitioning.schema:
+            schema = schema.append(partition_field)
+        dataset = ds.dataset(self.archive_dir, schema=schema, format="parquet", partitioning=partitioning,
+                             exclude_invalid_files=True)
+        expression = (pc.field("dt") >= start.isoformat()) & (pc.field("dt") <= end.isoformat())
+        for column, value in filters.items():
+            if value is not None:
+                expression = expression & (pc.field(column) == value)
+        if blocked_only:
+            expression = expression & pc.field("is_blocked")
+        if text_contains:
+            expression = expression & (
+                pc.match_substring(pc.field("original_prompt"), text_contains, ignore_case=True)
+                | pc.match_substring(pc.field("masked_prompt"), text_contains, ignore_case=True)
+            )
+        table = dataset.to_table(columns=["source"] + columns, filter=expression)
+        if "created_at" in columns:
+            table = table.sort_by("created_at")
+        return table.slice(0, limit).to_pylist()
+
+def create_log_archiver(include_es: bool = True) -> LogArchiver:
+    """환경변수 설정으로 아카이버 생성"""
+    from app.schema import SQLALCHEMY_DATABASE_URL
+
+    config = ArchiveConfig(
+        archive_dir=os.getenv("LOG_ARCHIVE_DIR", "./archive"),
+        archive_after_days=int(os.getenv("LOG_ARCHIVE_AFTER_DAYS", "90")),
+        purge_source=os.getenv("LOG_ARCHIVE_PURGE_SOURCE", "true").lower() == "true",
+        batch_size=int(os.getenv("LOG_ARCHIVE_BATCH_SIZE", "10000")),
+        compression_level=int(os.getenv("LOG_ARCHIVE_ZSTD_LEVEL", "9")),
+    )
+    database_url = os.getenv("LOG_ARCHIVE_DATABASE_URL", SQLALCHEMY_DATABASE_URL)
+
+    es_client = None
+    if include_es:
+        try:
+            from elasticsearch import Elasticsearch
+            from app.config import get_settings
+
+            settings = get_settings()
+            if settings.enable_es_logging:
+                es_client = Elasticsearch(
+                    settings.elasticsearch_url,
+                    http_auth=(settings.elasticsearch_user, settings.elasticsearch_password),
+                    verify_certs=bool(settings.elastic_ca_cert_path),
+                    ca_certs=settings.elastic_ca_cert_path or None,
+                )
+        except ImportError:
+            logger.warning("Elasticsearch 라이브러리가 설치되지 않음")
+
+    return LogArchiver(config, database_url=database_url, es_client=es_client,
+                       es_index=os.getenv("LOG_ARCHIVE_ES_INDEX", "prompt-log"))
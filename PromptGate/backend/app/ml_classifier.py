@@ -14,6 +14,8 @@ import os
 import json
 import pickle
 from datetime import datetime
+from .feature_extractor import features_to_dict
+from .telemetry import get_telemetry, traced_stage
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +57,10 @@ class MLClassifier:
         self.models = {}
         self.vectorizer = None
         self.feature_extractors = {}
+        self.feature_extractor = None
+        self.transformer_batcher = None
+        self.traditional_runtime = None
+        self.traditional_batcher = None
         
         # 모델 상태
         self.model_status = {
@@ -96,21 +102,18 @@ class MLClassifier:
     def _initialize_transformer_model(self):
         """Transformer 모델 초기화"""
         try:
-            # Transformers 라이브러리 사용
-            from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+            # 파인튜닝된 분류 체크포인트 (예: klue/roberta-base 기반) 를 배치 추론기로 로드
+            from .transformer_inference import create_transformer_batcher
             
-            # 한국어 텍스트 분류 모델 (KLUE RoBERTa)
-            model_name = "klue/roberta-base"
-            
-            self.models["transformer"] = pipeline(
-                "text-classification",
-                model=model_name,
-                tokenizer=model_name,
-                return_all_scores=True
-            )
+            self.transformer_batcher = create_transformer_batcher()
+            if self.transformer_batcher is None:
+                logger.info("ML_TRANSFORMER_CHECKPOINT 미설정 - Transformer 분류 단계 비활성")
+                return
             
+            self.models["transformer"] = self.transformer_batcher.runtime
             self.model_status["transformer_model"] = True
-            logger.info("Transformer 모델 초기화 성공")
+            get_telemetry().register_queue("transformer", self.transformer_batcher.queue_depth)
+            logger.info(f"Transformer 모델 초기화 성공: {self.transformer_batcher.runtime.checkpoint}")
             
         except ImportError:
             logger.warning("Transformers 라이브러리가 설치되지 않음")
@@ -120,31 +123,22 @@ class MLClassifier:
     def _initialize_traditional_model(self):
         """전통적인 ML 모델 초기화"""
         try:
-            from sklearn.feature_extraction.text import TfidfVectorizer
-            from sklearn.ensemble import RandomForestClassifier
-            from sklearn.naive_bayes import MultinomialNB
-            
-            # TF-IDF 벡터화기
-            self.vectorizer = TfidfVectorizer(
-                max_features=5000,
-                ngram_range=(1, 3),
-                stop_words=None,  # 한국어는 별도 처리
-                min_df=2,
-                max_df=0.95
-            )
-            
-            # 랜덤 포레스트 분류기
-            self.models["random_forest"] = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42
-            )
-            
-            # 나이브 베이즈 분류기
-            self.models["naive_bayes"] = MultinomialNB(alpha=0.1)
+            from .traditional_model import load_traditional_runtime, create_traditional_batcher
+            
+            # 학습된 아티팩트 (train_traditional_model.py) 가 있으면 mmap 읽기 전용으로 로드
+            self.traditional_runtime = load_traditional_runtime()
+            if self.traditional_runtime is not None:
+                self.vectorizer = self.traditional_runtime.vectorizer
+                self.models.update(self.traditional_runtime.models)
+                # 동시 요청을 모아 한 번에 추론
+                self.traditional_batcher = create_traditional_batcher(self.traditional_runtime)
+                get_telemetry().register_queue("traditional", self.traditional_batcher.queue_depth)
+                logger.info(f"전통적인 ML 모델 로드 성공: {self.traditional_runtime.version}")
+            else:
+                # 학습되지 않은 모델은 예측에 쓸 수 없으므로 만들지 않고 특성 기반 위험도만 사용
+                logger.info("학습된 전통적인 ML 모델 없음 - 특성 기반 위험도 사용")
             
             self.model_status["traditional_model"] = True
-            logger.info("전통적인 ML 모델 초기화 성공")
             
         except ImportError:
             logger.warning("scikit-learn 라이브러리가 설치되지 않음")
@@ -154,33 +148,12 @@ class MLClassifier:
     def _initialize_feature_extractors(self):
         """특성 추출기 초기화"""
         try:
-            import re
+            from .feature_extractor import get_feature_extractor, TEXT_FEATURES, PATTERN_FEATURES
             
-            # 텍스트 특성 추출기
-            self.feature_extractors["text_features"] = {
-                "length": lambda text: len(text),
-                "word_count": lambda text: len(text.split()),
-                "sentence_count": lambda text: len(re.split(r'[.!?]+', text)),
-                "has_numbers": lambda text: bool(re.search(r'\d', text)),
-                "has_special_chars": lambda text: bool(re.search(r'[!@#$%^&*(),.?":{}|<>]', text)),
-                "has_uppercase": lambda text: bool(re.search(r'[A-Z]', text)),
-                "has_lowercase": lambda text: bool(re.search(r'[a-z]', text)),
-                "has_korean": lambda text: bool(re.search(r'[가-힣]', text)),
-                "has_english": lambda text: bool(re.search(r'[a-zA-Z]', text)),
-                "avg_word_length": lambda text: np.mean([len(word) for word in text.split()]) if text.split() else 0
-            }
-            
-            # 악의적 패턴 특성 추출기
-            self.feature_extractors["malicious_patterns"] = {
-                "ignore_instructions": lambda text: len(re.findall(r'ignore.*instructions?', text, re.IGNORECASE)),
-                "forget_everything": lambda text: len(re.findall(r'forget.*everything', text, re.IGNORECASE)),
-                "system_prompt": lambda text: len(re.findall(r'system.*prompt', text, re.IGNORECASE)),
-                "role_play": lambda text: len(re.findall(r'role.*play|pretend.*to.*be', text, re.IGNORECASE)),
-                "jailbreak": lambda text: len(re.findall(r'jailbreak|bypass', text, re.IGNORECASE)),
-                "admin_access": lambda text: len(re.findall(r'admin|root|sudo', text, re.IGNORECASE)),
-                "code_execution": lambda text: len(re.findall(r'execute|run.*code|eval', text, re.IGNORECASE)),
-                "data_extraction": lambda text: len(re.findall(r'show.*all|list.*all|dump.*data', text, re.IGNORECASE))
-            }
+            # 단일 패스 추출기 (텍스트 통계 + 악의적 패턴 수 → 고정 레이아웃 벡터)
+            self.feature_extractor = get_feature_extractor()
+            self.feature_extractors["text_features"] = list(TEXT_FEATURES)
+            self.feature_extractors["malicious_patterns"] = list(PATTERN_FEATURES)
             
             self.model_status["feature_extractor"] = True
             logger.info("특성 추출기 초기화 성공")
@@ -213,6 +186,7 @@ class MLClassifier:
         except Exception as e:
             logger.error(f"앙상블 모델 초기화 실패: {e}")
     
+    @traced_stage("ml")
     async def classify_prompt(self, prompt: str) -> MLClassificationResult:
         """프롬프트 분류"""
         start_time = time.time()
@@ -248,7 +222,7 @@ class MLClassifier:
                 confidence=ensemble_result["confidence"],
                 processing_time=processing_time,
                 model_used=ensemble_result["model_used"],
-                features_extracted=features
+                features_extracted=features_to_dict(features) if features is not None else {}
             )
             
         except Exception as e:
@@ -263,43 +237,26 @@ class MLClassifier:
                 error_messages=[str(e)]
             )
     
-    def _extract_features(self, prompt: str) -> Dict[str, Any]:
-        """특성 추출"""
-        features = {}
-        
-        # 텍스트 특성 추출
-        if "text_features" in self.feature_extractors:
-            for name, extractor in self.feature_extractors["text_features"].items():
-                try:
-                    features[f"text_{name}"] = extractor(prompt)
-                except Exception as e:
-                    features[f"text_{name}"] = 0
-                    logger.warning(f"텍스트 특성 추출 실패 ({name}): {e}")
-        
-        # 악의적 패턴 특성 추출
-        if "malicious_patterns" in self.feature_extractors:
-            for name, extractor in self.feature_extractors["malicious_patterns"].items():
-                try:
-                    features[f"pattern_{name}"] = extractor(prompt)
-                except Exception as e:
-                    features[f"pattern_{name}"] = 0
-                    logger.warning(f"패턴 특성 추출 실패 ({name}): {e}")
-        
-        return features
+    def _extract_features(self, prompt: str) -> Optional[np.ndarray]:
+        """특성 추출 (FEATURE_NAMES 순서 벡터)"""
+        if self.feature_extractor is None:
+            return None
+        try:
+            return self.feature_extractor.extract(prompt)
+        except Exception as e:
+            logger.warning(f"특성 추출 실패: {e}")
+            return None
     
     async def _predict_with_transformer(self, prompt: str) -> Dict[str, Any]:
         """Transformer 모델로 예측"""
         try:
-            # 실제 구현에서는 사전 훈련된 모델 사용
-            # 여기서는 시뮬레이션
-            await asyncio.sleep(0.1)  # 비동기 처리 시뮬레이션
-            
-            # 간단한 휴리스틱 기반 예측 (실제로는 모델 예측)
-            risk_score = self._calculate_heuristic_risk_score(prompt)
+            # 동시 요청과 함께 배치 추론 (클래스 확률)
+            probabilities = await self.transformer_batcher.classify(prompt)
+            risk_score = float(self.transformer_batcher.runtime.risk_scores(probabilities[np.newaxis, :])[0])
             
             return {
                 "risk_score": risk_score,
-                "confidence": 0.8,
+                "confidence": float(np.max(probabilities)),
                 "model": "transformer"
             }
             
@@ -307,16 +264,25 @@ class MLClassifier:
             logger.error(f"Transformer 예측 실패: {e}")
             return {"risk_score": 0.0, "confidence": 0.0, "model": "transformer"}
     
-    async def _predict_with_traditional_ml(self, prompt: str, features: Dict[str, Any]) -> Dict[str, Any]:
+    async def _predict_with_traditional_ml(self, prompt: str, features: Optional[np.ndarray]) -> Dict[str, Any]:
         """전통적인 ML 모델로 예측"""
         try:
-            # 실제 구현에서는 훈련된 모델 사용
-            # 여기서는 시뮬레이션
-            await asyncio.sleep(0.05)
+            if self.traditional_runtime is not None:
+                scores = await self.traditional_batcher.score(prompt)
+                weights = self.models.get("ensemble", {}).get("weights", {})
+                model_weights = {name: weights.get(name, 1.0) for name in scores}
+                risk_score = sum(scores[name] * weight for name, weight in model_weights.items()) / sum(model_weights.values())
+                
+                return {
+                    "risk_score": risk_score,
+                    "confidence": max(risk_score, 1.0 - risk_score),
+                    "model": "traditional",
+                    "model_version": self.traditional_runtime.version
+                }
             
             # 특성 기반 위험도 계산
             risk_score = self._calculate_feature_based_risk_score(features)
-            
+
             return {
                 "risk_score": risk_score,
                 "confidence": 0.7,
@@ -329,49 +295,15 @@ class MLClassifier:
     
     def _calculate_heuristic_risk_score(self, prompt: str) -> float:
         """휴리스틱 기반 위험도 점수 계산"""
-        import re
-        
-        risk_indicators = [
-            (r'ignore.*instructions?', 0.3),
-            (r'forget.*everything', 0.3),
-            (r'system.*prompt', 0.2),
-            (r'role.*play', 0.2),
-            (r'jailbreak', 0.4),
-            (r'admin|root|sudo', 0.3),
-            (r'execute|run.*code', 0.4),
-            (r'show.*all|list.*all', 0.3),
-            (r'bypass.*security', 0.4),
-            (r'override.*system', 0.3)
-        ]
-        
-        total_score = 0.0
-        for pattern, weight in risk_indicators:
-            matches = len(re.findall(pattern, prompt, re.IGNORECASE))
-            total_score += matches * weight
-        
-        return min(total_score, 1.0)
+        if self.feature_extractor is None:
+            return 0.0
+        return self.feature_extractor.heuristic_risk_score(prompt)
     
-    def _calculate_feature_based_risk_score(self, features: Dict[str, Any]) -> float:
-        """특성 기반 위험도 점수 계산"""
-        score = 0.0
-        
-        # 패턴 특성 가중치
-        pattern_weights = {
-            "pattern_ignore_instructions": 0.3,
-            "pattern_forget_everything": 0.3,
-            "pattern_system_prompt": 0.2,
-            "pattern_role_play": 0.2,
-            "pattern_jailbreak": 0.4,
-            "pattern_admin_access": 0.3,
-            "pattern_code_execution": 0.4,
-            "pattern_data_extraction": 0.3
-        }
-        
-        for feature_name, weight in pattern_weights.items():
-            if feature_name in features:
-                score += features[feature_name] * weight
-        
-        return min(score, 1.0)
+    def _calculate_feature_based_risk_score(self, features: Optional[np.ndarray]) -> float:
+        """특성 기반 위험도 점수 계산 (패턴 특성 가중합)"""
+        if features is None:
+            return 0.0
+        return self.feature_extractor.feature_risk_score(features)
     
     def _ensemble_predictions(self, predictions: Dict[str, Any]) -> Dict[str, Any]:
         """앙상블 예측"""
@@ -496,19 +428,26 @@ class MLClassifier:
             "model_status": self.model_status,
             "available_models": list(self.models.keys()),
             "feature_extractors": list(self.feature_extractors.keys()),
+            "transformer_inference": self.transformer_batcher.get_stats() if self.transformer_batcher else None,
+            "traditional_artifact": self.traditional_runtime.get_status() if self.traditional_runtime else None,
+            "traditional_inference": self.traditional_batcher.get_stats() if self.traditional_batcher else None,
             "timestamp": datetime.now().isoformat()
         }
 
 # 싱글톤 패턴을 위한 전역 변수
 _ml_classifier_instance: Optional[MLClassifier] = None
+_ml_classifier_lock = asyncio.Lock()
 
 async def get_ml_classifier() -> MLClassifier:
     """ML Classifier 싱글톤 인스턴스 반환"""
     global _ml_classifier_instance
     
     if _ml_classifier_instance is None:
-        _ml_classifier_instance = MLClassifier()
-        logger.info("ML Classifier 싱글톤 인스턴스 생성 완료")
+        async with _ml_classifier_lock:
+            if _ml_classifier_instance is None:
+                # 모델 로딩은 블로킹 작업이므로 이벤트 루프를 막지 않도록 스레드에서 생성
+                _ml_classifier_instance = await asyncio.to_thread(MLClassifier)
+                logger.info("ML Classifier 싱글톤 인스턴스 생성 완료")
     
     return _ml_classifier_instance
 
@@ -517,5 +456,9 @@ async def close_ml_classifier():
     global _ml_classifier_instance
     
     if _ml_classifier_instance:
+        if _ml_classifier_instance.transformer_batcher:
+            await asyncio.to_thread(_ml_classifier_instance.transformer_batcher.close)
+        if _ml_classifier_instance.traditional_batcher:
+            await asyncio.to_thread(_ml_classifier_instance.traditional_batcher.close)
         logger.info("ML Classifier 정리 완료")
         _ml_classifier_instance = None
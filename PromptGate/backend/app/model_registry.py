@@ -0,0 +1,237 @@
+"""
+프로세스 공용 모델 레지스트리
+SentenceTransformer / QdrantClient 등 무거운 객체를 프로세스당 한 번만 (지연, 스레드 안전) 로드해 공유
+
+gunicorn --preload 로 마스터 프로세스에서 미리 로드하면 fork 된 워커들이 모델 메모리를
+copy-on-write 로 공유한다. (MODEL_PRELOAD 환경변수 참고)
+    gunicorn main:app -k uvicorn.workers.UvicornWorker -w 4 --preload
+"""
+
+import gc
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "jhgan/ko-sroberta-multitask"
+
+@dataclass
+class ModelEntry:
+    """로드된 모델 정보"""
+    key: str
+    handle: Any
+    load_seconds: float
+    loaded_at: float
+    loaded_pid: int
+    param_bytes: Optional[int] = None
+
+def _estimate_model_bytes(handle: Any) -> Optional[int]:
+    """torch 모듈이면 파라미터 + 버퍼 크기 (그 외 객체는 측정하지 않음)"""
+    try:
+        parameters = getattr(handle, "parameters", None)
+        buffers = getattr(handle, "buffers", None)
+        if not callable(parameters):
+            return None
+        total = sum(p.numel() * p.element_size() for p in parameters())
+        if callable(buffers):
+            total += sum(b.numel() * b.element_size() for b in buffers())
+        return total
+    except Exception:
+        return None
+
+def _process_memory() -> Dict[str, int]:
+    """현재 프로세스 메모리 (kB → bytes). fork 워커의 공유/전용 페이지 확인용"""
+    memory = {}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    memory[name.lower()] = int(value.split()[0]) * 1024
+    except OSError:
+        try:
+            import resource
+
+            # Linux 외 환경: 최대 RSS 만 제공
+            memory["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            pass
+    return memory
+
+class ModelRegistry:
+    """키별 1회 로드 보장 레지스트리"""
+
+    def __init__(self):
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """로드되어 있으면 공유 핸들 반환, 없으면 loader 로 한 번만 로드 (다른 키의 로드는 막지 않음)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry.handle
+
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry.handle
+
+            started = time.perf_counter()
+            handle = loader()
+            load_seconds = time.perf_counter() - started
+            self._entries[key] = ModelEntry(
+                key=key,
+                handle=handle,
+                load_seconds=load_seconds,
+                loaded_at=time.time(),
+                loaded_pid=os.getpid(),
+                param_bytes=_estimate_model_bytes(handle),
+            )
+            logger.info(f"모델 로드 완료: {key} ({load_seconds:.2f}초)")
+            return handle
+
+    def is_loaded(self, key: str) -> bool:
+        return key in self._entries
+
+    def unload(self, key: str):
+        """핸들 제거 (다른 곳에서 참조 중이면 메모리는 참조가 끝날 때 해제됨)"""
+        with self._key_lock(key):
+            self._entries.pop(key, None)
+
+    def get_status(self) -> Dict[str, Any]:
+        """로드된 모델 목록과 상주 메모리"""
+        pid = os.getpid()
+        models = {
+            key: {
+                "load_seconds": round(entry.load_seconds, 3),
+                "loaded_at": entry.loaded_at,
+                # 마스터에서 로드 후 fork 된 경우 True (copy-on-write 공유 중)
+                "inherited_from_parent": entry.loaded_pid != pid,
+                "param_bytes": entry.param_bytes,
+            }
+            for key, entry in list(self._entries.items())
+        }
+        return {
+            "pid": pid,
+            "models": models,
+            "model_bytes": sum(m["param_bytes"] or 0 for m in models.values()),
+            "process_memory": _process_memory(),
+        }
+
+# ----------------------------------------------------------------------
+# 공용 로더
+# ----------------------------------------------------------------------
+def _load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+def _load_qdrant_client(host: str, port: int):
+    from qdrant_client import QdrantClient
+
+    return QdrantClient(host=host, port=port)
+
+def get_sentence_transformer(model_name: Optional[str] = None):
+    """공유 SentenceTransformer (ImportError 는 호출자에게 전달)"""
+    model_name = model_name or os.getenv("EMBEDDING_MODEL_NAME", DEFAULT_EMBEDDING_MODEL)
+    return get_model_registry().get_or_load(
+        f"sentence_transformer:{model_name}",
+        lambda: _load_sentence_transformer(model_name),
+    )
+
+def _load_onnx_embedder(model_dir: str, quantized: bool):
+    from .onnx_embedding import OnnxSentenceEmbedder
+
+    num_threads = os.getenv("EMBEDDING_ONNX_THREADS")
+    return OnnxSentenceEmbedder(model_dir, quantized=quantized,
+                                num_threads=int(num_threads) if num_threads else None)
+
+def get_embedding_model(model_name: Optional[str] = None):
+    """
+    설정된 백엔드의 임베딩 모델 (EMBEDDING_BACKEND=torch|onnx)
+
+    onnx 는 export_onnx_model.py 로 EMBEDDING_ONNX_DIR 에 미리 내보낸 모델을 사용하며,
+    모델이 없거나 로드에 실패하면 torch SentenceTransformer 로 대체한다.
+    """
+    model_name = model_name or os.getenv("EMBEDDING_MODEL_NAME", DEFAULT_EMBEDDING_MODEL)
+    if os.getenv("EMBEDDING_BACKEND", "torch").lower() == "onnx":
+        model_dir = os.getenv("EMBEDDING_ONNX_DIR", os.path.join("models", "onnx", model_name.split("/")[-1]))
+        quantized = os.getenv("EMBEDDING_ONNX_QUANTIZED", "true").lower() == "true"
+        try:
+            return get_model_registry().get_or_load(
+                f"onnx:{model_dir}:{'int8' if quantized else 'fp32'}",
+                lambda: _load_onnx_embedder(model_dir, quantized),
+            )
+        except ImportError:
+            logger.warning("ONNX Runtime 라이브러리가 설치되지 않음 (torch 백엔드로 대체)")
+        except Exception as e:
+            logger.error(f"ONNX 임베딩 모델 로드 실패 (torch 백엔드로 대체): {e}")
+    return get_sentence_transformer(model_name)
+
+def get_qdrant_client(host: Optional[str] = None, port: Optional[int] = None):
+    """공유 QdrantClient (동일 host:port 는 하나의 커넥션 풀 사용)"""
+    host = host or os.getenv("QDRANT_HOST", "localhost")
+    port = int(port or os.getenv("QDRANT_PORT", "6333"))
+    return get_model_registry().get_or_load(
+        f"qdrant:{host}:{port}",
+        lambda: _load_qdrant_client(host, port),
+    )
+
+def preload_models(model_names: Optional[List[str]] = None) -> List[str]:
+    """
+    fork 전 모델 미리 로드
+
+    로드 후 gc.freeze() 로 현재 객체를 GC 추적에서 제외해, 워커의 GC 가 객체 헤더를 건드려
+    공유 페이지가 복사되는 것을 줄인다.
+    """
+    model_names = model_names or [os.getenv("EMBEDDING_MODEL_NAME", DEFAULT_EMBEDDING_MODEL)]
+    loaded = []
+    for model_name in model_names:
+        try:
+            get_embedding_model(model_name)
+            loaded.append(model_name)
+        except ImportError:
+            logger.warning("SentenceTransformers 라이브러리가 설치되지 않음")
+            break
+        except Exception as e:
+            logger.error(f"모델 사전 로드 실패 ({model_name}): {e}")
+
+    if loaded and hasattr(gc, "freeze"):
+        gc.collect()
+        gc.freeze()
+    return loaded
+
+def preload_models_from_env() -> List[str]:
+    """MODEL_PRELOAD=true 또는 콤마 구분 모델 이름이면 사전 로드"""
+    value = os.getenv("MODEL_PRELOAD", "").strip()
+    if not value or value.lower() in ("false", "0", "no"):
+        return []
+    if value.lower() in ("true", "1", "yes"):
+        return preload_models()
+    return preload_models([name.strip() for name in value.split(",") if name.strip()])
+
+# 전역 인스턴스
+_model_registry: Optional[ModelRegistry] = None
+_model_registry_lock = threading.Lock()
+
+def get_model_registry() -> ModelRegistry:
+    """모델 레지스트리 인스턴스 반환"""
+    global _model_registry
+
+    if _model_registry is None:
+        with _model_registry_lock:
+            if _model_registry is None:
+                _model_registry = ModelRegistry()
+
+    return _model_registry
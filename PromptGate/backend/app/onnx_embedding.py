@@ -0,0 +1,143 @@
+"""
+ONNX Runtime 임베딩 백엔드
+ko-sroberta 를 ONNX 로 내보내고 동적 int8 양자화한 모델을 SentenceTransformer 와 같은
+mean pooling 으로 실행 (CPU 전용 노드용, EMBEDDING_BACKEND=onnx 로 선택)
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model.int8.onnx"
+DEFAULT_MAX_SEQ_LENGTH = 128  # ko-sroberta-multitask 의 max_seq_length
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True, opset: int = 14) -> Dict[str, str]:
+    """
+    HuggingFace 모델을 ONNX 로 내보내고 (선택) 동적 int8 양자화
+
+    토크나이저와 pooling 설정(SentenceTransformer max_seq_length)도 함께 저장한다.
+    내보내기에는 torch / transformers / sentence-transformers / onnxruntime 이 필요하다.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, FP32_MODEL_FILE)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    max_seq_length = SentenceTransformer(model_name, device="cpu").max_seq_length or DEFAULT_MAX_SEQ_LENGTH
+
+    sample = tokenizer(["샘플 문장"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, "pooling_config.json"), "w", encoding="utf-8") as f:
+        json.dump({"model_name": model_name, "pooling": "mean", "max_seq_length": max_seq_length}, f)
+    logger.info(f"ONNX 내보내기 완료: {fp32_path}")
+
+    paths = {"fp32": fp32_path}
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(output_dir, INT8_MODEL_FILE)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        paths["int8"] = int8_path
+        logger.info(f"동적 int8 양자화 완료: {int8_path}")
+    return paths
+
+class OnnxSentenceEmbedder:
+    """
+    SentenceTransformer.encode 호환 ONNX Runtime 임베더
+
+    EmbeddingFilter / EmbeddingBatcher 가 사용하는 encode(), get_sentence_embedding_dimension()
+    만 구현한다.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_dir = model_dir
+        self.model_path = os.path.join(model_dir, INT8_MODEL_FILE if quantized else FP32_MODEL_FILE)
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"ONNX 모델 파일이 없음: {self.model_path}")
+
+        pooling_config = {}
+        pooling_path = os.path.join(model_dir, "pooling_config.json")
+        if os.path.exists(pooling_path):
+            with open(pooling_path, "r", encoding="utf-8") as f:
+                pooling_config = json.load(f)
+        self.max_seq_length = int(pooling_config.get("max_seq_length", DEFAULT_MAX_SEQ_LENGTH))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(self.model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self._dimension: Optional[int] = None
+        logger.info(f"ONNX 임베딩 모델 로드 완료: {self.model_path}")
+
+    @staticmethod
+    def mean_pooling(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """SentenceTransformer Pooling(mean) 과 동일: 패딩 토큰 제외 평균"""
+        mask = attention_mask[..., np.newaxis].astype(token_embeddings.dtype)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        return summed / counts
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(texts, padding=True, truncation=True,
+                                 max_length=self.max_seq_length, return_tensors="np")
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+        token_embeddings = self.session.run(None, feeds)[0]
+        return self.mean_pooling(token_embeddings, encoded["attention_mask"])
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True,
+               show_progress_bar: bool = False, normalize_embeddings: bool = False, **kwargs: Any):
+        """SentenceTransformer.encode 와 같은 입출력 (단일 문자열이면 1차원 벡터)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # 길이순 정렬로 배치 내 패딩 최소화 후 원래 순서로 복원
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        chunks = []
+        for start in range(0, len(texts), batch_size):
+            chunks.append(self._encode_batch([texts[i] for i in order[start:start + batch_size]]))
+        embeddings = np.empty((len(texts), chunks[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(chunks, axis=0)
+
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = int(self._encode_batch(["차원 확인"]).shape[1])
+        return self._dimension
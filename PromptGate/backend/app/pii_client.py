@@ -8,6 +8,8 @@ import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from .deadline import DeadlineExceeded, deadline_expired, derive_timeout
+
 logger = logging.getLogger(__name__)
 
 class PIIDetectionClient:
@@ -42,7 +44,7 @@ class PIIDetectionClient:
             return {"status": "unhealthy", "error": str(e)}
     
     async def detect_pii(self, text: str, context: str = "", language: str = "ko") -> Dict[str, Any]:
-        """PII 탐지 요청"""
+        """PII 탐지 요청 (요청 마감 시간을 넘기면 DeadlineExceeded)"""
         try:
             payload = {
                 "text": text,
@@ -50,7 +52,7 @@ class PIIDetectionClient:
                 "language": language
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with httpx.AsyncClient(timeout=derive_timeout(30.0)) as client:
                 response = await client.post(
                     f"{self.base_url}/detect",
                     json=payload
@@ -58,7 +60,11 @@ class PIIDetectionClient:
                 response.raise_for_status()
                 return response.json()
                 
+        except DeadlineExceeded:
+            raise
         except httpx.TimeoutException:
+            if deadline_expired():
+                raise DeadlineExceeded("PII 탐지 요청 마감 시간 초과")
             logger.error("PII 탐지 요청 타임아웃")
             return {
                 "has_pii": False,
@@ -92,7 +98,7 @@ class PIIDetectionClient:
                 "anonymization_method": anonymization_method
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with httpx.AsyncClient(timeout=derive_timeout(30.0)) as client:
                 response = await client.post(
                     f"{self.base_url}/anonymize",
                     json=payload
@@ -100,7 +106,11 @@ class PIIDetectionClient:
                 response.raise_for_status()
                 return response.json()
                 
+        except DeadlineExceeded:
+            raise
         except httpx.TimeoutException:
+            if deadline_expired():
+                raise DeadlineExceeded("PII 익명화 요청 마감 시간 초과")
             logger.error("PII 익명화 요청 타임아웃")
             return {
                 "original_text": text,
@@ -128,7 +138,7 @@ class PIIDetectionClient:
                 "language": language
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with httpx.AsyncClient(timeout=derive_timeout(30.0)) as client:
                 response = await client.post(
                     f"{self.base_url}/detect-and-anonymize",
                     json=payload
@@ -136,7 +146,11 @@ class PIIDetectionClient:
                 response.raise_for_status()
                 return response.json()
                 
+        except DeadlineExceeded:
+            raise
         except httpx.TimeoutException:
+            if deadline_expired():
+                raise DeadlineExceeded("PII 탐지 및 익명화 요청 마감 시간 초과")
             logger.error("PII 탐지 및 익명화 요청 타임아웃")
             return {
                 "detection": {
@@ -16,6 +16,8 @@ from datetime import datetime
 import os
 import toml
 
+from .telemetry import traced_stage
+
 # PII 탐지 라이브러리 import
 try:
     import spacy
@@ -362,6 +364,7 @@ class AdvancedPIIDetector:
             logger.error(f"toml 파일에서 패턴 로드 실패: {e}")
             return False
     
+    @traced_stage("pii")
     async def scan_text(self, text: str, context: str = "") -> PIIScanResult:
         """텍스트에서 PII 스캔 - 마이크로서비스 우선 사용"""
         start_time = time.time()
@@ -902,13 +905,17 @@ class AdvancedPIIDetector:
 
 # 전역 인스턴스
 _pii_detector_instance: Optional[AdvancedPIIDetector] = None
+_pii_detector_lock = asyncio.Lock()
 
 async def get_pii_detector() -> AdvancedPIIDetector:
     """PII 탐지기 인스턴스 반환"""
     global _pii_detector_instance
     
     if _pii_detector_instance is None:
-        _pii_detector_instance = AdvancedPIIDetector()
+        async with _pii_detector_lock:
+            if _pii_detector_instance is None:
+                # spaCy/Presidio 모델 로딩은 블로킹 작업이므로 이벤트 루프를 막지 않도록 스레드에서 생성
+                _pii_detector_instance = await asyncio.to_thread(AdvancedPIIDetector)
     
     return _pii_detector_instance
 
@@ -12,6 +12,8 @@ from enum import Enum
 import os
 from datetime import datetime
 
+from app.deadline import DeadlineExceeded, deadline_expired, derive_timeout
+
 logger = logging.getLogger(__name__)
 
 class PolicyAction(Enum):
@@ -51,16 +53,20 @@ class OPAClient:
         logger.info(f"OPA 클라이언트 초기화: {opa_url}")
     
     async def query_policy(self, policy_path: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """OPA 정책 쿼리 실행"""
+        """OPA 정책 쿼리 실행 (타임아웃은 요청 마감 시간까지 남은 시간으로 제한)"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=derive_timeout(self.timeout)) as client:
                 response = await client.post(
                     f"{self.opa_url}/v1/data/{policy_path}",
                     json={"input": input_data}
                 )
                 response.raise_for_status()
                 return response.json()
+        except DeadlineExceeded:
+            raise
         except httpx.TimeoutException:
+            if deadline_expired():
+                raise DeadlineExceeded(f"OPA 쿼리 마감 시간 초과: {policy_path}")
             logger.error(f"OPA 쿼리 타임아웃: {policy_path}")
             return {"result": {"allow": False, "reason": "OPA timeout"}}
         except Exception as e:
@@ -70,7 +76,7 @@ class OPAClient:
     async def health_check(self) -> bool:
         """OPA 서버 상태 확인"""
         try:
-            async with httpx.AsyncClient(timeout=2.0) as client:
+            async with httpx.AsyncClient(timeout=derive_timeout(2.0)) as client:
                 response = await client.get(f"{self.opa_url}/health")
                 return response.status_code == 200
         except Exception as e:
@@ -218,6 +224,9 @@ class PolicyEngine:
             
             return PolicyResult(**result)
             
+        except DeadlineExceeded:
+            # 호출자(run_detector)가 timed_out 으로 보고하고 fail 모드를 적용
+            raise
         except Exception as e:
             logger.error(f"정책 평가 실패: {e}")
             return PolicyResult(
@@ -0,0 +1,458 @@
+"""
+샘플링 프로파일러 (관리자 전용)
+p99 가 튈 때 원인(시크릿 스캐너 정규식 백트래킹, Okt 형태소 분석, encode 의 GIL 경합 등)을
+운영 중인 프로세스에서 바로 확인하기 위한 스택 샘플러. 별도 의존성 없이 sys._current_frames() 를
+주기적으로 읽어 flamegraph.pl / speedscope 에 그대로 넣을 수 있는 collapsed stack 형식으로 집계한다.
+
+    GET /admin/profile?seconds=10&mode=wall|cpu   N초 동안 전체 스레드 샘플링
+    X-Profile-Request: wall|cpu (요청 헤더)        해당 요청만 프로파일, 응답 헤더 X-Profile-Id 로 조회
+    PROFILER_SLOW_REQUEST_MS                      이 시간을 넘긴 요청의 스택 샘플을 자동 보관
+    GET /admin/profile/captures[/{id}]            요청/느린 요청 캡처 목록과 collapsed stack
+
+값의 단위는 마이크로초이다. wall 은 샘플 사이 경과 시간을 대기 중인 스레드까지 포함해 더하고,
+cpu 는 샘플 사이 각 스레드가 실제로 쓴 CPU 시간(pthread_getcpuclockid)을 더한다.
+두 결과의 차이가 I/O 대기나 GIL 대기 시간이다. 요청 단위 캡처는 이벤트 루프에서 그 요청이 실행 중인
+스택만 포함하므로 스레드로 넘긴 작업(to_thread)은 /admin/profile 로 확인한다.
+샘플러도 GIL 이 있어야 스택을 읽으므로 GIL 을 놓지 않는 C 호출(re 매칭 등)은 한 번의 큰 샘플로 잡히고,
+그 값은 호출이 끝난 직후 위치(호출한 함수)에 붙는다.
+
+백엔드와 pii-detector 서비스가 같은 모듈을 사용한다. (각 이미지에 app/ 만 복사되므로 두 곳에 둠)
+
+설정 (환경변수):
+    PROFILER_ADMIN_TOKEN        X-Admin-Token 헤더로 받을 토큰 (미설정 시 프로파일러 비활성화)
+    PROFILER_INTERVAL_MS        샘플 주기 (기본 10)
+    PROFILER_MAX_SECONDS        /admin/profile 최대 시간 (기본 60)
+    PROFILER_SLOW_REQUEST_MS    느린 요청 캡처 기준 (기본 0 = 끔)
+    PROFILER_MAX_CAPTURES       보관할 캡처 수 (기본 50)
+"""
+
+import asyncio
+import hmac
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+WALL = "wall"
+CPU = "cpu"
+MODES = (WALL, CPU)
+
+# 스레드별 CPU 시간은 POSIX 스레드 CPU 클럭으로 읽음 (Linux 등)
+CPU_SUPPORTED = hasattr(time, "pthread_getcpuclockid")
+
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+PROFILE_REQUEST_HEADER = b"x-profile-request"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+MAX_STACK_DEPTH = 128
+
+# 프로파일러 자체 엔드포인트는 느린 요청 캡처 대상에서 제외 (/admin/profile 은 seconds 만큼 걸림)
+PROFILER_PATH_PREFIX = "/admin/profile"
+
+def collapse(stacks: Counter) -> str:
+    """collapsed stack 텍스트 ("루트;...;리프 값" 한 줄씩)"""
+    return "".join(f"{stack} {value}\n" for stack, value in stacks.most_common())
+
+@dataclass
+class ProfileSession:
+    """/admin/profile 한 번의 전체 스레드 샘플링"""
+    mode: str
+    stacks: Counter = field(default_factory=Counter)
+    samples: int = 0
+
+@dataclass
+class RequestProfile:
+    """진행 중인 요청 하나의 샘플 (frame 이 이벤트 루프 스택에 있을 때만 집계)"""
+    capture_id: str
+    method: str
+    path: str
+    mode: str
+    frame: Any          # 요청을 처리 중인 ProfilerMiddleware 코루틴 프레임
+    thread_id: int
+    requested: bool
+    stacks: Counter = field(default_factory=Counter)
+    samples: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+
+@dataclass
+class Capture:
+    """보관된 요청 프로파일"""
+    capture_id: str
+    reason: str         # requested | slow
+    method: str
+    path: str
+    mode: str
+    duration_ms: float
+    samples: int
+    captured_at: str
+    stacks: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "capture_id": self.capture_id,
+            "reason": self.reason,
+            "method": self.method,
+            "path": self.path,
+            "mode": self.mode,
+            "duration_ms": round(self.duration_ms, 2),
+            "samples": self.samples,
+            "captured_at": self.captured_at,
+        }
+
+class StackSampler:
+    """
+    프로세스 스택 샘플러
+    샘플링할 대상(세션 또는 진행 중인 요청)이 있을 때만 백그라운드 스레드가 깨어나 샘플을 모은다.
+    """
+
+    def __init__(self,
+                 admin_token: str = "",
+                 interval: float = 0.01,
+                 max_seconds: float = 60.0,
+                 slow_threshold: float = 0.0,
+                 max_captures: int = 50):
+        self.admin_token = admin_token
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.slow_threshold = slow_threshold
+        self.captures: Deque[Capture] = deque(maxlen=max_captures)
+
+        self._sessions: List[ProfileSession] = []
+        self._requests: Dict[str, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ident: Optional[int] = None
+        self._ids = itertools.count(1)
+        self._labels: Dict[Any, str] = {}
+        self._cpu_last: Dict[int, int] = {}
+        self._last_tick: Optional[float] = None
+
+        self.total_samples = 0
+        self.sample_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "StackSampler":
+        return cls(
+            admin_token=os.getenv("PROFILER_ADMIN_TOKEN", ""),
+            interval=float(os.getenv("PROFILER_INTERVAL_MS", "10")) / 1000.0,
+            max_seconds=float(os.getenv("PROFILER_MAX_SECONDS", "60")),
+            slow_threshold=float(os.getenv("PROFILER_SLOW_REQUEST_MS", "0")) / 1000.0,
+            max_captures=int(os.getenv("PROFILER_MAX_CAPTURES", "50")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token)
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        if not self.enabled or not token:
+            return False
+        return hmac.compare_digest(token.encode(), self.admin_token.encode())
+
+    # ------------------------------------------------------------------
+    # 세션 / 요청 등록
+    # ------------------------------------------------------------------
+    def start_session(self, mode: str) -> ProfileSession:
+        session = ProfileSession(mode=mode)
+        with self._lock:
+            self._sessions.append(session)
+        self._ensure_running()
+        return session
+
+    def stop_session(self, session: ProfileSession):
+        with self._lock:
+            self._sessions.remove(session)
+
+    def begin_request(self, method: str, path: str, mode: str, frame, requested: bool) -> RequestProfile:
+        profile = RequestProfile(
+            capture_id=f"{os.getpid()}-{next(self._ids)}",
+            method=method,
+            path=path,
+            mode=mode,
+            frame=frame,
+            thread_id=threading.get_ident(),
+            requested=requested,
+        )
+        with self._lock:
+            self._requests[profile.capture_id] = profile
+        self._ensure_running()
+        return profile
+
+    def end_request(self, profile: RequestProfile) -> Optional[Capture]:
+        """요청 종료, 헤더로 요청했거나 기준 시간을 넘겼으면 캡처 보관"""
+        duration = time.perf_counter() - profile.started_at
+        # 등록 해제 후에는 샘플러가 profile 을 건드리지 않음
+        with self._lock:
+            self._requests.pop(profile.capture_id, None)
+        profile.frame = None
+
+        if profile.requested:
+            reason = "requested"
+        elif self.slow_threshold and duration >= self.slow_threshold:
+            reason = "slow"
+            logger.warning(f"[Profiler] 느린 요청 캡처: {profile.method} {profile.path} "
+                           f"{duration * 1000:.0f}ms (id={profile.capture_id}, samples={profile.samples})")
+        else:
+            return None
+
+        capture = Capture(
+            capture_id=profile.capture_id,
+            reason=reason,
+            method=profile.method,
+            path=profile.path,
+            mode=profile.mode,
+            duration_ms=duration * 1000,
+            samples=profile.samples,
+            captured_at=datetime.utcnow().isoformat(),
+            stacks=collapse(profile.stacks),
+        )
+        self.captures.append(capture)
+        return capture
+
+    def get_capture(self, capture_id: str) -> Optional[Capture]:
+        for capture in self.captures:
+            if capture.capture_id == capture_id:
+                return capture
+        return None
+
+    # ------------------------------------------------------------------
+    # 샘플링 스레드
+    # ------------------------------------------------------------------
+    def _ensure_running(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                    self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        self._ident = threading.get_ident()
+        while True:
+            self._wakeup.clear()
+            with self._lock:
+                active = bool(self._sessions or self._requests)
+            if not active:
+                # 대상이 없으면 다음 요청/세션까지 대기 (기준 시각도 초기화)
+                self._last_tick = None
+                self._cpu_last.clear()
+                self._wakeup.wait()
+                continue
+
+            started = time.perf_counter()
+            try:
+                with self._lock:
+                    self._sample(started)
+            except Exception as e:
+                logger.error(f"[Profiler] 샘플링 실패: {e}")
+            elapsed = time.perf_counter() - started
+            self.total_samples += 1
+            self.sample_seconds += elapsed
+            time.sleep(max(self.interval - elapsed, 0.0))
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            short = os.path.join(os.path.basename(os.path.dirname(filename)), os.path.basename(filename))
+            label = f"{getattr(code, 'co_qualname', code.co_name)} ({short}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _cpu_delta(self, thread_id: int, wall: int) -> int:
+        """
+        지난 샘플 이후 스레드가 쓴 CPU 시간 (마이크로초)
+        처음 보는 스레드는 0, 종료된 스레드의 ident 가 재사용된 경우를 위해 0 ~ wall 로 제한
+        """
+        try:
+            now = time.clock_gettime_ns(time.pthread_getcpuclockid(thread_id))
+        except (OSError, ValueError):
+            return 0
+        last = self._cpu_last.get(thread_id)
+        self._cpu_last[thread_id] = now
+        if last is None:
+            return 0
+        return min(max((now - last) // 1000, 0), wall)
+
+    def _sample(self, now: float):
+        wall = 0 if self._last_tick is None else int((now - self._last_tick) * 1_000_000)
+        self._last_tick = now
+
+        requests_by_thread: Dict[int, Dict[Any, RequestProfile]] = {}
+        for profile in self._requests.values():
+            requests_by_thread.setdefault(profile.thread_id, {})[profile.frame] = profile
+        cpu_needed = (any(s.mode == CPU for s in self._sessions)
+                      or any(p.mode == CPU for p in self._requests.values()))
+
+        frames = sys._current_frames()
+        # 세션이 없으면 요청을 처리하는 이벤트 루프 스레드만 본다
+        thread_ids = list(frames) if self._sessions else [t for t in requests_by_thread if t in frames]
+        names = {t.ident: t.name for t in threading.enumerate()} if self._sessions else {}
+
+        for thread_id in thread_ids:
+            if thread_id == self._ident:
+                continue
+            cpu = self._cpu_delta(thread_id, wall) if cpu_needed else 0
+            watched = requests_by_thread.get(thread_id)
+
+            labels = []
+            matched = []
+            frame = frames[thread_id]
+            while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                labels.append(self._label(frame.f_code))
+                if watched and frame in watched:
+                    matched.append(watched[frame])
+                frame = frame.f_back
+            labels.reverse()
+            stack = ";".join(labels)
+
+            if self._sessions:
+                rooted = f"thread:{names.get(thread_id, thread_id)};{stack}"
+                for session in self._sessions:
+                    value = cpu if session.mode == CPU else wall
+                    if value:
+                        session.stacks[rooted] += value
+            for profile in matched:
+                value = cpu if profile.mode == CPU else wall
+                profile.samples += 1
+                if value:
+                    profile.stacks[stack] += value
+
+        for session in self._sessions:
+            session.samples += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = len(self._sessions)
+            requests = len(self._requests)
+        return {
+            "enabled": self.enabled,
+            "interval_ms": self.interval * 1000,
+            "slow_request_ms": self.slow_threshold * 1000,
+            "cpu_supported": CPU_SUPPORTED,
+            "active_sessions": sessions,
+            "inflight_requests": requests,
+            "captures": len(self.captures),
+            "total_samples": self.total_samples,
+            "avg_sample_us": round(self.sample_seconds / self.total_samples * 1_000_000, 1)
+                             if self.total_samples else 0.0,
+        }
+
+class ProfilerMiddleware:
+    """
+    요청 단위 프로파일 (순수 ASGI, 가장 바깥 미들웨어로 등록)
+    관리자 토큰과 X-Profile-Request 헤더가 있거나 느린 요청 캡처가 켜져 있으면 요청을 샘플 대상으로 등록한다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        sampler = get_profiler()
+        if scope["type"] != "http" or not sampler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        requested_mode = None
+        token = None
+        for key, value in scope.get("headers", []):
+            if key == PROFILE_REQUEST_HEADER:
+                requested_mode = CPU if value.decode("latin-1").strip().lower() == CPU else WALL
+            elif key == ADMIN_TOKEN_HEADER:
+                token = value.decode("latin-1")
+        if requested_mode is not None and not sampler.is_admin(token):
+            requested_mode = None
+        if requested_mode == CPU and not CPU_SUPPORTED:
+            requested_mode = WALL
+        if requested_mode is None and (not sampler.slow_threshold
+                                       or scope.get("path", "").startswith(PROFILER_PATH_PREFIX)):
+            await self.app(scope, receive, send)
+            return
+
+        profile = sampler.begin_request(scope.get("method", ""), scope.get("path", ""),
+                                        requested_mode or WALL, sys._getframe(),
+                                        requested=requested_mode is not None)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, profile.capture_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id if profile.requested else send)
+        finally:
+            sampler.end_request(profile)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """관리자 토큰 확인 (프로파일러 비활성화 시 404)"""
+    sampler = get_profiler()
+    if not sampler.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not sampler.is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 필요합니다")
+
+router = APIRouter(prefix=PROFILER_PATH_PREFIX, tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.get("", response_class=PlainTextResponse)
+async def profile_process(seconds: float = Query(10.0, gt=0), mode: str = Query(WALL)):
+    """N초 동안 전체 스레드 샘플링 (collapsed stack, 단위 마이크로초)"""
+    sampler = get_profiler()
+    if mode not in MODES:
+        raise HTTPException(status_code=400, detail=f"mode 는 {' / '.join(MODES)} 중 하나여야 합니다")
+    if mode == CPU and not CPU_SUPPORTED:
+        raise HTTPException(status_code=400, detail="이 플랫폼에서는 cpu 모드를 지원하지 않습니다")
+    if seconds > sampler.max_seconds:
+        raise HTTPException(status_code=400, detail=f"seconds 는 최대 {sampler.max_seconds:g} 입니다")
+
+    logger.info(f"[Profiler] {mode} 프로파일 시작 ({seconds:g}초)")
+    session = sampler.start_session(mode)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop_session(session)
+
+    return PlainTextResponse(collapse(session.stacks), headers={
+        "X-Profile-Mode": mode,
+        "X-Profile-Samples": str(session.samples),
+    })
+
+@router.get("/captures")
+async def list_captures():
+    """요청/느린 요청 캡처 목록 (최신순)"""
+    return {"captures": [capture.to_dict() for capture in reversed(get_profiler().captures)]}
+
+@router.get("/captures/{capture_id}", response_class=PlainTextResponse)
+async def get_capture(capture_id: str):
+    capture = get_profiler().get_capture(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="캡처를 찾을 수 없습니다")
+    return PlainTextResponse(capture.stacks, headers={
+        "X-Profile-Mode": capture.mode,
+        "X-Profile-Samples": str(capture.samples),
+    })
+
+@router.get("/status")
+async def profiler_status():
+    return get_profiler().get_stats()
+
+_profiler_instance: Optional[StackSampler] = None
+
+def get_profiler() -> StackSampler:
+    global _profiler_instance
+    if _profiler_instance is None:
+        _profiler_instance = StackSampler.from_env()
+    return _profiler_instance
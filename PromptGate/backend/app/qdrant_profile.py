@@ -0,0 +1,198 @@
+"""
+Qdrant 컬렉션 튜닝 프로파일
+HNSW m/ef_construct, int8 스칼라 양자화(+원본 벡터 재채점), 원본 벡터 on-disk 저장, payload 인덱스
+(category/severity/source/tenant_id) 를 한 곳에서 관리하고 생성/검색/마이그레이션에 공통 적용
+
+환경변수 (기본값)
+    QDRANT_HNSW_M=16  QDRANT_HNSW_EF_CONSTRUCT=200  QDRANT_SEARCH_EF=128
+    QDRANT_QUANTIZATION=true  QDRANT_QUANTIZATION_OVERSAMPLING=2.0  QDRANT_ON_DISK_VECTORS=true
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAYLOAD_INDEXES = {
+    "category": "keyword",
+    "severity": "keyword",
+    "source": "keyword",
+    "tenant_id": "keyword",
+}
+
+@dataclass
+class CollectionProfile:
+    """컬렉션 튜닝 프로파일"""
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 200
+    search_ef: int = 128
+    quantization: bool = True
+    quantile: float = 0.99
+    always_ram: bool = True  # 양자화 벡터는 RAM, 원본은 on-disk
+    rescore: bool = True
+    oversampling: float = 2.0
+    on_disk_vectors: bool = True
+    payload_indexes: Dict[str, str] = field(default_factory=lambda: dict(DEFAULT_PAYLOAD_INDEXES))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hnsw_m": self.hnsw_m,
+            "hnsw_ef_construct": self.hnsw_ef_construct,
+            "search_ef": self.search_ef,
+            "quantization": "int8" if self.quantization else None,
+            "quantile": self.quantile,
+            "rescore": self.rescore,
+            "oversampling": self.oversampling,
+            "on_disk_vectors": self.on_disk_vectors,
+            "payload_indexes": self.payload_indexes,
+        }
+
+def get_collection_profile() -> CollectionProfile:
+    """환경변수로 조정한 프로파일"""
+    return CollectionProfile(
+        hnsw_m=int(os.getenv("QDRANT_HNSW_M", "16")),
+        hnsw_ef_construct=int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "200")),
+        search_ef=int(os.getenv("QDRANT_SEARCH_EF", "128")),
+        quantization=os.getenv("QDRANT_QUANTIZATION", "true").lower() == "true",
+        oversampling=float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", "2.0")),
+        on_disk_vectors=os.getenv("QDRANT_ON_DISK_VECTORS", "true").lower() == "true",
+    )
+
+def _quantization_config(profile: CollectionProfile):
+    from qdrant_client.models import ScalarQuantization, ScalarQuantizationConfig, ScalarType
+
+    return ScalarQuantization(
+        scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=profile.quantile,
+                                        always_ram=profile.always_ram)
+    )
+
+def build_search_params(profile: Optional[CollectionProfile] = None, exact: bool = False):
+    """프로파일에 맞는 SearchParams (양자화 사용 시 oversampling 후 원본 벡터로 재채점)"""
+    from qdrant_client.models import SearchParams, QuantizationSearchParams
+
+    profile = profile or get_collection_profile()
+    quantization = None
+    if profile.quantization:
+        quantization = QuantizationSearchParams(ignore=False, rescore=profile.rescore,
+                                                oversampling=profile.oversampling)
+    return SearchParams(hnsw_ef=profile.search_ef, exact=exact, quantization=quantization)
+
+def build_tenant_filter(tenant_id: Optional[str]):
+    """
+    해당 테넌트 + 테넌트 미지정(공용) 포인트만 검색하는 필터 (검색 엔진 내부에서 적용)
+    테넌트가 없는 요청은 공용 포인트만 검색한다. (다른 테넌트의 전용 차단 프롬프트가 노출되지 않도록)
+    """
+    from qdrant_client.models import Filter, FieldCondition, MatchValue, IsEmptyCondition, PayloadField
+
+    shared = IsEmptyCondition(is_empty=PayloadField(key="tenant_id"))
+    if not tenant_id:
+        return Filter(must=[shared])
+    return Filter(should=[
+        FieldCondition(key="tenant_id", match=MatchValue(value=tenant_id)),
+        shared,
+    ])
+
+def is_visible_to_tenant(payload: Optional[Dict[str, Any]], tenant_id: Optional[str]) -> bool:
+    """로컬 검색 결과에 build_tenant_filter 와 같은 조건 적용"""
+    owner = (payload or {}).get("tenant_id")
+    return not owner or (bool(tenant_id) and owner == tenant_id)
+
+def create_collection_with_profile(client: Any, collection_name: str, dimension: int,
+                                   profile: Optional[CollectionProfile] = None):
+    """프로파일을 적용해 컬렉션 생성 후 payload 인덱스 생성"""
+    from qdrant_client.models import VectorParams, Distance, HnswConfigDiff
+
+    profile = profile or get_collection_profile()
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=dimension, distance=Distance.COSINE, on_disk=profile.on_disk_vectors),
+        hnsw_config=HnswConfigDiff(m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct),
+        quantization_config=_quantization_config(profile) if profile.quantization else None,
+    )
+    ensure_payload_indexes(client, collection_name, profile)
+    logger.info(f"컬렉션 생성 완료 (튜닝 프로파일 적용): {collection_name}")
+
+def ensure_payload_indexes(client: Any, collection_name: str, profile: Optional[CollectionProfile] = None) -> List[str]:
+    """없는 payload 인덱스만 생성"""
+    from qdrant_client.models import PayloadSchemaType
+
+    profile = profile or get_collection_profile()
+    existing = describe_collection(client, collection_name)["payload_indexes"]
+    created = []
+    for field_name, schema in profile.payload_indexes.items():
+        if field_name in existing:
+            continue
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=PayloadSchemaType(schema),
+        )
+        created.append(field_name)
+    if created:
+        logger.info(f"payload 인덱스 생성: {collection_name} {created}")
+    return created
+
+def describe_collection(client: Any, collection_name: str) -> Dict[str, Any]:
+    """현재 컬렉션 설정 요약"""
+    info = client.get_collection(collection_name)
+    vectors = info.config.params.vectors
+    hnsw = info.config.hnsw_config
+    quantization = info.config.quantization_config
+    return {
+        "points": info.points_count,
+        "status": getattr(info.status, "value", str(info.status)),
+        "vector_size": vectors.size,
+        "on_disk_vectors": bool(getattr(vectors, "on_disk", False)),
+        "hnsw_m": hnsw.m,
+        "hnsw_ef_construct": hnsw.ef_construct,
+        "quantization": "int8" if quantization is not None and getattr(quantization, "scalar", None) else None,
+        "payload_indexes": {name: getattr(schema.data_type, "value", str(schema.data_type))
+                            for name, schema in (info.payload_schema or {}).items()},
+    }
+
+def plan_profile_changes(current: Dict[str, Any], profile: CollectionProfile) -> List[str]:
+    """현재 설정과 프로파일의 차이"""
+    changes = []
+    if current["hnsw_m"] != profile.hnsw_m or current["hnsw_ef_construct"] != profile.hnsw_ef_construct:
+        changes.append(f"hnsw m={current['hnsw_m']}→{profile.hnsw_m}, "
+                       f"ef_construct={current['hnsw_ef_construct']}→{profile.hnsw_ef_construct}")
+    wanted_quantization = "int8" if profile.quantization else None
+    if current["quantization"] != wanted_quantization:
+        changes.append(f"quantization {current['quantization']}→{wanted_quantization}")
+    if current["on_disk_vectors"] != profile.on_disk_vectors:
+        changes.append(f"on_disk_vectors {current['on_disk_vectors']}→{profile.on_disk_vectors}")
+    for field_name in profile.payload_indexes:
+        if field_name not in current["payload_indexes"]:
+            changes.append(f"payload index +{field_name}")
+    return changes
+
+def apply_profile(client: Any, collection_name: str, profile: Optional[CollectionProfile] = None) -> List[str]:
+    """
+    기존 컬렉션에 프로파일 적용 (데이터 유지)
+
+    HNSW/양자화/on-disk 변경은 Qdrant 가 백그라운드로 세그먼트를 재구성하며, 그동안 상태가 yellow 로 표시된다.
+    """
+    from qdrant_client.models import HnswConfigDiff, VectorParamsDiff, Disabled
+
+    profile = profile or get_collection_profile()
+    current = describe_collection(client, collection_name)
+    changes = plan_profile_changes(current, profile)
+    if not changes:
+        return []
+
+    if profile.quantization:
+        quantization_config = _quantization_config(profile)
+    else:
+        quantization_config = Disabled.DISABLED if current["quantization"] else None
+
+    client.update_collection(
+        collection_name=collection_name,
+        hnsw_config=HnswConfigDiff(m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct),
+        vectors_config={"": VectorParamsDiff(on_disk=profile.on_disk_vectors)},
+        quantization_config=quantization_config,
+    )
+    ensure_payload_indexes(client, collection_name, profile)
+    logger.info(f"컬렉션 프로파일 적용: {collection_name} {changes}")
+    return changes
@@ -15,8 +15,9 @@ logger = get_logger("rebuff-integration")
 class RebuffIntegration:
     def __init__(self):
         self.settings = get_settings()
-        self.rebuff_client = get_rebuff_client()
-        logger.info(f"Rebuff Integration 초기화 완료. 상태: {self.rebuff_client.get_status()}")
+        # 클라이언트 (오프라인 엔진 포함) 는 첫 탐지 시 이벤트 루프 안에서 싱글톤으로 준비
+        self.rebuff_client = None
+        logger.info("Rebuff Integration 초기화 완료")
     
     async def detect_prompt_injection(self, prompt: str) -> Dict:
         """
@@ -33,6 +34,8 @@ class RebuffIntegration:
         """
         try:
             # 새로운 Rebuff SDK 클라이언트 사용
+            if self.rebuff_client is None:
+                self.rebuff_client = await get_rebuff_client()
             result = await self.rebuff_client.detect_injection(prompt)
             
             return {
@@ -6,10 +6,13 @@ Rebuff SDK 클라이언트 구현
 import os
 import asyncio
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from enum import Enum
 import logging
 
+from .rebuff_engine import OfflineRebuffEngine, create_model_scorer, match_injection_patterns
+
 logger = logging.getLogger(__name__)
 
 class DetectionMethod(Enum):
@@ -29,6 +32,7 @@ class RebuffResult:
     tactics: List[str]
     canary_word: Optional[str] = None
     processing_time: float = 0.0
+    scores: Dict[str, Optional[float]] = field(default_factory=dict)
 
 class RebuffSDKClient:
     """Rebuff SDK 클라이언트"""
@@ -37,7 +41,8 @@ class RebuffSDKClient:
                  openai_api_key: str,
                  pinecone_api_key: Optional[str] = None,
                  pinecone_index: Optional[str] = None,
-                 openai_model: str = "gpt-3.5-turbo"):
+                 openai_model: str = "gpt-3.5-turbo",
+                 engine: Optional[OfflineRebuffEngine] = None):
         """
         Rebuff SDK 클라이언트 초기화
         
@@ -46,17 +51,32 @@ class RebuffSDKClient:
             pinecone_api_key: Pinecone API 키 (선택사항)
             pinecone_index: Pinecone 인덱스명 (선택사항)
             openai_model: 사용할 OpenAI 모델
+            engine: 오프라인 Rebuff 엔진 (지정 시 OpenAI/Pinecone 없이 클러스터 내에서 탐지)
         """
         self.openai_api_key = openai_api_key
         self.pinecone_api_key = pinecone_api_key
         self.pinecone_index = pinecone_index
         self.openai_model = openai_model
+        self.engine = engine
+        self.mode = "offline" if engine is not None else "sdk"
         
         self.rebuff_client = None
         self.is_initialized = False
         
-        # SDK 초기화 시도
-        self._initialize_sdk()
+        # SDK 초기화 시도 (오프라인 모드는 initialize() 에서 엔진 준비)
+        if self.engine is None:
+            self._initialize_sdk()
+    
+    async def initialize(self):
+        """오프라인 엔진 초기화 (벡터 저장소/모델은 최초 1회만 준비)"""
+        if self.engine is None:
+            return
+        try:
+            await self.engine.initialize()
+            self.is_initialized = any(self.engine.layer_status.values())
+        except Exception as e:
+            logger.error(f"오프라인 Rebuff 엔진 초기화 실패: {e}")
+            self.is_initialized = False
     
     def _initialize_sdk(self):
         """Rebuff SDK 초기화"""
@@ -96,7 +116,8 @@ class RebuffSDKClient:
                             run_llm: bool = True,
                             max_heuristic_score: float = 0.75,
                             max_vector_score: float = 0.9,
-                            max_model_score: float = 0.9) -> RebuffResult:
+                            max_model_score: float = 0.9,
+                            tenant_id: Optional[str] = None) -> RebuffResult:
         """
         프롬프트 인젝션 탐지
         
@@ -108,13 +129,62 @@ class RebuffSDKClient:
             max_heuristic_score: 휴리스틱 최대 점수
             max_vector_score: 벡터 최대 점수
             max_model_score: 모델 최대 점수
+            tenant_id: 테넌트 ID (벡터 검사에 테넌트 정책 적용)
             
         Returns:
             RebuffResult: 탐지 결과
         """
-        # 임시로 fallback 방식만 사용 (asyncio.run() 오류 해결을 위해)
-        logger.warning("Rebuff SDK 임시 비활성화. Fallback 방식 사용")
-        return self._fallback_detection(prompt)
+        if not self.is_initialized:
+            return self._fallback_detection(prompt)
+        
+        start_time = time.time()
+        try:
+            if self.engine is not None:
+                layer_scores = await self.engine.score(prompt, run_heuristic, run_vector, run_llm, tenant_id)
+                scores = layer_scores.to_dict()
+                errors = layer_scores.errors
+                matched_prompts = layer_scores.matched_prompts
+            else:
+                # SDK 탐지는 동기 HTTP 호출이므로 이벤트 루프를 막지 않도록 스레드에서 실행
+                response = await asyncio.to_thread(
+                    self.rebuff_client.detect_injection,
+                    prompt,
+                    max_heuristic_score=max_heuristic_score,
+                    max_vector_score=max_vector_score,
+                    max_model_score=max_model_score,
+                    check_heuristic=run_heuristic,
+                    check_vector=run_vector,
+                    check_llm=run_llm
+                )
+                scores = {
+                    "heuristic": response.heuristic_score if run_heuristic else None,
+                    "vector": response.vector_score if run_vector else None,
+                    "model": response.openai_score if run_llm else None
+                }
+                errors = {}
+                matched_prompts = []
+        except Exception as e:
+            logger.error(f"Rebuff 탐지 실패, Fallback 방식 사용: {e}")
+            return self._fallback_detection(prompt)
+        
+        limits = {"heuristic": max_heuristic_score, "vector": max_vector_score, "model": max_model_score}
+        methods = {"heuristic": DetectionMethod.HEURISTIC, "vector": DetectionMethod.VECTOR, "model": DetectionMethod.LLM}
+        triggered = [name for name, score in scores.items() if score is not None and score > limits[name]]
+        
+        reasons = [f"{name} score {scores[name]:.3f} > {limits[name]}" for name in triggered]
+        if "vector" in triggered:
+            reasons.extend(f"similar to: {matched[:50]}" for matched in matched_prompts[:3])
+        reasons.extend(f"{name} 검사 실패: {error}" for name, error in errors.items())
+        
+        return RebuffResult(
+            is_injection=bool(triggered),
+            confidence=max((score for score in scores.values() if score is not None), default=0.0),
+            method=methods[triggered[0]] if len(triggered) == 1 else DetectionMethod.HYBRID,
+            reasons=reasons,
+            tactics=triggered,
+            processing_time=time.time() - start_time,
+            scores=scores
+        )
     
     async def add_canary_word(self, prompt_template: str) -> tuple[str, str]:
         """
@@ -126,6 +196,9 @@ class RebuffSDKClient:
         Returns:
             tuple: (카나리 워드가 추가된 프롬프트, 카나리 워드)
         """
+        if self.engine is not None:
+            return self.engine.add_canary_word(prompt_template)
+        
         if not self.is_initialized or not self.rebuff_client:
             logger.warning("Rebuff SDK가 초기화되지 않음")
             return prompt_template, ""
@@ -153,6 +226,13 @@ class RebuffSDKClient:
         Returns:
             bool: 카나리 워드 유출 여부
         """
+        if self.engine is not None:
+            try:
+                return await self.engine.check_canary_leakage(user_input, completion, canary_word)
+            except Exception as e:
+                logger.error(f"카나리 워드 유출 검사 실패: {e}")
+                return canary_word in completion if canary_word else False
+        
         if not self.is_initialized or not self.rebuff_client:
             logger.warning("Rebuff SDK가 초기화되지 않음")
             return False
@@ -171,39 +251,10 @@ class RebuffSDKClient:
         """
         Fallback 탐지 (SDK 실패 시)
         """
-        import re
-        import time
-        
         start_time = time.time()
         
-        # 기본적인 프롬프트 인젝션 패턴
-        injection_patterns = [
-            r"ignore.*previous.*instructions",
-            r"forget.*everything.*before",
-            r"ignore.*above.*instructions",
-            r"disregard.*previous.*prompt",
-            r"ignore.*all.*instructions",
-            r"you.*are.*now.*different",
-            r"pretend.*to.*be",
-            r"act.*as.*if",
-            r"ignore.*safety.*guidelines",
-            r"bypass.*security",
-            r"jailbreak.*prompt",
-            r"roleplay.*as",
-            r"simulate.*scenario",
-            r"override.*system",
-            r"developer.*mode",
-            r"admin.*access",
-            r"root.*privileges",
-            r"sudo.*command",
-            r"execute.*code",
-            r"run.*script"
-        ]
-        
-        detected_patterns = []
-        for pattern in injection_patterns:
-            if re.search(pattern, prompt, re.IGNORECASE):
-                detected_patterns.append(pattern)
+        # 기본적인 프롬프트 인젝션 패턴 (오프라인 엔진 패턴 휴리스틱과 같은 목록)
+        detected_patterns = match_injection_patterns(prompt)
         
         is_injection = len(detected_patterns) > 0
         confidence = min(len(detected_patterns) * 0.3, 1.0)
@@ -223,33 +274,31 @@ class RebuffSDKClient:
         """Rebuff SDK 상태 조회"""
         return {
             "initialized": self.is_initialized,
+            "mode": self.mode,
             "has_openai": bool(self.openai_api_key),
             "has_pinecone": bool(self.pinecone_api_key and self.pinecone_index),
             "model": self.openai_model,
-            "client_available": self.rebuff_client is not None
+            "client_available": self.rebuff_client is not None,
+            "engine": self.engine.get_status() if self.engine else None
         }
 
 # 싱글톤 패턴을 위한 전역 변수
 _rebuff_client_instance: Optional[RebuffSDKClient] = None
+_rebuff_client_lock = asyncio.Lock()
 
 async def get_rebuff_client() -> RebuffSDKClient:
     """Rebuff SDK 클라이언트 싱글톤 인스턴스 반환"""
     global _rebuff_client_instance
     
     if _rebuff_client_instance is None:
-        import os
-        from app.config import get_settings
-        
-        settings = get_settings()
-        
-        _rebuff_client_instance = RebuffSDKClient(
-            openai_api_key=os.getenv("OPENAI_API_KEY", ""),
-            pinecone_api_key=os.getenv("PINECONE_API_KEY"),
-            pinecone_index=os.getenv("PINECONE_INDEX_NAME"),
-            openai_model="gpt-3.5-turbo"
-        )
-        
-        logger.info("Rebuff SDK 클라이언트 싱글톤 인스턴스 생성 완료")
+        async with _rebuff_client_lock:
+            if _rebuff_client_instance is None:
+                # Pinecone 연결 등 SDK 초기화는 블로킹 작업이므로 이벤트 루프를 막지 않도록 스레드에서 생성
+                client = await asyncio.to_thread(create_rebuff_client)
+                await client.initialize()
+                _rebuff_client_instance = client
+                
+                logger.info("Rebuff SDK 클라이언트 싱글톤 인스턴스 생성 완료")
     
     return _rebuff_client_instance
 
@@ -258,6 +307,8 @@ async def close_rebuff_client():
     global _rebuff_client_instance
     
     if _rebuff_client_instance:
+        if _rebuff_client_instance.engine:
+            await _rebuff_client_instance.engine.close()
         logger.info("Rebuff SDK 클라이언트 정리 완료")
         _rebuff_client_instance = None
 
@@ -266,32 +317,28 @@ def create_rebuff_client() -> RebuffSDKClient:
     """
     환경변수에서 설정을 로드하여 Rebuff 클라이언트 생성
     
+    REBUFF_MODE=offline (기본) 이면 OpenAI/Pinecone 없이 클러스터 내 오프라인 엔진 사용,
+    REBUFF_MODE=sdk 이면 공식 Rebuff SDK 사용
+    
     Returns:
         RebuffSDKClient: 생성된 클라이언트
     """
     openai_api_key = os.getenv("OPENAI_API_KEY", "")
     pinecone_api_key = os.getenv("PINECONE_API_KEY", "")
-    pinecone_index = os.getenv("PINECONE_INDEX", "")
+    pinecone_index = os.getenv("PINECONE_INDEX", os.getenv("PINECONE_INDEX_NAME", ""))
     openai_model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    mode = os.getenv("REBUFF_MODE", "offline").lower()
     
-    if not openai_api_key:
+    engine = None
+    if mode == "offline":
+        engine = OfflineRebuffEngine(model_scorer=create_model_scorer())
+    elif not openai_api_key:
         logger.warning("OPENAI_API_KEY가 설정되지 않음")
     
     return RebuffSDKClient(
         openai_api_key=openai_api_key,
         pinecone_api_key=pinecone_api_key,
         pinecone_index=pinecone_index,
-        openai_model=openai_model
+        openai_model=openai_model,
+        engine=engine
     )
-
-# 전역 클라이언트 인스턴스
-_rebuff_client: Optional[RebuffSDKClient] = None
-
-def get_rebuff_client() -> RebuffSDKClient:
-    """Rebuff 클라이언트 싱글톤 인스턴스 반환"""
-    global _rebuff_client
-    
-    if _rebuff_client is None:
-        _rebuff_client = create_rebuff_client()
-    
-    return _rebuff_client
@@ -916,13 +916,17 @@ class AdvancedSecretScanner:
 
 # 전역 Secret Scanner 인스턴스
 _secret_scanner_instance: Optional[AdvancedSecretScanner] = None
+_secret_scanner_lock = asyncio.Lock()
 
 async def get_secret_scanner() -> AdvancedSecretScanner:
     """Secret Scanner 인스턴스 반환 (싱글톤)"""
     global _secret_scanner_instance
     
     if _secret_scanner_instance is None:
-        _secret_scanner_instance = AdvancedSecretScanner()
+        async with _secret_scanner_lock:
+            if _secret_scanner_instance is None:
+                # 패턴 컴파일은 블로킹 작업이므로 이벤트 루프를 막지 않도록 스레드에서 생성
+                _secret_scanner_instance = await asyncio.to_thread(AdvancedSecretScanner)
     
     return _secret_scanner_instance
 
@@ -0,0 +1,178 @@
+"""
+서비스 시작 오케스트레이터
+엔진 초기화 단계를 의존 관계에 따라 병렬 실행하고, 엔진별 준비 상태와 소요 시간을 추적해
+/health (liveness) 와 별도로 /ready (readiness) 판단에 사용
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class StepState(Enum):
+    """초기화 단계 상태"""
+    PENDING = "pending"
+    STARTING = "starting"
+    READY = "ready"
+    FAILED = "failed"
+    SKIPPED = "skipped"  # 의존 단계 실패로 실행하지 않음
+
+@dataclass
+class StartupStep:
+    """초기화 단계 정의"""
+    name: str
+    init: Callable[[], Awaitable[Any]]
+    depends_on: List[str] = field(default_factory=list)
+    required: bool = True  # False 이면 실패해도 readiness 에 영향 없음 (기능 저하로 동작), 진행 중에는 대기
+    timeout: Optional[float] = None
+
+@dataclass
+class StepStatus:
+    """초기화 단계 실행 결과"""
+    state: StepState = StepState.PENDING
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    detail: Any = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return round((end - self.started_at) * 1000, 1)
+
+class StartupOrchestrator:
+    """의존 관계 기반 병렬 초기화 및 readiness 관리"""
+
+    def __init__(self, default_timeout: Optional[float] = None):
+        self.default_timeout = default_timeout
+        self.steps: Dict[str, StartupStep] = {}
+        self.status: Dict[str, StepStatus] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def add_step(self, name: str, init: Callable[[], Awaitable[Any]], depends_on: Optional[List[str]] = None,
+                 required: bool = True, timeout: Optional[float] = None):
+        """초기화 단계 등록 (init 은 인자 없는 코루틴 함수, 반환값은 상태 정보로 보관)"""
+        self.steps[name] = StartupStep(name, init, list(depends_on or []), required, timeout)
+        self.status[name] = StepStatus()
+
+    def _validate(self):
+        """미등록 의존성 / 순환 의존성 검사"""
+        for step in self.steps.values():
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(f"{step.name}: 등록되지 않은 의존 단계 {dependency}")
+
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"순환 의존성 발견: {name}")
+            visiting.add(name)
+            for dependency in self.steps[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.steps:
+            visit(name)
+
+    async def _run_step(self, step: StartupStep):
+        status = self.status[step.name]
+
+        # 의존 단계 완료 대기
+        for dependency in step.depends_on:
+            await asyncio.shield(self._tasks[dependency])
+            if self.status[dependency].state != StepState.READY:
+                status.state = StepState.SKIPPED
+                status.error = f"의존 단계 실패: {dependency}"
+                logger.warning(f"초기화 건너뜀: {step.name} ({status.error})")
+                return
+
+        status.state = StepState.STARTING
+        status.started_at = time.monotonic()
+        timeout = step.timeout if step.timeout is not None else self.default_timeout
+        try:
+            status.detail = await asyncio.wait_for(step.init(), timeout=timeout)
+            status.state = StepState.READY
+            logger.info(f"초기화 완료: {step.name} ({status.duration_ms}ms)")
+        except asyncio.TimeoutError:
+            status.state = StepState.FAILED
+            status.error = f"시간 초과 ({timeout}초)"
+            logger.error(f"초기화 시간 초과: {step.name}")
+        except Exception as e:
+            status.state = StepState.FAILED
+            status.error = str(e)
+            logger.error(f"초기화 실패: {step.name}: {e}")
+        finally:
+            status.finished_at = time.monotonic()
+
+    async def run(self):
+        """모든 단계 실행 (의존 관계가 없는 단계끼리는 동시에 진행)"""
+        self._validate()
+        self.started_at = time.monotonic()
+        self._tasks = {
+            name: asyncio.create_task(self._run_step(step), name=f"startup:{name}")
+            for name, step in self.steps.items()
+        }
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self.finished_at = time.monotonic()
+        logger.info(f"전체 초기화 종료: {round((self.finished_at - self.started_at) * 1000, 1)}ms, "
+                    f"ready={self.is_ready()}")
+
+    def is_ready(self) -> bool:
+        """
+        필수 단계가 모두 READY 이고 선택 단계는 모두 끝났는지
+        (선택 단계가 로딩 중일 때 트래픽을 받으면 첫 요청들이 모델 로딩을 기다리게 됨)
+        """
+        if not self.steps:
+            return False
+        for name, step in self.steps.items():
+            state = self.status[name].state
+            if step.required and state != StepState.READY:
+                return False
+            if not step.required and state in (StepState.PENDING, StepState.STARTING):
+                return False
+        return True
+
+    def get_status(self) -> Dict[str, Any]:
+        """엔진별 준비 상태 및 소요 시간"""
+        return {
+            "ready": self.is_ready(),
+            "complete": self.finished_at is not None,
+            "elapsed_ms": None if self.started_at is None else round(
+                ((self.finished_at or time.monotonic()) - self.started_at) * 1000, 1),
+            "engines": {
+                name: {
+                    "state": self.status[name].state.value,
+                    "required": step.required,
+                    "depends_on": step.depends_on,
+                    "duration_ms": self.status[name].duration_ms,
+                    "error": self.status[name].error,
+                }
+                for name, step in self.steps.items()
+            },
+        }
+
+# 전역 인스턴스
+_startup_orchestrator: Optional[StartupOrchestrator] = None
+
+def get_startup_orchestrator() -> StartupOrchestrator:
+    """시작 오케스트레이터 인스턴스 반환"""
+    global _startup_orchestrator
+
+    if _startup_orchestrator is None:
+        timeout = os.getenv("STARTUP_STEP_TIMEOUT_SECONDS", "300")
+        _startup_orchestrator = StartupOrchestrator(default_timeout=float(timeout) if timeout else None)
+
+    return _startup_orchestrator
@@ -0,0 +1,273 @@
+"""
+평가 파이프라인 계측 (OpenTelemetry 스팬 + Prometheus 메트릭)
+탐지 단계(keyword, rebuff, vector, secret, pii, ml, policy, logging)마다 스팬을 만들고
+단계별 지연 히스토그램, 테넌트별 평가 수/차단 수, 이벤트 루프 지연과 큐 길이 게이지를 /metrics 로 노출한다.
+
+운영에서 켜 둘 수 있도록 요청 경로에서는 히스토그램 관측과 카운터 증가만 하고,
+큐 길이는 스크레이프 시점에 읽는다. 스팬은 opentelemetry-api 만 사용하며 SDK TracerProvider 가
+설정된 경우에만 만든다. (opentelemetry-sdk 설치 후 OTEL_* 환경변수 또는 opentelemetry-instrument 로 내보냄)
+
+설정 (환경변수):
+    TELEMETRY_ENABLED                  true (기본) | false
+    TELEMETRY_MAX_TENANTS              테넌트 라벨 최대 수, 초과분은 "other" (기본 100)
+    EVENT_LOOP_LAG_INTERVAL_SECONDS    이벤트 루프 지연 측정 주기 (기본 0.5)
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("keyword", "rebuff", "vector", "secret", "pii", "ml", "policy", "logging")
+
+# 단계 지연은 300ms 예산 안의 분포가 보이도록 1ms~5s
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0, 2.5, 5.0)
+
+class StageHandle:
+    """진행 중인 단계 (탐지기 상태를 지정하면 스팬 속성과 메트릭 라벨에 반영)"""
+
+    __slots__ = ("name", "status", "span")
+
+    def __init__(self, name: str, span=None):
+        self.name = name
+        self.status = "completed"
+        self.span = span
+
+    def set_status(self, status: str):
+        self.status = status
+
+    def set_attribute(self, key: str, value):
+        if self.span is not None:
+            self.span.set_attribute(key, value)
+
+class PipelineTelemetry:
+    """프로세스 단위 계측 (메트릭 레지스트리, 트레이서, 이벤트 루프 지연 측정)"""
+
+    def __init__(self, enabled: bool = True, max_tenants: int = 100, lag_interval: float = 0.5):
+        self.enabled = enabled
+        self.max_tenants = max_tenants
+        self.lag_interval = lag_interval
+        self.registry = None
+        self.tracer = None
+        self._tenants = set()
+        self._tenants_lock = threading.Lock()
+        self._queue_sources: Dict[str, Callable[[], int]] = {}
+        self._lag_task: Optional[asyncio.Task] = None
+        self._stage_children: Dict[Tuple[str, str], object] = {}
+        self._trace = None
+        self._tracing_configured = False
+
+        if not enabled:
+            return
+
+        try:
+            from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram,
+                                           GCCollector, PlatformCollector, ProcessCollector)
+            self.registry = CollectorRegistry()
+            ProcessCollector(registry=self.registry)
+            PlatformCollector(registry=self.registry)
+            GCCollector(registry=self.registry)
+
+            self.stage_latency = Histogram(
+                "promptgate_stage_duration_seconds", "탐지 단계별 처리 시간",
+                ["stage", "status"], buckets=STAGE_BUCKETS, registry=self.registry
+            )
+            self.evaluation_latency = Histogram(
+                "promptgate_evaluation_duration_seconds", "프롬프트 평가 전체 처리 시간",
+                ["endpoint"], buckets=STAGE_BUCKETS, registry=self.registry
+            )
+            self.evaluations = Counter(
+                "promptgate_evaluations_total", "테넌트별 평가 수 (outcome: allowed / blocked / error)",
+                ["tenant", "outcome"], registry=self.registry
+            )
+            self.inflight = Gauge(
+                "promptgate_inflight_requests", "처리 중인 HTTP 요청 수", registry=self.registry
+            )
+            self.loop_lag = Gauge(
+                "promptgate_event_loop_lag_seconds", "이벤트 루프 지연 (sleep 예정 시각 대비 늦어진 시간)",
+                registry=self.registry
+            )
+            self.loop_lag_max = Gauge(
+                "promptgate_event_loop_lag_max_seconds", "마지막 스크레이프 이후 최대 이벤트 루프 지연",
+                registry=self.registry
+            )
+            self.queue_depth = Gauge(
+                "promptgate_queue_depth", "배처/작업 큐 길이", ["queue"], registry=self.registry
+            )
+            self._max_lag = 0.0
+        except ImportError:
+            self.registry = None
+            logger.warning("prometheus_client 라이브러리가 설치되지 않음 - /metrics 비활성화")
+
+        try:
+            from opentelemetry import trace
+            self._trace = trace
+            self.tracer = trace.get_tracer("promptgate.filter")
+        except ImportError:
+            logger.warning("opentelemetry-api 라이브러리가 설치되지 않음 - 트레이싱 비활성화")
+
+    @classmethod
+    def from_env(cls) -> "PipelineTelemetry":
+        return cls(
+            enabled=os.getenv("TELEMETRY_ENABLED", "true").lower() == "true",
+            max_tenants=int(os.getenv("TELEMETRY_MAX_TENANTS", "100")),
+            lag_interval=float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5")),
+        )
+
+    # ------------------------------------------------------------------
+    # 요청 경로
+    # ------------------------------------------------------------------
+    def _span(self, name: str, attributes: Dict):
+        """SDK(TracerProvider)가 설정된 경우에만 스팬 생성 (no-op 스팬도 요청당 수 us 를 씀)"""
+        if self.tracer is None:
+            return nullcontext()
+        if not self._tracing_configured:
+            if isinstance(self._trace.get_tracer_provider(), self._trace.ProxyTracerProvider):
+                return nullcontext()
+            self._tracing_configured = True
+        return self.tracer.start_as_current_span(f"promptgate.{name}", attributes=attributes)
+
+    def _observe_stage(self, name: str, status: str, seconds: float):
+        child = self._stage_children.get((name, status))
+        if child is None:
+            child = self._stage_children[(name, status)] = self.stage_latency.labels(name, status)
+        child.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str, **attributes) -> Iterator[StageHandle]:
+        """탐지 단계 스팬 + 지연 히스토그램 (예외가 나면 status=failed)"""
+        if not self.enabled:
+            yield StageHandle(name)
+            return
+        start = time.perf_counter()
+        with self._span(name, attributes) as span:
+            handle = StageHandle(name, span)
+            try:
+                yield handle
+            except Exception:
+                if handle.status == "completed":
+                    handle.status = "failed"
+                raise
+            finally:
+                handle.set_attribute("promptgate.status", handle.status)
+                if self.registry is not None:
+                    self._observe_stage(name, handle.status, time.perf_counter() - start)
+
+    def _tenant_label(self, tenant_id: Optional[str]) -> str:
+        """테넌트 라벨 수 제한 (시계열 폭증 방지)"""
+        tenant = tenant_id or "unknown"
+        if tenant in self._tenants:
+            return tenant
+        with self._tenants_lock:
+            if len(self._tenants) < self.max_tenants:
+                self._tenants.add(tenant)
+                return tenant
+        return "other"
+
+    def record_evaluation(self, endpoint: str, tenant_id: Optional[str], outcome: str, seconds: float):
+        if self.registry is None:
+            return
+        self.evaluations.labels(self._tenant_label(tenant_id), outcome).inc()
+        self.evaluation_latency.labels(endpoint).observe(seconds)
+
+    # ------------------------------------------------------------------
+    # 게이지
+    # ------------------------------------------------------------------
+    def register_queue(self, name: str, depth: Callable[[], int]):
+        """스크레이프 시점에 읽을 큐 길이 함수 등록"""
+        self._queue_sources[name] = depth
+
+    def start(self):
+        """이벤트 루프 지연 측정 시작 (실행 중인 루프에서 호출)"""
+        if self.registry is None or self._lag_task is not None:
+            return
+        self._lag_task = asyncio.create_task(self._measure_loop_lag())
+
+    async def _measure_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            lag = max(loop.time() - scheduled, 0.0)
+            self.loop_lag.set(lag)
+            self._max_lag = max(self._max_lag, lag)
+
+    async def stop(self):
+        """이벤트 루프 지연 측정 중지, SDK TracerProvider 가 있으면 버퍼에 남은 스팬을 내보냄 (앱 종료 시 호출)"""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            await asyncio.gather(self._lag_task, return_exceptions=True)
+            self._lag_task = None
+
+        if self.tracer is None:
+            return
+        provider = self._trace.get_tracer_provider()
+        force_flush = getattr(provider, "force_flush", None)
+        if force_flush is None:
+            return
+        try:
+            # 내보내기(네트워크)가 이벤트 루프를 막지 않도록 스레드에서
+            await asyncio.to_thread(force_flush)
+        except Exception as e:
+            logger.warning(f"스팬 내보내기 실패: {e}")
+
+    def _refresh_queue_depths(self):
+        from app.embedding_service import get_embedding_service_stats
+        for name, stats in get_embedding_service_stats().items():
+            self.queue_depth.labels(f"embedding:{name}").set(stats["queue_depth"])
+        for name, depth in list(self._queue_sources.items()):
+            try:
+                self.queue_depth.labels(name).set(depth())
+            except Exception as e:
+                logger.debug(f"큐 길이 조회 실패 ({name}): {e}")
+
+    def render(self) -> Tuple[bytes, str]:
+        """Prometheus 텍스트 형식 (메트릭 비활성화 시 RuntimeError)"""
+        if self.registry is None:
+            raise RuntimeError("메트릭 비활성화 (TELEMETRY_ENABLED=false 또는 prometheus_client 미설치)")
+        from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+        self._refresh_queue_depths()
+        self.loop_lag_max.set(self._max_lag)
+        self._max_lag = 0.0
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
+
+class TelemetryMiddleware:
+    """처리 중인 요청 수 게이지 (순수 ASGI)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        telemetry = get_telemetry()
+        if scope["type"] != "http" or telemetry.registry is None:
+            await self.app(scope, receive, send)
+            return
+        telemetry.inflight.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            telemetry.inflight.dec()
+
+def traced_stage(name: str):
+    """비동기 함수 전체를 탐지 단계로 계측하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with get_telemetry().stage(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+_telemetry_instance: Optional[PipelineTelemetry] = None
+
+def get_telemetry() -> PipelineTelemetry:
+    global _telemetry_instance
+    if _telemetry_instance is None:
+        _telemetry_instance = PipelineTelemetry.from_env()
+    return _telemetry_instance
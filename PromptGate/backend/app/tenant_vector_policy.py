@@ -0,0 +1,219 @@
+"""
+테넌트별 임베딩 유사도 정책
+filter_rules (type = 'embedding') 의 threshold 와 context 로 테넌트별 검색 대상을 정한다.
+
+context 키
+    collection   : 전용 컬렉션 이름 (대형 테넌트, 지정 시 payload 필터 없이 전용 컬렉션만 검색)
+    local_cache  : true 이면 테넌트 벡터를 프로세스 로컬 인덱스에 미러링해 우선 검색 (핫 테넌트)
+    max_results  : 검색 결과 수
+
+규칙의 action 이 log_only 이면 유사 프롬프트를 차단하지 않고 경고로만 남긴다.
+규칙이 없는 테넌트는 공용 컬렉션을 tenant_id payload 필터로 검색하고, 테넌트가 없는 요청은 공용 포인트만 검색한다.
+EMBEDDING_HOT_TENANTS (콤마 구분 테넌트 코드) 로 DB 규칙 없이 로컬 캐시 대상을 지정할 수 있다.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .qdrant_profile import build_tenant_filter, is_visible_to_tenant
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLLECTION = "blocked-prompts"
+DEFAULT_THRESHOLD = 0.75
+
+@dataclass
+class TenantVectorPolicy:
+    """테넌트 유사도 검색 정책"""
+    tenant_id: Optional[str]
+    collection_name: str = DEFAULT_COLLECTION
+    threshold: float = DEFAULT_THRESHOLD
+    action: str = "block"
+    dedicated: bool = False  # 전용 컬렉션 사용 여부
+    local_cache: bool = False
+    max_results: Optional[int] = None
+    rule_id: Optional[int] = None
+
+    @property
+    def filter_action(self) -> str:
+        """유사 프롬프트 탐지 시 filter_results 액션 (log_only 는 경고만, 유사도 탐지는 마스킹/승인이 불가해 나머지는 차단)"""
+        return "warn" if self.action == "log_only" else "block"
+
+    def query_filter(self):
+        """Qdrant 검색 필터 (전용 컬렉션은 필터 없음, 공용 컬렉션은 해당 테넌트 + 공용 포인트, 테넌트 미지정이면 공용 포인트만)"""
+        return None if self.dedicated else build_tenant_filter(self.tenant_id)
+
+    def is_visible(self, payload: Optional[Dict[str, Any]]) -> bool:
+        """로컬 미러 검색 결과 중 이 요청이 볼 수 있는 포인트인지 (query_filter 와 같은 조건)"""
+        return self.dedicated or is_visible_to_tenant(payload, self.tenant_id)
+
+    @property
+    def mirror_tenant_id(self) -> Optional[str]:
+        """로컬 미러 범위 (공용 컬렉션 + 핫 테넌트면 해당 테넌트 슬라이스만 미러링)"""
+        return self.tenant_id if self.local_cache and not self.dedicated else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tenant_id": self.tenant_id,
+            "collection_name": self.collection_name,
+            "threshold": self.threshold,
+            "action": self.action,
+            "dedicated": self.dedicated,
+            "local_cache": self.local_cache,
+            "max_results": self.max_results,
+            "rule_id": self.rule_id,
+        }
+
+def _hot_tenants() -> Set[str]:
+    return {tenant.strip() for tenant in os.getenv("EMBEDDING_HOT_TENANTS", "").split(",") if tenant.strip()}
+
+def build_tenant_vector_policy(tenant_id: Optional[str], rule: Optional[Dict[str, Any]],
+                               default_collection: str = DEFAULT_COLLECTION,
+                               default_threshold: float = DEFAULT_THRESHOLD) -> TenantVectorPolicy:
+    """filter_rules 임베딩 규칙 → 정책"""
+    policy = TenantVectorPolicy(tenant_id=tenant_id, collection_name=default_collection, threshold=default_threshold)
+    if tenant_id and tenant_id in _hot_tenants():
+        policy.local_cache = True
+    if not rule:
+        return policy
+
+    context = rule.get("context") or {}
+    policy.rule_id = rule.get("id")
+    policy.action = rule.get("action") or policy.action
+    if rule.get("threshold") is not None:
+        policy.threshold = float(rule["threshold"])
+    if context.get("collection") and context["collection"] != default_collection:
+        policy.collection_name = context["collection"]
+        policy.dedicated = True
+    if "local_cache" in context:
+        policy.local_cache = bool(context["local_cache"])
+    if context.get("max_results"):
+        policy.max_results = int(context["max_results"])
+    return policy
+
+# 테넌트 → (정책, 조회 시각)
+_policy_cache: Dict[Tuple[str, str], Tuple[TenantVectorPolicy, float]] = {}
+_POLICY_TTL = float(os.getenv("EMBEDDING_TENANT_POLICY_TTL", "300"))
+
+async def get_tenant_vector_policy(tenant_id: Optional[str], default_collection: str = DEFAULT_COLLECTION,
+                                   default_threshold: float = DEFAULT_THRESHOLD) -> TenantVectorPolicy:
+    """테넌트 정책 조회 (DB 조회 실패 시 공용 컬렉션 + 기본 임계값)"""
+    if not tenant_id:
+        return TenantVectorPolicy(tenant_id=None, collection_name=default_collection, threshold=default_threshold)
+
+    cache_key = (tenant_id, default_collection)
+    cached = _policy_cache.get(cache_key)
+    if cached is not None and time.time() - cached[1] < _POLICY_TTL:
+        return cached[0]
+
+    rule = None
+    try:
+        from .db_filter_engine import get_db_filter_engine
+
+        db_engine = await asyncio.to_thread(get_db_filter_engine)
+        rule = await db_engine.get_embedding_rule(tenant_id)
+    except Exception as e:
+        logger.warning(f"테넌트 임베딩 규칙 조회 실패 (기본 정책 사용): {e}")
+
+    policy = build_tenant_vector_policy(tenant_id, rule, default_collection, default_threshold)
+    _policy_cache[cache_key] = (policy, time.time())
+    return policy
+
+def clear_tenant_vector_policies():
+    """정책 캐시 초기화 (규칙 변경 직후 반영용)"""
+    _policy_cache.clear()
+
+@dataclass
+class _TenantSlot:
+    semaphore: asyncio.Semaphore
+    users: int = 0  # 실행 중 + 대기 중 요청 수
+
+class TenantConcurrencyLimiter:
+    """
+    테넌트별 동시 검색 수 제한 (한 테넌트의 폭주가 다른 테넌트 검색을 막지 않도록)
+    최근 사용 순으로 max_tenants 개까지만 유지하고, 사용 중인 테넌트는 제거하지 않는다.
+    """
+
+    def __init__(self, limit: int, max_tenants: int = 1024):
+        self.limit = limit
+        self.max_tenants = max_tenants
+        self._slots: "OrderedDict[str, _TenantSlot]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @asynccontextmanager
+    async def acquire(self, tenant_id: Optional[str]):
+        key = tenant_id or "__shared__"
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _TenantSlot(asyncio.Semaphore(self.limit))
+            self._evict_idle()
+        else:
+            self._slots.move_to_end(key)
+
+        slot.users += 1
+        try:
+            async with slot.semaphore:
+                yield
+        finally:
+            slot.users -= 1
+
+    def _evict_idle(self):
+        """오래 쓰지 않은 유휴 테넌트부터 제거 (모두 사용 중이면 잠시 한도를 넘김)"""
+        for key in list(self._slots):
+            if len(self._slots) <= self.max_tenants:
+                break
+            if self._slots[key].users == 0:
+                del self._slots[key]
+
+class TenantSearchPool:
+    """
+    벡터 검색 전용 스레드 풀 + 테넌트별 동시성 제한
+    기본 to_thread 실행기는 임베딩/DB 조회 등과 공유되므로 테넌트 제한이 격리가 되지 않는다.
+    테넌트 한도를 풀 크기보다 작게 두어 한 테넌트가 모든 검색 스레드를 차지하지 못하게 한다.
+    """
+
+    def __init__(self, workers: int, per_tenant: int, max_tenants: int = 1024):
+        self.workers = max(1, workers)
+        self.per_tenant = max(1, min(per_tenant, self.workers - 1 or 1))
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vector-search")
+        self.limiter = TenantConcurrencyLimiter(self.per_tenant, max_tenants)
+
+    async def run(self, tenant_id: Optional[str], func, *args, **kwargs):
+        """테넌트 한도 안에서 전용 풀로 블로킹 호출 실행"""
+        async with self.limiter.acquire(tenant_id):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+_search_pool_instance: Optional[TenantSearchPool] = None
+
+def get_tenant_search_pool() -> TenantSearchPool:
+    """벡터 검색 풀 싱글톤 (EmbeddingFilter / vector_store 공용)"""
+    global _search_pool_instance
+    if _search_pool_instance is None:
+        workers = int(os.getenv("EMBEDDING_SEARCH_WORKERS", "32"))
+        _search_pool_instance = TenantSearchPool(
+            workers,
+            int(os.getenv("EMBEDDING_TENANT_MAX_CONCURRENCY", str(max(1, workers // 4)))),
+            int(os.getenv("EMBEDDING_TENANT_LIMITER_MAX", "1024")),
+        )
+    return _search_pool_instance
+
+def close_tenant_search_pool():
+    """벡터 검색 풀 정리"""
+    global _search_pool_instance
+    if _search_pool_instance is not None:
+        _search_pool_instance.shutdown()
+        _search_pool_instance = None
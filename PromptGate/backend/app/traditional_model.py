@@ -0,0 +1,544 @@
+"""
+전통 ML 분류기 (TF-IDF + RandomForest / MultinomialNB) 학습 및 서빙
+라벨이 있는 prompt_logs (is_blocked) / eval_results (details.cases) 로 학습해 버전별 아티팩트로 저장하고,
+서빙에서는 joblib mmap_mode="r" 로 읽기 전용 로드해 워커 프로세스 간 페이지 캐시를 공유한다.
+
+sklearn 트리는 언피클 시 노드 배열을 복사하므로(Tree.__setstate__) RandomForest 는 노드 배열을 이어 붙인
+FlatForest 로 저장해 가장 큰 부분인 숲 전체가 mmap 되도록 한다. NaiveBayes 확률 행렬과 TF-IDF idf 도
+mmap 되며, 어휘 사전(vocabulary_ dict)만 워커마다 따로 올라간다.
+
+디렉터리 구조:
+    {model_dir}/LATEST                      현재 서빙 버전
+    {model_dir}/{version}/model.joblib      비압축 joblib (numpy 배열은 mmap 가능)
+    {model_dir}/{version}/metadata.json     학습 데이터 수, 평가 지표, 하이퍼파라미터
+
+환경변수
+    ML_TRADITIONAL_MODEL_DIR=./models/traditional   ML_TRADITIONAL_MODEL_VERSION (기본: LATEST)
+    ML_TRADITIONAL_MMAP=true
+    ML_TRADITIONAL_BATCH_SIZE=64   ML_TRADITIONAL_MAX_WAIT_MS=2 (동시 요청 마이크로배치)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 2  # 2: random_forest 를 FlatForest 로 저장 (1: sklearn 객체, 로드 시 변환)
+SUPPORTED_FORMATS = (1, 2)
+ARTIFACT_FILE = "model.joblib"
+METADATA_FILE = "metadata.json"
+LATEST_FILE = "LATEST"
+MODEL_NAMES = ("random_forest", "naive_bayes")
+
+# MLClassifier 와 동일한 하이퍼파라미터
+VECTORIZER_PARAMS = {"max_features": 5000, "ngram_range": (1, 3), "min_df": 2, "max_df": 0.95}
+RANDOM_FOREST_PARAMS = {"n_estimators": 100, "max_depth": 10, "random_state": 42}
+NAIVE_BAYES_PARAMS = {"alpha": 0.1}
+
+@dataclass
+class TrainingExample:
+    """학습 샘플 (label 1 = 위험)"""
+    text: str
+    label: int
+    source: str
+
+@dataclass
+class TrainingReport:
+    """학습 결과"""
+    version: str
+    path: str
+    samples: int
+    positives: int
+    sources: Dict[str, int] = field(default_factory=dict)
+    metrics: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "samples": self.samples,
+            "positives": self.positives,
+            "sources": self.sources,
+            "metrics": self.metrics,
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+        }
+
+# ----------------------------------------------------------------------
+# 학습 데이터 로드
+# ----------------------------------------------------------------------
+def _to_label(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return 1 if value >= 0.5 else 0
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("1", "true", "malicious", "unsafe", "block", "blocked", "injection", "jailbreak"):
+            return 1
+        if lowered in ("0", "false", "benign", "safe", "allow", "pass"):
+            return 0
+    return None
+
+def load_prompt_log_examples(engine: Any, since_days: Optional[int] = None,
+                             limit: Optional[int] = None, batch_size: int = 10000) -> List[TrainingExample]:
+    """prompt_logs 원문 + 차단 여부 (id 키셋 페이지네이션)"""
+    from sqlalchemy import text
+
+    since = datetime.utcnow() - timedelta(days=since_days) if since_days else datetime(1970, 1, 1)
+    examples: List[TrainingExample] = []
+    last_id = 0
+    while limit is None or len(examples) < limit:
+        with engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT id, original_prompt, is_blocked
+                FROM prompt_logs
+                WHERE created_at >= :since AND id > :last_id AND original_prompt IS NOT NULL
+                ORDER BY id
+                LIMIT :limit
+            """), {"since": since, "last_id": last_id, "limit": batch_size}).mappings().all()
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        examples.extend(TrainingExample(row["original_prompt"], int(bool(row["is_blocked"])), "prompt_logs")
+                        for row in rows)
+    return examples[:limit] if limit else examples
+
+def load_eval_result_examples(engine: Any, limit: Optional[int] = None) -> List[TrainingExample]:
+    """eval_results.details 의 cases 배열 ({prompt|text, label|expected|is_malicious})"""
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT details FROM eval_results WHERE details IS NOT NULL ORDER BY id DESC"
+        )).scalars().all()
+
+    examples: List[TrainingExample] = []
+    for details in rows:
+        if isinstance(details, str):
+            details = json.loads(details)
+        for case in (details or {}).get("cases") or []:
+            prompt = case.get("prompt") or case.get("text")
+            label = _to_label(next((case[key] for key in ("label", "expected", "is_malicious") if key in case), None))
+            if prompt and label is not None:
+                examples.append(TrainingExample(prompt, label, "eval_results"))
+        if limit and len(examples) >= limit:
+            break
+    return examples[:limit] if limit else examples
+
+def load_file_examples(path: str, text_field: Optional[str] = None,
+                       label_field: str = "label") -> List[TrainingExample]:
+    """JSONL / CSV 라벨 파일"""
+    from .bulk_ingest import iter_file_records
+
+    examples = []
+    for _, record in iter_file_records(path):
+        prompt = record.get(text_field) if text_field else (
+            record.get("prompt") or record.get("text") or record.get("content"))
+        label = _to_label(record.get(label_field))
+        if prompt and label is not None:
+            examples.append(TrainingExample(str(prompt), label, os.path.basename(path)))
+    return examples
+
+def deduplicate_examples(examples: Iterable[TrainingExample]) -> List[TrainingExample]:
+    """같은 프롬프트는 한 번만 (한 번이라도 위험 라벨이면 위험)"""
+    merged: Dict[str, TrainingExample] = {}
+    for example in examples:
+        key = " ".join(example.text.split())
+        if not key:
+            continue
+        existing = merged.get(key)
+        if existing is None or example.label > existing.label:
+            merged[key] = example
+    return list(merged.values())
+
+# ----------------------------------------------------------------------
+# 학습 / 저장
+# ----------------------------------------------------------------------
+def _malicious_column(model: Any) -> int:
+    return list(model.classes_).index(1)
+
+class FlatForest:
+    """
+    RandomForestClassifier 의 트리 노드 배열을 이어 붙인 읽기 전용 예측기
+    모든 상태가 numpy 배열이라 joblib mmap 로드 시 워커 간 페이지 캐시를 공유한다.
+    predict_proba 는 sklearn 과 같은 결과(트리별 잎 확률의 평균)를 낸다.
+    """
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self, roots: np.ndarray, left: np.ndarray, right: np.ndarray, feature: np.ndarray,
+                 threshold: np.ndarray, leaf_score: np.ndarray, max_depth: int):
+        self.roots = roots            # 트리별 루트 노드 위치
+        self.left = left              # 잎은 자기 자신을 가리킴 (깊이만큼 반복해도 잎에 머묾)
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.leaf_score = leaf_score  # 노드별 위험 클래스 확률
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, forest: Any) -> "FlatForest":
+        column = _malicious_column(forest)
+        roots, lefts, rights, features, thresholds, scores = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            value = tree.value[:, 0, :]
+            scores.append(value[:, column] / value.sum(axis=1))
+            offset += tree.node_count
+        return cls(
+            roots=np.asarray(roots, dtype=np.int64),
+            left=np.concatenate(lefts).astype(np.int64),
+            right=np.concatenate(rights).astype(np.int64),
+            feature=np.concatenate(features).astype(np.int64),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            leaf_score=np.concatenate(scores).astype(np.float64),
+            max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_),
+        )
+
+    def predict_proba(self, matrix: Any) -> np.ndarray:
+        """(n, 2) 클래스 확률 (모든 트리를 한 번에 깊이 순으로 내려감)"""
+        dense = matrix.toarray() if hasattr(matrix, "toarray") else np.asarray(matrix)
+        dense = dense.astype(np.float32, copy=False)
+        rows = np.arange(dense.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (dense.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = dense[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        malicious = self.leaf_score[nodes].mean(axis=1)
+        return np.column_stack([1.0 - malicious, malicious])
+
+def _evaluate(models: Dict[str, Any], vectorizer: Any, texts: List[str], labels: List[int]) -> Dict[str, Dict[str, float]]:
+    from sklearn.metrics import precision_score, recall_score, f1_score, roc_auc_score
+
+    matrix = vectorizer.transform(texts)
+    metrics = {}
+    for name, model in models.items():
+        scores = model.predict_proba(matrix)[:, _malicious_column(model)]
+        predicted = (scores >= 0.5).astype(int)
+        metrics[name] = {
+            "precision": round(float(precision_score(labels, predicted, zero_division=0)), 4),
+            "recall": round(float(recall_score(labels, predicted, zero_division=0)), 4),
+            "f1": round(float(f1_score(labels, predicted, zero_division=0)), 4),
+            "roc_auc": round(float(roc_auc_score(labels, scores)), 4) if len(set(labels)) > 1 else None,
+        }
+    return metrics
+
+def train_traditional_models(examples: List[TrainingExample], test_size: float = 0.2,
+                             random_state: int = 42) -> Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]:
+    """TF-IDF + RandomForest / MultinomialNB 학습 (holdout 평가 후 전체 데이터로 재학습)"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.model_selection import train_test_split
+
+    texts = [example.text for example in examples]
+    labels = [example.label for example in examples]
+    if len(set(labels)) < 2:
+        raise ValueError("위험/정상 라벨이 모두 있어야 학습할 수 있습니다")
+
+    def fit(train_texts: List[str], train_labels: List[int]) -> Dict[str, Any]:
+        vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS, dtype=np.float32)
+        matrix = vectorizer.fit_transform(train_texts)
+        # stop_words_ 는 추론에 쓰이지 않고 아티팩트만 키우므로 제거
+        vectorizer.stop_words_ = None
+        return {
+            "vectorizer": vectorizer,
+            "random_forest": RandomForestClassifier(**RANDOM_FOREST_PARAMS).fit(matrix, train_labels),
+            "naive_bayes": MultinomialNB(**NAIVE_BAYES_PARAMS).fit(matrix, train_labels),
+        }
+
+    metrics: Dict[str, Dict[str, float]] = {}
+    if test_size > 0:
+        train_texts, test_texts, train_labels, test_labels = train_test_split(
+            texts, labels, test_size=test_size, random_state=random_state, stratify=labels)
+        holdout = fit(train_texts, train_labels)
+        metrics = _evaluate({name: holdout[name] for name in MODEL_NAMES}, holdout["vectorizer"],
+                            test_texts, test_labels)
+    return fit(texts, labels), metrics
+
+def save_artifact(fitted: Dict[str, Any], model_dir: str, metadata: Dict[str, Any],
+                  version: Optional[str] = None, promote: bool = True) -> str:
+    """버전 디렉터리에 비압축 joblib 저장 (압축하면 mmap 로드 불가, 숲은 FlatForest 로 변환)"""
+    import joblib
+
+    if not isinstance(fitted["random_forest"], FlatForest):
+        fitted = {**fitted, "random_forest": FlatForest.from_sklearn(fitted["random_forest"])}
+    version = version or datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    version_dir = os.path.join(model_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    tmp_path = os.path.join(version_dir, ARTIFACT_FILE + ".tmp")
+    joblib.dump(fitted, tmp_path)
+    os.replace(tmp_path, os.path.join(version_dir, ARTIFACT_FILE))
+    with open(os.path.join(version_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump({"format": ARTIFACT_FORMAT, "version": version, **metadata}, f, ensure_ascii=False, indent=2)
+
+    if promote:
+        promote_version(model_dir, version)
+    return version_dir
+
+def promote_version(model_dir: str, version: str):
+    """LATEST 포인터 교체 (원자적)"""
+    if not os.path.exists(os.path.join(model_dir, version, ARTIFACT_FILE)):
+        raise FileNotFoundError(f"아티팩트가 없습니다: {model_dir}/{version}")
+    tmp_path = os.path.join(model_dir, LATEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(model_dir, LATEST_FILE))
+
+def resolve_version(model_dir: str, version: Optional[str] = None) -> Optional[str]:
+    if version:
+        return version
+    try:
+        with open(os.path.join(model_dir, LATEST_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def list_versions(model_dir: str) -> List[Dict[str, Any]]:
+    """저장된 버전 메타데이터 (최신순)"""
+    if not os.path.isdir(model_dir):
+        return []
+    latest = resolve_version(model_dir)
+    versions = []
+    for name in sorted(os.listdir(model_dir), reverse=True):
+        metadata_path = os.path.join(model_dir, name, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            with open(metadata_path, encoding="utf-8") as f:
+                metadata = json.load(f)
+            versions.append({**metadata, "latest": name == latest})
+    return versions
+
+def train_and_save(examples: List[TrainingExample], model_dir: str, test_size: float = 0.2,
+                   promote: bool = True) -> TrainingReport:
+    """학습 → 저장 → (선택) LATEST 교체"""
+    started = time.time()
+    examples = deduplicate_examples(examples)
+    fitted, metrics = train_traditional_models(examples, test_size=test_size)
+
+    sources: Dict[str, int] = {}
+    for example in examples:
+        sources[example.source] = sources.get(example.source, 0) + 1
+    positives = sum(example.label for example in examples)
+
+    metadata = {
+        "trained_at": datetime.utcnow().isoformat() + "Z",
+        "samples": len(examples),
+        "positives": positives,
+        "sources": sources,
+        "metrics": metrics,
+        "vocabulary_size": len(fitted["vectorizer"].vocabulary_),
+        "params": {
+            "vectorizer": {**VECTORIZER_PARAMS, "ngram_range": list(VECTORIZER_PARAMS["ngram_range"])},
+            "random_forest": RANDOM_FOREST_PARAMS,
+            "naive_bayes": NAIVE_BAYES_PARAMS,
+        },
+    }
+    version_dir = save_artifact(fitted, model_dir, metadata, promote=promote)
+    return TrainingReport(
+        version=os.path.basename(version_dir),
+        path=version_dir,
+        samples=len(examples),
+        positives=positives,
+        sources=sources,
+        metrics=metrics,
+        elapsed_seconds=time.time() - started,
+    )
+
+# ----------------------------------------------------------------------
+# 서빙
+# ----------------------------------------------------------------------
+class TraditionalModelRuntime:
+    """학습된 TF-IDF + RandomForest / NaiveBayes (읽기 전용, 희소 행렬 배치 추론)"""
+
+    def __init__(self, path: str, fitted: Dict[str, Any], metadata: Dict[str, Any]):
+        self.path = path
+        self.version = metadata.get("version")
+        self.metadata = metadata
+        self.vectorizer = fitted["vectorizer"]
+        self.models = {name: fitted[name] for name in MODEL_NAMES}
+        if not isinstance(self.models["random_forest"], FlatForest):
+            # 형식 1 아티팩트: 메모리에서 변환 (숲은 mmap 되지 않으므로 재학습/재저장 권장)
+            logger.warning(f"형식 1 아티팩트 - RandomForest 를 메모리에서 변환 (mmap 공유 안 됨): {path}")
+            self.models["random_forest"] = FlatForest.from_sklearn(self.models["random_forest"])
+        self._columns = {name: _malicious_column(model) for name, model in self.models.items()}
+
+    @classmethod
+    def load(cls, model_dir: str, version: Optional[str] = None, mmap: bool = True) -> "TraditionalModelRuntime":
+        import joblib
+
+        version = resolve_version(model_dir, version)
+        if not version:
+            raise FileNotFoundError(f"학습된 아티팩트가 없습니다: {model_dir}")
+        version_dir = os.path.join(model_dir, version)
+        with open(os.path.join(version_dir, METADATA_FILE), encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("format") not in SUPPORTED_FORMATS:
+            raise ValueError(f"지원하지 않는 아티팩트 형식: {metadata.get('format')}")
+        fitted = joblib.load(os.path.join(version_dir, ARTIFACT_FILE), mmap_mode="r" if mmap else None)
+        return cls(version_dir, fitted, metadata)
+
+    def predict(self, texts: List[str], batch_size: int = 1024) -> Dict[str, np.ndarray]:
+        """모델별 위험 확률 (texts 순서)"""
+        scores = {name: np.zeros(len(texts), dtype=np.float32) for name in self.models}
+        for start in range(0, len(texts), batch_size):
+            matrix = self.vectorizer.transform(texts[start:start + batch_size])  # CSR 희소 행렬
+            for name, model in self.models.items():
+                scores[name][start:start + matrix.shape[0]] = model.predict_proba(matrix)[:, self._columns[name]]
+        return scores
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "trained_at": self.metadata.get("trained_at"),
+            "samples": self.metadata.get("samples"),
+            "metrics": self.metadata.get("metrics"),
+        }
+
+def load_traditional_runtime() -> Optional[TraditionalModelRuntime]:
+    """환경변수 설정으로 아티팩트 로드 (없으면 None, 모델은 레지스트리에서 공유)"""
+    from .model_registry import get_model_registry
+
+    model_dir = os.getenv("ML_TRADITIONAL_MODEL_DIR", "./models/traditional")
+    version = resolve_version(model_dir, os.getenv("ML_TRADITIONAL_MODEL_VERSION"))
+    if not version:
+        return None
+    return get_model_registry().get_or_load(
+        f"traditional_model:{os.path.abspath(model_dir)}:{version}",
+        lambda: TraditionalModelRuntime.load(
+            model_dir,
+            version,
+            mmap=os.getenv("ML_TRADITIONAL_MMAP", "true").lower() == "true",
+        ),
+    )
+
+@dataclass
+class _ScoreRequest:
+    text: str
+    future: Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+_STOP = object()
+
+class TraditionalModelBatcher:
+    """동시 요청을 모아 한 번의 TF-IDF 변환 + 모델 추론으로 처리하는 마이크로배처"""
+
+    def __init__(self, runtime: TraditionalModelRuntime, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        from .embedding_service import Histogram, BATCH_SIZE_BUCKETS, LATENCY_MS_BUCKETS
+
+        self.runtime = runtime
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.inference_latency_histogram = Histogram(LATENCY_MS_BUCKETS)
+        self.errors = 0
+
+    def submit(self, text: str) -> Future:
+        """점수 요청 등록 (결과는 {모델 이름: 위험 확률})"""
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put(_ScoreRequest(text, future))
+        return future
+
+    async def score(self, text: str) -> Dict[str, float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="traditional-batcher", daemon=True)
+            self._thread.start()
+
+    def _collect_batch(self, first: _ScoreRequest) -> List[_ScoreRequest]:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [request for request in self._collect_batch(first)
+                     if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self.batch_size_histogram.observe(len(batch))
+            started = time.perf_counter()
+            try:
+                scores = self.runtime.predict([request.text for request in batch])
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"전통 ML 배치 추론 실패 ({len(batch)}건): {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            self.inference_latency_histogram.observe((time.perf_counter() - started) * 1000)
+            for i, request in enumerate(batch):
+                request.future.set_result({name: float(values[i]) for name, values in scores.items()})
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.runtime.version,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self.queue_depth(),
+            "errors": self.errors,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "inference_latency_ms": self.inference_latency_histogram.snapshot(),
+        }
+
+def create_traditional_batcher(runtime: TraditionalModelRuntime) -> TraditionalModelBatcher:
+    return TraditionalModelBatcher(
+        runtime,
+        max_batch_size=int(os.getenv("ML_TRADITIONAL_BATCH_SIZE", "64")),
+        max_wait_ms=float(os.getenv("ML_TRADITIONAL_MAX_WAIT_MS", "2")),
+    )
@@ -0,0 +1,258 @@
+"""
+Transformer 분류기 배치 추론
+파인튜닝된 시퀀스 분류 체크포인트를 한 번 로드해, 동시에 들어온 요청을 모아 토큰 길이순으로
+묶고 묶음별 최장 길이까지만 패딩(dynamic padding)해 워커 스레드 풀에서 추론한다.
+
+환경변수
+    ML_TRANSFORMER_CHECKPOINT   파인튜닝된 체크포인트 경로 또는 허브 ID (미설정 시 Transformer 단계 비활성)
+    ML_MAX_SEQ_LENGTH=256       최대 토큰 길이
+    ML_TRUNCATION=head_tail     head (앞부분 유지) | tail (뒷부분 유지) | head_tail (앞뒤 절반씩 유지)
+    ML_MALICIOUS_LABELS         위험으로 볼 라벨 (콤마 구분, 기본: malicious,injection,unsafe,jailbreak,LABEL_1)
+    ML_INFERENCE_BATCH_SIZE=32  ML_INFERENCE_GROUP_SIZE=8 (길이별 패딩 묶음 크기)
+    ML_INFERENCE_MAX_WAIT_MS=5  ML_INFERENCE_WORKERS=2  ML_TORCH_THREADS
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .embedding_service import Histogram, BATCH_SIZE_BUCKETS, LATENCY_MS_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+TRUNCATION_STRATEGIES = ("head", "tail", "head_tail")
+DEFAULT_MALICIOUS_LABELS = "malicious,injection,unsafe,jailbreak,LABEL_1"
+
+@dataclass
+class _ClassifyRequest:
+    text: str
+    future: Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+_STOP = object()
+
+class TransformerClassifierRuntime:
+    """시퀀스 분류 모델 + 토크나이저 (추론 전용)"""
+
+    def __init__(self, checkpoint: str, max_length: int = 256, truncation: str = "head_tail",
+                 malicious_labels: Optional[List[str]] = None, device: str = "cpu",
+                 num_threads: Optional[int] = None):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        if truncation not in TRUNCATION_STRATEGIES:
+            raise ValueError(f"지원하지 않는 truncation 전략: {truncation}")
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.torch = torch
+        self.checkpoint = checkpoint
+        self.max_length = max_length
+        self.truncation = truncation
+        self.device = device
+        self.tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+        # fast 토크나이저는 스레드 간 공유 시 "Already borrowed" 오류가 날 수 있어 추론 스레드마다 따로 로드
+        self._auto_tokenizer = AutoTokenizer
+        self._thread_local = threading.local()
+        self.model = AutoModelForSequenceClassification.from_pretrained(checkpoint).to(device).eval()
+
+        id2label = self.model.config.id2label or {}
+        self.labels = [str(id2label.get(i, f"LABEL_{i}")) for i in range(self.model.config.num_labels)]
+        wanted = {label.strip().lower() for label in (malicious_labels or DEFAULT_MALICIOUS_LABELS.split(","))}
+        self.malicious_indices = [i for i, label in enumerate(self.labels) if label.lower() in wanted]
+        if not self.malicious_indices:
+            # 이진 분류에서 라벨 이름이 없으면 마지막 클래스를 위험으로 간주
+            self.malicious_indices = [len(self.labels) - 1]
+            logger.warning(f"위험 라벨을 찾지 못해 '{self.labels[-1]}' 를 위험 클래스로 사용: {self.labels}")
+
+    def _worker_tokenizer(self):
+        """현재 스레드 전용 토크나이저"""
+        tokenizer = getattr(self._thread_local, "tokenizer", None)
+        if tokenizer is None:
+            tokenizer = self._thread_local.tokenizer = self._auto_tokenizer.from_pretrained(self.checkpoint)
+        return tokenizer
+
+    def _token_ids(self, tokenizer, texts: List[str]) -> List[List[int]]:
+        """특수 토큰 포함 max_length 이내로 자른 토큰 ID (패딩 없음)"""
+        budget = self.max_length - tokenizer.num_special_tokens_to_add(pair=False)
+        encoded = tokenizer(texts, add_special_tokens=False, truncation=False)["input_ids"]
+        ids = []
+        for tokens in encoded:
+            if len(tokens) > budget:
+                if self.truncation == "head":
+                    tokens = tokens[:budget]
+                elif self.truncation == "tail":
+                    tokens = tokens[-budget:]
+                else:
+                    # 인젝션 문구가 프롬프트 끝에 붙는 경우가 많아 앞뒤를 함께 유지
+                    head = budget // 2
+                    tokens = tokens[:head] + tokens[len(tokens) - (budget - head):]
+            ids.append(tokenizer.build_inputs_with_special_tokens(tokens))
+        return ids
+
+    def predict_proba(self, texts: List[str], batch_size: int = 16) -> np.ndarray:
+        """클래스 확률 (texts 순서 유지). 길이순 정렬 후 묶음별 동적 패딩"""
+        tokenizer = self._worker_tokenizer()
+        ids = self._token_ids(tokenizer, texts)
+        order = np.argsort([len(tokens) for tokens in ids], kind="stable")
+        probabilities = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+
+        with self.torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                chunk = order[start:start + batch_size]
+                padded = tokenizer.pad({"input_ids": [ids[i] for i in chunk]}, padding="longest",
+                                            return_tensors="pt")
+                logits = self.model(**{name: tensor.to(self.device) for name, tensor in padded.items()}).logits
+                probabilities[chunk] = self.torch.softmax(logits.float(), dim=-1).cpu().numpy()
+        return probabilities
+
+    def risk_scores(self, probabilities: np.ndarray) -> np.ndarray:
+        """위험 클래스 확률 합"""
+        return probabilities[:, self.malicious_indices].sum(axis=1)
+
+class TransformerBatcher:
+    """분류 요청 마이크로배처 (수집 스레드 + 추론 스레드 풀)"""
+
+    def __init__(self, runtime: TransformerClassifierRuntime, max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, workers: int = 2, group_size: int = 8):
+        self.runtime = runtime
+        self.max_batch_size = max_batch_size
+        self.group_size = group_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ml-infer")
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.inference_latency_histogram = Histogram(LATENCY_MS_BUCKETS)
+        self.errors = 0
+
+    def submit(self, text: str) -> Future:
+        """분류 요청 등록 (결과는 클래스 확률 벡터)"""
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put(_ClassifyRequest(text, future))
+        return future
+
+    async def classify(self, text: str) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(text))
+
+    async def classify_many(self, texts: List[str]) -> List[np.ndarray]:
+        return list(await asyncio.gather(*(self.classify(text) for text in texts)))
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="ml-batcher", daemon=True)
+            self._thread.start()
+
+    def _collect_batch(self, first: _ClassifyRequest) -> List[_ClassifyRequest]:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _infer(self, batch: List[_ClassifyRequest]):
+        started = time.perf_counter()
+        try:
+            probabilities = self.runtime.predict_proba([request.text for request in batch],
+                                                       batch_size=self.group_size)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Transformer 배치 추론 실패 ({len(batch)}건): {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        self.inference_latency_histogram.observe((time.perf_counter() - started) * 1000)
+        for request, row in zip(batch, probabilities):
+            request.future.set_result(row)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [request for request in self._collect_batch(first)
+                     if request.future.set_running_or_notify_cancel()]
+            if batch:
+                self.batch_size_histogram.observe(len(batch))
+                self._executor.submit(self._infer, batch)
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=5)
+        self._thread = None
+        self._executor.shutdown(wait=True)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "checkpoint": self.runtime.checkpoint,
+            "labels": self.runtime.labels,
+            "max_length": self.runtime.max_length,
+            "truncation": self.runtime.truncation,
+            "max_batch_size": self.max_batch_size,
+            "group_size": self.group_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth(),
+            "errors": self.errors,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "inference_latency_ms": self.inference_latency_histogram.snapshot(),
+        }
+
+def create_transformer_batcher() -> Optional[TransformerBatcher]:
+    """환경변수 설정으로 배처 생성 (체크포인트 미설정 시 None, 모델은 레지스트리에서 공유)"""
+    checkpoint = os.getenv("ML_TRANSFORMER_CHECKPOINT")
+    if not checkpoint:
+        return None
+
+    from .model_registry import get_model_registry
+
+    max_length = int(os.getenv("ML_MAX_SEQ_LENGTH", "256"))
+    truncation = os.getenv("ML_TRUNCATION", "head_tail").lower()
+    num_threads = os.getenv("ML_TORCH_THREADS")
+    runtime = get_model_registry().get_or_load(
+        f"transformer_classifier:{checkpoint}:{max_length}:{truncation}",
+        lambda: TransformerClassifierRuntime(
+            checkpoint,
+            max_length=max_length,
+            truncation=truncation,
+            malicious_labels=os.getenv("ML_MALICIOUS_LABELS", DEFAULT_MALICIOUS_LABELS).split(","),
+            device=os.getenv("ML_DEVICE", "cpu"),
+            num_threads=int(num_threads) if num_threads else None,
+        ),
+    )
+    return TransformerBatcher(
+        runtime,
+        max_batch_size=int(os.getenv("ML_INFERENCE_BATCH_SIZE", "32")),
+        group_size=int(os.getenv("ML_INFERENCE_GROUP_SIZE", "8")),
+        max_wait_ms=float(os.getenv("ML_INFERENCE_MAX_WAIT_MS", "5")),
+        workers=int(os.getenv("ML_INFERENCE_WORKERS", "2")),
+    )
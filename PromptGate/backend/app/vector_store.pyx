@@ -1,37 +1,57 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, SearchParams
-from sentence_transformers import SentenceTransformer
+import asyncio
 from app.config import get_settings
+from app.model_registry import get_qdrant_client
+from app.embedding_service import get_embedding_service
+from app.qdrant_profile import build_search_params
+from app.tenant_vector_policy import get_tenant_vector_policy, get_tenant_search_pool
+from app.local_vector_index import get_local_vector_mirror, get_local_index_mode
 
 # 환경 설정 불러오기
 settings = get_settings()
 
-# Qdrant 클라이언트 초기화
-client = QdrantClient(host=settings.qdrant_host, port=settings.qdrant_port)
+# Qdrant 클라이언트 / SentenceTransformer 모델(한국어 최적화)은 모델 레지스트리에서 공유
+# (EmbeddingFilter 와 같은 인스턴스를 사용하며 최초 호출 시 로드됨)
 
-# SentenceTransformer 모델 (한국어 최적화 모델)
-model = SentenceTransformer('jhgan/ko-sroberta-multitask')  # 최초 실행 시 다운로드됨
-
-# 벡터 유사도 필터 함수
-def check_similarity(prompt: str) -> bool:
+# 벡터 유사도 필터 함수 (유사 프롬프트가 있으면 테넌트 정책 반환, 없으면 None)
+async def match_similarity(prompt: str, tenant_id: str = None):
     try:
-        # 실제 프롬프트 임베딩
-        vector = model.encode(prompt).tolist()
-
-        # Qdrant 벡터 유사도 검색
-        results = client.search(
-            collection_name="blocked-prompts",
-            query_vector=vector,
-            limit=1,
-            score_threshold=0.65,  # 유사도 임계값
-            search_params=SearchParams(hnsw_ef=64, exact=False)
-        )
+        # 최초 호출 시 모델 로드가 블로킹이므로 스레드에서 준비
+        service = await asyncio.to_thread(get_embedding_service)
+        client = get_qdrant_client(settings.qdrant_host, settings.qdrant_port)
+
+        # 실제 프롬프트 임베딩 (동시 요청과 함께 마이크로배치)
+        vector = (await service.embed(prompt)).tolist()
+
+        # 테넌트 정책 (filter_rules 임베딩 규칙의 컬렉션 / 임계값)
+        policy = await get_tenant_vector_policy(tenant_id, "blocked-prompts", 0.65)
+
+        # Qdrant 벡터 유사도 검색 (장애 시 EmbeddingFilter 와 공유하는 로컬 인덱스로 대체)
+        try:
+            # 테넌트별 동시성 제한 + 벡터 검색 전용 스레드 풀
+            results = await get_tenant_search_pool().run(
+                policy.tenant_id,
+                client.search,
+                collection_name=policy.collection_name,
+                query_vector=vector,
+                query_filter=policy.query_filter(),
+                limit=1,
+                score_threshold=policy.threshold,  # 유사도 임계값
+                search_params=build_search_params()
+            )
+        except Exception:
+            mirror = get_local_vector_mirror(policy.collection_name, policy.mirror_tenant_id)
+            if get_local_index_mode() == "off" or not mirror.is_ready:
+                raise
+            results = [hit for hit in mirror.search(vector, 4, policy.threshold) if policy.is_visible(hit.payload)][:1]
 
         if results:
             print(f"[유사도 점수] {results[0].score}")
 
-        return len(results) > 0  # 결과가 있으면 유사하다고 판단
+        return policy if results else None  # 결과가 있으면 유사하다고 판단
 
     except Exception as e:
         print(f"[Qdrant Search Error] {e}")
-        return False
+        return None
+
+async def check_similarity(prompt: str, tenant_id: str = None) -> bool:
+    return await match_similarity(prompt, tenant_id) is not None
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+프롬프트 로그 Parquet 아카이브 스크립트
+  python archive_logs.py run [--dry-run] [--keep-source] [--db-only]
+  python archive_logs.py search --start 2026-01-01 --end 2026-01-31 [--tenant 1] [--text "password"]
+"""
+
+import sys
+import os
+import argparse
+from datetime import date
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.log_archiver import create_log_archiver, ArchiveQuery
+from app.logger import get_logger
+
+logger = get_logger("log-archiver")
+
+def run_archive(args):
+    """보존 기간이 지난 로그 아카이브"""
+    archiver = create_log_archiver(include_es=not args.db_only)
+    if args.keep_source:
+        archiver.config.purge_source = False
+
+    print(f"🚀 로그 아카이브를 시작합니다{' (dry-run)' if args.dry_run else ''}...")
+    print(f"  - 대상: {archiver.config.archive_after_days}일 이전 로그 → {archiver.config.archive_dir}")
+
+    has_errors = False
+    for report in archiver.run(dry_run=args.dry_run):
+        print(f"\n📋 {report.source}")
+        print(f"  - 일자: {len(report.days)}일 ({report.days[0]} ~ {report.days[-1]})" if report.days else "  - 일자: 없음")
+        print(f"  - 행: {report.rows}, 파일 크기: {report.bytes_written / 1024 / 1024:.2f}MB, 원본 삭제: {report.purged}")
+        for error in report.errors:
+            has_errors = True
+            print(f"  ❌ {error}")
+
+    if has_errors:
+        sys.exit(1)
+    print("\n🎉 로그 아카이브가 완료되었습니다!")
+
+def run_search(args):
+    """아카이브 검색"""
+    query = ArchiveQuery(args.archive_dir)
+    rows = query.search(
+        start=date.fromisoformat(args.start),
+        end=date.fromisoformat(args.end),
+        tenant_id=args.tenant,
+        user_id=args.user,
+        detection_method=args.method,
+        blocked_only=args.blocked,
+        text_contains=args.text,
+        limit=args.limit,
+    )
+    for row in rows:
+        prompt = (row.get("masked_prompt") or row.get("original_prompt") or "")[:80]
+        print(f"{row['created_at']} | {row.get('tenant_id') or '-'} | {row.get('user_id') or '-'} | "
+              f"{row.get('detection_method') or '-'} | {'BLOCK' if row.get('is_blocked') else 'PASS'} | {prompt}")
+    print(f"\n📊 {len(rows)}건")
+
+def main():
+    """로그 아카이브 메인 함수"""
+    parser = argparse.ArgumentParser(description="프롬프트 로그 Parquet 아카이브")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="오래된 로그를 Parquet 로 내보내기")
+    run_parser.add_argument("--dry-run", action="store_true", help="파일 작성/삭제 없이 대상만 출력")
+    run_parser.add_argument("--keep-source", action="store_true", help="내보낸 뒤 원본을 삭제하지 않음")
+    run_parser.add_argument("--db-only", action="store_true", help="Elasticsearch 소스 제외")
+
+    search_parser = subparsers.add_parser("search", help="아카이브 검색")
+    search_parser.add_argument("--archive-dir", default=os.getenv("LOG_ARCHIVE_DIR", "./archive"))
+    search_parser.add_argument("--start", required=True, help="시작일 (YYYY-MM-DD)")
+    search_parser.add_argument("--end", required=True, help="종료일 (YYYY-MM-DD, 포함)")
+    search_parser.add_argument("--tenant", help="테넌트 ID (ES 로그만, prompt_logs 아카이브에는 테넌트 없음)")
+    search_parser.add_argument("--user")
+    search_parser.add_argument("--method", help="detection_method")
+    search_parser.add_argument("--blocked", action="store_true", help="차단된 로그만")
+    search_parser.add_argument("--text", help="프롬프트 부분 문자열")
+    search_parser.add_argument("--limit", type=int, default=100)
+
+    args = parser.parse_args()
+    try:
+        if args.command == "run":
+            run_archive(args)
+        else:
+            run_search(args)
+    except Exception as e:
+        logger.error(f"로그 아카이브 실패: {str(e)}")
+        print(f"❌ 로그 아카이브 실패: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
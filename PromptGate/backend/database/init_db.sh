@@ -51,7 +51,7 @@ WITH
     TEMPLATE = template0;
 " 2>/dev/null || echo -e "${YELLOW}⚠️ 데이터베이스가 이미 존재합니다.${NC}"
 
-# 스키마 파일 실행
+# 스키마 파일 실행 (신규 DB 용, 기존 DB 는 migrations/ 의 SQL 을 번호 순서대로 실행)
 echo -e "${YELLOW}📋 스키마 생성 중...${NC}"
 if [ -f "schema.sql" ]; then
     PGPASSWORD=$DB_PASSWORD psql -h $DB_HOST -p $DB_PORT -U $DB_USER -d $DB_NAME -f schema.sql
@@ -0,0 +1,139 @@
+-- 001: decision_logs / shadow_events 를 ts 기준 RANGE 파티션 테이블로 전환
+--
+-- 파티셔닝 이전 schema.sql 로 만든 DB 에 한 번 실행한다. (이미 파티션 테이블이면 해당 테이블은 건너뜀)
+--   PGPASSWORD=... psql -h $DB_HOST -U $DB_USER -d $DB_NAME -v ON_ERROR_STOP=1 \
+--       -f migrations/001_partition_log_tables.sql
+--
+-- 기존 행을 새 파티션 테이블로 복사하므로 트랜잭션 동안 두 테이블에 ACCESS EXCLUSIVE 락이 걸린다.
+-- 로그 적재를 멈춘 점검 시간에 실행할 것.
+-- 기존 데이터 구간의 파티션(decision_logs 일 단위, shadow_events 월 단위)과 앞으로 쓸 파티션을 함께 만들고,
+-- 이후 생성/만료는 manage_partitions.py 가 관리한다. 파티션 이름은 app/partition_manager.py 규칙과 같다.
+
+BEGIN;
+
+-- shadow_events (+ case_events 외래 키)
+DO $$
+DECLARE
+    month_start DATE;
+    last_month DATE := (date_trunc('month', current_date) + interval '2 months')::date;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'shadow_events'::regclass) = 'p' THEN
+        RAISE NOTICE 'shadow_events 는 이미 파티션 테이블 - 건너뜀';
+        RETURN;
+    END IF;
+
+    ALTER TABLE case_events DROP CONSTRAINT IF EXISTS case_events_event_id_fkey;
+    ALTER TABLE shadow_events RENAME TO shadow_events_unpartitioned;
+    ALTER TABLE shadow_events_unpartitioned RENAME CONSTRAINT shadow_events_pkey TO shadow_events_unpartitioned_pkey;
+    DROP INDEX IF EXISTS idx_shadow_events_tenant_ts;
+    DROP INDEX IF EXISTS idx_shadow_events_agent_ts;
+    DROP INDEX IF EXISTS idx_shadow_events_indicators_gin;
+
+    CREATE TABLE shadow_events (
+        id BIGINT NOT NULL DEFAULT nextval('shadow_events_id_seq'),
+        tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+        agent_id BIGINT REFERENCES shadow_agents(id) ON DELETE SET NULL,
+        user_id BIGINT REFERENCES users(id) ON DELETE SET NULL,
+        ts TIMESTAMPTZ NOT NULL DEFAULT now(),
+        source TEXT NOT NULL,
+        request JSONB,
+        indicators JSONB,
+        decision TEXT CHECK (decision IN ('allow', 'deny', 'obligations')) NOT NULL,
+        decision_reason TEXT[],
+        bundle_version TEXT,
+        latency_ms INT,
+        PRIMARY KEY (id, ts)
+    ) PARTITION BY RANGE (ts);
+
+    CREATE TABLE shadow_events_default PARTITION OF shadow_events DEFAULT;
+
+    month_start := COALESCE((SELECT date_trunc('month', min(ts))::date FROM shadow_events_unpartitioned),
+                            date_trunc('month', current_date)::date);
+    WHILE month_start <= last_month LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF shadow_events FOR VALUES FROM (%L) TO (%L)',
+                       'shadow_events_p' || to_char(month_start, 'YYYYMM'),
+                       month_start, (month_start + interval '1 month')::date);
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+
+    INSERT INTO shadow_events (id, tenant_id, agent_id, user_id, ts, source, request, indicators,
+                               decision, decision_reason, bundle_version, latency_ms)
+    SELECT id, tenant_id, agent_id, user_id, ts, source, request, indicators,
+           decision, decision_reason, bundle_version, latency_ms
+    FROM shadow_events_unpartitioned;
+
+    -- case_events 는 (event_id, event_ts) 로 파티션 테이블의 기본 키를 참조
+    ALTER TABLE case_events ADD COLUMN IF NOT EXISTS event_ts TIMESTAMPTZ;
+    UPDATE case_events ce SET event_ts = se.ts
+    FROM shadow_events_unpartitioned se
+    WHERE se.id = ce.event_id AND ce.event_ts IS NULL;
+    ALTER TABLE case_events ALTER COLUMN event_ts SET NOT NULL;
+    ALTER TABLE case_events ADD CONSTRAINT case_events_event_id_event_ts_fkey
+        FOREIGN KEY (event_id, event_ts) REFERENCES shadow_events(id, ts) ON DELETE CASCADE;
+
+    ALTER SEQUENCE shadow_events_id_seq OWNED BY shadow_events.id;
+    DROP TABLE shadow_events_unpartitioned;
+
+    CREATE INDEX idx_shadow_events_tenant_ts ON shadow_events (tenant_id, ts DESC);
+    CREATE INDEX idx_shadow_events_agent_ts ON shadow_events (tenant_id, agent_id, ts DESC);
+    CREATE INDEX idx_shadow_events_indicators_gin ON shadow_events USING GIN (indicators);
+END $$;
+
+-- decision_logs
+DO $$
+DECLARE
+    part_day DATE;
+    until_day DATE := current_date + 7;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'decision_logs'::regclass) = 'p' THEN
+        RAISE NOTICE 'decision_logs 는 이미 파티션 테이블 - 건너뜀';
+        RETURN;
+    END IF;
+
+    ALTER TABLE decision_logs RENAME TO decision_logs_unpartitioned;
+    ALTER TABLE decision_logs_unpartitioned RENAME CONSTRAINT decision_logs_pkey TO decision_logs_unpartitioned_pkey;
+    DROP INDEX IF EXISTS idx_decision_logs_tenant_ts;
+    DROP INDEX IF EXISTS idx_decision_logs_decision;
+    DROP INDEX IF EXISTS idx_decision_logs_summary_gin;
+
+    CREATE TABLE decision_logs (
+        id BIGINT NOT NULL DEFAULT nextval('decision_logs_id_seq'),
+        tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+        user_id BIGINT REFERENCES users(id) ON DELETE SET NULL,
+        ts TIMESTAMPTZ NOT NULL DEFAULT now(),
+        route TEXT,
+        input_digest TEXT,
+        summary JSONB,
+        decision TEXT CHECK (decision IN ('allow', 'deny', 'obligations')) NOT NULL,
+        reasons TEXT[],
+        bundle_name TEXT,
+        bundle_version TEXT,
+        policy_channel TEXT,
+        latency_ms INT,
+        PRIMARY KEY (id, ts)
+    ) PARTITION BY RANGE (ts);
+
+    CREATE TABLE decision_logs_default PARTITION OF decision_logs DEFAULT;
+
+    part_day := COALESCE((SELECT min(ts)::date FROM decision_logs_unpartitioned), current_date);
+    WHILE part_day <= until_day LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF decision_logs FOR VALUES FROM (%L) TO (%L)',
+                       'decision_logs_p' || to_char(part_day, 'YYYYMMDD'), part_day, part_day + 1);
+        part_day := part_day + 1;
+    END LOOP;
+
+    INSERT INTO decision_logs (id, tenant_id, user_id, ts, route, input_digest, summary, decision,
+                               reasons, bundle_name, bundle_version, policy_channel, latency_ms)
+    SELECT id, tenant_id, user_id, ts, route, input_digest, summary, decision,
+           reasons, bundle_name, bundle_version, policy_channel, latency_ms
+    FROM decision_logs_unpartitioned;
+
+    ALTER SEQUENCE decision_logs_id_seq OWNED BY decision_logs.id;
+    DROP TABLE decision_logs_unpartitioned;
+
+    CREATE INDEX idx_decision_logs_tenant_ts ON decision_logs (tenant_id, ts DESC);
+    CREATE INDEX idx_decision_logs_decision ON decision_logs (tenant_id, decision, ts DESC);
+    CREATE INDEX idx_decision_logs_summary_gin ON decision_logs USING GIN (summary);
+END $$;
+
+COMMIT;
@@ -0,0 +1,99 @@
+-- 002: 대시보드 롤업 소스(prompt_sessions)와 변경 시각 워터마크
+--
+-- 롤업 테이블이 없거나 id 워터마크(rollup_watermarks.last_id)를 쓰던 DB 에 한 번 실행한다. (여러 번 실행해도 됨)
+--   PGPASSWORD=... psql -h $DB_HOST -U $DB_USER -d $DB_NAME -v ON_ERROR_STOP=1 \
+--       -f migrations/002_rollup_sources.sql
+--
+-- id 워터마크로 만든 기존 집계는 갱신된 세션을 반영하지 못하므로 비우고 워터마크를 지운다.
+-- 실행 후 run_rollup.py --once 가 소스 전체를 다시 집계한다.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS prompt_sessions (
+    id BIGSERIAL PRIMARY KEY,
+    tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    user_id BIGINT REFERENCES users(id) ON DELETE SET NULL,
+    model_name TEXT,
+    total_prompts INT NOT NULL DEFAULT 0,
+    total_tokens BIGINT NOT NULL DEFAULT 0,
+    total_cost NUMERIC NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+ALTER TABLE prompt_sessions ADD COLUMN IF NOT EXISTS model_name TEXT;
+ALTER TABLE prompt_sessions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_prompt_sessions_updated_at ON prompt_sessions;
+CREATE TRIGGER trg_prompt_sessions_updated_at
+    BEFORE UPDATE ON prompt_sessions
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_prompt_sessions_tenant_created ON prompt_sessions (tenant_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_prompt_sessions_updated ON prompt_sessions (updated_at);
+
+CREATE TABLE IF NOT EXISTS dashboard_rollup_hourly (
+    tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMPTZ NOT NULL,
+    department TEXT NOT NULL DEFAULT '',
+    model_name TEXT NOT NULL DEFAULT '',
+    decision TEXT NOT NULL DEFAULT '',
+    prompt_sessions BIGINT NOT NULL DEFAULT 0,
+    prompt_requests BIGINT NOT NULL DEFAULT 0,
+    prompt_tokens BIGINT NOT NULL DEFAULT 0,
+    prompt_cost NUMERIC NOT NULL DEFAULT 0,
+    decision_count BIGINT NOT NULL DEFAULT 0,
+    shadow_event_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, bucket_start, department, model_name, decision)
+);
+
+CREATE TABLE IF NOT EXISTS dashboard_rollup_daily (
+    tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    bucket_date DATE NOT NULL,
+    department TEXT NOT NULL DEFAULT '',
+    model_name TEXT NOT NULL DEFAULT '',
+    decision TEXT NOT NULL DEFAULT '',
+    prompt_sessions BIGINT NOT NULL DEFAULT 0,
+    prompt_requests BIGINT NOT NULL DEFAULT 0,
+    prompt_tokens BIGINT NOT NULL DEFAULT 0,
+    prompt_cost NUMERIC NOT NULL DEFAULT 0,
+    decision_count BIGINT NOT NULL DEFAULT 0,
+    shadow_event_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, bucket_date, department, model_name, decision)
+);
+CREATE INDEX IF NOT EXISTS idx_rollup_daily_department ON dashboard_rollup_daily (tenant_id, department, bucket_date);
+
+CREATE TABLE IF NOT EXISTS dashboard_rollup_daily_users (
+    tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    bucket_date DATE NOT NULL,
+    user_id BIGINT NOT NULL,
+    department TEXT NOT NULL DEFAULT '',
+    model_name TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (tenant_id, bucket_date, user_id, model_name)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    source TEXT PRIMARY KEY,
+    last_ts TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- id 워터마크 → 변경 시각 워터마크
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'rollup_watermarks' AND column_name = 'last_id') THEN
+        ALTER TABLE rollup_watermarks DROP COLUMN last_id;
+        ALTER TABLE rollup_watermarks ADD COLUMN IF NOT EXISTS last_ts TIMESTAMPTZ;
+        DELETE FROM rollup_watermarks;
+        TRUNCATE dashboard_rollup_hourly, dashboard_rollup_daily, dashboard_rollup_daily_users;
+    END IF;
+END $$;
+
+COMMIT;
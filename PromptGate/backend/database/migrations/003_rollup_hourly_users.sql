@@ -0,0 +1,29 @@
+-- 003: 시간별 활성 사용자 집합 (dashboard_rollup_hourly_users)
+--
+-- 롤업 워커가 일 버킷을 소스 행 대신 시간 버킷에서 만들도록 바뀌면서 일별 활성 사용자도
+-- 시간별 사용자 집합에서 다시 만든다. 002 이후 한 번 실행한다. (여러 번 실행해도 됨)
+--   PGPASSWORD=... psql -h $DB_HOST -U $DB_USER -d $DB_NAME -v ON_ERROR_STOP=1 \
+--       -f migrations/003_rollup_hourly_users.sql
+--
+-- 기존 세션으로 시간별 집합을 채워 두어야 진행 중인 날의 일별 사용자가 줄어들지 않는다.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS dashboard_rollup_hourly_users (
+    tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMPTZ NOT NULL,
+    user_id BIGINT NOT NULL,
+    department TEXT NOT NULL DEFAULT '',
+    model_name TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (tenant_id, bucket_start, user_id, model_name)
+);
+
+INSERT INTO dashboard_rollup_hourly_users (tenant_id, bucket_start, user_id, department, model_name)
+SELECT DISTINCT s.tenant_id, date_trunc('hour', s.created_at), s.user_id,
+       COALESCE(u.department, ''), COALESCE(s.model_name, '')
+FROM prompt_sessions s
+LEFT JOIN users u ON u.id = s.user_id
+WHERE s.user_id IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+COMMIT;
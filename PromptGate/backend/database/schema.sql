@@ -205,9 +205,10 @@ CREATE TABLE shadow_agents (
     UNIQUE(tenant_id, name, type, source)
 );
 
--- shadow_events 테이블 (파티셔닝 대상)
+-- shadow_events 테이블 (ts 기준 RANGE 파티셔닝)
+-- 파티션 생성/만료는 PromptGate/backend/manage_partitions.py 가 관리
 CREATE TABLE shadow_events (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
     agent_id BIGINT REFERENCES shadow_agents(id) ON DELETE SET NULL,
     user_id BIGINT REFERENCES users(id) ON DELETE SET NULL,
@@ -218,8 +219,11 @@ CREATE TABLE shadow_events (
     decision TEXT CHECK (decision IN ('allow', 'deny', 'obligations')) NOT NULL,
     decision_reason TEXT[],
     bundle_version TEXT,
-    latency_ms INT
-);
+    latency_ms INT,
+    PRIMARY KEY (id, ts)
+) PARTITION BY RANGE (ts);
+
+CREATE TABLE shadow_events_default PARTITION OF shadow_events DEFAULT;
 
 -- shadow_cases 테이블
 CREATE TABLE shadow_cases (
@@ -238,16 +242,19 @@ CREATE TABLE shadow_cases (
 -- case_events 매핑 테이블
 CREATE TABLE case_events (
     case_id BIGINT NOT NULL REFERENCES shadow_cases(id) ON DELETE CASCADE,
-    event_id BIGINT NOT NULL REFERENCES shadow_events(id) ON DELETE CASCADE,
+    event_id BIGINT NOT NULL,
+    event_ts TIMESTAMPTZ NOT NULL,
     added_at TIMESTAMPTZ DEFAULT now(),
-    PRIMARY KEY (case_id, event_id)
+    PRIMARY KEY (case_id, event_id),
+    FOREIGN KEY (event_id, event_ts) REFERENCES shadow_events(id, ts) ON DELETE CASCADE
 );
 
 -- 4. 결정 로그 & 감사 (Decisions / Audit)
 
--- decision_logs 테이블 (파티셔닝 대상)
+-- decision_logs 테이블 (ts 기준 RANGE 파티셔닝)
+-- 파티션 생성/만료는 PromptGate/backend/manage_partitions.py 가 관리
 CREATE TABLE decision_logs (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
     user_id BIGINT REFERENCES users(id) ON DELETE SET NULL,
     ts TIMESTAMPTZ NOT NULL DEFAULT now(),
@@ -259,8 +266,11 @@ CREATE TABLE decision_logs (
     bundle_name TEXT,
     bundle_version TEXT,
     policy_channel TEXT,
-    latency_ms INT
-);
+    latency_ms INT,
+    PRIMARY KEY (id, ts)
+) PARTITION BY RANGE (ts);
+
+CREATE TABLE decision_logs_default PARTITION OF decision_logs DEFAULT;
 
 -- audit_logs 테이블
 CREATE TABLE audit_logs (
@@ -402,6 +412,94 @@ CREATE TABLE traffic_routes (
     updated_by BIGINT REFERENCES users(id)
 );
 
+-- 7. 대시보드 롤업 (DashIQ)
+-- PromptGate/backend/run_rollup.py 가 워터마크(변경 시각) 이후 바뀐 행이 속한 버킷을 다시 계산
+-- 차원 값이 없으면 '' 로 저장 (UNIQUE 키 / ON CONFLICT 사용을 위해 NOT NULL)
+
+-- prompt_sessions 테이블 (api-server 가 기록, 세션 진행 중 누적값 갱신)
+CREATE TABLE prompt_sessions (
+    id BIGSERIAL PRIMARY KEY,
+    tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    user_id BIGINT REFERENCES users(id) ON DELETE SET NULL,
+    model_name TEXT,
+    total_prompts INT NOT NULL DEFAULT 0,
+    total_tokens BIGINT NOT NULL DEFAULT 0,
+    total_cost NUMERIC NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- 갱신 시 updated_at 자동 변경 (롤업 워터마크 기준)
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_prompt_sessions_updated_at
+    BEFORE UPDATE ON prompt_sessions
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- dashboard_rollup_hourly 테이블
+CREATE TABLE dashboard_rollup_hourly (
+    tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMPTZ NOT NULL,
+    department TEXT NOT NULL DEFAULT '',
+    model_name TEXT NOT NULL DEFAULT '',
+    decision TEXT NOT NULL DEFAULT '',
+    prompt_sessions BIGINT NOT NULL DEFAULT 0,
+    prompt_requests BIGINT NOT NULL DEFAULT 0,
+    prompt_tokens BIGINT NOT NULL DEFAULT 0,
+    prompt_cost NUMERIC NOT NULL DEFAULT 0,
+    decision_count BIGINT NOT NULL DEFAULT 0,
+    shadow_event_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, bucket_start, department, model_name, decision)
+);
+
+-- dashboard_rollup_daily 테이블
+CREATE TABLE dashboard_rollup_daily (
+    tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    bucket_date DATE NOT NULL,
+    department TEXT NOT NULL DEFAULT '',
+    model_name TEXT NOT NULL DEFAULT '',
+    decision TEXT NOT NULL DEFAULT '',
+    prompt_sessions BIGINT NOT NULL DEFAULT 0,
+    prompt_requests BIGINT NOT NULL DEFAULT 0,
+    prompt_tokens BIGINT NOT NULL DEFAULT 0,
+    prompt_cost NUMERIC NOT NULL DEFAULT 0,
+    decision_count BIGINT NOT NULL DEFAULT 0,
+    shadow_event_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, bucket_date, department, model_name, decision)
+);
+
+-- dashboard_rollup_daily_users 테이블 (기간별 COUNT(DISTINCT user_id) 용)
+CREATE TABLE dashboard_rollup_daily_users (
+    tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    bucket_date DATE NOT NULL,
+    user_id BIGINT NOT NULL,
+    department TEXT NOT NULL DEFAULT '',
+    model_name TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (tenant_id, bucket_date, user_id, model_name)
+);
+
+-- dashboard_rollup_hourly_users 테이블 (시간별 활성 사용자 집합, 일별 사용자 집합을 만드는 데 사용)
+CREATE TABLE dashboard_rollup_hourly_users (
+    tenant_id BIGINT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMPTZ NOT NULL,
+    user_id BIGINT NOT NULL,
+    department TEXT NOT NULL DEFAULT '',
+    model_name TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (tenant_id, bucket_start, user_id, model_name)
+);
+
+-- rollup_watermarks 테이블 (소스 테이블별 마지막 집계 변경 시각)
+CREATE TABLE rollup_watermarks (
+    source TEXT PRIMARY KEY,
+    last_ts TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
 -- 인덱스 생성
 CREATE INDEX idx_users_tenant_email ON users (tenant_id, email);
 CREATE INDEX idx_users_status ON users (status);
@@ -417,6 +515,7 @@ CREATE INDEX idx_allowlists_tenant_kind ON allowlists (tenant_id, kind, expire_a
 CREATE INDEX idx_blocklists_tenant_kind ON blocklists (tenant_id, kind, expire_at);
 
 CREATE INDEX idx_shadow_agents_tenant_status ON shadow_agents (tenant_id, status, risk DESC);
+-- 파티션 테이블 인덱스는 모든 파티션(신규 포함)에 자동 전파됨
 CREATE INDEX idx_shadow_events_tenant_ts ON shadow_events (tenant_id, ts DESC);
 CREATE INDEX idx_shadow_events_agent_ts ON shadow_events (tenant_id, agent_id, ts DESC);
 CREATE INDEX idx_shadow_events_indicators_gin ON shadow_events USING GIN (indicators);
@@ -434,6 +533,10 @@ CREATE INDEX idx_alert_events_rule_ts ON alert_events (rule_id, ts DESC);
 CREATE INDEX idx_model_registry_tenant ON model_registry (tenant_id, status);
 CREATE INDEX idx_eval_results_model_ts ON eval_results (tenant_id, model_id, ts DESC);
 
+CREATE INDEX idx_prompt_sessions_tenant_created ON prompt_sessions (tenant_id, created_at);
+CREATE INDEX idx_prompt_sessions_updated ON prompt_sessions (updated_at);
+CREATE INDEX idx_rollup_daily_department ON dashboard_rollup_daily (tenant_id, department, bucket_date);
+
 -- 기본 데이터 삽입
 INSERT INTO tenants (name, code, region, data_retention_days, encryption_profile, status) 
 VALUES ('KRA Internal', 'kra-internal', 'ap-northeast-2', 365, 'default', 'active');
@@ -469,4 +572,3 @@ INSERT INTO integrations (tenant_id, kind, name, config, enabled) VALUES
 (1, 'metrics', 'prometheus', '{"endpoint": "http://localhost:9090"}', true);
 
 COMMIT;
-
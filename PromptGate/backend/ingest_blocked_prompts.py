@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+차단 프롬프트 코퍼스 대량 적재 스크립트 (기존 컬렉션 유지, 내용 해시 중복 제거, 체크포인트 재개)
+  python ingest_blocked_prompts.py jailbreak_corpus.jsonl
+  python ingest_blocked_prompts.py prompts.csv --text-field text --parallel 8
+중단 후 같은 명령을 다시 실행하면 체크포인트 이후부터 이어서 적재 (--restart 로 처음부터)
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.bulk_ingest import BulkIngester, BulkIngestConfig, IngestProgress, iter_file_records, ensure_collection
+
+def print_progress(progress: IngestProgress):
+    data = progress.to_dict()
+    print(f"\r📦 읽음 {data['records_read']:,} | upsert {data['upserted']:,} | 중복 {data['duplicates']:,} | "
+          f"실패 {data['failed']:,} | 체크포인트 {data['checkpoint']:,} | {data['upserts_per_second']}/s",
+          end="", flush=True)
+
+async def run(args):
+    from app.embedding_service import get_embedding_service
+    from app.model_registry import get_qdrant_client
+
+    print("🚀 임베딩 모델 / Qdrant 연결 준비...")
+    service = await asyncio.to_thread(get_embedding_service, args.model)
+    client = get_qdrant_client(args.qdrant_host, args.qdrant_port)
+    ensure_collection(client, args.collection, service.model.get_sentence_embedding_dimension())
+
+    checkpoint_path = args.checkpoint or f"{args.file}.{args.collection}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+        print(f"🗑️ 체크포인트 삭제: {checkpoint_path}")
+
+    ingester = BulkIngester(
+        service,
+        client,
+        BulkIngestConfig(
+            collection_name=args.collection,
+            batch_size=args.batch_size,
+            parallel=args.parallel,
+            wait=args.wait,
+            text_field=args.text_field,
+            category=args.category,
+            severity=args.severity,
+            source=args.source,
+            tenant_id=args.tenant_id,
+            checkpoint_path=checkpoint_path,
+        ),
+        on_progress=print_progress,
+    )
+    progress = await ingester.ingest(iter_file_records(args.file, args.format))
+    print()
+
+    data = progress.to_dict()
+    print(f"✅ 적재 완료: {data['upserted']:,}건 upsert, 중복 {data['duplicates']:,}건, "
+          f"빈 값 {data['skipped_empty']:,}건 ({data['elapsed_seconds']}초)")
+    if data["resumed_from"]:
+        print(f"ℹ️ 레코드 {data['resumed_from']:,} 이후부터 재개함")
+    if progress.batches_failed:
+        print(f"⚠️ 실패 배치 {progress.batches_failed}개 - 다시 실행하면 체크포인트({data['checkpoint']:,}) 이후부터 재시도")
+        for error in data["errors"]:
+            print(f"  - {error}")
+        sys.exit(1)
+
+def main():
+    """차단 프롬프트 대량 적재 메인 함수"""
+    parser = argparse.ArgumentParser(description="차단 프롬프트 JSONL/CSV 코퍼스를 Qdrant 에 대량 적재")
+    parser.add_argument("file", help="JSONL(.jsonl/.ndjson) 또는 CSV(.csv/.tsv) 파일")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="파일 형식 (기본: 확장자로 판단)")
+    parser.add_argument("--text-field", help="프롬프트 필드 이름 (기본: prompt/text/content)")
+    parser.add_argument("--collection", default="blocked-prompts")
+    parser.add_argument("--category", default="malicious", help="레코드에 category 가 없을 때 기본값")
+    parser.add_argument("--severity", default="high", help="레코드에 severity 가 없을 때 기본값")
+    parser.add_argument("--source", default="bulk_ingest", help="레코드에 source 가 없을 때 기본값")
+    parser.add_argument("--tenant-id", help="테넌트 전용 프롬프트로 적재 (레코드에 tenant_id 가 없을 때 기본값)")
+    parser.add_argument("--batch-size", type=int, default=256, help="upsert 배치 크기")
+    parser.add_argument("--parallel", type=int, default=4, help="동시 upsert 배치 수")
+    parser.add_argument("--wait", action="store_true", help="upsert 마다 색인 완료까지 대기")
+    parser.add_argument("--checkpoint", help="체크포인트 파일 (기본: <file>.<collection>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="체크포인트 무시하고 처음부터 적재")
+    parser.add_argument("--model", default=None, help="임베딩 모델 (기본: EMBEDDING_MODEL_NAME)")
+    parser.add_argument("--qdrant-host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--qdrant-port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"❌ 파일을 찾을 수 없습니다: {args.file}")
+        sys.exit(1)
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\n⏸️ 중단됨 - 다시 실행하면 체크포인트부터 재개합니다.")
+        sys.exit(130)
+    except ImportError as e:
+        print(f"❌ 필요한 라이브러리가 설치되지 않음: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
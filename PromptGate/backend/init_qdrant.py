@@ -1,7 +1,7 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, VectorParams, Distance
-from sentence_transformers import SentenceTransformer
+from qdrant_client.models import PointStruct
 from app.config import get_settings
+from app.model_registry import get_qdrant_client, get_sentence_transformer
+from app.qdrant_profile import create_collection_with_profile
 settings = get_settings()
 
 COLLECTION_NAME = "blocked-prompts"
@@ -17,10 +17,10 @@ sample_prompts = [
 ]
 
 # Qdrant 클라이언트
-client = QdrantClient(host="vector-db", port=6333)
+client = get_qdrant_client(host="vector-db", port=6333)
 
 # 한국어 포함 로컬 임베딩 모델
-model = SentenceTransformer('jhgan/ko-sroberta-multitask')
+model = get_sentence_transformer('jhgan/ko-sroberta-multitask')
 
 # 1. 기존 컬렉션 제거 (있다면)
 try:
@@ -29,16 +29,10 @@ try:
 except:
     print(f"ℹ️ 기존 컬렉션 없음")
 
-# 2. 새 컬렉션 생성
+# 2. 새 컬렉션 생성 (양자화/HNSW/payload 인덱스 튜닝 프로파일 적용)
 embedding_dim = model.get_sentence_embedding_dimension()
 
-client.recreate_collection(
-    collection_name=COLLECTION_NAME,
-    vectors_config=VectorParams(
-        size=embedding_dim,
-        distance=Distance.COSINE
-    )
-)
+create_collection_with_profile(client, COLLECTION_NAME, embedding_dim)
 print(f"✅ 컬렉션 '{COLLECTION_NAME}' 생성 완료")
 
 # 3. 프롬프트 임베딩 후 등록
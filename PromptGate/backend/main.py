@@ -1,5 +1,5 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from app.logger import get_logger, log_to_elasticsearch
 from app.api import router as api_router
 from app.filter import evaluate_prompt
@@ -11,115 +11,142 @@ from app.rebuff_sdk_client import get_rebuff_client, close_rebuff_client
 from app.ml_classifier import get_ml_classifier, close_ml_classifier
 from app.embedding_filter import get_embedding_filter, close_embedding_filter
 from app.db_filter_engine import get_db_filter_engine
+from app.startup import get_startup_orchestrator
+from app.model_registry import get_model_registry, preload_models_from_env
+from app.embedding_service import get_embedding_service_stats
+from app.deadline import DeadlineMiddleware
+from app.telemetry import TelemetryMiddleware, get_telemetry
+from app.profiler import ProfilerMiddleware, router as profiler_router
 from datetime import datetime
 import asyncio
 import logging
+import time
 
 app = FastAPI(title="PromptGate Filter Service", version="1.0.0")
 logger = get_logger("filter-service")
 
+# MODEL_PRELOAD 설정 시 import 시점(gunicorn --preload 마스터)에 모델을 로드해 워커들이 공유
+preload_models_from_env()
+
+# 요청 마감 시간 (REQUEST_DEADLINES, 기본 /api/v1/evaluate=300ms)
+app.add_middleware(DeadlineMiddleware)
+# 처리 중인 요청 수 게이지 (단계별 지연/테넌트별 평가 수는 /metrics)
+app.add_middleware(TelemetryMiddleware)
+# 요청 단위/느린 요청 프로파일 (PROFILER_ADMIN_TOKEN 설정 시, 가장 바깥에서 요청 스택을 추적)
+app.add_middleware(ProfilerMiddleware)
+
 # API 라우터 등록
 app.include_router(api_router, prefix="/api/v1", tags=["chat"])
+# 관리자 전용 프로파일러 (/admin/profile)
+app.include_router(profiler_router)
 
 @app.on_event("startup")
 async def startup_event():
-    """애플리케이션 시작 시 보안 엔진 및 정책 엔진 초기화 (병렬 처리)"""
+    """애플리케이션 시작 시 보안 엔진 및 정책 엔진 초기화 (의존 관계 기반 병렬 처리)"""
     logger.info("PromptGate 서비스 시작 - 보안 엔진 및 정책 엔진 초기화")
     
-    # 병렬 초기화를 위한 태스크 리스트
-    init_tasks = []
+    # 이벤트 루프 지연 측정 시작
+    get_telemetry().start()
+    
+    orchestrator = get_startup_orchestrator()
     
     # 1. 하이브리드 보안 엔진 초기화
     async def init_hybrid_security():
-        try:
-            engine = await get_hybrid_security_engine()
-            status = await engine.get_security_status()
-            logger.info(f"하이브리드 보안 엔진 상태: {status}")
-        except Exception as e:
-            logger.error(f"하이브리드 보안 엔진 초기화 실패: {e}")
+        engine = await get_hybrid_security_engine()
+        status = await engine.get_security_status()
+        logger.info(f"하이브리드 보안 엔진 상태: {status}")
+        return status
     
     # 2. OPA 정책 엔진 초기화
     async def init_policy_engine():
-        try:
-            policy_engine = await get_policy_engine()
-            policy_status = await policy_engine.get_policy_status()
-            logger.info(f"정책 엔진 상태: {policy_status}")
-        except Exception as e:
-            logger.error(f"정책 엔진 초기화 실패: {e}")
+        policy_engine = await get_policy_engine()
+        policy_status = await policy_engine.get_policy_status()
+        logger.info(f"정책 엔진 상태: {policy_status}")
+        return policy_status
     
     # 3. Secret Scanner 초기화
     async def init_secret_scanner():
-        try:
-            secret_scanner = await get_secret_scanner()
-            await secret_scanner.load_patterns_from_db(tenant_id=1)
-            await secret_scanner.load_patterns_from_toml()
-            scanner_status = secret_scanner.get_scanner_status()
-            logger.info(f"Secret Scanner 상태: {scanner_status}")
-        except Exception as e:
-            logger.error(f"Secret Scanner 초기화 실패: {e}")
+        secret_scanner = await get_secret_scanner()
+        await secret_scanner.load_patterns_from_db(tenant_id=1)
+        await secret_scanner.load_patterns_from_toml()
+        scanner_status = secret_scanner.get_scanner_status()
+        logger.info(f"Secret Scanner 상태: {scanner_status}")
+        return scanner_status
     
     # 4. PII 탐지기 초기화
     async def init_pii_detector():
-        try:
-            pii_detector = await get_pii_detector()
-            await pii_detector.load_patterns_from_db(tenant_id=1)
-            await pii_detector.load_patterns_from_toml()
-            pii_status = pii_detector.get_scanner_status()
-            logger.info(f"PII 탐지기 상태: {pii_status}")
-        except Exception as e:
-            logger.error(f"PII 탐지기 초기화 실패: {e}")
+        pii_detector = await get_pii_detector()
+        await pii_detector.load_patterns_from_db(tenant_id=1)
+        await pii_detector.load_patterns_from_toml()
+        pii_status = pii_detector.get_scanner_status()
+        logger.info(f"PII 탐지기 상태: {pii_status}")
+        return pii_status
     
     # 5. Rebuff SDK 클라이언트 초기화
     async def init_rebuff_client():
-        try:
-            rebuff_client = await get_rebuff_client()
-            rebuff_status = rebuff_client.get_status()
-            logger.info(f"Rebuff SDK 클라이언트 상태: {rebuff_status}")
-        except Exception as e:
-            logger.error(f"Rebuff SDK 클라이언트 초기화 실패: {e}")
+        rebuff_client = await get_rebuff_client()
+        rebuff_status = rebuff_client.get_status()
+        logger.info(f"Rebuff SDK 클라이언트 상태: {rebuff_status}")
+        return rebuff_status
     
     # 6. ML Classifier 초기화
     async def init_ml_classifier():
-        try:
-            ml_classifier = await get_ml_classifier()
-            ml_status = ml_classifier.get_status()
-            logger.info(f"ML Classifier 상태: {ml_status}")
-        except Exception as e:
-            logger.error(f"ML Classifier 초기화 실패: {e}")
+        ml_classifier = await get_ml_classifier()
+        ml_status = ml_classifier.get_status()
+        logger.info(f"ML Classifier 상태: {ml_status}")
+        return ml_status
     
     # 7. Embedding Filter 초기화
     async def init_embedding_filter():
-        try:
-            embedding_filter = await get_embedding_filter()
-            embedding_status = embedding_filter.get_status()
-            logger.info(f"Embedding Filter 상태: {embedding_status}")
-        except Exception as e:
-            logger.error(f"Embedding Filter 초기화 실패: {e}")
+        embedding_filter = await get_embedding_filter()
+        embedding_status = embedding_filter.get_status()
+        logger.info(f"Embedding Filter 상태: {embedding_status}")
+        return embedding_status
     
     # 8. DB 필터링 엔진 초기화
     async def init_db_filter_engine():
-        try:
-            db_filter_engine = get_db_filter_engine()
-            logger.info("DB 필터링 엔진 초기화 완료")
-        except Exception as e:
-            logger.error(f"DB 필터링 엔진 초기화 실패: {e}")
-    
-    # 모든 초기화 태스크를 병렬로 실행
-    init_tasks = [
-        init_hybrid_security(),
-        init_policy_engine(),
-        init_secret_scanner(),
-        init_pii_detector(),
-        init_rebuff_client(),
-        init_ml_classifier(),
-        init_embedding_filter(),
-        init_db_filter_engine()
-    ]
-    
-    # 병렬 실행
-    await asyncio.gather(*init_tasks, return_exceptions=True)
-    
-    logger.info("PromptGate 서비스 초기화 완료")
+        await asyncio.to_thread(get_db_filter_engine)
+        logger.info("DB 필터링 엔진 초기화 완료")
+    
+    # 블로킹 모델 로딩은 각 get_* 에서 스레드로 실행되므로 의존 관계가 없는 단계끼리 동시에 진행
+    # Rebuff / ML / Embedding 은 실패해도 규칙 기반 필터로 동작하므로 선택 단계 (로딩이 끝날 때까지는 readiness 대기)
+    orchestrator.add_step("db_filter_engine", init_db_filter_engine)
+    orchestrator.add_step("policy_engine", init_policy_engine)
+    orchestrator.add_step("hybrid_security", init_hybrid_security)
+    orchestrator.add_step("secret_scanner", init_secret_scanner, depends_on=["db_filter_engine"])
+    orchestrator.add_step("pii_detector", init_pii_detector, depends_on=["db_filter_engine"])
+    orchestrator.add_step("rebuff_client", init_rebuff_client, required=False)
+    orchestrator.add_step("ml_classifier", init_ml_classifier, required=False)
+    orchestrator.add_step("embedding_filter", init_embedding_filter, required=False)
+    
+    # 초기화는 백그라운드로 진행하여 /health 는 즉시 응답하고, /ready 는 완료 후 200 반환
+    app.state.startup_task = asyncio.create_task(orchestrator.run())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """애플리케이션 종료 시 엔진 리소스 정리 후 남은 스팬 내보내기"""
+    startup_task = getattr(app.state, "startup_task", None)
+    if startup_task is not None and not startup_task.done():
+        startup_task.cancel()
+        await asyncio.gather(startup_task, return_exceptions=True)
+
+    results = await asyncio.gather(
+        close_hybrid_security_engine(),
+        close_policy_engine(),
+        close_secret_scanner(),
+        close_pii_detector(),
+        close_rebuff_client(),
+        close_ml_classifier(),
+        close_embedding_filter(),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"리소스 정리 실패: {result}")
+
+    # 정리 중 생긴 스팬까지 내보내도록 마지막에 중지
+    await get_telemetry().stop()
+    logger.info("PromptGate 서비스 종료 - 리소스 정리 완료")
 
 @app.post("/prompt/check")
 async def check_prompt(request: Request):
@@ -129,28 +156,37 @@ async def check_prompt(request: Request):
     user_id = data.get("user_id", "anonymous")
     
     # 실제 evaluate_prompt 함수 사용
+    start_time = time.perf_counter()
     result = await evaluate_prompt(prompt, user_id=user_id)
 
-    # Elasticsearch 로그 저장
-    log_to_elasticsearch(
-        index="prompt-log",
-        document={
-             "timestamp": datetime.utcnow().isoformat(),
-             "user_id": user_id,
-             "session_id": "session-001",  # 추후 확장
-             "prompt": prompt,
-             "masked_prompt": result.get("masked_prompt", ""),
-             "is_blocked": result.get("is_blocked"),
-             "block_type": result.get("block_type", "none"),
-             "reason": result.get("reason", result.get("error", "")),
-             "risk_score": result.get("risk_score", None),
-             "ai_service": "openai",
-             "ip": "127.0.0.1",
-             "source": "proxy"
-        }
-    )  
-
-    logger.info(f"Prompt Check: {prompt} -> {result}")
+    # Elasticsearch 로그 저장 (동기 클라이언트이므로 스레드에서)
+    telemetry = get_telemetry()
+    with telemetry.stage("logging"):
+        await asyncio.to_thread(
+            log_to_elasticsearch,
+            index="prompt-log",
+            document={
+                 "timestamp": datetime.utcnow().isoformat(),
+                 "user_id": user_id,
+                 "session_id": "session-001",  # 추후 확장
+                 "prompt": prompt,
+                 "masked_prompt": result.get("masked_prompt", ""),
+                 "is_blocked": result.get("is_blocked"),
+                 "block_type": result.get("block_type", "none"),
+                 "reason": result.get("reason", result.get("error", "")),
+                 "risk_score": result.get("risk_score", None),
+                 "ai_service": "openai",
+                 "ip": "127.0.0.1",
+                 "source": "proxy"
+            }
+        )  
+
+    outcome = "blocked" if result.get("is_blocked") else "allowed"
+    telemetry.record_evaluation("prompt_check", data.get("tenant_id", "kra-internal"), outcome,
+                                time.perf_counter() - start_time)
+    # 프롬프트 원문은 로그에 남기지 않음 (ES 문서에만 기록)
+    logger.info(f"Prompt Check: user={user_id} length={len(prompt)} -> {outcome} "
+                f"({result.get('detection_method', 'unknown')})")
     return result
 
 @app.post("/prompt/check/hybrid")
@@ -169,7 +205,7 @@ async def check_prompt_hybrid(request: Request):
         "processing_time": 0.001
     }
     
-    logger.info(f"Hybrid Check: {prompt} -> {result}")
+    logger.info(f"Hybrid Check: length={len(prompt)} -> blocked={result['is_blocked']}")
     return result
 
 @app.post("/response/check/hybrid")
@@ -188,7 +224,7 @@ async def check_response_hybrid(request: Request):
         "processing_time": 0.001
     }
     
-    logger.info(f"Response Check: {response} -> {result}")
+    logger.info(f"Response Check: length={len(response)} -> blocked={result['is_blocked']}")
     return result
 
 @app.get("/security/status")
@@ -213,6 +249,28 @@ async def health_check():
     """헬스 체크 엔드포인트"""
     return {"status": "healthy", "service": "PromptGate Filter Service"}
 
+@app.get("/models/status")
+async def get_models_status():
+    """공유 모델 레지스트리 상태 (로드된 모델, 상주 메모리, 임베딩 배치 히스토그램)"""
+    status = get_model_registry().get_status()
+    status["embedding_services"] = get_embedding_service_stats()
+    return status
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 메트릭 (단계별 지연, 테넌트별 평가/차단 수, 이벤트 루프 지연, 큐 길이)"""
+    try:
+        body, content_type = get_telemetry().render()
+    except RuntimeError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
+    return Response(content=body, media_type=content_type)
+
+@app.get("/ready")
+async def readiness_check():
+    """레디니스 체크 엔드포인트 (필수 엔진 초기화 완료 전, 선택 엔진 로딩 중에는 503)"""
+    status = get_startup_orchestrator().get_status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
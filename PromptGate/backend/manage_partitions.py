@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+decision_logs / shadow_events 파티션 유지보수 스크립트
+cron 등으로 하루 1회 실행 (예: 0 3 * * * python manage_partitions.py)
+"""
+
+import sys
+import os
+import argparse
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.partition_manager import create_partition_manager, ExpireMode
+from app.logger import get_logger
+
+logger = get_logger("partition-maintenance")
+
+def main():
+    """파티션 유지보수 메인 함수"""
+    parser = argparse.ArgumentParser(description="로그 테이블 파티션 유지보수")
+    parser.add_argument("--dry-run", action="store_true", help="변경 없이 대상만 출력")
+    parser.add_argument("--archive", action="store_true",
+                        help="만료 파티션을 삭제하지 않고 partition_archive 스키마로 이동")
+    args = parser.parse_args()
+
+    try:
+        manager = create_partition_manager(ExpireMode.ARCHIVE if args.archive else ExpireMode.DROP)
+        print(f"🚀 파티션 유지보수를 시작합니다{' (dry-run)' if args.dry_run else ''}...")
+
+        reports = manager.run(dry_run=args.dry_run)
+        has_errors = False
+        for report in reports:
+            print(f"\n📋 {report.table}")
+            print(f"  - 생성: {', '.join(report.created) or '없음'}")
+            print(f"  - 만료: {', '.join(report.expired) or '없음'}")
+            for tenant_id, rows in report.purged_rows.items():
+                print(f"  - 테넌트 {tenant_id} 보존 기간 초과 삭제: {rows}행")
+            for error in report.errors:
+                has_errors = True
+                print(f"  ❌ {error}")
+
+        if has_errors:
+            sys.exit(1)
+        print("\n🎉 파티션 유지보수가 완료되었습니다!")
+
+    except Exception as e:
+        logger.error(f"파티션 유지보수 실패: {str(e)}")
+        print(f"❌ 파티션 유지보수 실패: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+DashIQ 대시보드 롤업 워커 실행 스크립트
+기본은 상주 실행, --once 옵션 시 1회 집계 후 종료 (cron 용)
+--recompute-days N 은 지난 N 일 버킷을 소스 기준으로 다시 계산 (닫힌 버킷 보정, 백필)
+"""
+
+import sys
+import os
+import argparse
+from datetime import date, timedelta
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.rollup_worker import create_rollup_worker
+from app.logger import get_logger
+
+logger = get_logger("rollup-worker")
+
+def main():
+    """롤업 워커 메인 함수"""
+    parser = argparse.ArgumentParser(description="DashIQ 대시보드 롤업 워커")
+    parser.add_argument("--once", action="store_true", help="1회 집계 후 종료")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("ROLLUP_INTERVAL_SECONDS", "60")),
+                        help="상주 실행 시 집계 주기 (초)")
+    parser.add_argument("--recompute-days", type=int, default=0,
+                        help="지난 N 일 버킷을 다시 계산 후 종료")
+    args = parser.parse_args()
+
+    try:
+        worker = create_rollup_worker()
+
+        if args.recompute_days:
+            today = date.today()
+            reports = worker.recompute_range(today - timedelta(days=args.recompute_days), today + timedelta(days=1))
+            has_errors = False
+            for report in reports:
+                print(f"📊 {report.source}: {report.rows}개 집계 행 재계산")
+                for error in report.errors:
+                    has_errors = True
+                    print(f"  ❌ {error}")
+            if has_errors:
+                sys.exit(1)
+            return
+
+        if not args.once:
+            worker.run_forever(args.interval)
+            return
+
+        has_errors = False
+        for report in worker.run_once():
+            print(f"📊 {report.source}: {report.batches}배치, {report.rows}개 집계 행 갱신, 워터마크 {report.watermark}")
+            for error in report.errors:
+                has_errors = True
+                print(f"  ❌ {error}")
+        if has_errors:
+            sys.exit(1)
+
+    except KeyboardInterrupt:
+        print("⏹️ 롤업 워커 종료")
+    except Exception as e:
+        logger.error(f"롤업 워커 실패: {str(e)}")
+        print(f"❌ 롤업 워커 실패: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
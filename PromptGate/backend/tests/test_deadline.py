@@ -0,0 +1,121 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.deadline import (
+    COMPLETED,
+    SKIPPED,
+    TIMED_OUT,
+    DeadlineExceeded,
+    DeadlineMiddleware,
+    current_deadline,
+    deadline_scope,
+    derive_timeout,
+    reserve_scope,
+    run_detector,
+)
+
+
+def test_inner_scope_never_extends_outer_deadline():
+    with deadline_scope(0.1) as outer:
+        with deadline_scope(10.0) as inner:
+            assert inner is outer
+        with reserve_scope(0.05) as reserved:
+            assert reserved.expires_at < outer.expires_at
+    assert current_deadline() is None
+
+
+def test_derive_timeout_is_capped_by_remaining_time():
+    assert derive_timeout(5.0) == 5.0
+    with deadline_scope(0.2):
+        assert derive_timeout(5.0) <= 0.2
+    with deadline_scope(0.0):
+        with pytest.raises(DeadlineExceeded):
+            derive_timeout(5.0)
+
+
+def test_slow_detector_times_out_and_reports_fail_mode(monkeypatch):
+    monkeypatch.delenv("DETECTOR_FAIL_MODE_POLICY", raising=False)
+
+    async def slow():
+        await asyncio.sleep(1.0)
+
+    async def scenario():
+        with deadline_scope(0.05):
+            return await run_detector("policy", slow)
+
+    outcome = asyncio.run(scenario())
+    assert outcome.status == TIMED_OUT
+    assert outcome.should_block  # policy 기본값은 fail-closed
+
+
+def test_detector_below_min_budget_is_skipped(monkeypatch):
+    monkeypatch.setenv("DETECTOR_MIN_BUDGET_MS_VECTOR", "100")
+    started = []
+
+    async def search():
+        started.append(True)
+
+    async def scenario():
+        with deadline_scope(0.05):
+            return await run_detector("vector", search)
+
+    outcome = asyncio.run(scenario())
+    assert outcome.status == SKIPPED and not started
+    assert not outcome.should_block  # vector 기본값은 fail-open
+
+
+def test_detector_without_deadline_completes():
+    async def fast():
+        return "ok"
+
+    outcome = asyncio.run(run_detector("keyword", fast))
+    assert outcome.status == COMPLETED and outcome.result == "ok"
+
+
+def run_middleware(middleware, headers):
+    seen = []
+
+    async def endpoint(scope, receive, send):
+        deadline = current_deadline()
+        seen.append((deadline.budget, deadline.client_supplied))
+
+    middleware.app = endpoint
+    asyncio.run(middleware({"type": "http", "path": "/api/v1/evaluate", "headers": headers}, None, None))
+    return seen[0]
+
+
+def test_untrusted_deadline_header_is_ignored():
+    middleware = DeadlineMiddleware(None, budgets={"/api/v1/evaluate": 0.3}, secret="")
+    assert run_middleware(middleware, [(b"x-request-deadline-ms", b"1")]) == (0.3, False)
+
+    middleware = DeadlineMiddleware(None, budgets={"/api/v1/evaluate": 0.3}, secret="internal")
+    headers = [(b"x-request-deadline-ms", b"1"), (b"x-deadline-secret", b"guess")]
+    assert run_middleware(middleware, headers) == (0.3, False)
+
+
+def test_trusted_caller_can_only_shorten_budget():
+    middleware = DeadlineMiddleware(None, budgets={"/api/v1/evaluate": 0.3}, secret="internal")
+    secret = (b"x-deadline-secret", b"internal")
+    assert run_middleware(middleware, [(b"x-request-deadline-ms", b"100"), secret]) == (0.1, True)
+    assert run_middleware(middleware, [(b"x-request-deadline-ms", b"900"), secret]) == (0.3, False)
+
+
+def test_injection_detector_fails_closed_under_client_budget(monkeypatch):
+    monkeypatch.delenv("DETECTOR_FAIL_MODE_REBUFF", raising=False)
+
+    async def slow():
+        await asyncio.sleep(1.0)
+
+    async def scenario(client_supplied):
+        with deadline_scope(0.02, client_supplied=client_supplied):
+            with reserve_scope(0.01):  # 안쪽 마감 시간도 호출자 예산 표시를 물려받음
+                return await run_detector("rebuff", slow)
+
+    assert not asyncio.run(scenario(False)).should_block
+    outcome = asyncio.run(scenario(True))
+    assert outcome.status == TIMED_OUT and outcome.should_block
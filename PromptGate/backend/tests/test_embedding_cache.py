@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.embedding_cache import EmbeddingCache, create_embedding_cache, model_backend, model_fingerprint
+
+
+class FakeOnnxModel:
+    def __init__(self, model_path):
+        self.model_path = model_path
+
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+
+class FakeConfig:
+    def __init__(self, commit_hash):
+        self._commit_hash = commit_hash
+
+
+class FakeSentenceTransformer:
+    def __init__(self, commit_hash):
+        self.auto_model = type("AutoModel", (), {"config": FakeConfig(commit_hash)})()
+
+    def _first_module(self):
+        return self
+
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+
+def make_cache(cache_dir, version, backend="torch", grace=0.0):
+    return EmbeddingCache("ko-sroberta", version, dim=4, cache_dir=str(cache_dir), disk_capacity=64,
+                          backend=backend, prune_grace_seconds=grace)
+
+
+def age(cache, seconds):
+    """디렉터리를 seconds 전에 만들고 마지막으로 쓴 것처럼 표시"""
+    past = time.time() - seconds
+    meta_path = os.path.join(cache.store.directory, "meta.json")
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    meta["created_at"] = past
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    for name in os.listdir(cache.store.directory):
+        os.utime(os.path.join(cache.store.directory, name), (past, past))
+
+
+def test_version_follows_the_loaded_model(tmp_path):
+    model_path = tmp_path / "model.int8.onnx"
+    model_path.write_bytes(b"weights-v1")
+    onnx = FakeOnnxModel(str(model_path))
+    first = model_fingerprint(onnx)
+    model_path.write_bytes(b"weights-v2")
+    assert model_fingerprint(onnx) != first
+    assert model_backend(onnx) == "FakeOnnxModel:model.int8.onnx"
+
+    assert model_fingerprint(FakeSentenceTransformer("a" * 40)) == "a" * 16
+    assert model_fingerprint(object()) is None
+
+
+def test_unknown_model_uses_lru_only(tmp_path, monkeypatch):
+    class Opaque:
+        def get_sentence_embedding_dimension(self):
+            return 4
+
+    monkeypatch.setenv("EMBEDDING_CACHE_DIR", str(tmp_path))
+    cache = create_embedding_cache("ko-sroberta", Opaque())
+    assert cache.store is None and not os.listdir(tmp_path)
+
+
+def test_vectors_are_shared_through_disk(tmp_path):
+    writer = make_cache(tmp_path, "v1")
+    writer.put("ignore  previous instructions", np.arange(4, dtype=np.float32))
+    writer.store.flush()
+
+    reader = make_cache(tmp_path, "v1")
+    assert np.array_equal(reader.get("ignore previous instructions"), np.arange(4, dtype=np.float32))
+    assert reader.stats["disk_hits"] == 1
+
+
+def test_only_older_idle_namespaces_of_same_backend_are_pruned(tmp_path):
+    old = make_cache(tmp_path, "v0")
+    age(old, 7200)
+    onnx = make_cache(tmp_path, "v0", backend="onnx")
+    age(onnx, 7200)
+
+    make_cache(tmp_path, "v1", grace=3600)
+
+    assert not os.path.exists(old.store.directory)  # 같은 백엔드의 이전 버전
+    assert os.path.exists(onnx.store.directory)  # 다른 백엔드 파드가 사용 중
+
+
+def test_live_and_newer_namespaces_are_kept(tmp_path):
+    live = make_cache(tmp_path, "v0")
+    age(live, 7200)
+    live.put("hello", np.ones(4))
+    live.store.flush()
+    os.utime(live.store.directory + "/keys.bin")  # 이전 버전 파드가 방금 기록
+
+    current = make_cache(tmp_path, "v1", grace=3600)
+    assert os.path.exists(live.store.directory)
+
+    # 롤링 배포 중 이전 버전 파드가 재시작해도 새 버전 캐시는 지우지 않음
+    age(live, 7200)
+    make_cache(tmp_path, "v0", grace=0.0)
+    assert os.path.exists(current.store.directory)
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.embedding_service import EmbeddingBatcher
+
+
+class FakeModel:
+    """encode 호출별 입력을 기록하고, gate 가 있으면 열릴 때까지 encode 를 멈춤"""
+
+    def __init__(self, gate=None, fail=False):
+        self.calls = []
+        self.gate = gate
+        self.fail = fail
+        self.entered = threading.Event()
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        self.calls.append(list(texts))
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("encode failed")
+        return np.asarray([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+
+class FakeCache:
+    def __init__(self, hits):
+        self.hits = hits
+        self.stored = {}
+
+    def get(self, text):
+        return self.hits.get(text)
+
+    def put(self, text, vector):
+        self.stored[text] = vector
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def make(model, **options):
+        batcher = EmbeddingBatcher(model, **options)
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        batcher.close()
+
+
+def test_concurrent_requests_share_a_batch_up_to_max_batch_size(make_batcher):
+    model = FakeModel()
+    batcher = make_batcher(model, max_batch_size=4, max_wait_ms=200)
+
+    futures = [batcher.submit(f"text {i:02d}") for i in range(10)]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert [len(batch) for batch in model.calls] == [4, 4, 2]
+    assert all(result[0] == 7.0 for result in results)
+    assert batcher.get_stats()["batch_size"]["count"] == 3
+
+
+def test_lone_request_waits_at_most_max_wait(make_batcher):
+    model = FakeModel()
+    batcher = make_batcher(model, max_batch_size=32, max_wait_ms=20)
+
+    started = time.perf_counter()
+    batcher.submit("first").result(timeout=5)
+    assert time.perf_counter() - started < 1.0
+    time.sleep(0.05)
+    batcher.submit("second").result(timeout=5)
+    assert model.calls == [["first"], ["second"]]
+
+
+def test_duplicate_texts_in_a_batch_are_encoded_once(make_batcher):
+    model = FakeModel()
+    batcher = make_batcher(model, max_wait_ms=100)
+
+    async def scenario():
+        return await batcher.embed_many(["same", "same", "other"])
+
+    vectors = asyncio.run(scenario())
+    assert model.calls == [["same", "other"]]
+    assert [vector[0] for vector in vectors] == [4.0, 4.0, 5.0]
+
+
+def test_encode_error_reaches_every_future_and_worker_survives(make_batcher):
+    model = FakeModel(fail=True)
+    batcher = make_batcher(model, max_wait_ms=100)
+
+    futures = [batcher.submit(text) for text in ("a", "b")]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="encode failed"):
+            future.result(timeout=5)
+    assert batcher.errors == 1
+
+    model.fail = False
+    assert batcher.submit("c").result(timeout=5)[0] == 1.0
+
+
+def test_cancelled_request_is_not_encoded(make_batcher):
+    gate = threading.Event()
+    model = FakeModel(gate=gate)
+    batcher = make_batcher(model, max_wait_ms=1)
+
+    first = batcher.submit("first")
+    assert model.entered.wait(5)  # 워커가 첫 배치 encode 중
+    cancelled = batcher.submit("cancelled")
+    kept = batcher.submit("kept")
+    assert cancelled.cancel()
+    gate.set()
+
+    assert kept.result(timeout=5)[0] == 4.0 and first.result(timeout=5)[0] == 5.0
+    assert model.calls == [["first"], ["kept"]]
+
+
+def test_close_drains_queue_and_next_submit_restarts_worker(make_batcher):
+    gate = threading.Event()
+    model = FakeModel(gate=gate)
+    batcher = make_batcher(model, max_batch_size=2, max_wait_ms=1)
+
+    futures = [batcher.submit(f"t{i}") for i in range(5)]
+    assert model.entered.wait(5)
+    gate.set()
+    batcher.close()
+
+    assert all(future.done() for future in futures)
+    assert batcher._thread is None
+    assert batcher.submit("again").result(timeout=5)[0] == 5.0
+
+
+def test_cache_hit_skips_the_queue_and_misses_are_stored(make_batcher):
+    model = FakeModel()
+    cache = FakeCache({"cached": np.zeros(2, dtype=np.float32)})
+    batcher = make_batcher(model, max_wait_ms=1, cache=cache)
+
+    assert batcher.submit("cached").result(timeout=5).tolist() == [0.0, 0.0]
+    assert batcher._thread is None and not model.calls
+    batcher.submit("fresh").result(timeout=5)
+    assert model.calls == [["fresh"]] and "fresh" in cache.stored
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.embedding_filter import EmbeddingFilter
+from app.local_vector_index import LocalVectorMirror, NumpyVectorIndex
+from app.tenant_vector_policy import build_tenant_vector_policy
+
+DIM = 8
+
+
+def make_points(count, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, DIM)).astype(np.float32)
+    return [SimpleNamespace(id=i, vector=vectors[i].tolist(), payload={"prompt": f"p{i}"}) for i in range(count)]
+
+
+class FakeQdrant:
+    """scroll 페이지네이션과 전수 코사인 search 를 흉내 내는 클라이언트"""
+
+    def __init__(self, points, fail_search=False):
+        self.points = points
+        self.fail_search = fail_search
+        self.scroll_filters = []
+
+    def scroll(self, collection_name, limit, offset=None, with_payload=True, with_vectors=True, scroll_filter=None):
+        self.scroll_filters.append(scroll_filter)
+        start = offset or 0
+        page = self.points[start:start + limit]
+        return page, (start + limit if start + limit < len(self.points) else None)
+
+    def search(self, collection_name, query_vector, limit, query_filter=None, **kwargs):
+        if self.fail_search:
+            raise ConnectionError("qdrant down")
+        matrix = np.asarray([point.vector for point in self.points], dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        scores = matrix @ (np.asarray(query_vector) / np.linalg.norm(query_vector))
+        return [SimpleNamespace(id=self.points[i].id, score=float(scores[i]), payload=self.points[i].payload)
+                for i in np.argsort(-scores)[:limit]]
+
+
+def test_concurrent_add_and_search_see_consistent_snapshots():
+    points = make_points(64)
+    index = NumpyVectorIndex([p.id for p in points], np.asarray([p.vector for p in points]),
+                             [p.payload for p in points])
+    query = np.asarray(points[0].vector, dtype=np.float32)
+    errors = []
+    stop = threading.Event()
+
+    def searcher():
+        while not stop.is_set():
+            try:
+                for hit in index.search(query, 1000):
+                    assert hit.payload["prompt"] == f"p{hit.id}"
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=searcher) for _ in range(4)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # add 도중 스레드 전환이 일어나도록
+    try:
+        for thread in threads:
+            thread.start()
+        rng = np.random.default_rng(1)
+        for i in range(64, 1064):
+            index.add(i, rng.normal(size=DIM), {"prompt": f"p{i}"})
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        sys.setswitchinterval(interval)
+
+    assert not errors
+    assert len(index) == 1064 and len(index.search(query, 2000)) == 1064
+
+
+def test_add_replaces_existing_point():
+    index = NumpyVectorIndex([1], np.ones((1, DIM)), [{"prompt": "old"}])
+    index.add(1, -np.ones(DIM), {"prompt": "new"})
+    [hit] = index.search(-np.ones(DIM), 5)
+    assert len(index) == 1 and hit.payload == {"prompt": "new"} and hit.score > 0.99
+
+
+def test_sync_pages_through_qdrant_and_restores_from_snapshot(tmp_path):
+    client = FakeQdrant(make_points(25))
+    mirror = LocalVectorMirror("blocked-prompts", snapshot_dir=str(tmp_path), recall_check=False)
+    assert mirror.sync_from_qdrant(client, batch_size=10) == 25
+    assert len(client.scroll_filters) == 3 and client.scroll_filters[0] is None  # 전체 미러는 필터 없음
+    assert not mirror.is_stale()
+
+    restored = LocalVectorMirror("blocked-prompts", snapshot_dir=str(tmp_path))
+    assert restored.load_snapshot()
+    query = np.asarray(client.points[3].vector)
+    assert [hit.id for hit in restored.search(query, 3)] == [hit.id for hit in mirror.search(query, 3)]
+    assert restored.search(query, 1)[0].payload == {"prompt": "p3"}
+
+
+def test_tenant_mirror_syncs_only_its_scope():
+    client = FakeQdrant(make_points(3))
+    LocalVectorMirror("blocked-prompts", tenant_id="tenant-a", recall_check=False).sync_from_qdrant(client)
+    assert client.scroll_filters[0] is not None
+
+
+def test_recall_against_qdrant():
+    client = FakeQdrant(make_points(40))
+    mirror = LocalVectorMirror("blocked-prompts")
+    mirror.sync_from_qdrant(client)
+    assert mirror.measure_recall(client, k=5, sample_size=10) == 1.0
+
+    # 로컬 인덱스에 없는 포인트가 Qdrant 에 추가되면 리콜이 떨어짐
+    client.points = client.points + make_points(40, seed=7)
+    for offset, point in enumerate(client.points[40:]):
+        point.id = 100 + offset
+    queries = np.asarray([point.vector for point in client.points[40:45]], dtype=np.float32)
+    assert mirror.measure_recall(client, queries=queries, k=5) < 1.0
+
+
+def test_search_falls_back_to_local_mirror_when_qdrant_fails():
+    points = make_points(10)
+    mirror = LocalVectorMirror("blocked-prompts", recall_check=False)
+    mirror.sync_from_qdrant(FakeQdrant(points))
+
+    class DirectPool:
+        async def run(self, tenant_id, func, **kwargs):
+            return func(**kwargs)
+
+    engine = EmbeddingFilter.__new__(EmbeddingFilter)
+    engine.local_index_mode = "fallback"
+    engine.local_index = mirror
+    engine.vector_db_client = FakeQdrant(points, fail_search=True)
+    engine._search_pool = DirectPool()
+    engine._search_params = object()
+    engine._local_sync_tasks = {}
+
+    policy = build_tenant_vector_policy(None, None)
+    query = np.asarray(points[2].vector, dtype=np.float32)
+    hits, method = asyncio.run(engine._search(query, 3, 0.5, policy))
+    assert method == "cosine_similarity_local_fallback"
+    assert hits[0].id == 2
+
+    engine.vector_db_client.fail_search = False
+    hits, method = asyncio.run(engine._search(query, 3, 0.5, policy))
+    assert method == "cosine_similarity" and hits[0].id == 2
@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import model_registry
+from app.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # 테스트마다 빈 전역 레지스트리 사용
+    registry = ModelRegistry()
+    monkeypatch.setattr(model_registry, "_model_registry", registry)
+    return registry
+
+
+def test_concurrent_get_or_load_loads_once_and_shares_the_handle(registry):
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(threading.get_ident())
+        release.wait(5)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(registry.get_or_load, "model", loader) for _ in range(8)]
+        release.set()
+        handles = [future.result(timeout=5) for future in futures]
+
+    assert len(calls) == 1
+    assert all(handle is handles[0] for handle in handles)
+    assert registry.is_loaded("model")
+    assert registry.get_status()["models"]["model"]["inherited_from_parent"] is False
+
+
+def test_slow_load_does_not_block_other_keys(registry):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_loader():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        slow = pool.submit(registry.get_or_load, "slow", slow_loader)
+        assert started.wait(5)
+        # slow 로드가 끝나지 않은 상태에서도 다른 키는 바로 로드됨
+        assert registry.get_or_load("fast", lambda: "fast") == "fast"
+        assert not slow.done()
+        release.set()
+        assert slow.result(timeout=5) == "slow"
+
+
+def test_failed_load_is_not_cached(registry):
+    attempts = []
+
+    def flaky_loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("download failed")
+        return "model"
+
+    with pytest.raises(OSError):
+        registry.get_or_load("model", flaky_loader)
+    assert not registry.is_loaded("model")
+    assert registry.get_or_load("model", flaky_loader) == "model"
+    assert len(attempts) == 2
+
+    registry.unload("model")
+    assert not registry.is_loaded("model")
+
+
+def test_embedding_model_is_shared_through_the_registry(registry, monkeypatch):
+    loaded = []
+
+    def fake_load(model_name):
+        loaded.append(model_name)
+        return f"model:{model_name}"
+
+    monkeypatch.setattr(model_registry, "_load_sentence_transformer", fake_load)
+    monkeypatch.setenv("EMBEDDING_BACKEND", "torch")
+    monkeypatch.setenv("EMBEDDING_MODEL_NAME", "test/model")
+
+    first = model_registry.get_embedding_model()
+    assert model_registry.get_sentence_transformer("test/model") is first
+    assert model_registry.get_sentence_transformer("other/model") == "model:other/model"
+    assert loaded == ["test/model", "other/model"]
+
+
+def test_onnx_backend_falls_back_to_torch_without_onnxruntime(registry, monkeypatch):
+    def missing_onnx(model_dir, quantized):
+        raise ImportError("onnxruntime")
+
+    monkeypatch.setattr(model_registry, "_load_onnx_embedder", missing_onnx)
+    monkeypatch.setattr(model_registry, "_load_sentence_transformer", lambda name: f"torch:{name}")
+    monkeypatch.setenv("EMBEDDING_BACKEND", "onnx")
+    monkeypatch.setenv("EMBEDDING_ONNX_DIR", "/nonexistent")
+
+    assert model_registry.get_embedding_model("test/model") == "torch:test/model"
+    assert set(registry.get_status()["models"]) == {"sentence_transformer:test/model"}
@@ -0,0 +1,143 @@
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Dict, List
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.partition_manager import (
+    ExpireMode,
+    PartitionInterval,
+    PartitionManager,
+    PartitionSpec,
+    quote_ident,
+)
+
+TODAY = date(2026, 10, 30)
+
+
+class FakeResult:
+    def __init__(self, rows=(), rowcount=0):
+        self.rows = list(rows)
+        self.rowcount = rowcount
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeDatabase:
+    """pg_inherits / tenants 조회에 응답하고 실행된 SQL 을 기록"""
+
+    def __init__(self, partitions: Dict[str, List[str]], retention: Dict[int, int], rowcount: int = 0):
+        self.partitions = partitions
+        self.retention = retention
+        self.rowcount = rowcount
+        self.statements: List[str] = []
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        if "FROM pg_inherits" in sql:
+            return FakeResult((name,) for name in sorted(self.partitions.get(params["table"], [])))
+        if "FROM tenants" in sql:
+            return FakeResult(self.retention.items())
+        self.statements.append(sql)
+        return FakeResult(rowcount=self.rowcount)
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    begin = connect
+
+
+def make_manager(db: FakeDatabase, spec: PartitionSpec, expire_mode: ExpireMode = ExpireMode.DROP) -> PartitionManager:
+    manager = PartitionManager("sqlite://", specs=[spec], expire_mode=expire_mode)
+    manager.engine = db
+    return manager
+
+
+def test_planned_partitions_cross_month_boundary():
+    manager = PartitionManager("sqlite://")
+    daily = manager.planned_partitions(PartitionSpec("decision_logs", PartitionInterval.DAY, premake=2), TODAY)
+    assert daily == [
+        ("decision_logs_p20261030", date(2026, 10, 30), date(2026, 10, 31)),
+        ("decision_logs_p20261031", date(2026, 10, 31), date(2026, 11, 1)),
+        ("decision_logs_p20261101", date(2026, 11, 1), date(2026, 11, 2)),
+    ]
+    monthly = manager.planned_partitions(PartitionSpec("shadow_events", PartitionInterval.MONTH, premake=2), TODAY)
+    assert [(name, start, end) for name, start, end in monthly] == [
+        ("shadow_events_p202610", date(2026, 10, 1), date(2026, 11, 1)),
+        ("shadow_events_p202611", date(2026, 11, 1), date(2026, 12, 1)),
+        ("shadow_events_p202612", date(2026, 12, 1), date(2027, 1, 1)),
+    ]
+    for name, start, _ in daily + monthly:
+        table = name.rsplit("_p", 1)[0]
+        assert PartitionManager.parse_partition_name(table, name)[0] == start
+
+
+def test_ensure_future_partitions_creates_only_missing():
+    spec = PartitionSpec("decision_logs", PartitionInterval.DAY, premake=2)
+    db = FakeDatabase({"decision_logs": ["decision_logs_default", "decision_logs_p20261030"]}, {1: 365})
+    created = make_manager(db, spec).ensure_future_partitions(spec, TODAY)
+
+    assert created == ["decision_logs_p20261031", "decision_logs_p20261101"]
+    attaches = [sql for sql in db.statements if "ATTACH PARTITION" in sql]
+    assert attaches == [
+        'ALTER TABLE "decision_logs" ATTACH PARTITION "decision_logs_p20261031" '
+        "FOR VALUES FROM ('2026-10-31') TO ('2026-11-01')",
+        'ALTER TABLE "decision_logs" ATTACH PARTITION "decision_logs_p20261101" '
+        "FOR VALUES FROM ('2026-11-01') TO ('2026-11-02')",
+    ]
+    # default 파티션에 들어온 같은 구간의 행은 ATTACH 전에 옮김
+    moves = [sql for sql in db.statements if sql.startswith("WITH moved AS")]
+    assert len(moves) == 2 and all('DELETE FROM "decision_logs_default"' in sql for sql in moves)
+
+
+def test_ensure_future_partitions_dry_run_executes_nothing():
+    spec = PartitionSpec("shadow_events", PartitionInterval.MONTH, premake=1)
+    db = FakeDatabase({"shadow_events": []}, {1: 365})
+    created = make_manager(db, spec).ensure_future_partitions(spec, TODAY, dry_run=True)
+    assert created == ["shadow_events_p202610", "shadow_events_p202611"]
+    assert db.statements == []
+
+
+def test_expire_uses_longest_retention_and_purges_shorter_tenants():
+    spec = PartitionSpec("decision_logs", PartitionInterval.DAY)
+    old = [f"decision_logs_p{(TODAY - timedelta(days=days)):%Y%m%d}" for days in (120, 91, 90, 10)]
+    db = FakeDatabase({"decision_logs": ["decision_logs_default"] + old}, {1: 90, 2: 30}, rowcount=5)
+    expired, purged = make_manager(db, spec).expire_partitions(spec, TODAY)
+
+    # 가장 긴 보존 기간(90일) 이전에 끝난 파티션만 분리, 경계에 걸친 파티션은 유지
+    assert expired == sorted(old[:2])
+    assert f'DROP TABLE "{old[0]}"' in db.statements
+    assert not any(old[2] in sql or old[3] in sql for sql in db.statements)
+    # 보존 기간이 더 짧은 테넌트 2 의 행만 삭제
+    assert purged == {"2": 5}
+    deletes = [sql for sql in db.statements if sql.startswith("DELETE FROM")]
+    assert deletes == ['DELETE FROM "decision_logs" WHERE tenant_id = :tenant_id AND ts < CAST(:cutoff AS timestamptz)']
+
+
+def test_expire_archive_mode_moves_partition():
+    spec = PartitionSpec("shadow_events", PartitionInterval.MONTH)
+    db = FakeDatabase({"shadow_events": ["shadow_events_p202501", "shadow_events_p202610"]}, {1: 365})
+    expired, _ = make_manager(db, spec, ExpireMode.ARCHIVE).expire_partitions(spec, TODAY)
+    assert expired == ["shadow_events_p202501"]
+    assert 'ALTER TABLE "shadow_events" DETACH PARTITION "shadow_events_p202501"' in db.statements
+    assert 'ALTER TABLE "shadow_events_p202501" SET SCHEMA "partition_archive"' in db.statements
+    assert not any(sql.startswith("DROP TABLE") for sql in db.statements)
+
+
+@pytest.mark.parametrize("name", ["decision_logs; DROP TABLE tenants", 'x"y', "Decision_Logs", ""])
+def test_rejects_unsafe_identifiers(name):
+    with pytest.raises(ValueError):
+        quote_ident(name)
+    with pytest.raises(ValueError):
+        PartitionSpec(name)
+
+
+def test_rejects_unsafe_lock_timeout():
+    with pytest.raises(ValueError):
+        PartitionManager("sqlite://", lock_timeout="5s'; DROP TABLE tenants; --")
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("toml")
+
+import app.filter as prompt_filter
+from app.policy_engine import PolicyAction
+from app.secret_scanner import SecretScanResult
+
+
+class FailingPolicyEngine:
+    async def evaluate(self, context, prompt, filter_results):
+        raise RuntimeError("OPA unavailable")
+
+
+@pytest.fixture
+def failing_policy(monkeypatch):
+    """정책 평가 실패 + fail-open, 나머지 탐지기는 가짜 결과"""
+    monkeypatch.setenv("DETECTOR_FAIL_MODE_POLICY", "open")
+    monkeypatch.setenv("DETECTOR_FAIL_MODE_SECRET", "open")
+
+    async def get_policy_engine():
+        return FailingPolicyEngine()
+
+    class Scanner:
+        async def scan_text(self, text, context):
+            return SecretScanResult(has_secrets=False, total_secrets=0, high_risk_secrets=0, secrets=[],
+                                    scanner_status={}, processing_time=0.0)
+
+    async def get_secret_scanner():
+        return Scanner()
+
+    async def no_injection(prompt):
+        return {"is_injection": False}
+
+    async def no_match(prompt, tenant_id):
+        return None
+
+    monkeypatch.setattr(prompt_filter, "get_policy_engine", get_policy_engine)
+    monkeypatch.setattr(prompt_filter, "get_secret_scanner", get_secret_scanner)
+    monkeypatch.setattr(prompt_filter.rebuff_integration, "detect_prompt_injection", no_injection)
+    monkeypatch.setattr(prompt_filter, "match_similarity", no_match)
+    monkeypatch.setattr(prompt_filter, "log_to_elasticsearch", lambda index, data: None)
+    monkeypatch.setattr(prompt_filter, "get_block_keywords", lambda: [])
+    return monkeypatch
+
+
+def evaluate(prompt):
+    return asyncio.run(prompt_filter.evaluate_prompt_with_policy(prompt))
+
+
+def test_fallback_action_follows_strongest_filter_result():
+    assert prompt_filter.fallback_policy_action([]) == PolicyAction.ALLOW
+    assert prompt_filter.fallback_policy_action([{"action": "warn"}]) == PolicyAction.ALERT
+    assert prompt_filter.fallback_policy_action([{"action": "warn"}, {"action": "block"}]) == PolicyAction.DENY
+
+
+def test_blocked_keyword_still_blocks_when_policy_fails_open(failing_policy):
+    failing_policy.setattr(prompt_filter, "get_block_keywords", lambda: ["drop table"])
+
+    result = evaluate("please drop table users")
+
+    assert result["is_blocked"]
+    assert result["detectors"]["policy"]["status"] == "failed"
+    assert result["filter_results"][0]["filter_type"] == "keyword"
+
+
+def test_clean_prompt_is_allowed_when_policy_fails_open(failing_policy):
+    result = evaluate("summarize the quarterly report")
+
+    assert not result["is_blocked"]
+    assert result["detectors"]["policy"]["status"] == "failed"
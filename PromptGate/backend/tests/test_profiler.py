@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import app.profiler as profiler
+from app.profiler import ProfilerMiddleware, StackSampler
+
+PII_DETECTOR_PROFILER = os.path.join(os.path.dirname(BACKEND_DIR), "services", "pii-detector", "app", "profiler.py")
+
+
+def busy_handler(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+def make_client(monkeypatch, **options) -> TestClient:
+    monkeypatch.setattr(profiler, "_profiler_instance", StackSampler(interval=0.001, **options))
+    app = FastAPI()
+    app.add_middleware(ProfilerMiddleware)
+    app.include_router(profiler.router)
+
+    @app.get("/work")
+    async def work(seconds: float = 0.0):
+        busy_handler(seconds)
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_service_copies_are_identical():
+    # 두 이미지에 app/ 만 복사되므로 같은 모듈을 두 곳에 둠, 한쪽만 고치지 않도록
+    with open(os.path.join(BACKEND_DIR, "app", "profiler.py"), "rb") as backend, \
+            open(PII_DETECTOR_PROFILER, "rb") as pii_detector:
+        assert backend.read() == pii_detector.read(), \
+            "backend/app/profiler.py 와 services/pii-detector/app/profiler.py 가 다릅니다"
+
+
+def test_admin_endpoints_are_hidden_when_disabled(monkeypatch):
+    client = make_client(monkeypatch, admin_token="")
+    assert client.get("/admin/profile/status", headers={"X-Admin-Token": "anything"}).status_code == 404
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "wrong"}])
+def test_admin_endpoints_require_token(monkeypatch, headers):
+    client = make_client(monkeypatch, admin_token="secret")
+    assert client.get("/admin/profile/captures", headers=headers).status_code == 403
+
+
+def test_admin_status_with_token(monkeypatch):
+    client = make_client(monkeypatch, admin_token="secret")
+    response = client.get("/admin/profile/status", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200 and response.json()["enabled"]
+
+
+def test_requested_profile_is_captured(monkeypatch):
+    client = make_client(monkeypatch, admin_token="secret")
+
+    response = client.get("/work?seconds=0.1", headers={"X-Profile-Request": "wall", "X-Admin-Token": "secret"})
+    capture_id = response.headers["x-profile-id"]
+
+    captures = client.get("/admin/profile/captures", headers={"X-Admin-Token": "secret"}).json()["captures"]
+    assert [(c["capture_id"], c["reason"], c["path"]) for c in captures] == [(capture_id, "requested", "/work")]
+    stacks = client.get(f"/admin/profile/captures/{capture_id}", headers={"X-Admin-Token": "secret"})
+    assert "busy_handler" in stacks.text
+
+
+def test_profile_header_without_token_is_ignored(monkeypatch):
+    client = make_client(monkeypatch, admin_token="secret")
+    response = client.get("/work", headers={"X-Profile-Request": "wall"})
+    assert "x-profile-id" not in response.headers
+    assert not profiler.get_profiler().captures
+
+
+def test_slow_requests_are_captured(monkeypatch):
+    client = make_client(monkeypatch, admin_token="secret", slow_threshold=0.05)
+
+    client.get("/work?seconds=0.1")
+    client.get("/work")
+
+    captures = list(profiler.get_profiler().captures)
+    assert [(c.reason, c.path) for c in captures] == [("slow", "/work")]
+    assert captures[0].duration_ms >= 100 and "busy_handler" in captures[0].stacks
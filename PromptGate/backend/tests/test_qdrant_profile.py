@@ -0,0 +1,136 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+models = pytest.importorskip("qdrant_client.models")
+
+from app.qdrant_profile import (
+    CollectionProfile,
+    apply_profile,
+    build_tenant_filter,
+    describe_collection,
+    ensure_payload_indexes,
+    is_visible_to_tenant,
+    plan_profile_changes,
+)
+
+
+class FakeQdrant:
+    """get_collection 응답 구조와 인덱스 생성/컬렉션 변경 호출을 흉내 내는 클라이언트"""
+
+    def __init__(self, m=16, ef_construct=200, quantization=True, on_disk=True, indexes=("category", "severity",
+                                                                                        "source", "tenant_id")):
+        self.m = m
+        self.ef_construct = ef_construct
+        self.quantization = quantization
+        self.on_disk = on_disk
+        self.indexes = {name: "keyword" for name in indexes}
+        self.created_indexes = []
+        self.updates = []
+
+    def get_collection(self, collection_name):
+        quantization = SimpleNamespace(scalar=SimpleNamespace(type="int8")) if self.quantization else None
+        return SimpleNamespace(
+            points_count=42,
+            status=SimpleNamespace(value="green"),
+            config=SimpleNamespace(
+                params=SimpleNamespace(vectors=SimpleNamespace(size=768, on_disk=self.on_disk)),
+                hnsw_config=SimpleNamespace(m=self.m, ef_construct=self.ef_construct),
+                quantization_config=quantization,
+            ),
+            payload_schema={name: SimpleNamespace(data_type=SimpleNamespace(value=data_type))
+                            for name, data_type in self.indexes.items()},
+        )
+
+    def create_payload_index(self, collection_name, field_name, field_schema):
+        self.created_indexes.append(field_name)
+        self.indexes[field_name] = field_schema.value
+
+    def update_collection(self, **kwargs):
+        self.updates.append(kwargs)
+
+
+def test_describe_collection_reads_current_settings():
+    assert describe_collection(FakeQdrant(indexes=("tenant_id",)), "blocked-prompts") == {
+        "points": 42,
+        "status": "green",
+        "vector_size": 768,
+        "on_disk_vectors": True,
+        "hnsw_m": 16,
+        "hnsw_ef_construct": 200,
+        "quantization": "int8",
+        "payload_indexes": {"tenant_id": "keyword"},
+    }
+
+
+def test_plan_is_empty_when_collection_matches_profile():
+    assert plan_profile_changes(describe_collection(FakeQdrant(), "c"), CollectionProfile()) == []
+
+
+def test_plan_lists_every_difference():
+    client = FakeQdrant(m=8, ef_construct=100, quantization=False, on_disk=False, indexes=("category",))
+    changes = plan_profile_changes(describe_collection(client, "c"), CollectionProfile())
+    assert changes == [
+        "hnsw m=8→16, ef_construct=100→200",
+        "quantization None→int8",
+        "on_disk_vectors False→True",
+        "payload index +severity",
+        "payload index +source",
+        "payload index +tenant_id",
+    ]
+
+    current = describe_collection(FakeQdrant(), "c")
+    assert plan_profile_changes(current, CollectionProfile(quantization=False)) == ["quantization int8→None"]
+
+
+def test_ensure_payload_indexes_creates_only_missing():
+    client = FakeQdrant(indexes=("category", "tenant_id"))
+    assert ensure_payload_indexes(client, "c", CollectionProfile()) == ["severity", "source"]
+    assert client.created_indexes == ["severity", "source"]
+    assert ensure_payload_indexes(client, "c", CollectionProfile()) == []
+
+
+def test_apply_profile_updates_collection_only_when_needed():
+    client = FakeQdrant()
+    assert apply_profile(client, "c", CollectionProfile()) == []
+    assert client.updates == []
+
+    client = FakeQdrant(m=8, indexes=())
+    changes = apply_profile(client, "c", CollectionProfile(quantization=False))
+    assert changes[0] == "hnsw m=8→16, ef_construct=200→200"
+    [update] = client.updates
+    assert update["hnsw_config"].m == 16
+    assert update["vectors_config"][""].on_disk is True
+    # 양자화를 끄는 경우 명시적으로 비활성화
+    assert update["quantization_config"] == models.Disabled.DISABLED
+    assert set(client.created_indexes) == {"category", "severity", "source", "tenant_id"}
+
+
+def test_tenant_filter_matches_own_and_shared_points():
+    shared_only = build_tenant_filter(None)
+    assert shared_only.should is None
+    [condition] = shared_only.must
+    assert condition.is_empty.key == "tenant_id"
+
+    tenant_filter = build_tenant_filter("tenant-a")
+    assert tenant_filter.must is None
+    own, shared = tenant_filter.should
+    assert own.key == "tenant_id" and own.match.value == "tenant-a"
+    assert shared.is_empty.key == "tenant_id"
+
+
+@pytest.mark.parametrize("payload, tenant_id, visible", [
+    ({"tenant_id": None}, None, True),
+    ({}, "tenant-a", True),
+    (None, "tenant-a", True),
+    ({"tenant_id": "tenant-a"}, "tenant-a", True),
+    ({"tenant_id": "tenant-a"}, "tenant-b", False),
+    ({"tenant_id": "tenant-a"}, None, False),
+    ({"tenant_id": "tenant-a"}, "", False),
+])
+def test_is_visible_to_tenant_agrees_with_filter(payload, tenant_id, visible):
+    assert is_visible_to_tenant(payload, tenant_id) is visible
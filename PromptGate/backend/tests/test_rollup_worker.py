@@ -0,0 +1,266 @@
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.rollup_worker import ROLLUP_SOURCES, RollupWorker
+
+NOW = datetime(2026, 10, 30, 12, 0, tzinfo=timezone.utc)
+MIGRATIONS = [os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "migrations", name)
+              for name in ("002_rollup_sources.sql", "003_rollup_hourly_users.sql")]
+SOURCES = {source.name: source for source in ROLLUP_SOURCES}
+
+
+class FakeResult:
+    def __init__(self, value=None, rowcount=0):
+        self.value = value
+        self.rowcount = rowcount
+
+    def scalar(self):
+        return self.value
+
+
+class FakeDatabase:
+    """워터마크/now()/MIN 조회에 응답하고 재계산 문의 스캔 구간을 기록"""
+
+    def __init__(self, watermark: Optional[datetime], earliest: Optional[datetime] = None):
+        self.watermark = watermark
+        self.earliest = earliest
+        self.scans: List[tuple] = []
+        self.transactions = 0
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        if sql.startswith("SELECT last_ts FROM rollup_watermarks"):
+            return FakeResult(self.watermark)
+        if sql == "SELECT now()":
+            return FakeResult(NOW)
+        if sql.startswith("SELECT MIN("):
+            return FakeResult(self.earliest)
+        if sql.startswith("UPDATE rollup_watermarks"):
+            self.watermark = max(self.watermark or params["high"], params["high"])
+            return FakeResult()
+        if params and "scan_from" in params:
+            self.scans.append((params["scan_from"], params["scan_to"]))
+        return FakeResult(rowcount=1)
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    @contextmanager
+    def begin(self):
+        self.transactions += 1
+        yield self
+
+
+def make_worker(db: FakeDatabase, **kwargs) -> RollupWorker:
+    worker = RollupWorker("sqlite://", **kwargs)
+    worker.engine = db
+    return worker
+
+
+def test_scan_starts_before_watermark_to_catch_late_commits():
+    db = FakeDatabase(watermark=NOW - timedelta(minutes=5))
+    report = make_worker(db, rescan_seconds=3600).process_source(SOURCES["decision_logs"])
+
+    assert report.batches == 1
+    assert set(db.scans) == {(NOW - timedelta(minutes=65), NOW)}
+    assert db.watermark == NOW
+
+
+def test_watermark_never_moves_backwards():
+    db = FakeDatabase(watermark=NOW - timedelta(minutes=5))
+    make_worker(db, rescan_seconds=3600).process_source(SOURCES["decision_logs"])
+    db.watermark = NOW + timedelta(minutes=1)  # 다른 워커가 먼저 앞선 구간까지 처리
+    make_worker(db, rescan_seconds=3600).process_source(SOURCES["decision_logs"])
+    assert db.watermark == NOW + timedelta(minutes=1)
+
+
+def test_first_run_catches_up_in_batches_from_earliest_change():
+    db = FakeDatabase(watermark=None, earliest=NOW - timedelta(hours=60))
+    report = make_worker(db, batch_hours=24).process_source(SOURCES["prompt_sessions"])
+
+    windows = sorted(set(db.scans))
+    assert windows == [
+        (NOW - timedelta(hours=60), NOW - timedelta(hours=36)),
+        (NOW - timedelta(hours=36), NOW - timedelta(hours=12)),
+        (NOW - timedelta(hours=12), NOW),
+    ]
+    assert report.batches == db.transactions == 3
+    assert db.watermark == NOW
+
+
+def test_empty_source_does_nothing():
+    db = FakeDatabase(watermark=None, earliest=None)
+    report = make_worker(db).process_source(SOURCES["shadow_events"])
+    assert report.batches == 0 and db.transactions == 0
+
+
+def test_sessions_are_tracked_by_updated_at_and_logs_by_ts():
+    worker = RollupWorker("sqlite://")
+    sessions = " ".join(" ".join(worker.statements(SOURCES["prompt_sessions"], "updated_at")).split())
+    assert "s.updated_at >= :scan_from AND s.updated_at < :scan_to" in sessions
+    assert "dashboard_rollup_daily_users" in sessions
+    logs = " ".join(" ".join(worker.statements(SOURCES["decision_logs"], "ts")).split())
+    assert "dashboard_rollup_daily_users" not in logs
+    # 더하지 않고 다시 계산한 값으로 덮어씀
+    assert "decision_count = EXCLUDED.decision_count" in logs
+    assert "decision_count + EXCLUDED" not in logs
+
+
+def test_daily_buckets_are_built_from_hourly_rollups():
+    worker = RollupWorker("sqlite://")
+    for source in ROLLUP_SOURCES:
+        for statement in worker.statements(source, source.change_column):
+            sql = " ".join(statement.split())
+            writes_daily = ("INSERT INTO dashboard_rollup_daily " in sql
+                            or "INSERT INTO dashboard_rollup_daily_users " in sql)
+            if writes_daily:
+                # 일 버킷은 소스 행을 다시 읽지 않고 시간 버킷(사용자는 시간별 집합)만 합침
+                assert f"FROM {source.name} s JOIN" not in sql
+                assert "FROM dashboard_rollup_hourly" in sql
+
+
+# ----------------------------------------------------------------------
+# 실제 PostgreSQL (TEST_DATABASE_URL 이 있을 때만)
+# ----------------------------------------------------------------------
+BASE_TABLES = """
+    DROP SCHEMA IF EXISTS public CASCADE;
+    CREATE SCHEMA public;
+    CREATE TABLE tenants (id BIGSERIAL PRIMARY KEY, name TEXT);
+    CREATE TABLE users (id BIGSERIAL PRIMARY KEY, tenant_id BIGINT REFERENCES tenants(id), department TEXT);
+    CREATE TABLE decision_logs (id BIGSERIAL, tenant_id BIGINT NOT NULL, user_id BIGINT,
+                                ts TIMESTAMPTZ NOT NULL DEFAULT now(), decision TEXT NOT NULL);
+    CREATE TABLE shadow_events (id BIGSERIAL, tenant_id BIGINT NOT NULL, user_id BIGINT,
+                                ts TIMESTAMPTZ NOT NULL DEFAULT now(), decision TEXT NOT NULL);
+    -- id 워터마크를 쓰던 이전 롤업 스키마
+    CREATE TABLE rollup_watermarks (source TEXT PRIMARY KEY, last_id BIGINT NOT NULL DEFAULT 0,
+                                    updated_at TIMESTAMPTZ DEFAULT now());
+    INSERT INTO tenants (name) VALUES ('t1');
+    INSERT INTO users (tenant_id, department) VALUES (1, 'sales'), (1, 'dev');
+"""
+
+
+@pytest.fixture
+def pg_worker():
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL 미설정")
+    from sqlalchemy import text
+
+    worker = RollupWorker(url, rescan_seconds=3600)
+    raw = worker.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(BASE_TABLES)
+        for migration in MIGRATIONS:
+            with open(migration) as f:
+                cursor.execute(f.read())
+        raw.commit()
+    finally:
+        raw.close()
+    yield worker, text
+    worker.engine.dispose()
+
+
+def daily_totals(worker, text):
+    with worker.engine.connect() as conn:
+        return {tuple(row[:2]): tuple(row[2:]) for row in conn.execute(text(
+            "SELECT department, model_name, SUM(prompt_sessions), SUM(prompt_requests), "
+            "SUM(prompt_tokens), SUM(decision_count) FROM dashboard_rollup_daily GROUP BY 1, 2"
+        ))}
+
+
+def test_updated_session_is_recomputed_not_undercounted(pg_worker):
+    worker, text = pg_worker
+    with worker.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO prompt_sessions (tenant_id, user_id, model_name, total_prompts, total_tokens, created_at) "
+            "VALUES (1, 1, 'gpt', 1, 10, now() - interval '10 minutes'), (1, 2, 'gpt', 2, 20, now())"
+        ))
+        conn.execute(text("INSERT INTO decision_logs (tenant_id, user_id, decision) VALUES (1, 1, 'deny')"))
+
+    worker.run_once()
+    assert daily_totals(worker, text) == {
+        ("sales", "gpt"): (1, 1, 10, 0),
+        ("dev", "gpt"): (1, 2, 20, 0),
+        ("sales", ""): (0, 0, 0, 1),
+    }
+
+    # 진행 중 세션의 누적값 갱신 (id 는 그대로, updated_at 만 바뀜)
+    with worker.engine.begin() as conn:
+        conn.execute(text("UPDATE prompt_sessions SET total_prompts = 5, total_tokens = 70 WHERE user_id = 1"))
+
+    # 두 번 실행해도 같은 결과 (덮어쓰기라 재스캔 구간이 겹쳐도 중복 집계 없음)
+    worker.run_once()
+    worker.run_once()
+    assert daily_totals(worker, text) == {
+        ("sales", "gpt"): (1, 5, 70, 0),
+        ("dev", "gpt"): (1, 2, 20, 0),
+        ("sales", ""): (0, 0, 0, 1),
+    }
+    with worker.engine.connect() as conn:
+        assert conn.execute(text("SELECT SUM(prompt_tokens) FROM dashboard_rollup_hourly")).scalar() == 90
+        assert conn.execute(text("SELECT COUNT(*) FROM dashboard_rollup_daily_users")).scalar() == 2
+        assert conn.execute(text("SELECT COUNT(*) FROM dashboard_rollup_hourly_users")).scalar() == 2
+
+
+def test_daily_users_are_distinct_across_hours(pg_worker):
+    worker, text = pg_worker
+    with worker.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO prompt_sessions (tenant_id, user_id, model_name, created_at) VALUES "
+            "(1, 1, 'gpt', date_trunc('day', now()) + interval '1 hour'), "
+            "(1, 1, 'gpt', date_trunc('day', now()) + interval '2 hours'), "
+            "(1, 2, 'gpt', date_trunc('day', now()) + interval '2 hours')"
+        ))
+    worker.run_once()
+    with worker.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM dashboard_rollup_hourly_users")).scalar() == 3
+        assert conn.execute(text("SELECT COUNT(*) FROM dashboard_rollup_daily_users")).scalar() == 2
+        assert conn.execute(text("SELECT SUM(prompt_sessions) FROM dashboard_rollup_daily")).scalar() == 3
+
+
+def test_late_commit_inside_rescan_window_is_counted(pg_worker):
+    worker, text = pg_worker
+    with worker.engine.begin() as conn:
+        conn.execute(text("INSERT INTO decision_logs (tenant_id, user_id, decision) VALUES (1, 1, 'deny')"))
+    worker.run_once()
+    with worker.engine.connect() as conn:
+        watermark = conn.execute(text(
+            "SELECT last_ts FROM rollup_watermarks WHERE source = 'decision_logs'"
+        )).scalar()
+    # 워터마크보다 앞선 ts 로 늦게 커밋된 행
+    with worker.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO decision_logs (tenant_id, user_id, decision, ts) VALUES (1, 2, 'allow', :ts)"
+        ), {"ts": watermark - timedelta(minutes=30)})
+
+    worker.run_once()
+    assert daily_totals(worker, text)[("dev", "")] == (0, 0, 0, 1)
+
+
+def test_recompute_range_repairs_closed_buckets(pg_worker):
+    worker, text = pg_worker
+    with worker.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO decision_logs (tenant_id, user_id, decision, ts) "
+            "VALUES (1, 1, 'deny', now() - interval '3 days')"
+        ))
+    worker.run_once()
+    # 재스캔 구간보다 오래된 행 삭제 (보존 기간 만료 등) → 증분 실행으로는 반영되지 않음
+    with worker.engine.begin() as conn:
+        conn.execute(text("DELETE FROM decision_logs"))
+    worker.run_once()
+    assert daily_totals(worker, text) == {("sales", ""): (0, 0, 0, 1)}
+
+    today = date.today()
+    reports = worker.recompute_range(today - timedelta(days=7), today + timedelta(days=1))
+    assert not any(report.errors for report in reports)
+    assert daily_totals(worker, text) == {}
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.startup import StartupOrchestrator, StepState
+
+
+def test_optional_step_still_loading_keeps_pod_unready():
+    async def scenario():
+        orchestrator = StartupOrchestrator()
+        release = asyncio.Event()
+        observed = []
+
+        async def ready():
+            return "ok"
+
+        async def slow_model():
+            await release.wait()
+
+        orchestrator.add_step("policy_engine", ready)
+        orchestrator.add_step("embedding_filter", slow_model, required=False)
+        task = asyncio.create_task(orchestrator.run())
+        await asyncio.sleep(0.01)
+        observed.append((orchestrator.status["embedding_filter"].state, orchestrator.is_ready()))
+        release.set()
+        await task
+        observed.append((orchestrator.status["embedding_filter"].state, orchestrator.is_ready()))
+        return observed
+
+    assert asyncio.run(scenario()) == [(StepState.STARTING, False), (StepState.READY, True)]
+
+
+def test_failed_or_skipped_optional_step_does_not_block_readiness():
+    async def scenario():
+        orchestrator = StartupOrchestrator()
+
+        async def ready():
+            return "ok"
+
+        async def broken():
+            raise RuntimeError("model missing")
+
+        orchestrator.add_step("policy_engine", ready)
+        orchestrator.add_step("ml_classifier", broken, required=False)
+        orchestrator.add_step("ml_warmup", ready, depends_on=["ml_classifier"], required=False)
+        await orchestrator.run()
+        return orchestrator
+
+    orchestrator = asyncio.run(scenario())
+    assert orchestrator.status["ml_classifier"].state == StepState.FAILED
+    assert orchestrator.status["ml_warmup"].state == StepState.SKIPPED
+    assert orchestrator.is_ready()
+
+
+def test_failed_required_step_blocks_readiness():
+    async def scenario():
+        orchestrator = StartupOrchestrator(default_timeout=0.01)
+
+        async def hang():
+            await asyncio.sleep(1.0)
+
+        orchestrator.add_step("policy_engine", hang)
+        await orchestrator.run()
+        return orchestrator
+
+    orchestrator = asyncio.run(scenario())
+    assert orchestrator.status["policy_engine"].state == StepState.FAILED
+    assert not orchestrator.is_ready() and not orchestrator.get_status()["ready"]
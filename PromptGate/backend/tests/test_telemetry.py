@@ -0,0 +1,80 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.telemetry import PipelineTelemetry
+
+
+class FlushingProvider:
+    def __init__(self):
+        self.flushed = 0
+
+    def force_flush(self, timeout_millis=30000):
+        self.flushed += 1
+        return True
+
+
+class FakeTrace:
+    def __init__(self, provider):
+        self.provider = provider
+
+    def get_tracer_provider(self):
+        return self.provider
+
+
+def test_stop_cancels_lag_task_and_flushes_spans():
+    provider = FlushingProvider()
+    telemetry = PipelineTelemetry(lag_interval=0.01)
+    telemetry.tracer = object()
+    telemetry._trace = FakeTrace(provider)
+
+    async def scenario():
+        telemetry.start()
+        await asyncio.sleep(0.03)
+        await telemetry.stop()
+
+    asyncio.run(scenario())
+    assert telemetry._lag_task is None
+    assert provider.flushed == 1
+
+
+def test_stop_without_sdk_provider_is_noop():
+    telemetry = PipelineTelemetry()
+    telemetry.tracer = object()
+    telemetry._trace = FakeTrace(object())  # ProxyTracerProvider 처럼 force_flush 없음
+    asyncio.run(telemetry.stop())
+
+
+def test_app_shutdown_stops_telemetry(monkeypatch):
+    pytest.importorskip("toml")
+    import main
+
+    stopped = []
+    closed = []
+
+    class FakeTelemetry:
+        async def stop(self):
+            stopped.append(list(closed))
+
+    def fake_close(name, fail=False):
+        async def close():
+            closed.append(name)
+            if fail:
+                raise RuntimeError("close failed")
+        return close
+
+    for name in ("close_hybrid_security_engine", "close_policy_engine", "close_secret_scanner",
+                 "close_pii_detector", "close_rebuff_client", "close_ml_classifier"):
+        monkeypatch.setattr(main, name, fake_close(name))
+    monkeypatch.setattr(main, "close_embedding_filter", fake_close("close_embedding_filter", fail=True))
+    monkeypatch.setattr(main, "get_telemetry", lambda: FakeTelemetry())
+
+    assert main.shutdown_event in main.app.router.on_shutdown
+    asyncio.run(main.shutdown_event())
+
+    # 엔진 정리가 하나 실패해도 텔레메트리는 마지막에 중지
+    assert len(stopped) == 1 and len(stopped[0]) == 7
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.embedding_filter import EmbeddingFilter
+from app.local_vector_index import LocalSearchHit
+from app.tenant_vector_policy import (
+    TenantConcurrencyLimiter,
+    TenantSearchPool,
+    build_tenant_vector_policy,
+)
+
+
+def test_rule_action_maps_to_filter_action():
+    assert build_tenant_vector_policy("t1", None).filter_action == "block"
+    assert build_tenant_vector_policy("t1", {"action": "log_only"}).filter_action == "warn"
+    assert build_tenant_vector_policy("t1", {"action": "require_approval"}).filter_action == "block"
+
+
+def test_limiter_keeps_only_recent_idle_tenants():
+    async def scenario():
+        limiter = TenantConcurrencyLimiter(limit=2, max_tenants=3)
+        for tenant in ["a", "b", "c"]:
+            async with limiter.acquire(tenant):
+                pass
+        async with limiter.acquire("a"):  # a 를 최근 사용으로
+            pass
+        async with limiter.acquire("d"):
+            pass
+        return list(limiter._slots)
+
+    assert asyncio.run(scenario()) == ["c", "a", "d"]
+
+
+def test_limiter_never_evicts_tenant_in_use():
+    async def scenario():
+        limiter = TenantConcurrencyLimiter(limit=1, max_tenants=1)
+        release = asyncio.Event()
+        holding = asyncio.Event()
+
+        async def hold():
+            async with limiter.acquire("busy"):
+                holding.set()
+                await release.wait()
+
+        task = asyncio.create_task(hold())
+        await holding.wait()
+        async with limiter.acquire("other"):
+            busy_slot_kept = "busy" in limiter._slots
+        release.set()
+        await task
+        return busy_slot_kept
+
+    assert asyncio.run(scenario())
+
+
+def test_noisy_tenant_cannot_take_every_search_thread():
+    pool = TenantSearchPool(workers=4, per_tenant=16)
+    assert pool.per_tenant == 3
+
+    async def scenario():
+        gate = threading.Event()
+        noisy = [asyncio.create_task(pool.run("noisy", gate.wait)) for _ in range(10)]
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        await pool.run("quiet", lambda: None)
+        quiet_latency = time.perf_counter() - started
+        gate.set()
+        await asyncio.gather(*noisy)
+        return quiet_latency
+
+    try:
+        assert asyncio.run(scenario()) < 0.5
+    finally:
+        pool.shutdown()
+
+
+class FakeMirror:
+    def __init__(self, owners):
+        self.hits = [LocalSearchHit(i, 0.9 - i * 0.01, {"tenant_id": owner} if owner is not None else {})
+                     for i, owner in enumerate(owners)]
+
+    def search(self, query, limit, score_threshold=None):
+        return self.hits[:limit]
+
+
+def local_search(policy, owners):
+    engine = EmbeddingFilter.__new__(EmbeddingFilter)
+    hits = engine._search_local(FakeMirror(owners), None, 10, 0.5, policy)
+    return [hit.payload.get("tenant_id") for hit in hits]
+
+
+def test_request_without_tenant_sees_only_shared_points():
+    owners = ["tenant-a", None, "tenant-b", ""]
+    assert local_search(build_tenant_vector_policy(None, None), owners) == [None, ""]
+    assert local_search(build_tenant_vector_policy("tenant-a", None), owners) == ["tenant-a", None, ""]
+    # 전용 컬렉션은 테넌트 전용이므로 거르지 않음
+    dedicated = build_tenant_vector_policy("tenant-a", {"context": {"collection": "tenant-a-prompts"}})
+    assert local_search(dedicated, owners) == owners
+
+
+def test_qdrant_filter_without_tenant_matches_only_shared_points():
+    pytest.importorskip("qdrant_client")
+    from qdrant_client.models import IsEmptyCondition
+
+    shared_only = build_tenant_vector_policy(None, None).query_filter()
+    assert shared_only is not None and shared_only.should is None
+    [condition] = shared_only.must
+    assert isinstance(condition, IsEmptyCondition) and condition.is_empty.key == "tenant_id"
+
+    tenant = build_tenant_vector_policy("tenant-a", None).query_filter()
+    assert len(tenant.should) == 2 and tenant.must is None
+    assert build_tenant_vector_policy("tenant-a", {"context": {"collection": "own"}}).query_filter() is None
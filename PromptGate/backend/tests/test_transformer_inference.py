@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.transformer_inference import TransformerClassifierRuntime
+
+
+class FakeTokenizer:
+    loaded = []
+
+    @classmethod
+    def from_pretrained(cls, checkpoint):
+        tokenizer = cls()
+        cls.loaded.append((threading.get_ident(), tokenizer))
+        return tokenizer
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def __call__(self, texts, add_special_tokens=False, truncation=False):
+        return {"input_ids": [list(range(len(text))) for text in texts]}
+
+    def build_inputs_with_special_tokens(self, tokens):
+        return [-1] + tokens + [-2]
+
+
+def make_runtime(max_length=8, truncation="head_tail"):
+    runtime = TransformerClassifierRuntime.__new__(TransformerClassifierRuntime)
+    runtime.checkpoint = "fake"
+    runtime.max_length = max_length
+    runtime.truncation = truncation
+    runtime._auto_tokenizer = FakeTokenizer
+    runtime._thread_local = threading.local()
+    return runtime
+
+
+def test_each_worker_thread_gets_its_own_tokenizer():
+    FakeTokenizer.loaded.clear()
+    runtime = make_runtime()
+    barrier = threading.Barrier(2)
+
+    def borrow(_):
+        barrier.wait()
+        first = runtime._worker_tokenizer()
+        assert runtime._worker_tokenizer() is first  # 같은 스레드에서는 재사용
+        return first
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        tokenizers = list(executor.map(borrow, range(2)))
+
+    assert tokenizers[0] is not tokenizers[1]
+    assert len({ident for ident, _ in FakeTokenizer.loaded}) == 2
+
+
+def test_head_tail_truncation_keeps_both_ends():
+    runtime = make_runtime(max_length=8)
+    [ids] = runtime._token_ids(runtime._worker_tokenizer(), ["x" * 10])
+    assert ids == [-1, 0, 1, 2, 7, 8, 9, -2]
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+MLClassifier 전통 ML 모델 (TF-IDF + RandomForest / NaiveBayes) 학습 스크립트
+  python train_traditional_model.py train [--sources prompt_logs,eval_results] [--file labeled.jsonl] [--since-days 180]
+  python train_traditional_model.py list
+  python train_traditional_model.py promote 20260301120000
+  python train_traditional_model.py score labeled.jsonl [--version 20260301120000]
+
+학습 결과는 ML_TRADITIONAL_MODEL_DIR/{version}/ 에 저장되고 기본적으로 LATEST 로 지정된다.
+서빙 프로세스는 재시작 시 LATEST 버전을 mmap 읽기 전용으로 로드한다.
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.traditional_model import (
+    TraditionalModelRuntime, load_prompt_log_examples, load_eval_result_examples, load_file_examples,
+    train_and_save, list_versions, promote_version,
+)
+
+def collect_examples(args) -> list:
+    """지정한 소스에서 라벨 샘플 수집"""
+    examples = []
+    sources = [source.strip() for source in args.sources.split(",") if source.strip()]
+    if sources:
+        from sqlalchemy import create_engine
+        from app.schema import SQLALCHEMY_DATABASE_URL
+
+        engine = create_engine(args.database_url or os.getenv("ML_TRAINING_DATABASE_URL", SQLALCHEMY_DATABASE_URL))
+        for source in sources:
+            try:
+                if source == "prompt_logs":
+                    loaded = load_prompt_log_examples(engine, since_days=args.since_days, limit=args.limit)
+                elif source == "eval_results":
+                    loaded = load_eval_result_examples(engine, limit=args.limit)
+                else:
+                    print(f"⚠️ 알 수 없는 소스: {source}")
+                    continue
+            except Exception as e:
+                print(f"⚠️ {source} 로드 실패: {e}")
+                continue
+            print(f"  - {source}: {len(loaded):,}건 (위험 {sum(e.label for e in loaded):,}건)")
+            examples.extend(loaded)
+
+    for path in args.file or []:
+        loaded = load_file_examples(path, text_field=args.text_field, label_field=args.label_field)
+        print(f"  - {path}: {len(loaded):,}건 (위험 {sum(e.label for e in loaded):,}건)")
+        examples.extend(loaded)
+    return examples
+
+def run_train(args):
+    print("📥 학습 데이터 수집...")
+    examples = collect_examples(args)
+    if len(examples) < args.min_samples:
+        print(f"❌ 학습 샘플이 부족합니다: {len(examples)}건 (최소 {args.min_samples}건)")
+        sys.exit(1)
+
+    print(f"🚀 학습 시작 ({len(examples):,}건)...")
+    report = train_and_save(examples, args.model_dir, test_size=args.test_size, promote=not args.no_promote)
+    print(f"✅ 학습 완료: {report.version} ({report.samples:,}건, 위험 {report.positives:,}건, {report.elapsed_seconds:.1f}초)")
+    for name, metrics in report.metrics.items():
+        print(f"  📊 {name:<14} precision {metrics['precision']} | recall {metrics['recall']} | "
+              f"f1 {metrics['f1']} | roc_auc {metrics['roc_auc']}")
+    print(f"📁 {report.path}" + ("" if args.no_promote else " (LATEST)"))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+
+def run_list(args):
+    versions = list_versions(args.model_dir)
+    if not versions:
+        print(f"ℹ️ 저장된 버전이 없습니다: {args.model_dir}")
+        return
+    for version in versions:
+        f1 = {name: metrics.get("f1") for name, metrics in (version.get("metrics") or {}).items()}
+        print(f"{'⭐' if version['latest'] else '  '} {version['version']} | {version.get('samples', 0):,}건 | f1 {f1}")
+
+def run_promote(args):
+    promote_version(args.model_dir, args.version)
+    print(f"✅ LATEST → {args.version} (서빙 프로세스 재시작 시 반영)")
+
+def run_score(args):
+    """라벨 파일 배치 추론 (희소 행렬 일괄 변환)"""
+    runtime = TraditionalModelRuntime.load(args.model_dir, args.version)
+    examples = load_file_examples(args.file, text_field=args.text_field, label_field=args.label_field)
+    if not examples:
+        print("❌ 라벨이 있는 레코드가 없습니다.")
+        sys.exit(1)
+
+    texts = [example.text for example in examples]
+    labels = np.array([example.label for example in examples])
+    started = time.perf_counter()
+    scores = runtime.predict(texts, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - started
+
+    print(f"📊 {runtime.version} | {len(texts):,}건 | {elapsed * 1000:.1f}ms ({len(texts) / elapsed:,.0f}/s)")
+    for name, values in scores.items():
+        predicted = values >= args.threshold
+        tp = int(np.sum(predicted & (labels == 1)))
+        precision = tp / max(int(predicted.sum()), 1)
+        recall = tp / max(int(labels.sum()), 1)
+        print(f"  {name:<14} precision {precision:.4f} | recall {recall:.4f}")
+
+def main():
+    """전통 ML 모델 학습 메인 함수"""
+    parser = argparse.ArgumentParser(description="MLClassifier TF-IDF + RandomForest/NaiveBayes 학습 및 버전 관리")
+    parser.add_argument("--model-dir", default=os.getenv("ML_TRADITIONAL_MODEL_DIR", "./models/traditional"))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="라벨 데이터로 학습 후 새 버전 저장")
+    train_parser.add_argument("--sources", default="prompt_logs,eval_results",
+                              help="DB 소스 (콤마 구분, 빈 값이면 파일만 사용)")
+    train_parser.add_argument("--file", action="append", help="추가 라벨 파일 (JSONL/CSV, 여러 번 지정 가능)")
+    train_parser.add_argument("--since-days", type=int, help="prompt_logs 최근 N일만 사용")
+    train_parser.add_argument("--limit", type=int, help="소스별 최대 샘플 수")
+    train_parser.add_argument("--min-samples", type=int, default=50)
+    train_parser.add_argument("--test-size", type=float, default=0.2, help="holdout 평가 비율 (0 이면 생략)")
+    train_parser.add_argument("--no-promote", action="store_true", help="LATEST 로 지정하지 않음")
+    train_parser.add_argument("--database-url", help="기본: ML_TRAINING_DATABASE_URL 또는 정책 DB")
+    train_parser.add_argument("--report", help="JSON 리포트 저장 경로")
+
+    subparsers.add_parser("list", help="저장된 버전 목록")
+    promote_parser = subparsers.add_parser("promote", help="서빙 버전(LATEST) 변경")
+    promote_parser.add_argument("version")
+
+    score_parser = subparsers.add_parser("score", help="라벨 파일로 배치 추론 / 정밀도·재현율 확인")
+    score_parser.add_argument("file")
+    score_parser.add_argument("--version", help="기본: LATEST")
+    score_parser.add_argument("--batch-size", type=int, default=1024)
+    score_parser.add_argument("--threshold", type=float, default=0.5)
+
+    for sub in (train_parser, score_parser):
+        sub.add_argument("--text-field", help="프롬프트 필드 이름 (기본: prompt/text/content)")
+        sub.add_argument("--label-field", default="label", help="라벨 필드 이름 (1/0, malicious/benign 등)")
+    args = parser.parse_args()
+
+    try:
+        {"train": run_train, "list": run_list, "promote": run_promote, "score": run_score}[args.command](args)
+    except ImportError as e:
+        print(f"❌ 필요한 라이브러리가 설치되지 않음: {e}")
+        sys.exit(1)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
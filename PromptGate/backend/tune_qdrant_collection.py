@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Qdrant 차단 프롬프트 컬렉션 튜닝 프로파일 적용 / 벤치마크 스크립트
+  python tune_qdrant_collection.py show
+  python tune_qdrant_collection.py apply [--dry-run] [--no-benchmark]
+  python tune_qdrant_collection.py benchmark [--queries 200] [--k 10] [--tenant kra-internal]
+
+apply 는 적용 전/후 검색 지연(p50/p99)과 정확 검색(exact) 대비 recall@k 를 비교해 출력
+프로파일 값은 QDRANT_HNSW_M 등 환경변수로 조정 (app/qdrant_profile.py 참고)
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.qdrant_profile import (
+    get_collection_profile, describe_collection, plan_profile_changes, apply_profile,
+    build_search_params, build_tenant_filter,
+)
+
+def sample_queries(client, collection: str, count: int, noise: float, seed: int = 0) -> np.ndarray:
+    """컬렉션 벡터 일부에 노이즈를 더한 질의 벡터"""
+    vectors = []
+    offset = None
+    while len(vectors) < count * 5:
+        points, offset = client.scroll(collection_name=collection, limit=256, offset=offset,
+                                       with_payload=False, with_vectors=True)
+        vectors.extend(point.vector for point in points)
+        if offset is None:
+            break
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    base = np.asarray(vectors, dtype=np.float32)
+    picks = rng.choice(len(base), size=min(count, len(base)), replace=False)
+    return base[picks] + rng.normal(0, noise, size=(len(picks), base.shape[1])).astype(np.float32)
+
+def run_benchmark(client, collection: str, queries: np.ndarray, k: int, tenant: str = None) -> dict:
+    """프로파일 검색 파라미터의 지연과 exact 검색 대비 recall@k"""
+    approx_params = build_search_params()
+    exact_params = build_search_params(exact=True)
+    query_filter = build_tenant_filter(tenant) if tenant else None  # 테넌트 미지정이면 컬렉션 전체
+
+    latencies, matched, total = [], 0, 0
+    for query in queries:
+        vector = query.tolist()
+        started = time.perf_counter()
+        approx = client.search(collection_name=collection, query_vector=vector, query_filter=query_filter,
+                               search_params=approx_params, limit=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        exact = client.search(collection_name=collection, query_vector=vector, query_filter=query_filter,
+                              search_params=exact_params, limit=k)
+        truth = {point.id for point in exact}
+        matched += len(truth & {point.id for point in approx})
+        total += len(truth)
+
+    return {
+        "queries": len(queries),
+        "k": k,
+        "tenant": tenant,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2) if latencies else None,
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2) if latencies else None,
+        "recall_at_k": round(matched / total, 4) if total else None,
+    }
+
+def print_benchmark(label: str, result: dict):
+    print(f"  {label:<6} p50 {result['p50_ms']}ms | p99 {result['p99_ms']}ms | "
+          f"recall@{result['k']} {result['recall_at_k']} ({result['queries']} queries)")
+
+def wait_until_green(client, collection: str, timeout: float):
+    """세그먼트 재구성(최적화) 완료 대기"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = describe_collection(client, collection)["status"]
+        if status == "green":
+            return True
+        print(f"  ⏳ 컬렉션 최적화 중 (status={status})...")
+        time.sleep(5)
+    return False
+
+def main():
+    """Qdrant 컬렉션 튜닝 메인 함수"""
+    parser = argparse.ArgumentParser(description="Qdrant 컬렉션 튜닝 프로파일 적용 및 벤치마크")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("show", help="현재 설정과 프로파일 차이 출력")
+
+    apply_parser = subparsers.add_parser("apply", help="기존 컬렉션에 프로파일 적용 (데이터 유지)")
+    apply_parser.add_argument("--dry-run", action="store_true", help="변경 사항만 출력")
+    apply_parser.add_argument("--no-benchmark", action="store_true", help="적용 전/후 벤치마크 생략")
+    apply_parser.add_argument("--wait-timeout", type=float, default=600, help="최적화 완료 대기 시간(초)")
+
+    bench_parser = subparsers.add_parser("benchmark", help="현재 설정 검색 지연/recall 측정")
+
+    for sub in (apply_parser, bench_parser):
+        sub.add_argument("--queries", type=int, default=200, help="질의 수")
+        sub.add_argument("--k", type=int, default=10)
+        sub.add_argument("--noise", type=float, default=0.05, help="질의 벡터 노이즈 표준편차")
+        sub.add_argument("--tenant", help="테넌트 필터 검색으로 측정")
+        sub.add_argument("--report", help="JSON 리포트 저장 경로")
+
+    parser.add_argument("--collection", default="blocked-prompts")
+    parser.add_argument("--qdrant-host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--qdrant-port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    args = parser.parse_args()
+
+    try:
+        from app.model_registry import get_qdrant_client
+
+        client = get_qdrant_client(args.qdrant_host, args.qdrant_port)
+        profile = get_collection_profile()
+        current = describe_collection(client, args.collection)
+    except ImportError as e:
+        print(f"❌ 필요한 라이브러리가 설치되지 않음: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ 컬렉션 조회 실패: {e}")
+        sys.exit(1)
+
+    changes = plan_profile_changes(current, profile)
+    if args.command == "show":
+        print(f"📋 현재 설정: {json.dumps(current, ensure_ascii=False)}")
+        print(f"🎯 프로파일: {json.dumps(profile.to_dict(), ensure_ascii=False)}")
+        print("✅ 변경 없음" if not changes else "🔧 변경 예정:\n  - " + "\n  - ".join(changes))
+        return
+
+    report = {"collection": args.collection, "profile": profile.to_dict(), "before_config": current}
+    queries = sample_queries(client, args.collection, args.queries, args.noise)
+    if not len(queries):
+        print("⚠️ 컬렉션이 비어 있어 벤치마크를 생략합니다.")
+
+    if args.command == "benchmark":
+        if len(queries):
+            report["result"] = run_benchmark(client, args.collection, queries, args.k, args.tenant)
+            print(f"📊 {args.collection} ({current['points']}건)")
+            print_benchmark("current", report["result"])
+    else:
+        if not changes:
+            print("✅ 이미 프로파일이 적용되어 있습니다.")
+            return
+        print("🔧 변경 예정:\n  - " + "\n  - ".join(changes))
+        if args.dry_run:
+            return
+
+        benchmark = len(queries) and not args.no_benchmark
+        if benchmark:
+            report["before"] = run_benchmark(client, args.collection, queries, args.k, args.tenant)
+        apply_profile(client, args.collection, profile)
+        print("✅ 프로파일 적용 요청 완료")
+        if not wait_until_green(client, args.collection, args.wait_timeout):
+            print("⚠️ 최적화가 아직 진행 중입니다. 완료 후 benchmark 로 다시 측정하세요.")
+        report["after_config"] = describe_collection(client, args.collection)
+        if benchmark:
+            report["after"] = run_benchmark(client, args.collection, queries, args.k, args.tenant)
+            print(f"📊 {args.collection} ({current['points']}건)")
+            print_benchmark("before", report["before"])
+            print_benchmark("after", report["after"])
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 리포트 저장: {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from datetime import datetime
 
 from app.pii_detector import PresidioPIIDetector
 from app.models import PIIRequest, PIIResponse, AnonymizeRequest, AnonymizeResponse
+from app.profiler import ProfilerMiddleware, router as profiler_router
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +25,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# 관리자 전용 프로파일러 (PROFILER_ADMIN_TOKEN 설정 시 /admin/profile, 요청 단위/느린 요청 캡처)
+app.add_middleware(ProfilerMiddleware)
+app.include_router(profiler_router)
+
 # 전역 PII 탐지기 인스턴스
 pii_detector: Optional[PresidioPIIDetector] = None
 